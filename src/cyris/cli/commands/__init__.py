@@ -1,17 +1,12 @@
 """
 CLI Command Handlers - 命令处理器模块
 每个CLI命令的业务逻辑处理器，遵循SRP原则
+
+Handlers are imported on first access so that ``cyris list`` does not load
+the create/destroy/ssh machinery it never uses.
 """
 
-from .base_command import BaseCommandHandler
-from .create_command import CreateCommandHandler  
-from .list_command import ListCommandHandler
-from .status_command import StatusCommandHandler
-from .destroy_command import DestroyCommandHandler
-from .config_commands import ConfigCommandHandler
-from .ssh_command import SSHInfoCommandHandler
-from .permissions_command import PermissionsCommandHandler
-from .legacy_command import LegacyCommandHandler
+from ...core.lazy_import import lazy_exports
 
 __all__ = [
     'BaseCommandHandler',
@@ -19,8 +14,26 @@ __all__ = [
     'ListCommandHandler', 
     'StatusCommandHandler',
     'DestroyCommandHandler',
+    'ResetCommandHandler',
+    'PoolCommandHandler',
     'ConfigCommandHandler',
     'SSHInfoCommandHandler',
     'PermissionsCommandHandler',
-    'LegacyCommandHandler'
-]
\ No newline at end of file
+    'LegacyCommandHandler',
+    'DebugCommandHandler'
+]
+
+__getattr__, __dir__ = lazy_exports(globals(), {
+    'BaseCommandHandler': '.base_command',
+    'CreateCommandHandler': '.create_command',
+    'ListCommandHandler': '.list_command',
+    'StatusCommandHandler': '.status_command',
+    'DestroyCommandHandler': '.destroy_command',
+    'ResetCommandHandler': '.reset_command',
+    'PoolCommandHandler': '.pool_command',
+    'ConfigCommandHandler': '.config_commands',
+    'SSHInfoCommandHandler': '.ssh_command',
+    'PermissionsCommandHandler': '.permissions_command',
+    'LegacyCommandHandler': '.legacy_command',
+    'DebugCommandHandler': '.debug_command',
+})
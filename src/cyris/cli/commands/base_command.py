@@ -66,50 +66,35 @@ class BaseCommandHandler(ABC):
         self.logger.debug(f"File exists: {file_path}")
         return True
     
-    def create_orchestrator(self, network_mode: str = 'bridge', enable_ssh: bool = True):
-        """Create orchestrator with singleton pattern - Reusable logic"""
-        self.logger.debug(f"create_orchestrator() START with network_mode={network_mode}, enable_ssh={enable_ssh}")
+    def create_orchestrator(self, network_mode: str = 'bridge', enable_ssh: bool = True,
+                            metadata_only: bool = False):
+        """Create orchestrator with singleton pattern - Reusable logic
+        
+        With ``metadata_only=True`` the KVM provider (and libvirt) is not
+        imported up front; the orchestrator builds it on first access. Use this
+        for read-only commands (list, status, ssh-info) - the returned provider
+        is then ``None``.
+        """
+        self.logger.debug(f"create_orchestrator() START with network_mode={network_mode}, enable_ssh={enable_ssh}, metadata_only={metadata_only}")
             
         try:
             self.logger.debug("About to import RangeOrchestrator")
-            from cyris.services.orchestrator import RangeOrchestrator
+            from cyris.services.orchestrator import RangeOrchestrator, CyRISSingleton
             self.logger.debug("RangeOrchestrator imported successfully")
-                
-            self.logger.debug("About to import KVMProvider")
-            from cyris.infrastructure.providers.kvm_provider import KVMProvider
-            self.logger.debug("KVMProvider imported successfully")
-            
-            # Configure network settings
-            self.logger.debug("About to configure network settings")
-            libvirt_uri = 'qemu:///system' if network_mode == 'bridge' else 'qemu:///session'
-            self.logger.debug(f"libvirt_uri set to: {libvirt_uri}")
-            
-            kvm_settings = {
-                'connection_uri': libvirt_uri,
-                'libvirt_uri': libvirt_uri,
-                'base_path': str(self.config.cyber_range_dir),
-                'network_mode': network_mode,
-                'enable_ssh': enable_ssh,
-                'build_storage_dir': str(self.config.build_storage_dir),
-                'vm_storage_dir': str(self.config.vm_storage_dir)
-            }
             
-            self.logger.debug(f"kvm_settings created: {kvm_settings}")
-            self.logger.debug("About to create KVMProvider instance")
-            provider = KVMProvider(kvm_settings)
-            self.logger.debug("KVMProvider instance created successfully")
-            
-            # Use singleton pattern for orchestrator
-            self.logger.debug("About to import CyRISSingleton")
-            from cyris.services.orchestrator import CyRISSingleton
-            self.logger.debug("CyRISSingleton imported successfully")
+            if metadata_only:
+                provider = None
+                provider_factory = lambda: self._create_kvm_provider(network_mode, enable_ssh)
+            else:
+                provider = self._create_kvm_provider(network_mode, enable_ssh)
+                provider_factory = None
                 
             self.logger.debug(f"About to create CyRISSingleton with lock file: {self.config.cyber_range_dir / '.cyris.lock'}")
             singleton = CyRISSingleton(self.config.cyber_range_dir / '.cyris.lock')
             self.logger.debug("CyRISSingleton created successfully")
                 
             self.logger.debug("About to create RangeOrchestrator instance")
-            orchestrator = RangeOrchestrator(self.config, provider)
+            orchestrator = RangeOrchestrator(self.config, provider, provider_factory=provider_factory)
             self.logger.debug("RangeOrchestrator instance created successfully")
             
             self.logger.debug("create_orchestrator() completed successfully")
@@ -124,6 +109,56 @@ class BaseCommandHandler(ABC):
             self.handle_error(e, "create_orchestrator")
             return None, None, None
     
+    def _create_kvm_provider(self, network_mode: str = 'bridge', enable_ssh: bool = True):
+        """Build the KVM provider for the given network mode (imports libvirt)"""
+        self.logger.debug("About to import KVMProvider")
+        from cyris.infrastructure.providers.kvm_provider import KVMProvider
+        self.logger.debug("KVMProvider imported successfully")
+        
+        # Configure network settings
+        libvirt_uri = 'qemu:///system' if network_mode == 'bridge' else 'qemu:///session'
+        self.logger.debug(f"libvirt_uri set to: {libvirt_uri}")
+        
+        kvm_settings = {
+            'connection_uri': libvirt_uri,
+            'libvirt_uri': libvirt_uri,
+            'base_path': str(self.config.cyber_range_dir),
+            'network_mode': network_mode,
+            'enable_ssh': enable_ssh,
+            'build_storage_dir': str(self.config.build_storage_dir),
+            'vm_storage_dir': str(self.config.vm_storage_dir),
+            'image_build_workers': getattr(self.config, 'image_build_workers', 2),
+            'template_cache': getattr(self.config, 'template_cache', True),
+            'template_mirror_dir': getattr(self.config, 'template_mirror_dir', None),
+            'image_distribution_mbps': getattr(self.config, 'image_distribution_mbps', 0),
+            'warm_pool_size': getattr(self.config, 'warm_pool_size', 0),
+            'warm_pool_sizes': getattr(self.config, 'warm_pool_sizes', {}),
+            'warm_pool_mode': getattr(self.config, 'warm_pool_mode', 'saved'),
+            'warm_pool_memory_mb': getattr(self.config, 'warm_pool_memory_mb', 8192)
+        }
+        
+        self.logger.debug(f"kvm_settings created: {kvm_settings}")
+        provider = KVMProvider(kvm_settings)
+        self.logger.debug("KVMProvider instance created successfully")
+        return provider
+    
+    def _get_libvirt_uri(self, range_metadata) -> str:
+        """Libvirt connection URI a range was created with"""
+        libvirt_uri = 'qemu:///system'  # Default
+        
+        # Check if provider_config exists and has libvirt_uri
+        if hasattr(range_metadata, 'provider_config') and range_metadata.provider_config:
+            if 'libvirt_uri' in range_metadata.provider_config:
+                libvirt_uri = range_metadata.provider_config['libvirt_uri']
+        # Check tags for provider info as fallback
+        elif range_metadata.tags and 'libvirt_uri' in range_metadata.tags:
+            libvirt_uri = range_metadata.tags['libvirt_uri']
+            
+        if self.verbose:
+            self.log_verbose(f"Using libvirt URI: {libvirt_uri}")
+            
+        return libvirt_uri
+    
     def log_verbose(self, message: str) -> None:
         """Verbose logging output"""
         if self.verbose:
@@ -26,7 +26,7 @@ class CreateCommandHandler(BaseCommandHandler):
     def execute(self, description_file: Path, range_id: Optional[int] = None,
                 dry_run: bool = False, build_only: bool = False, skip_builder: bool = False, 
                 network_mode: str = 'bridge', enable_ssh: bool = True, 
-                recreate: bool = False) -> bool:
+                recreate: bool = False, resume: bool = False) -> bool:
         """Execute create command with comprehensive validation and error handling"""
         
         self.logger.debug(f"CreateCommandHandler.execute() START with file={description_file}")
@@ -43,7 +43,8 @@ class CreateCommandHandler(BaseCommandHandler):
             if not self.validate_file_exists(description_file):
                 return False
             
-            if not self.validate_yaml_file(description_file):
+            # Parse and validate once; later steps reuse the compiled plan
+            if self._load_plan(description_file) is None:
                 return False
             
             if not self.validate_network_mode(network_mode):
@@ -80,7 +81,7 @@ class CreateCommandHandler(BaseCommandHandler):
             if dry_run:
                 return self._execute_dry_run(description_file, range_id, network_mode, enable_ssh)
             else:
-                return self._execute_actual_creation(description_file, range_id, network_mode, enable_ssh, dry_run, build_only, skip_builder, recreate)
+                return self._execute_actual_creation(description_file, range_id, network_mode, enable_ssh, dry_run, build_only, skip_builder, recreate, resume)
                 
         except Exception as e:
             self.handle_error(e, "create")
@@ -97,58 +98,34 @@ class CreateCommandHandler(BaseCommandHandler):
                 return False
                 
             with singleton:
-                # For dry run, we'll validate YAML and show what would be created
-                import yaml
+                # For dry run, show what the compiled plan would create
+                plan = self._load_plan(description_file)
+                if plan is None:
+                    return False
                 
-                try:
-                    with open(description_file, 'r') as f:
-                        yaml_data = yaml.safe_load(f)
-                    
-                    self.console.print(f"[green]✓[/green] YAML syntax valid")
+                self.console.print(f"[green]✓[/green] Range description valid")
+                self.console.print(f"[cyan]Range Name:[/cyan] {plan.range_id or description_file.stem}")
+                self.console.print(f"[cyan]Hosts:[/cyan] {len(plan.hosts)}")
+                self.console.print(f"[cyan]Guests:[/cyan] {len(plan.guests)}")
+                self.console.print(f"[cyan]VM instances:[/cyan] {len(plan.instances)}")
+                self.console.print(f"[cyan]Networks:[/cyan] {len(plan.networks)}")
                 
-                    # Extract information from range description
-                    hosts = []
-                    guests = []
-                    range_name = description_file.stem
-                    
-                    # Parse the YAML structure (supports both list and dict formats)
-                    if isinstance(yaml_data, list):
-                        for section in yaml_data:
-                            if isinstance(section, dict):
-                                if 'host_settings' in section:
-                                    hosts.extend(section['host_settings'])
-                                if 'guest_settings' in section:
-                                    guests.extend(section['guest_settings'])
-                                if 'clone_settings' in section:
-                                    for clone in section['clone_settings']:
-                                        if clone.get('range_id'):
-                                            range_name = clone['range_id']
-                    elif isinstance(yaml_data, dict):
-                        if 'host_settings' in yaml_data:
-                            hosts.extend(yaml_data['host_settings'])
-                        if 'guest_settings' in yaml_data:
-                            guests.extend(yaml_data['guest_settings'])
-                        if 'clone_settings' in yaml_data:
-                            for clone in yaml_data['clone_settings']:
-                                if clone.get('range_id'):
-                                    range_name = clone['range_id']
-                    
-                    self.console.print(f"[cyan]Range Name:[/cyan] {range_name}")
-                    self.console.print(f"[cyan]Hosts:[/cyan] {len(hosts)}")
-                    self.console.print(f"[cyan]Guests:[/cyan] {len(guests)}")
-                    
-                    # Show guest details
-                    for i, guest in enumerate(guests):
-                        guest_id = guest.get('id', f'guest-{i+1}')
-                        self.console.print(f"  {i+1}. {guest_id}")
-                        
-                    return True
-                except yaml.YAMLError as e:
-                    self.error_display.display_error(f"YAML parsing failed: {e}")
-                    return False
-                except Exception as e:
-                    self.error_display.display_error(f"YAML validation failed: {e}")
-                    return False
+                # Show guest details
+                for i, guest in enumerate(plan.guests):
+                    self.console.print(f"  {i+1}. {guest.guest_id}")
+                
+                # An existing range would only get the delta applied
+                target = range_id if range_id is not None else plan.range_id
+                diff = orchestrator.diff_range(str(target), plan) if target is not None else None
+                if diff is not None:
+                    self.console.print(f"[cyan]Changes to existing range {target}:[/cyan] {diff.summary()}")
+                    for change in diff.guests:
+                        self.console.print(f"  {change.action.value} {change.guest_id} ({change.reason})")
+                
+                if self.verbose:
+                    self.log_verbose(f"Plan digest: {plan.digest}")
+                    
+                return True
                 
         except Exception as e:
             self.error_display.display_error(f"Validation error: {str(e)}")
@@ -157,9 +134,20 @@ class CreateCommandHandler(BaseCommandHandler):
                 self.error_console.print(traceback.format_exc())
             return False
     
+    def _load_plan(self, description_file: Path):
+        """Compiled range plan for the description, or None after reporting why it is invalid"""
+        from cyris.config.range_plan import PLAN_CACHE_DIR, load_range_plan
+        
+        try:
+            return load_range_plan(description_file, Path(self.config.cyber_range_dir) / PLAN_CACHE_DIR)
+        except ConfigurationError as e:
+            self.error_display.display_error(f"Invalid range description: {e}")
+            return None
+    
     def _execute_actual_creation(self, description_file: Path, range_id: Optional[int],
                                network_mode: str, enable_ssh: bool, dry_run: bool = False, 
-                               build_only: bool = False, skip_builder: bool = False, recreate: bool = False) -> bool:
+                               build_only: bool = False, skip_builder: bool = False, recreate: bool = False,
+                               resume: bool = False) -> bool:
         """Execute actual cyber range creation with simplified Rich display"""
         
         # Create simplified Rich progress manager (no Live display, no complex layouts)
@@ -290,7 +278,8 @@ class CreateCommandHandler(BaseCommandHandler):
                             dry_run=dry_run,
                             build_only=build_only,
                             skip_builder=skip_builder,
-                            recreate=recreate
+                            recreate=recreate,
+                            resume=resume
                         )
                         progress_manager.log_info(f"[DEBUG] orchestrator.create_range_from_yaml returned: {result_range_id}")
                         
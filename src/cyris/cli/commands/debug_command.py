@@ -0,0 +1,125 @@
+"""
+Debug Command Handler
+Internal diagnostics for developers, such as subprocess accounting
+"""
+
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from rich.table import Table
+
+from .base_command import BaseCommandHandler
+
+
+class DebugCommandHandler(BaseCommandHandler):
+    """Debug command handler - Shows where CyRIS spends its external processes"""
+
+    def execute(self, **kwargs) -> bool:
+        """Execute debug command based on action"""
+        action = kwargs.pop('action', 'exec-stats')
+
+        if action == 'exec-stats':
+            return self.exec_stats(**kwargs)
+        self.error_display.display_error(f"Unknown debug action: {action}")
+        return False
+
+    def exec_stats(self, range_id: Optional[str] = None, top: int = 20,
+                   as_json: bool = False, reset: bool = False) -> bool:
+        """
+        Show subprocess statistics: all CLI runs so far, or one range creation.
+
+        Args:
+            range_id: Show the statistics recorded while creating this range
+            top: Number of call sites to list
+            as_json: Print the raw statistics
+            reset: Delete the accumulated statistics
+        """
+        from ...core import exec_gateway
+
+        ranges_dir = Path(self.config.cyber_range_dir)
+        if range_id:
+            path = ranges_dir / range_id / "logs" / exec_gateway.RANGE_STATS_FILE
+        else:
+            path = ranges_dir / exec_gateway.STATS_FILE
+
+        if reset:
+            if range_id:
+                self.error_display.display_error("--reset applies to the accumulated statistics only")
+                return False
+            if path.exists():
+                path.unlink()
+            self.console.print(f"Exec statistics reset ({path})")
+            return True
+
+        if not path.exists():
+            hint = (f"range {range_id} has no recorded creation" if range_id
+                    else "no CyRIS command has spawned a process yet")
+            self.error_display.display_error(f"No exec statistics at {path}: {hint}")
+            return False
+
+        stats = exec_gateway.load_stats(path)
+        if as_json:
+            print(json.dumps(stats, indent=2))
+            return True
+
+        self._display_stats(stats, path, top)
+        return True
+
+    def _display_stats(self, stats: Dict[str, Any], path: Path, top: int) -> None:
+        from ...core.exec_gateway import SiteStats
+
+        sites = [SiteStats.from_dict(data) for data in stats.get("sites", [])]
+        sites.sort(key=lambda s: (s.calls, s.total_s), reverse=True)
+        total = sum(s.calls for s in sites)
+        unrouted = sum(s.calls for s in sites if not s.routed)
+
+        self.console.print(f"\n[bold blue]Subprocess statistics[/bold blue] [dim]({path})[/dim]")
+        self.console.print(
+            f"{total} processes from {len(sites)} call sites since {stats.get('since') or 'unknown'}"
+            + (f", {unrouted} started outside the exec gateway" if unrouted else "")
+        )
+
+        table = Table(show_header=True, show_edge=True, padding=(0, 1))
+        table.add_column("Call site", style="cyan", overflow="fold")
+        table.add_column("Program", style="green", no_wrap=True)
+        table.add_column("Calls", justify="right")
+        table.add_column("Failed", justify="right")
+        table.add_column("Total s", justify="right")
+        table.add_column("Mean ms", justify="right")
+        table.add_column("p95 ms", justify="right")
+        table.add_column("Max ms", justify="right")
+
+        for site in sites[:top]:
+            p95 = site.percentile(0.95)
+            timed = site.routed and site.calls
+            table.add_row(
+                site.site,
+                site.program if site.routed else f"{site.program} *",
+                str(site.calls),
+                str(site.failures) if site.routed else "-",
+                f"{site.total_s:.2f}" if timed else "-",
+                f"{site.mean_s * 1000:.1f}" if timed else "-",
+                f"<={p95 * 1000:.0f}" if p95 is not None else "-",
+                f"{site.max_s * 1000:.0f}" if timed else "-",
+            )
+        self.console.print(table)
+        if unrouted:
+            self.console.print("[dim]* started outside the exec gateway: counted, latency unknown[/dim]")
+        if len(sites) > top:
+            self.console.print(f"[dim]{len(sites) - top} more call sites (use --top)[/dim]")
+
+        by_program = Counter()
+        for site in sites:
+            by_program[site.program] += site.calls
+        if by_program:
+            self.console.print("By program: " + ", ".join(
+                f"{program} {calls}" for program, calls in by_program.most_common(10)))
+
+        cache = stats.get("cache", {})
+        if cache:
+            hits = sum(counters.get("hits", 0) for counters in cache.values())
+            lookups = hits + sum(counters.get("misses", 0) for counters in cache.values())
+            self.console.print(f"Tool checks: {hits} of {lookups} answered from cache "
+                               f"({len(cache)} distinct checks)")
@@ -119,23 +119,6 @@ class DestroyCommandHandler(BaseCommandHandler):
             self.handle_error(e, "remove")
             return False
     
-    def _get_libvirt_uri(self, range_metadata) -> str:
-        """获取libvirt连接URI"""
-        libvirt_uri = 'qemu:///system'  # Default
-        
-        # Check if provider_config exists and has libvirt_uri
-        if hasattr(range_metadata, 'provider_config') and range_metadata.provider_config:
-            if 'libvirt_uri' in range_metadata.provider_config:
-                libvirt_uri = range_metadata.provider_config['libvirt_uri']
-        # Check tags for provider info as fallback
-        elif range_metadata.tags and 'libvirt_uri' in range_metadata.tags:
-            libvirt_uri = range_metadata.tags['libvirt_uri']
-            
-        if self.verbose:
-            self.log_verbose(f"Using libvirt URI: {libvirt_uri}")
-            
-        return libvirt_uri
-    
     def _remove_records(self, orchestrator, range_id: str, force: bool) -> bool:
         """删除靶场记录"""
         self.console.print(f"🗑️  [blue]Removing all records for cyber range {range_id}...[/blue]")
@@ -22,7 +22,7 @@ class ListCommandHandler(BaseCommandHandler):
                 verbose: bool = False) -> bool:
         """Execute list command with auto-discovery and singleton pattern"""
         try:
-            orchestrator, provider, singleton = self.create_orchestrator()
+            orchestrator, provider, singleton = self.create_orchestrator(metadata_only=True)
             if not orchestrator:
                 return False
             
@@ -91,7 +91,7 @@ class ListCommandHandler(BaseCommandHandler):
         """Check filesystem for range directories (legacy fallback)"""
         ranges_dir = self.config.cyber_range_dir
         if ranges_dir.exists():
-            range_dirs = [d for d in ranges_dir.iterdir() if d.is_dir()]
+            range_dirs = [d for d in ranges_dir.iterdir() if d.is_dir() and not d.name.startswith('.')]
             if range_dirs:
                 self.console.print(f"Found [cyan]{len(range_dirs)}[/cyan] range directories on filesystem:")
                 for range_dir in sorted(range_dirs):
@@ -0,0 +1,90 @@
+"""
+Pool Command Handler
+Shows and empties the warm pool of standby VMs
+"""
+
+import json
+from pathlib import Path
+
+from rich.table import Table
+
+from .base_command import BaseCommandHandler
+from cyris.cli.presentation import MessageFormatter
+
+
+class PoolCommandHandler(BaseCommandHandler):
+    """Pool command handler - Standby VMs kept for kvm-auto guests"""
+
+    def execute(self, **kwargs) -> bool:
+        """Execute pool command based on action"""
+        action = kwargs.pop('action', 'status')
+
+        if action == 'status':
+            return self.status(**kwargs)
+        if action == 'drain':
+            return self.drain(**kwargs)
+        self.error_display.display_error(f"Unknown pool action: {action}")
+        return False
+
+    def _pool(self, provider=None):
+        from cyris.infrastructure.providers.warm_pool import POOL_DIR, WarmPool
+
+        def no_connection():
+            raise RuntimeError("no libvirt connection")
+
+        return WarmPool(
+            pool_dir=Path(self.config.vm_storage_dir) / POOL_DIR,
+            connection_factory=provider._pool_connection if provider else no_connection,
+            boot=provider._boot_pool_member if provider else None,
+            size=getattr(self.config, 'warm_pool_size', 0),
+            sizes=getattr(self.config, 'warm_pool_sizes', {}),
+            memory_budget_mb=getattr(self.config, 'warm_pool_memory_mb', 8192),
+            mode=getattr(self.config, 'warm_pool_mode', 'saved'),
+        )
+
+    def status(self, as_json: bool = False) -> bool:
+        """Show standby VMs per pool key"""
+        pool = self._pool()
+        status = pool.status()
+        if as_json:
+            print(json.dumps(status, indent=2))
+            return True
+
+        if not pool.enabled:
+            self.console.print("[dim]Warm pool disabled (warm_pool_size is 0)[/dim]")
+        if not status["pools"]:
+            self.console.print("No standby VMs")
+            return True
+
+        table = Table(title=f"Warm pool ({status['mode']})")
+        table.add_column("Pool")
+        table.add_column("Image")
+        table.add_column("VMs", justify="right")
+        table.add_column("Memory (MB)", justify="right")
+        for key, pool_status in sorted(status["pools"].items()):
+            table.add_row(key, Path(pool_status["image"]).name, str(pool_status["vms"]),
+                          str(pool_status["memory_mb"]))
+        self.console.print(table)
+        self.console.print(f"Memory: {status['memory_mb']} of {status['memory_budget_mb']} MB")
+        return True
+
+    def drain(self, network_mode: str = 'bridge') -> bool:
+        """Destroy all standby VMs and their files"""
+        try:
+            provider = self._create_kvm_provider(network_mode, enable_ssh=False)
+            try:
+                report = self._pool(provider).drain()
+            finally:
+                provider.disconnect()
+        except Exception as e:
+            self.handle_error(e, "pool drain")
+            return False
+
+        for result in report.failed:
+            self.console.print(f"  [red]✗[/red] {result.kind} {result.resource}: {result.error}")
+        domains = sum(1 for r in report.results.values() if r.kind == "domain" and r.ok)
+        if report.succeeded:
+            self.console.print(MessageFormatter.success(f"Warm pool drained: {domains} standby VMs removed"))
+            return True
+        self.console.print(MessageFormatter.error(f"Warm pool partially drained: {len(report.failed)} failures"))
+        return False
@@ -0,0 +1,73 @@
+"""
+Reset Command Handler
+Reverts a cyber range to the snapshot taken after its creation
+"""
+
+from .base_command import BaseCommandHandler
+from cyris.cli.presentation import MessageFormatter
+
+
+class ResetCommandHandler(BaseCommandHandler):
+    """Reset command handler - Returns a range to its starting state"""
+
+    def execute(self, range_id: str, force: bool = False) -> bool:
+        """Execute reset command"""
+        try:
+            if not self.validate_range_id(range_id):
+                return False
+
+            if not force:
+                import click
+                if not click.confirm(f'Reset cyber range {range_id}? '
+                                     'Everything changed in its VMs since creation is lost.'):
+                    self.console.print('[yellow]Operation cancelled[/yellow]')
+                    return True
+
+            # Range metadata decides which libvirt connection to use
+            basic_orchestrator, _, _ = self.create_orchestrator(metadata_only=True)
+            if not basic_orchestrator:
+                return False
+
+            range_metadata = basic_orchestrator.get_range(range_id)
+            if not range_metadata:
+                self.error_display.display_range_not_found(range_id)
+                return False
+            if 'snapshot' not in range_metadata.tags:
+                self.error_display.display_error(
+                    f"Cyber range {range_id} has no snapshot to reset to "
+                    "(it was created with range_snapshots disabled, or snapshotting failed)"
+                )
+                return False
+
+            network_mode = 'bridge' if 'system' in self._get_libvirt_uri(range_metadata) else 'user'
+            orchestrator, _, _ = self.create_orchestrator(network_mode)
+            if not orchestrator:
+                return False
+
+            self.console.print(f"[bold blue]Resetting cyber range:[/bold blue] {range_id}")
+            report = orchestrator.reset_range(range_id)
+            if report is None:
+                self.console.print(MessageFormatter.error(f"Failed to reset cyber range {range_id}"))
+                return False
+
+            for result in report.failed:
+                self.console.print(f"  [red]✗[/red] {result.domain}: {result.error}")
+            if self.verbose:
+                for result in report.results.values():
+                    if result.ok:
+                        self.log_verbose(f"{result.domain} reverted in {result.duration:.1f}s")
+
+            if report.succeeded:
+                self.console.print(MessageFormatter.success(
+                    f"Cyber range {range_id} reset: {len(report.domains)} VMs reverted in {report.duration:.1f}s"
+                ))
+                return True
+            self.console.print(MessageFormatter.error(
+                f"Cyber range {range_id} partially reset: {len(report.failed)} of "
+                f"{len(report.results)} VMs could not be reverted"
+            ))
+            return False
+
+        except Exception as e:
+            self.handle_error(e, "reset")
+            return False
@@ -27,7 +27,7 @@ class StatusCommandHandler(BaseCommandHandler):
             
             self.console.print(f"\n[bold blue]Cyber Range Status[/bold blue]: [bold]{range_id}[/bold]")
             
-            orchestrator, provider, singleton = self.create_orchestrator()
+            orchestrator, provider, singleton = self.create_orchestrator(metadata_only=True)
             if not orchestrator:
                 return False
             
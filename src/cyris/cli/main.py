@@ -117,6 +117,10 @@ def cli(ctx, config: Optional[str], verbose: bool, version: bool):
             f.flush()
         ctx.obj['config'] = settings
         
+        # Processes spawned by this command add to `cyris debug exec-stats`
+        from ..core import exec_gateway
+        exec_gateway.persist_on_exit(Path(settings.cyber_range_dir) / exec_gateway.STATS_FILE)
+        
         with open(debug_log_path, 'a') as f:
             f.write("[DEBUG] cli() function completed successfully\n")
             f.flush()
@@ -145,8 +149,9 @@ def cli(ctx, config: Optional[str], verbose: bool, version: bool):
               help='Network mode: user (isolated) or bridge (SSH accessible)')
 @click.option('--enable-ssh', is_flag=True, default=True, help='Enable SSH access (requires bridge networking)')
 @click.option('--recreate', is_flag=True, help='Force recreate existing range (destroy and rebuild)')
+@click.option('--resume', is_flag=True, help='Continue an interrupted creation from its first incomplete step')
 @click.pass_context
-def create(ctx, description_file: Path, range_id: Optional[int], dry_run: bool, build_only: bool, skip_builder: bool, network_mode: str, enable_ssh: bool, recreate: bool):
+def create(ctx, description_file: Path, range_id: Optional[int], dry_run: bool, build_only: bool, skip_builder: bool, network_mode: str, enable_ssh: bool, recreate: bool, resume: bool):
     """Create a new cyber range
     
     DESCRIPTION_FILE: YAML format cyber range description file
@@ -159,6 +164,9 @@ def create(ctx, description_file: Path, range_id: Optional[int], dry_run: bool,
     if build_only and skip_builder:
         click.echo("Error: --build-only and --skip-builder cannot be used together", err=True)
         sys.exit(1)
+    if resume and (recreate or build_only):
+        click.echo("Error: --resume cannot be used with --recreate or --build-only", err=True)
+        sys.exit(1)
     
     from .commands import CreateCommandHandler
     
@@ -187,7 +195,8 @@ def create(ctx, description_file: Path, range_id: Optional[int], dry_run: bool,
         skip_builder=skip_builder,
         network_mode=network_mode,
         enable_ssh=enable_ssh,
-        recreate=recreate
+        recreate=recreate,
+        resume=resume
     )
     
     with open(debug_log_path, 'a') as f:
@@ -264,6 +273,30 @@ def destroy(ctx, range_id: str, force: bool, rm: bool):
         sys.exit(1)
 
 
+@cli.command()
+@click.argument('range_id')
+@click.option('--force', '-f', is_flag=True, help='Reset without confirmation')
+@click.pass_context
+def reset(ctx, range_id: str, force: bool):
+    """Reset a cyber range to its state right after creation
+    
+    Reverts every VM to the snapshot taken once the range was created, in
+    parallel; tasks are not run again.
+    
+    RANGE_ID: ID of the cyber range to reset
+    """
+    from .commands import ResetCommandHandler
+    
+    config = get_config(ctx)
+    verbose = ctx.obj['verbose']
+    
+    handler = ResetCommandHandler(config, verbose)
+    success = handler.execute(range_id=range_id, force=force)
+    
+    if not success:
+        sys.exit(1)
+
+
 @cli.command()
 @click.argument('range_id')
 @click.option('--force', '-f', is_flag=True, help='Force removal even if range is not destroyed')
@@ -417,6 +450,78 @@ def legacy_run(ctx, args):
         sys.exit(1)
 
 
+@cli.group()
+def pool():
+    """Warm pool of standby VMs for kvm-auto guests"""
+
+
+@pool.command(name='status')
+@click.option('--json', 'as_json', is_flag=True, help='Print the pool status as JSON')
+@click.pass_context
+def pool_status(ctx, as_json: bool):
+    """Show standby VMs per image configuration"""
+    from .commands import PoolCommandHandler
+    
+    config = get_config(ctx)
+    verbose = ctx.obj['verbose']
+    
+    handler = PoolCommandHandler(config, verbose)
+    success = handler.execute(action='status', as_json=as_json)
+    
+    if not success:
+        sys.exit(1)
+
+
+@pool.command(name='drain')
+@click.option('--network-mode', 
+              type=click.Choice(['user', 'bridge'], case_sensitive=False),
+              default='bridge',
+              help='Network mode the standby VMs were created with')
+@click.pass_context
+def pool_drain(ctx, network_mode: str):
+    """Destroy all standby VMs and free their memory and disks"""
+    from .commands import PoolCommandHandler
+    
+    config = get_config(ctx)
+    verbose = ctx.obj['verbose']
+    
+    handler = PoolCommandHandler(config, verbose)
+    success = handler.execute(action='drain', network_mode=network_mode)
+    
+    if not success:
+        sys.exit(1)
+
+
+@cli.group()
+def debug():
+    """Developer diagnostics"""
+
+
+@debug.command(name='exec-stats')
+@click.argument('range_id', required=False)
+@click.option('--top', type=int, default=20, show_default=True, help='Number of call sites to show')
+@click.option('--json', 'as_json', is_flag=True, help='Print raw statistics as JSON')
+@click.option('--reset', is_flag=True, help='Clear the accumulated statistics')
+@click.pass_context
+def exec_stats(ctx, range_id: Optional[str], top: int, as_json: bool, reset: bool):
+    """Show external processes spawned by CyRIS, per call site
+    
+    Without RANGE_ID, shows totals over all CLI runs; with it, the processes
+    spawned while creating that range.
+    """
+    from .commands import DebugCommandHandler
+    
+    config = get_config(ctx)
+    verbose = ctx.obj['verbose']
+    
+    handler = DebugCommandHandler(config, verbose)
+    success = handler.execute(action='exec-stats', range_id=range_id, top=top,
+                              as_json=as_json, reset=reset)
+    
+    if not success:
+        sys.exit(1)
+
+
 def main(args=None):
     """Main entry point"""
     logger = None
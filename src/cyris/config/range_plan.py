@@ -0,0 +1,479 @@
+"""
+Range Plan Compiler
+
+Parses and validates a YAML range description once into an immutable,
+fully expanded RangePlan: hosts, guests (with clone_settings tasks merged
+in), one entry per cloned VM instance, network segments, forwarding rules
+and the topology handed to the topology manager.
+
+A plan is keyed by the SHA-256 of the description's bytes. Within a process
+the compiled plan is memoised, so validation, dry-run, pre-checks and
+creation share one parse. With a cache directory it is also stored as JSON
+(``<cyber_range_dir>/.plans/<digest>.json``), so re-creating a range from
+an unchanged description skips YAML parsing and entity validation, and the
+orchestrator writes a copy next to each range it creates.
+
+Entities built from a plan use ``model_construct``: their values were
+validated when the plan was compiled.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from dataclasses import dataclass, replace
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union, TYPE_CHECKING
+
+import yaml
+
+from cyris.core.unified_logger import get_logger
+from .parser import ConfigurationError
+
+if TYPE_CHECKING:
+    from ..domain.entities.host import Host
+    from ..domain.entities.guest import Guest
+
+logger = get_logger(__name__, "range_plan")
+
+# Bump when compilation output changes so cached plans are recompiled
+PLAN_VERSION = 1
+PLAN_FILE = "range_plan.json"
+PLAN_CACHE_DIR = ".plans"
+
+# Informal OS names accepted in descriptions
+OS_TYPE_ALIASES = {
+    'ubuntu.20.04': 'ubuntu_20',
+    'ubuntu.18.04': 'ubuntu_18',
+    'ubuntu.16.04': 'ubuntu_16',
+    'windows7': 'windows.7',
+    'windows10': 'windows.10',
+}
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def source_digest(data: bytes) -> str:
+    """Cache key for a description: its bytes plus the plan format version"""
+    return hashlib.sha256(b"cyris-range-plan:%d\0" % PLAN_VERSION + data).hexdigest()
+
+
+@dataclass(frozen=True)
+class HostSpec:
+    """A validated host_settings entry"""
+    host_id: str
+    mgmt_addr: str
+    virbr_addr: str
+    account: str
+
+    def to_entity(self) -> "Host":
+        from ..domain.entities.host import Host
+        return Host.model_construct(
+            host_id=self.host_id, mgmt_addr=self.mgmt_addr,
+            virbr_addr=self.virbr_addr, account=self.account
+        )
+
+
+@dataclass(frozen=True)
+class GuestSpec:
+    """A validated guest_settings entry; ``fields`` are the Guest field values"""
+    guest_id: str
+    fields: Mapping[str, Any]
+
+    @property
+    def basevm_type(self) -> str:
+        return self.fields['basevm_type']
+
+    @property
+    def tasks(self) -> Tuple[Mapping[str, Any], ...]:
+        return self.fields.get('tasks', ())
+
+    def to_entity(self) -> "Guest":
+        from ..domain.entities.guest import Guest
+        return Guest.model_construct(**_thaw(self.fields))
+
+
+@dataclass(frozen=True)
+class InstanceSpec:
+    """One VM to be cloned: a guest in a range instance on a host"""
+    host_id: str
+    instance: int
+    guest_id: str
+    clone: int
+    entry_point: bool = False
+
+
+@dataclass(frozen=True)
+class NetworkSpec:
+    """A network segment from a host's topology"""
+    host_id: str
+    name: str
+    members: Tuple[str, ...]
+    gateway: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ForwardingRuleSpec:
+    """A forwarding (firewall) rule attached to a cloned guest"""
+    host_id: str
+    guest_id: str
+    rule: str
+
+
+@dataclass(frozen=True)
+class RangePlan:
+    """Compiled, immutable form of a range description"""
+    source: str
+    source_digest: str
+    digest: str
+    range_id: Optional[str]
+    hosts: Tuple[HostSpec, ...]
+    guests: Tuple[GuestSpec, ...]
+    instances: Tuple[InstanceSpec, ...]
+    networks: Tuple[NetworkSpec, ...]
+    forwarding_rules: Tuple[ForwardingRuleSpec, ...]
+    topology: Optional[Mapping[str, Any]]
+    clone_settings: Tuple[Mapping[str, Any], ...]
+
+    def build_hosts(self) -> List["Host"]:
+        """Fresh Host entities; callers may mutate them"""
+        return [host.to_entity() for host in self.hosts]
+
+    def build_guests(self) -> List["Guest"]:
+        """Fresh Guest entities; callers may mutate them"""
+        return [guest.to_entity() for guest in self.guests]
+
+    def topology_config(self) -> Optional[Dict[str, Any]]:
+        return _thaw(self.topology) if self.topology is not None else None
+
+    def clone_settings_config(self) -> List[Dict[str, Any]]:
+        return _thaw(self.clone_settings)
+
+    def guest(self, guest_id: str) -> Optional[GuestSpec]:
+        return next((guest for guest in self.guests if guest.guest_id == guest_id), None)
+
+    def with_guests_from(self, recorded: 'RangePlan', guest_ids: Iterable[str]) -> 'RangePlan':
+        """
+        This plan with ``guest_ids`` as they are in ``recorded``.
+
+        Guests that ``recorded`` does not have are left out. Used to record
+        only the part of a plan that was applied.
+        """
+        guest_ids = set(guest_ids)
+        guests = []
+        for guest in self.guests:
+            if guest.guest_id in guest_ids:
+                guest = recorded.guest(guest.guest_id)
+                if guest is None:
+                    continue
+            guests.append(guest)
+        return _with_digest(replace(self, guests=tuple(guests), digest=''))
+
+    def content(self) -> Dict[str, Any]:
+        """Plan content without provenance; this is what ``digest`` hashes"""
+        return {
+            'range_id': self.range_id,
+            'hosts': [vars(host).copy() for host in self.hosts],
+            'guests': [{'guest_id': g.guest_id, 'fields': _thaw(g.fields)} for g in self.guests],
+            'instances': [vars(instance).copy() for instance in self.instances],
+            'networks': [{**vars(network), 'members': list(network.members)} for network in self.networks],
+            'forwarding_rules': [vars(rule).copy() for rule in self.forwarding_rules],
+            'topology': self.topology_config(),
+            'clone_settings': self.clone_settings_config(),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'version': PLAN_VERSION, 'source': self.source, 'source_digest': self.source_digest,
+                'digest': self.digest, **self.content()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RangePlan':
+        if data.get('version') != PLAN_VERSION:
+            raise ValueError(f"unsupported range plan version {data.get('version')}")
+        return cls(
+            source=data['source'],
+            source_digest=data['source_digest'],
+            digest=data['digest'],
+            range_id=data['range_id'],
+            hosts=tuple(HostSpec(**host) for host in data['hosts']),
+            guests=tuple(GuestSpec(g['guest_id'], _freeze(g['fields'])) for g in data['guests']),
+            instances=tuple(InstanceSpec(**instance) for instance in data['instances']),
+            networks=tuple(NetworkSpec(**{**network, 'members': tuple(network['members'])})
+                           for network in data['networks']),
+            forwarding_rules=tuple(ForwardingRuleSpec(**rule) for rule in data['forwarding_rules']),
+            topology=_freeze(data['topology']) if data['topology'] is not None else None,
+            clone_settings=_freeze(data['clone_settings']),
+        )
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Write the plan atomically"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.to_dict(), f, indent=2, default=str)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'RangePlan':
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def _with_digest(plan: RangePlan) -> RangePlan:
+    canonical = json.dumps(plan.content(), sort_keys=True, separators=(',', ':'), default=str)
+    object.__setattr__(plan, 'digest', hashlib.sha256(canonical.encode()).hexdigest())
+    return plan
+
+
+def _sections(doc: Any) -> List[Dict[str, Any]]:
+    """Both description layouts as a list of section dicts"""
+    if isinstance(doc, dict):
+        return [doc]
+    if isinstance(doc, list):
+        return [section for section in doc if isinstance(section, dict)]
+    raise ConfigurationError("Range description must be a list of sections or a mapping")
+
+
+def _compile_host(data: Dict[str, Any]) -> HostSpec:
+    from pydantic import ValidationError
+    from ..domain.entities.host import Host
+
+    host_id = data.get('id', data.get('name'))
+    missing = [key for key, value in (('id', host_id), ('mgmt_addr', data.get('mgmt_addr')),
+                                      ('account', data.get('account'))) if not value]
+    if missing:
+        raise ConfigurationError(f"Host {host_id or '?'} is missing {', '.join(missing)}")
+    try:
+        host = Host(host_id=str(host_id), mgmt_addr=data['mgmt_addr'],
+                    virbr_addr=data.get('virbr_addr', '192.168.122.1'), account=data['account'])
+    except ValidationError as e:
+        raise ConfigurationError(f"Invalid host {host_id}: {e}")
+    return HostSpec(host.host_id, host.mgmt_addr, host.virbr_addr, host.account)
+
+
+def _os_type(value: Any) -> Any:
+    from ..domain.entities.guest import OSType
+
+    if value is None or isinstance(value, OSType):
+        return value
+    value = OS_TYPE_ALIASES.get(str(value), str(value))
+    try:
+        return OSType(value)
+    except ValueError:
+        logger.warning(f"Unknown basevm_os_type {value!r}, assuming ubuntu")
+        return OSType.UBUNTU
+
+
+def _compile_guest(data: Dict[str, Any]) -> "Guest":
+    from pydantic import ValidationError
+    from ..domain.entities.guest import Guest
+
+    guest_id = data.get('id', data.get('name'))
+    if not guest_id:
+        raise ConfigurationError(f"Guest without an id: {data}")
+    guest_id = str(guest_id)
+    try:
+        return Guest(
+            guest_id=guest_id,
+            ip_addr=data.get('ip_addr'),
+            basevm_addr=data.get('ip_addr', '192.168.1.100'),
+            root_passwd=data.get('root_passwd', 'password'),
+            basevm_host=data.get('basevm_host'),  # Optional for kvm-auto
+            basevm_config_file=data.get('basevm_config_file') or None,  # None for kvm-auto
+            basevm_os_type=_os_type(data.get('basevm_os_type', data.get('os_type', 'ubuntu'))),
+            basevm_type=data.get('basevm_type', 'kvm'),
+            basevm_name=data.get('basevm_name', guest_id),
+            tasks=[task for task in data.get('tasks') or [] if isinstance(task, dict)],
+            # kvm-auto specific fields
+            image_name=data.get('image_name'),
+            vcpus=data.get('vcpus'),
+            memory=data.get('memory'),
+            disk_size=data.get('disk_size'),
+            # Enhanced kvm-auto configuration options
+            graphics_type=data.get('graphics_type', 'vnc'),
+            graphics_port=data.get('graphics_port'),
+            graphics_listen=data.get('graphics_listen', '127.0.0.1'),
+            console_type=data.get('console_type', 'pty'),
+            network_model=data.get('network_model', 'virtio'),
+            os_variant=data.get('os_variant'),
+            boot_options=data.get('boot_options'),
+            cpu_model=data.get('cpu_model'),
+            extra_args=data.get('extra_args')
+        )
+    except ValidationError as e:
+        raise ConfigurationError(f"Invalid guest {guest_id}: {e}")
+
+
+def _members(value: Any) -> Tuple[str, ...]:
+    if isinstance(value, (list, tuple)):
+        return tuple(str(member).strip() for member in value)
+    return tuple(member.strip() for member in str(value or '').split(',') if member.strip())
+
+
+def compile_range_plan(description_file: Union[str, Path], data: Optional[bytes] = None) -> RangePlan:
+    """
+    Parse and validate a range description.
+
+    Args:
+        description_file: Path to the YAML description
+        data: The file's bytes, if already read
+
+    Returns:
+        RangePlan: The compiled plan
+
+    Raises:
+        ConfigurationError: If the description is unreadable or invalid
+    """
+    description_file = Path(description_file)
+    if data is None:
+        try:
+            data = description_file.read_bytes()
+        except OSError as e:
+            raise ConfigurationError(f"Cannot read range description {description_file}: {e}")
+    try:
+        doc = yaml.safe_load(data)
+    except yaml.YAMLError as e:
+        raise ConfigurationError(f"YAML parsing error: {e}")
+
+    hosts: List[HostSpec] = []
+    guests: List["Guest"] = []
+    clone_entries: List[Dict[str, Any]] = []
+    for section in _sections(doc):
+        hosts.extend(_compile_host(h) for h in section.get('host_settings') or [])
+        guests.extend(_compile_guest(g) for g in section.get('guest_settings') or [])
+        clone_entries.extend(c for c in section.get('clone_settings') or [] if isinstance(c, dict))
+
+    range_id = None
+    topology = None
+    instances: List[InstanceSpec] = []
+    networks: List[NetworkSpec] = []
+    rules: List[ForwardingRuleSpec] = []
+    by_id = {guest.guest_id: guest for guest in guests}
+    for clone in clone_entries:
+        # Later clone_settings entries win, as in the original parser
+        if clone.get('range_id') is not None:
+            range_id = str(clone['range_id'])
+        topology = next((host['topology'][0] for host in clone.get('hosts') or []
+                         if host.get('topology')), None)
+        for host in clone.get('hosts') or []:
+            host_id = str(host.get('host_id', ''))
+            for net in (host.get('topology') or [{}])[0].get('networks') or []:
+                networks.append(NetworkSpec(host_id, str(net.get('name', '')),
+                                            _members(net.get('members')), net.get('gateway')))
+            for clone_guest in host.get('guests') or []:
+                guest_id = str(clone_guest.get('guest_id', ''))
+                if clone_guest.get('tasks') and guest_id in by_id:
+                    # Tasks may also be given per guest in clone_settings
+                    by_id[guest_id].tasks.extend(clone_guest['tasks'])
+                for rule in clone_guest.get('forwarding_rules') or []:
+                    text = rule.get('rule') if isinstance(rule, dict) else rule
+                    if text:
+                        rules.append(ForwardingRuleSpec(host_id, guest_id, str(text)))
+                for instance in range(1, int(host.get('instance_number', 1) or 0) + 1):
+                    for number in range(1, int(clone_guest.get('number', 1) or 0) + 1):
+                        instances.append(InstanceSpec(host_id, instance, guest_id, number,
+                                                      bool(clone_guest.get('entry_point', False))))
+
+    # Plain JSON values, so a plan loaded from disk equals the compiled one
+    clone_entries = json.loads(json.dumps(clone_entries, default=str))
+    topology = json.loads(json.dumps(topology, default=str))
+    guest_specs = tuple(
+        GuestSpec(guest.guest_id, _freeze(guest.model_dump(mode='json', exclude={'id'})))
+        for guest in guests
+    )
+    plan = RangePlan(
+        source=str(description_file),
+        source_digest=source_digest(data),
+        digest='',
+        range_id=range_id,
+        hosts=tuple(hosts),
+        guests=guest_specs,
+        instances=tuple(instances),
+        networks=tuple(networks),
+        forwarding_rules=tuple(rules),
+        topology=_freeze(topology) if topology is not None else None,
+        clone_settings=_freeze(clone_entries),
+    )
+    return _with_digest(plan)
+
+
+_plans: Dict[str, RangePlan] = {}
+_plans_lock = threading.Lock()
+stats = {'compiled': 0, 'memory_hits': 0, 'disk_hits': 0}
+
+
+def load_range_plan(description_file: Union[str, Path],
+                    cache_dir: Optional[Union[str, Path]] = None) -> RangePlan:
+    """
+    Compiled plan for a description, reusing a cached one for identical bytes.
+
+    Args:
+        description_file: Path to the YAML description
+        cache_dir: Directory for compiled plans (``<cyber_range_dir>/.plans``)
+
+    Raises:
+        ConfigurationError: If the description is unreadable or invalid
+    """
+    description_file = Path(description_file)
+    try:
+        data = description_file.read_bytes()
+    except OSError as e:
+        raise ConfigurationError(f"Cannot read range description {description_file}: {e}")
+    key = source_digest(data)
+
+    with _plans_lock:
+        plan = _plans.get(key)
+    if plan is not None:
+        stats['memory_hits'] += 1
+        return plan
+
+    cached = Path(cache_dir) / f"{key}.json" if cache_dir else None
+    if cached is not None and cached.exists():
+        try:
+            plan = RangePlan.load(cached)
+            stats['disk_hits'] += 1
+            logger.debug(f"Loaded compiled plan for {description_file} from {cached}")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable range plan {cached}: {e}")
+            plan = None
+
+    if plan is None:
+        plan = compile_range_plan(description_file, data)
+        stats['compiled'] += 1
+        if cached is not None:
+            try:
+                plan.save(cached)
+            except OSError as e:
+                logger.warning(f"Could not cache range plan at {cached}: {e}")
+
+    with _plans_lock:
+        _plans[key] = plan
+    return plan
+
+
+def clear_plan_cache() -> None:
+    """Forget plans compiled in this process"""
+    with _plans_lock:
+        _plans.clear()
@@ -3,7 +3,7 @@ System Configuration Settings Module
 Uses Pydantic for configuration validation and management
 """
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 
@@ -59,6 +59,74 @@ class CyRISSettings(BaseSettings):
         description="Directory for VM disk files"
     )
     
+    image_build_workers: int = Field(
+        default=2,
+        description="Images of different kvm-auto image configurations built concurrently"
+    )
+    
+    # Decompressed virt-builder templates kvm-auto builds start from
+    template_cache: bool = Field(
+        default=True,
+        description="Keep virt-builder templates decompressed in build_storage_dir and build images from them"
+    )
+    template_mirror_dir: Optional[Path] = Field(
+        default=None,
+        description="Offline template mirror: <image>.qcow2 files or a virt-builder repository with an index"
+    )
+    image_distribution_mbps: float = Field(
+        default=0,
+        description="Bandwidth limit in Mbit/s per host when distributing images to other hosts (0: unlimited)"
+    )
+    
+    # Package cache for install_package tasks
+    package_cache_enabled: bool = Field(
+        default=False,
+        description="Serve install_package downloads to guests from a host-side caching proxy"
+    )
+    
+    package_cache_dir: Optional[Path] = Field(
+        default=None,
+        description="Package cache directory (defaults to <cyris_path>/cache/packages)"
+    )
+    
+    package_cache_mirrors: List[str] = Field(
+        default_factory=list,
+        description="Mirror hosts the package cache may fetch from, besides the official distribution mirrors"
+    )
+    
+    # Completed guest tasks are recorded in <range_dir>/task_ledger.json
+    task_markers: bool = Field(
+        default=False,
+        description="Also leave a marker per completed task inside Linux guests"
+    )
+    
+    # Baseline snapshot of every guest after creation, reverted by `cyris reset`
+    range_snapshots: bool = Field(
+        default=True,
+        description="Snapshot all guests once a range is created so it can be reset"
+    )
+    
+    # Standby VMs booted ahead of time for kvm-auto guests
+    warm_pool_size: int = Field(
+        default=0,
+        description="Standby VMs kept per kvm-auto image configuration (0 disables the warm pool)"
+    )
+    
+    warm_pool_sizes: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Standby VMs kept per image name, overriding warm_pool_size"
+    )
+    
+    warm_pool_mode: str = Field(
+        default="saved",
+        description="How standby VMs wait; only 'saved' (to a state file) is supported"
+    )
+    
+    warm_pool_memory_mb: int = Field(
+        default=8192,
+        description="Total guest memory of all standby VMs"
+    )
+    
     @field_validator('cyris_path', 'cyber_range_dir', 'build_storage_dir', 'vm_storage_dir')
     @classmethod
     def ensure_absolute_path(cls, v):
@@ -67,6 +135,16 @@ class CyRISSettings(BaseSettings):
             v = v.resolve()
         return v
     
+    @field_validator('warm_pool_mode')
+    @classmethod
+    def validate_warm_pool_mode(cls, v):
+        """Ensure the warm pool mode is known"""
+        if v != "saved":
+            raise ValueError(
+                "warm_pool_mode must be 'saved' (paused standby VMs would keep their pool names)"
+            )
+        return v
+    
     @field_validator('cyber_range_dir')
     @classmethod
     def ensure_cyber_range_dir_exists(cls, v):
@@ -23,6 +23,18 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _read_umask() -> int:
+    # os.umask() can only be read by setting it; do that once, at import,
+    # rather than while other threads may be creating files
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+# Mode of files created with open(): mkstemp() would leave them 0600
+_FILE_MODE = 0o666 & ~_read_umask()
+
+
 class ThreadSafeCounter:
     """Thread-safe counter with atomic operations"""
     
@@ -209,22 +221,36 @@ class AtomicFileWriter:
     def __init__(self, filename: str):
         """Initialize atomic file writer"""
         self.filename = filename
-        self._lock = threading.Lock()
+        # Re-entrant: append_lines() holds the lock while calling write_text()
+        self._lock = threading.RLock()
     
     def write_lines(self, lines: List[str]):
         """Atomically write lines to file"""
+        self.write_text(''.join(lines))
+    
+    def write_text(self, content: str, sync_dir: bool = False):
+        """
+        Atomically replace the file content.
+        
+        Args:
+            content: New file content
+            sync_dir: Also fsync the parent directory so the rename itself
+                survives a crash (not only the data)
+        """
+        directory = os.path.dirname(self.filename) or "."
         with self._lock:
             # Write to temporary file first
             temp_fd, temp_path = tempfile.mkstemp(
-                prefix=f"{os.path.basename(self.filename)}_",
-                dir=os.path.dirname(self.filename) or "."
+                prefix=f".{os.path.basename(self.filename)}_",
+                dir=directory
             )
             
             try:
                 with os.fdopen(temp_fd, 'w') as temp_file:
-                    temp_file.writelines(lines)
+                    temp_file.write(content)
                     temp_file.flush()
                     os.fsync(temp_file.fileno())  # Force write to disk
+                os.chmod(temp_path, _FILE_MODE)
                 
                 # Atomic move (rename) to final location
                 os.replace(temp_path, self.filename)
@@ -236,6 +262,13 @@ class AtomicFileWriter:
                 except OSError:
                     pass
                 raise
+            
+            if sync_dir:
+                dir_fd = os.open(directory, os.O_RDONLY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
     
     def append_lines(self, lines: List[str]):
         """Atomically append lines to file"""
@@ -0,0 +1,316 @@
+"""
+DAG Scheduler
+
+Runs a graph of named steps, each starting as soon as the steps it depends
+on have succeeded, with a concurrency limit per resource type (for example
+at most 8 concurrent IP probes but a single network step). A failed step
+skips everything downstream of it and leaves independent branches running.
+
+Every run produces a :class:`DagReport` with per-step timings and the
+critical path - the chain of steps that determined the total duration -
+so it shows where creation time actually goes.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .tracing import propagate, span
+from .unified_logger import get_logger
+
+logger = get_logger(__name__, "dag_scheduler")
+
+
+class NodeStatus(Enum):
+    """State of a scheduled step"""
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
+@dataclass
+class NodeRecord:
+    """One step of the graph and its timing"""
+    name: str
+    resource: str
+    deps: List[str]
+    status: NodeStatus = NodeStatus.PENDING
+    ready_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    exception: Optional[BaseException] = field(default=None, repr=False)
+
+    @property
+    def duration(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+    @property
+    def queued(self) -> float:
+        """Time spent ready but waiting for a free resource slot"""
+        if self.ready_at is None or self.started_at is None:
+            return 0.0
+        return max(0.0, self.started_at - self.ready_at)
+
+    def to_dict(self, origin: float = 0.0) -> Dict[str, Any]:
+        def offset(value):
+            return round(value - origin, 3) if value is not None else None
+        return {
+            "name": self.name,
+            "resource": self.resource,
+            "deps": self.deps,
+            "status": self.status.value,
+            "start": offset(self.started_at),
+            "end": offset(self.finished_at),
+            "duration": round(self.duration, 3),
+            "queued": round(self.queued, 3),
+            "error": self.error,
+        }
+
+
+@dataclass
+class DagReport:
+    """Outcome and timing of one scheduler run"""
+    nodes: Dict[str, NodeRecord]
+    started_at: float
+    finished_at: float
+    critical_path: List[str] = field(default_factory=list)
+
+    @property
+    def succeeded(self) -> bool:
+        return all(node.status == NodeStatus.SUCCEEDED for node in self.nodes.values())
+
+    @property
+    def failed(self) -> List[NodeRecord]:
+        return [node for node in self.nodes.values() if node.status == NodeStatus.FAILED]
+
+    @property
+    def skipped(self) -> List[NodeRecord]:
+        return [node for node in self.nodes.values() if node.status == NodeStatus.SKIPPED]
+
+    @property
+    def duration(self) -> float:
+        return self.finished_at - self.started_at
+
+    def resource_time(self) -> Dict[str, float]:
+        """Busy seconds per resource type (summed over concurrent steps)"""
+        totals: Dict[str, float] = {}
+        for node in self.nodes.values():
+            totals[node.resource] = totals.get(node.resource, 0.0) + node.duration
+        return {resource: round(total, 3) for resource, total in totals.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "duration": round(self.duration, 3),
+            "succeeded": self.succeeded,
+            "critical_path": [self.nodes[name].to_dict(self.started_at) for name in self.critical_path],
+            "resource_time": self.resource_time(),
+            "nodes": [node.to_dict(self.started_at) for node in
+                      sorted(self.nodes.values(), key=lambda n: (n.started_at is None, n.started_at or 0))],
+        }
+
+    def format_critical_path(self) -> str:
+        """Human-readable critical path table"""
+        lines = [f"Critical path ({self.duration:.1f}s total):"]
+        for name in self.critical_path:
+            node = self.nodes[name]
+            share = node.duration / self.duration * 100 if self.duration else 0.0
+            queued = f", queued {node.queued:.1f}s" if node.queued >= 0.05 else ""
+            lines.append(f"  {name:<32} {node.duration:8.1f}s {share:5.1f}%{queued}")
+        return "\n".join(lines)
+
+
+class DagScheduler:
+    """
+    Dependency-driven step runner.
+
+    Args:
+        concurrency: Maximum concurrently running steps per resource type
+        default_concurrency: Limit for resource types not listed
+        max_workers: Size of the worker thread pool
+    """
+
+    def __init__(
+        self,
+        concurrency: Optional[Dict[str, int]] = None,
+        default_concurrency: int = 4,
+        max_workers: int = 32
+    ):
+        self.concurrency = dict(concurrency or {})
+        self.default_concurrency = default_concurrency
+        self.max_workers = max_workers
+        self.logger = logger
+
+        self._nodes: Dict[str, NodeRecord] = {}
+        self._funcs: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Any],
+        deps: Iterable[str] = (),
+        resource: str = "default"
+    ) -> str:
+        """
+        Add a step.
+
+        Args:
+            name: Unique step name
+            func: Called with ``{dependency name: result}`` once all
+                dependencies succeeded; its return value is the step result
+            deps: Names of steps that must succeed first
+            resource: Resource type whose concurrency limit applies
+
+        Returns:
+            The step name
+        """
+        if name in self._nodes:
+            raise ValueError(f"Duplicate step: {name}")
+        self._nodes[name] = NodeRecord(name=name, resource=resource, deps=list(dict.fromkeys(deps)))
+        self._funcs[name] = func
+        return name
+
+    def record(self, name: str, started_at: float, finished_at: float,
+               deps: Iterable[str] = (), resource: str = "default",
+               success: bool = True, result: Any = None, error: Optional[str] = None) -> str:
+        """Add a step that already ran elsewhere, so it appears in the report"""
+        if name in self._nodes:
+            raise ValueError(f"Duplicate step: {name}")
+        self._nodes[name] = NodeRecord(
+            name=name, resource=resource, deps=list(dict.fromkeys(deps)),
+            status=NodeStatus.SUCCEEDED if success else NodeStatus.FAILED,
+            ready_at=started_at, started_at=started_at, finished_at=finished_at,
+            result=result, error=error
+        )
+        return name
+
+    def result(self, name: str) -> Any:
+        return self._nodes[name].result
+
+    def _validate(self) -> None:
+        for node in self._nodes.values():
+            missing = [dep for dep in node.deps if dep not in self._nodes]
+            if missing:
+                raise ValueError(f"Step {node.name} depends on unknown steps: {', '.join(missing)}")
+
+        # Kahn's algorithm: anything left over sits on a cycle
+        remaining = {name: len(node.deps) for name, node in self._nodes.items()}
+        dependents = self._dependents()
+        queue = [name for name, count in remaining.items() if count == 0]
+        while queue:
+            for dependent in dependents[queue.pop()]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    queue.append(dependent)
+        cyclic = sorted(name for name, count in remaining.items() if count > 0)
+        if cyclic:
+            raise ValueError(f"Dependency cycle between steps: {', '.join(cyclic)}")
+
+    def _dependents(self) -> Dict[str, List[str]]:
+        dependents: Dict[str, List[str]] = {name: [] for name in self._nodes}
+        for node in self._nodes.values():
+            for dep in node.deps:
+                dependents[dep].append(node.name)
+        return dependents
+
+    def run(self) -> DagReport:
+        """Run every pending step; returns the report (steps never raise)"""
+        self._validate()
+        dependents = self._dependents()
+        recorded = [n.started_at for n in self._nodes.values() if n.started_at is not None]
+        origin = min(recorded + [time.time()])
+
+        running: Dict[Future, str] = {}
+        active: Dict[str, int] = {}
+        ready: List[str] = []
+
+        def limit(resource: str) -> int:
+            return max(1, self.concurrency.get(resource, self.default_concurrency))
+
+        def settle(name: str) -> None:
+            """Queue or skip dependents of a finished step"""
+            for dependent in dependents[name]:
+                node = self._nodes[dependent]
+                if node.status != NodeStatus.PENDING or node.ready_at is not None:
+                    continue
+                deps = [self._nodes[dep] for dep in node.deps]
+                if any(dep.status in (NodeStatus.FAILED, NodeStatus.SKIPPED) for dep in deps):
+                    node.status = NodeStatus.SKIPPED
+                    node.error = f"dependency failed: {name}"
+                    settle(dependent)
+                elif all(dep.status == NodeStatus.SUCCEEDED for dep in deps):
+                    node.ready_at = time.time()
+                    ready.append(dependent)
+
+        for name, node in self._nodes.items():
+            if node.status == NodeStatus.PENDING and not node.deps:
+                node.ready_at = time.time()
+                ready.append(name)
+        for name, node in list(self._nodes.items()):
+            if node.status in (NodeStatus.SUCCEEDED, NodeStatus.FAILED):
+                settle(name)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cyris-dag") as pool:
+            while ready or running:
+                # Start ready steps in readiness order while their resource has room
+                for name in list(ready):
+                    node = self._nodes[name]
+                    if active.get(node.resource, 0) >= limit(node.resource):
+                        continue
+                    ready.remove(name)
+                    active[node.resource] = active.get(node.resource, 0) + 1
+                    node.status = NodeStatus.RUNNING
+                    node.started_at = time.time()
+                    inputs = {dep: self._nodes[dep].result for dep in node.deps}
+                    running[pool.submit(propagate(self._traced_step), name, inputs)] = name
+
+                if not running:
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    node = self._nodes[name]
+                    node.finished_at = time.time()
+                    active[node.resource] -= 1
+                    try:
+                        node.result = future.result()
+                        node.status = NodeStatus.SUCCEEDED
+                    except Exception as e:
+                        node.status = NodeStatus.FAILED
+                        node.error = str(e) or type(e).__name__
+                        node.exception = e
+                        self.logger.warning(f"Step {name} failed: {node.error}")
+                    settle(name)
+
+        report = DagReport(nodes=dict(self._nodes), started_at=origin, finished_at=time.time())
+        report.critical_path = self._critical_path()
+        return report
+
+    def _traced_step(self, name: str, inputs: Dict[str, Any]) -> Any:
+        with span(name, self._nodes[name].resource):
+            return self._funcs[name](inputs)
+
+    def _critical_path(self) -> List[str]:
+        """
+        Chain of steps that gated completion: from the last step to finish,
+        repeatedly follow the dependency that finished last.
+        """
+        finished = [n for n in self._nodes.values() if n.finished_at is not None]
+        if not finished:
+            return []
+        node = max(finished, key=lambda n: n.finished_at)
+        path = [node.name]
+        while True:
+            deps = [self._nodes[dep] for dep in node.deps if self._nodes[dep].finished_at is not None]
+            if not deps:
+                break
+            node = max(deps, key=lambda n: n.finished_at)
+            path.append(node.name)
+        return list(reversed(path))
@@ -0,0 +1,456 @@
+"""
+Exec Gateway
+
+Single entry point for running external tools. Every call made through
+:func:`run` (or :func:`popen`, for processes fed while they run) is counted
+per call site (``module:function``) and program, with
+failures, timeouts and a latency histogram, so fork-heavy paths can be found
+with ``cyris debug exec-stats``. Tool availability checks go through
+:func:`which` and :func:`cached_check`, which answer from a process-wide
+cache instead of forking ``which``/``--version`` probes on every call.
+
+Processes started without the gateway are still counted once accounting is
+enabled: an audit hook attributes them to the calling function and marks
+them as unrouted (no latency is known for those).
+"""
+
+import atexit
+import fcntl
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .unified_logger import get_logger
+
+logger = get_logger(__name__, "exec_gateway")
+
+STATS_VERSION = 1
+STATS_FILE = ".exec_stats.json"
+RANGE_STATS_FILE = "exec_stats.json"
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000, 30000)
+
+# Frames from these modules are skipped when looking for the caller
+_INTERNAL_MODULES = ("subprocess", "os", "shutil", "asyncio", "multiprocessing",
+                     "concurrent", "threading")
+
+
+@dataclass
+class SiteStats:
+    """Calls of one program from one call site"""
+    site: str
+    program: str
+    routed: bool = True
+    calls: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+    histogram: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+
+    @property
+    def key(self) -> Tuple[str, str, bool]:
+        return (self.site, self.program, self.routed)
+
+    @property
+    def mean_s(self) -> float:
+        return self.total_s / self.calls if self.calls and self.routed else 0.0
+
+    def record(self, duration: Optional[float], failed: bool = False, timed_out: bool = False) -> None:
+        self.calls += 1
+        self.failures += failed or timed_out
+        self.timeouts += timed_out
+        if duration is None:
+            return
+        self.total_s += duration
+        self.max_s = max(self.max_s, duration)
+        millis = duration * 1000
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if millis <= bound:
+                self.histogram[index] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound (seconds) of the histogram bucket holding ``fraction`` of calls"""
+        timed = sum(self.histogram)
+        if not timed:
+            return None
+        threshold = fraction * timed
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if seen >= threshold:
+                return (LATENCY_BUCKETS_MS[index] / 1000 if index < len(LATENCY_BUCKETS_MS)
+                        else self.max_s)
+        return self.max_s
+
+    def merge(self, other: "SiteStats", sign: int = 1) -> None:
+        self.calls += sign * other.calls
+        self.failures += sign * other.failures
+        self.timeouts += sign * other.timeouts
+        self.total_s += sign * other.total_s
+        self.max_s = max(self.max_s, other.max_s) if sign > 0 else self.max_s
+        self.histogram = [a + sign * b for a, b in zip(self.histogram, other.histogram)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "site": self.site,
+            "program": self.program,
+            "routed": self.routed,
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "total_s": round(self.total_s, 6),
+            "max_s": round(self.max_s, 6),
+            "histogram": list(self.histogram),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SiteStats":
+        stats = cls(site=data["site"], program=data["program"], routed=data.get("routed", True))
+        stats.calls = data.get("calls", 0)
+        stats.failures = data.get("failures", 0)
+        stats.timeouts = data.get("timeouts", 0)
+        stats.total_s = data.get("total_s", 0.0)
+        stats.max_s = data.get("max_s", 0.0)
+        histogram = data.get("histogram") or []
+        if len(histogram) == len(stats.histogram):
+            stats.histogram = list(histogram)
+        return stats
+
+
+class ExecStats:
+    """Thread-safe call-site statistics and tool-check cache counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sites: Dict[Tuple[str, str, bool], SiteStats] = {}
+        self.cache: Dict[str, Dict[str, int]] = {}
+        self.since = datetime.now().isoformat(timespec="seconds")
+
+    def record(self, site: str, program: str, duration: Optional[float],
+               failed: bool = False, timed_out: bool = False, routed: bool = True) -> None:
+        with self._lock:
+            key = (site, program, routed)
+            stats = self.sites.get(key)
+            if stats is None:
+                stats = self.sites[key] = SiteStats(site=site, program=program, routed=routed)
+            stats.record(duration, failed, timed_out)
+
+    def record_cache(self, check: str, hit: bool) -> None:
+        with self._lock:
+            counters = self.cache.setdefault(check, {"hits": 0, "misses": 0})
+            counters["hits" if hit else "misses"] += 1
+
+    def total_processes(self) -> int:
+        with self._lock:
+            return sum(stats.calls for stats in self.sites.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Serialisable copy of the current statistics"""
+        with self._lock:
+            return {
+                "version": STATS_VERSION,
+                "since": self.since,
+                "sites": [stats.to_dict() for stats in self.sites.values()],
+                "cache": {check: dict(counters) for check, counters in self.cache.items()},
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.sites.clear()
+            self.cache.clear()
+            self.since = datetime.now().isoformat(timespec="seconds")
+
+
+def _combine(first: Dict[str, Any], second: Dict[str, Any], sign: int) -> Dict[str, Any]:
+    sites = {}
+    for data in first.get("sites", []):
+        stats = SiteStats.from_dict(data)
+        sites[stats.key] = stats
+    for data in second.get("sites", []):
+        stats = SiteStats.from_dict(data)
+        if stats.key in sites:
+            sites[stats.key].merge(stats, sign)
+        elif sign > 0:
+            sites[stats.key] = stats
+
+    cache = {check: dict(counters) for check, counters in first.get("cache", {}).items()}
+    for check, counters in second.get("cache", {}).items():
+        target = cache.setdefault(check, {"hits": 0, "misses": 0})
+        for name in ("hits", "misses"):
+            target[name] = target.get(name, 0) + sign * counters.get(name, 0)
+
+    return {
+        "version": STATS_VERSION,
+        "since": first.get("since") if sign > 0 and first.get("since") else second.get("since"),
+        "sites": [stats.to_dict() for stats in sites.values() if stats.calls > 0],
+        "cache": {check: counters for check, counters in cache.items()
+                  if counters["hits"] or counters["misses"]},
+    }
+
+
+def merge_stats(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    """Statistics of two snapshots added together"""
+    return _combine(first, second, 1)
+
+
+def diff_stats(after: Dict[str, Any], before: Dict[str, Any]) -> Dict[str, Any]:
+    """Statistics recorded between two snapshots of the same process"""
+    result = _combine(after, before, -1)
+    result["since"] = datetime.now().isoformat(timespec="seconds")
+    return result
+
+
+STATS = ExecStats()
+_tool_cache: Dict[str, Any] = {}
+_tool_cache_lock = threading.Lock()
+_local = threading.local()
+_hook_installed = False
+_persist_path: Optional[Path] = None
+
+
+def _caller_site(depth: int = 1) -> str:
+    """``module:function`` of the first frame outside the gateway and stdlib process code"""
+    try:
+        frame = sys._getframe(depth)
+    except ValueError:
+        return "unknown"
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.split(".", 1)[0] not in _INTERNAL_MODULES and module != __name__:
+            return f"{module}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def _program(args: Union[str, Sequence[Any]], shell: bool = False) -> str:
+    if isinstance(args, (str, bytes, os.PathLike)):
+        text = os.fsdecode(args) if not isinstance(args, str) else args
+        argv = text.split() if shell else [text]
+    else:
+        argv = [os.fsdecode(arg) if isinstance(arg, (bytes, os.PathLike)) else str(arg) for arg in args]
+    # Report the tool behind sudo/env/timeout wrappers
+    index = 0
+    while index < len(argv) - 1 and os.path.basename(argv[index]) in ("sudo", "env", "timeout", "nice"):
+        index += 1
+        while index < len(argv) - 1 and (argv[index].startswith("-") or "=" in argv[index]
+                                         or argv[index].replace(".", "", 1).isdigit()):
+            index += 1
+    return os.path.basename(argv[index]) if argv else "?"
+
+
+def run(args: Union[str, Sequence[Any]], *, site: Optional[str] = None, **kwargs: Any) -> subprocess.CompletedProcess:
+    """
+    ``subprocess.run`` with accounting.
+
+    Args:
+        args: Command, as for ``subprocess.run``
+        site: Call-site label; defaults to the calling ``module:function``
+        **kwargs: Passed to ``subprocess.run`` unchanged
+
+    Returns:
+        The completed process; exceptions propagate as from ``subprocess.run``
+    """
+    site = site or _caller_site()
+    program = _program(args, kwargs.get("shell", False))
+    _local.routed = True
+    started = time.perf_counter()
+    try:
+        result = subprocess.run(args, **kwargs)
+    except subprocess.TimeoutExpired:
+        STATS.record(site, program, time.perf_counter() - started, timed_out=True)
+        raise
+    except BaseException:
+        STATS.record(site, program, time.perf_counter() - started, failed=True)
+        raise
+    finally:
+        _local.routed = False
+    STATS.record(site, program, time.perf_counter() - started,
+                 failed=getattr(result, "returncode", 0) != 0)
+    return result
+
+
+class Process(subprocess.Popen):
+    """``subprocess.Popen`` counted like :func:`run` once it is waited for"""
+
+    def __init__(self, args: Union[str, Sequence[Any]], *, site: str, **kwargs: Any):
+        self._site = site
+        self._program = _program(args, kwargs.get("shell", False))
+        self._started = time.perf_counter()
+        self._recorded = False
+        self._expired = False
+        self._record_lock = threading.Lock()
+        _local.routed = True
+        try:
+            super().__init__(args, **kwargs)
+        except BaseException:
+            STATS.record(site, self._program, time.perf_counter() - self._started, failed=True)
+            raise
+        finally:
+            _local.routed = False
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        returncode = super().wait(timeout)
+        with self._record_lock:
+            if not self._recorded:
+                self._recorded = True
+                STATS.record(self._site, self._program, time.perf_counter() - self._started,
+                             failed=returncode != 0 and not self._expired, timed_out=self._expired)
+        return returncode
+
+    @property
+    def expired(self) -> bool:
+        """Whether :meth:`expire` killed the process"""
+        return self._expired
+
+    def expire(self) -> None:
+        """Kill the process for running out of time; counted as a timeout"""
+        self._expired = True
+        self.kill()
+        self.wait()
+
+
+def popen(args: Union[str, Sequence[Any]], *, site: Optional[str] = None, **kwargs: Any) -> Process:
+    """
+    ``subprocess.Popen`` with accounting, for processes that are streamed to.
+
+    The call is recorded when the process is waited for; :meth:`Process.expire`
+    kills it and records a timeout.
+
+    Args:
+        args: Command, as for ``subprocess.Popen``
+        site: Call-site label; defaults to the calling ``module:function``
+        **kwargs: Passed to ``subprocess.Popen`` unchanged
+    """
+    return Process(args, site=site or _caller_site(), **kwargs)
+
+
+def which(tool: str) -> Optional[str]:
+    """Cached ``shutil.which`` - no ``which`` subprocess, one PATH scan per tool"""
+    return cached_check(f"which {tool}", lambda: shutil.which(tool))
+
+
+def has_tool(tool: str) -> bool:
+    return which(tool) is not None
+
+
+def cached_check(key: str, check: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+    """
+    Result of an expensive availability probe, computed once per process
+    (or once per ``ttl`` seconds).
+
+    Args:
+        key: Cache key, also the label in ``exec-stats``
+        check: Callable performing the probe
+        ttl: Optional lifetime of a cached result in seconds
+    """
+    now = time.monotonic()
+    with _tool_cache_lock:
+        entry = _tool_cache.get(key)
+    if entry is not None and (ttl is None or now - entry[1] < ttl):
+        STATS.record_cache(key, hit=True)
+        return entry[0]
+
+    value = check()
+    with _tool_cache_lock:
+        _tool_cache[key] = (value, now)
+    STATS.record_cache(key, hit=False)
+    return value
+
+
+def clear_tool_cache() -> None:
+    """Forget cached tool checks (e.g. after installing packages)"""
+    with _tool_cache_lock:
+        _tool_cache.clear()
+
+
+def enable_accounting() -> None:
+    """Also count processes started outside the gateway (installs an audit hook once)"""
+    global _hook_installed
+    if _hook_installed:
+        return
+
+    def hook(name, args):
+        if name == "subprocess.Popen":
+            if getattr(_local, "routed", False):
+                return
+            command, shell = args[1] or args[0], False
+        elif name == "os.system":
+            command, shell = args[0], True
+        else:
+            return
+        try:
+            program = _program(command, shell)
+        except Exception:
+            program = "?"
+        STATS.record(_caller_site(), program, None, routed=False)
+
+    sys.addaudithook(hook)
+    _hook_installed = True
+
+
+def snapshot() -> Dict[str, Any]:
+    return STATS.snapshot()
+
+
+def total_processes() -> int:
+    """Processes counted so far (routed and unrouted)"""
+    return STATS.total_processes()
+
+
+def load_stats(path: Path) -> Dict[str, Any]:
+    """Statistics file contents, or empty statistics when missing or unreadable"""
+    try:
+        data = json.loads(Path(path).read_text())
+        if isinstance(data, dict) and data.get("version") == STATS_VERSION:
+            return data
+    except (OSError, ValueError):
+        pass
+    return {"version": STATS_VERSION, "since": None, "sites": [], "cache": {}}
+
+
+def save_stats(path: Path, stats: Dict[str, Any], merge: bool = True) -> None:
+    """Write (or add to) a statistics file atomically"""
+    path = Path(path)
+    # Processes exiting together must not drop each other's counts
+    with open(path.with_name(f".{path.name}.lock"), "w") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        if merge:
+            stats = merge_stats(load_stats(path), stats)
+        temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        temp.write_text(json.dumps(stats, indent=2))
+        os.replace(temp, path)
+
+
+def persist_on_exit(path: Path) -> None:
+    """Add this process's statistics to ``path`` when it exits"""
+    global _persist_path
+    enable_accounting()
+    first = _persist_path is None
+    _persist_path = Path(path)
+    if first:
+        atexit.register(_persist)
+
+
+def _persist() -> None:
+    if _persist_path is None or not _persist_path.parent.is_dir():
+        return
+    stats = STATS.snapshot()
+    if not stats["sites"] and not stats["cache"]:
+        return
+    try:
+        save_stats(_persist_path, stats)
+    except OSError as e:
+        logger.debug(f"Could not save exec statistics to {_persist_path}: {e}")
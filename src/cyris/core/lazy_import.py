@@ -0,0 +1,56 @@
+"""
+Lazy Import Helpers
+
+Package ``__init__`` modules re-export classes from heavy submodules
+(libvirt, paramiko, boto3, rich). Importing those eagerly makes every CLI
+invocation pay for them, even read-only ones like ``cyris list``. The helpers
+here implement PEP 562 module ``__getattr__`` so the re-exports stay in place
+but are only resolved on first access.
+"""
+
+from importlib import import_module
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_exports(
+    namespace: Dict[str, Any],
+    exports: Dict[str, str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Build ``__getattr__``/``__dir__`` functions for a module.
+
+    Args:
+        namespace: ``globals()`` of the module; relative imports are anchored
+            at its ``__package__`` and resolved names are cached here so the
+            hook only runs once per name
+        exports: Mapping of exported name -> module (e.g. ``".kvm_provider"``)
+
+    Returns:
+        Tuple of (``__getattr__``, ``__dir__``) to assign at module level
+    """
+    module_name = namespace["__name__"]
+    anchor = namespace.get("__package__") or module_name
+
+    def __getattr__(name: str) -> Any:
+        source = exports.get(name)
+        if source is None:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        value = getattr(import_module(source, anchor), name)
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__
+
+
+def resolve(module_name: str, name: str) -> Any:
+    """
+    Resolve ``name`` through a module's attribute protocol.
+
+    Unlike a bare global lookup this honours both the module ``__getattr__``
+    hook and ``unittest.mock.patch`` replacements of the module attribute.
+    """
+    import sys
+    return getattr(sys.modules[module_name], name)
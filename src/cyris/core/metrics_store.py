@@ -0,0 +1,406 @@
+"""
+Columnar Metrics Store
+
+On-disk time-series storage for monitoring history. Every monitored object
+(range, VM, host) is a :class:`MetricSeries` with one memory-mapped file per
+downsampling tier:
+
+- ``raw``: samples as collected
+- ``1m``:  per-minute mean and max of the raw samples
+- ``1h``:  per-hour mean and max of the 1m buckets
+
+Each tier file is a fixed-size ring with a small header followed by the
+samples in column-major order (timestamp column, then one column per field;
+downsampled tiers add a max column per field). Buckets are rolled up when the
+first sample of the next bucket arrives, so the store survives restarts
+without keeping accumulators in memory. Queries pick the finest tier that
+still covers the requested window and read contiguous column slices; with
+numpy installed the columns are ``np.frombuffer`` views of the map and
+aggregations are vectorized (see :func:`cyris.core.ring_buffer.summarize`).
+
+Layout::
+
+    <root>/<kind>/<key>/meta.json
+    <root>/<kind>/<key>/{raw,1m,1h}.col
+"""
+
+import json
+import math
+import mmap
+import shutil
+import struct
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote, unquote
+
+from . import ring_buffer
+from .ring_buffer import summarize
+
+
+@dataclass(frozen=True)
+class Tier:
+    """Downsampling tier: ``step`` seconds per bucket (0 = raw samples)"""
+    name: str
+    step: int
+    capacity: int
+
+
+# raw: 1 day at 10 s, 1m: 7 days, 1h: 1 year
+DEFAULT_TIERS: Tuple[Tier, ...] = (
+    Tier("raw", 0, 8640),
+    Tier("1m", 60, 10080),
+    Tier("1h", 3600, 8760),
+)
+
+_MAGIC = b"CYRMCOL1"
+_HEADER = struct.Struct("<8sqqqq")  # magic, start, size, capacity, width
+_HEADER_SIZE = 64
+
+
+class _ColumnFile:
+    """Memory-mapped ring of column-major float64 rows"""
+
+    def __init__(self, path: Path, width: int, capacity: int):
+        self.path = path
+        self.width = width
+        self.capacity = capacity
+
+        size = _HEADER_SIZE + width * capacity * 8
+        fresh = not path.exists() or path.stat().st_size != size
+        with open(path, "r+b" if path.exists() else "w+b") as f:
+            if fresh:
+                f.truncate(0)
+                f.truncate(size)  # sparse on most filesystems
+            self._mm = mmap.mmap(f.fileno(), size)
+
+        magic, start, count, capacity_on_disk, width_on_disk = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or capacity_on_disk != capacity or width_on_disk != width:
+            start = count = 0
+        self._start, self._size = start, count
+        self._write_header()
+
+        self._flat = memoryview(self._mm)[_HEADER_SIZE:].cast("d")
+        self._array = None
+        if ring_buffer.NUMPY_AVAILABLE:
+            self._array = ring_buffer.np.frombuffer(
+                self._mm, dtype=ring_buffer.np.float64, count=width * capacity, offset=_HEADER_SIZE
+            ).reshape(width, capacity)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _write_header(self) -> None:
+        _HEADER.pack_into(self._mm, 0, _MAGIC, self._start, self._size, self.capacity, self.width)
+
+    def append(self, row: Sequence[float]) -> None:
+        if self._size < self.capacity:
+            index = (self._start + self._size) % self.capacity
+            self._size += 1
+        else:
+            index = self._start
+            self._start = (self._start + 1) % self.capacity
+
+        if self._array is not None:
+            self._array[:, index] = row
+        else:
+            for column, value in enumerate(row):
+                self._flat[column * self.capacity + index] = value
+        self._write_header()
+
+    def timestamp(self, logical: int) -> float:
+        return self._flat[(self._start + logical) % self.capacity]
+
+    def oldest(self) -> Optional[float]:
+        return self.timestamp(0) if self._size else None
+
+    def latest(self) -> Optional[float]:
+        return self.timestamp(self._size - 1) if self._size else None
+
+    def bisect(self, timestamp: float, right: bool = False) -> int:
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = self.timestamp(mid)
+            if value < timestamp or (right and value == timestamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def columns(self, lo: int, hi: int) -> List[Any]:
+        """Columns of logical rows ``[lo, hi)`` (numpy arrays or lists)"""
+        count = max(hi - lo, 0)
+        first = (self._start + lo) % self.capacity
+        runs = [(first, min(first + count, self.capacity))]
+        wrapped = count - (runs[0][1] - runs[0][0])
+        if wrapped > 0:
+            runs.append((0, wrapped))
+
+        if self._array is not None:
+            np = ring_buffer.np
+            return list(np.concatenate([self._array[:, a:b] for a, b in runs], axis=1))
+
+        columns = []
+        for column in range(self.width):
+            base = column * self.capacity
+            values: List[float] = []
+            for a, b in runs:
+                values.extend(self._flat[base + a:base + b])
+            columns.append(values)
+        return columns
+
+    def flush(self) -> None:
+        self._mm.flush()
+
+    def close(self) -> None:
+        self._array = None
+        self._flat.release()
+        self._mm.close()
+
+
+def _nan_reduce(values: Sequence[float], reducer: str) -> float:
+    present = [v for v in values if v == v]
+    if not present:
+        return math.nan
+    if reducer == "max":
+        return max(present)
+    return sum(present) / len(present)
+
+
+class MetricSeries:
+    """
+    Persistent time series of one monitored object.
+
+    Exposes the same ``append``/``window``/``to_dict``/``aggregate`` interface
+    as :class:`~cyris.core.ring_buffer.MetricsRingBuffer`, so it can replace
+    an in-memory buffer transparently.
+    """
+
+    def __init__(self, directory: Path, fields: Sequence[str], tiers: Sequence[Tier] = DEFAULT_TIERS):
+        self.directory = Path(directory)
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self.tiers: Tuple[Tier, ...] = tuple(tiers)
+        self._lock = threading.RLock()
+
+        meta = {"fields": list(self.fields), "tiers": [asdict(t) for t in self.tiers]}
+        meta_path = self.directory / "meta.json"
+        if meta_path.exists():
+            try:
+                existing = json.loads(meta_path.read_text())
+            except ValueError:
+                existing = None
+            if existing != meta:
+                # Schema changed: history of the old layout is not comparable
+                shutil.rmtree(self.directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if not meta_path.exists():
+            meta_path.write_text(json.dumps(meta))
+
+        width = len(self.fields) + 1
+        self._files = [
+            _ColumnFile(
+                self.directory / f"{tier.name}.col",
+                width if tier.step == 0 else 2 * len(self.fields) + 1,
+                tier.capacity
+            )
+            for tier in self.tiers
+        ]
+
+    def __len__(self) -> int:
+        return len(self._files[0])
+
+    def append(self, timestamp: float, values: Sequence[float]) -> None:
+        """Store a raw sample and roll up completed buckets"""
+        if len(values) != len(self.fields):
+            raise ValueError(f"expected {len(self.fields)} values, got {len(values)}")
+
+        with self._lock:
+            raw = self._files[0]
+            previous = raw.latest()
+            if previous is not None and timestamp < previous:
+                timestamp = previous  # Clock stepped back; keep the ring sorted
+            raw.append((timestamp, *values))
+            self._roll_up(0, previous, timestamp)
+
+    def _roll_up(self, level: int, previous: Optional[float], timestamp: float) -> None:
+        """Emit the bucket of ``previous`` into the next tier once it is complete"""
+        if previous is None or level + 1 >= len(self.tiers):
+            return
+
+        step = self.tiers[level + 1].step
+        bucket = int(previous // step)
+        if int(timestamp // step) <= bucket:
+            return
+
+        coarse = self._files[level + 1]
+        bucket_start = float(bucket * step)
+        coarse_previous = coarse.latest()
+        if coarse_previous is not None and coarse_previous >= bucket_start:
+            return  # Already emitted (e.g. before a restart)
+
+        fine = self._files[level]
+        columns = fine.columns(fine.bisect(bucket_start), fine.bisect(bucket_start + step))
+        count = len(self.fields)
+        means = columns[1:1 + count]
+        maxes = columns[1:1 + count] if level == 0 else columns[1 + count:1 + 2 * count]
+
+        coarse.append((
+            bucket_start,
+            *(_nan_reduce(column, "mean") for column in means),
+            *(_nan_reduce(column, "max") for column in maxes),
+        ))
+        self._roll_up(level + 1, coarse_previous, bucket_start)
+
+    def select_tier(self, since: Optional[float]) -> int:
+        """Index of the finest tier whose data reaches back to ``since``"""
+        if since is None:
+            return 0
+        best, best_oldest = 0, None
+        for index, column_file in enumerate(self._files):
+            oldest = column_file.oldest()
+            if oldest is None:
+                continue
+            if oldest <= since:
+                return index
+            if best_oldest is None or oldest < best_oldest:
+                best, best_oldest = index, oldest
+        return best
+
+    def _read(
+        self,
+        since: Optional[float],
+        until: Optional[float],
+        tier: Optional[str]
+    ) -> Tuple[int, List[Any]]:
+        index = self.select_tier(since) if tier is None else [t.name for t in self.tiers].index(tier)
+        column_file = self._files[index]
+        lo = 0 if since is None else column_file.bisect(since)
+        hi = len(column_file) if until is None else column_file.bisect(until, right=True)
+        return index, column_file.columns(lo, max(lo, hi))
+
+    def window(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        tier: Optional[str] = None
+    ) -> Tuple[Any, Any]:
+        """
+        Samples in ``[since, until]`` as ``(timestamps, rows)``.
+
+        Downsampled tiers return their per-bucket means. The format matches
+        ``MetricsRingBuffer.window``.
+        """
+        with self._lock:
+            _, columns = self._read(since, until, tier)
+        values = columns[1:1 + len(self.fields)]
+        if ring_buffer.NUMPY_AVAILABLE and self._files[0]._array is not None:
+            np = ring_buffer.np
+            rows = np.column_stack(values) if values else np.empty((len(columns[0]), 0))
+            return columns[0], rows
+        return columns[0], list(zip(*values))
+
+    def to_dict(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        tier: Optional[str] = None
+    ) -> Dict[str, List[float]]:
+        """Window as plain column lists (``{"timestamp": [...], field: [...]}``)"""
+        with self._lock:
+            _, columns = self._read(since, until, tier)
+        result = {"timestamp": [float(v) for v in columns[0]]}
+        for position, name in enumerate(self.fields, start=1):
+            result[name] = [float(v) for v in columns[position]]
+        return result
+
+    def aggregate(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        stats: Sequence[str] = ("mean", "max"),
+        tier: Optional[str] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Statistics per field over a window.
+
+        ``max`` uses the per-bucket maxima of downsampled tiers; the other
+        statistics are computed over bucket means.
+        """
+        with self._lock:
+            index, columns = self._read(since, until, tier)
+        count = len(self.fields)
+        result = summarize(dict(zip(self.fields, columns[1:1 + count])), stats)
+        if self.tiers[index].step and "max" in stats:
+            maxima = summarize(dict(zip(self.fields, columns[1 + count:])), ("max",))
+            for name in self.fields:
+                result[name]["max"] = maxima[name]["max"]
+        return result
+
+    def flush(self) -> None:
+        with self._lock:
+            for column_file in self._files:
+                column_file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            for column_file in self._files:
+                column_file.close()
+            self._files = []
+
+
+class MetricsStore:
+    """
+    Directory of :class:`MetricSeries`, one per (kind, key).
+
+    Args:
+        root: Base directory of the store
+        tiers: Downsampling tiers for new series
+    """
+
+    def __init__(self, root: Path, tiers: Sequence[Tier] = DEFAULT_TIERS):
+        self.root = Path(root)
+        self.tiers = tuple(tiers)
+        self._series: Dict[Tuple[str, str], MetricSeries] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, kind: str, key: str) -> Path:
+        return self.root / kind / quote(key, safe="")
+
+    def series(self, kind: str, key: str, fields: Sequence[str]) -> MetricSeries:
+        """Open (or create) the series of one monitored object"""
+        with self._lock:
+            series = self._series.get((kind, key))
+            if series is None or series.fields != tuple(fields):
+                if series is not None:
+                    series.close()
+                series = MetricSeries(self._path(kind, key), fields, self.tiers)
+                self._series[(kind, key)] = series
+            return series
+
+    def list_series(self, kind: str) -> List[str]:
+        """Keys of all stored series of a kind"""
+        directory = self.root / kind
+        if not directory.is_dir():
+            return []
+        return sorted(unquote(entry.name) for entry in directory.iterdir() if entry.is_dir())
+
+    def remove(self, kind: str, key: str) -> None:
+        """Delete the history of one object"""
+        with self._lock:
+            series = self._series.pop((kind, key), None)
+            if series is not None:
+                series.close()
+            shutil.rmtree(self._path(kind, key), ignore_errors=True)
+
+    def flush(self) -> None:
+        with self._lock:
+            for series in self._series.values():
+                series.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            for series in self._series.values():
+                series.close()
+            self._series.clear()
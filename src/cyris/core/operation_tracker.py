@@ -8,6 +8,7 @@ determination. Matches legacy logging capabilities while maintaining modern arch
 
 import threading
 import subprocess
+from . import exec_gateway
 import os
 from pathlib import Path
 from typing import Any, List, Dict, Optional, Callable, Union, Tuple
@@ -15,6 +16,7 @@ from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
 # import logging  # Replaced with unified logger
+from .tracing import span
 from .unified_logger import get_logger
 
 
@@ -288,7 +290,7 @@ class AtomicOperationTracker:
                     if isinstance(command, str):
                         # Redirect output to log file if available
                         if self.comprehensive_log_file:
-                            result = subprocess.run(
+                            result = exec_gateway.run(
                                 f"{command} >> {self.comprehensive_log_file} 2>&1",
                                 shell=True,
                                 capture_output=False,
@@ -296,7 +298,7 @@ class AtomicOperationTracker:
                                 cwd=cwd
                             )
                         else:
-                            result = subprocess.run(
+                            result = exec_gateway.run(
                                 command,
                                 shell=True,
                                 capture_output=True,
@@ -305,7 +307,7 @@ class AtomicOperationTracker:
                                 cwd=cwd
                             )
                     else:
-                        result = subprocess.run(
+                        result = exec_gateway.run(
                             command,
                             capture_output=True,
                             text=True,
@@ -468,7 +470,9 @@ def execute_command(
     cwd: Optional[str] = None
 ) -> str:
     """Execute command with comprehensive logging (like legacy os_system)"""
-    return GLOBAL_OPERATION_TRACKER.execute_system_command(command, log_context, timeout, cwd)
+    program = command.split(" ", 1)[0] if isinstance(command, str) else command[0]
+    with span(f"exec {os.path.basename(program)}", "subprocess", context=log_context or ""):
+        return GLOBAL_OPERATION_TRACKER.execute_system_command(command, log_context, timeout, cwd)
 
 
 def get_comprehensive_status() -> Dict[str, Any]:
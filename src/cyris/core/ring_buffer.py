@@ -0,0 +1,232 @@
+"""
+Fixed-size Metrics Ring Buffer
+
+Time-series storage with bounded memory for monitoring samples. Each buffer
+holds ``capacity`` rows of ``(timestamp, field values...)``; once full the
+oldest row is overwritten. Timestamps are appended in non-decreasing order,
+so a time window is located by binary search and copied out in O(window).
+
+Storage is a preallocated numpy array when numpy is installed, otherwise one
+``array('d')`` per column. :func:`summarize` computes mean/min/max/percentile
+aggregations over sample columns (vectorized with numpy).
+"""
+
+import threading
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile of sorted ``values`` (numpy's default)"""
+    position = (len(values) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(
+    columns: Dict[str, Sequence[float]],
+    stats: Sequence[str] = ("mean", "max")
+) -> Dict[str, Dict[str, float]]:
+    """
+    Aggregate metric columns.
+
+    Args:
+        columns: Mapping of field -> samples (NaN samples are ignored)
+        stats: Any of ``mean``, ``min``, ``max``, ``count`` and ``pNN``
+            percentiles (e.g. ``p95``)
+
+    Returns:
+        ``{field: {stat: value}}``; statistics of empty columns are NaN
+    """
+    result: Dict[str, Dict[str, float]] = {}
+    for name, column in columns.items():
+        if NUMPY_AVAILABLE:
+            values = np.asarray(column, dtype=np.float64)
+            values = values[~np.isnan(values)]
+            count = int(values.size)
+        else:
+            values = sorted(v for v in column if v == v)
+            count = len(values)
+
+        summary: Dict[str, float] = {}
+        for stat in stats:
+            if stat == "count":
+                summary[stat] = float(count)
+            elif not count:
+                summary[stat] = float("nan")
+            elif NUMPY_AVAILABLE:
+                if stat.startswith("p"):
+                    summary[stat] = float(np.percentile(values, float(stat[1:])))
+                else:
+                    summary[stat] = float({"mean": np.mean, "min": np.min, "max": np.max}[stat](values))
+            elif stat == "mean":
+                summary[stat] = sum(values) / count
+            elif stat == "min":
+                summary[stat] = values[0]
+            elif stat == "max":
+                summary[stat] = values[-1]
+            elif stat.startswith("p"):
+                summary[stat] = _percentile(values, float(stat[1:]))
+            else:
+                raise ValueError(f"Unknown statistic: {stat}")
+        result[name] = summary
+    return result
+
+
+class MetricsRingBuffer:
+    """
+    Ring buffer of float samples keyed by timestamp.
+
+    Args:
+        fields: Names of the value columns
+        capacity: Maximum number of samples retained
+    """
+
+    def __init__(self, fields: Sequence[str], capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self.capacity = capacity
+        self._start = 0  # Physical index of the oldest sample
+        self._size = 0
+        self._lock = threading.Lock()
+
+        width = len(self.fields) + 1  # column 0 holds the timestamp
+        if NUMPY_AVAILABLE:
+            self._data = np.full((capacity, width), np.nan, dtype=np.float64)
+        else:
+            self._columns = [array('d', bytes(8 * capacity)) for _ in range(width)]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, values: Sequence[float]) -> None:
+        """Add a sample, overwriting the oldest one when full"""
+        if len(values) != len(self.fields):
+            raise ValueError(f"expected {len(self.fields)} values, got {len(values)}")
+
+        with self._lock:
+            if self._size < self.capacity:
+                index = (self._start + self._size) % self.capacity
+                self._size += 1
+            else:
+                index = self._start
+                self._start = (self._start + 1) % self.capacity
+
+            row = (timestamp, *values)
+            if NUMPY_AVAILABLE:
+                self._data[index] = row
+            else:
+                for column, value in zip(self._columns, row):
+                    column[index] = value
+
+    def clear(self) -> None:
+        """Drop all samples"""
+        with self._lock:
+            self._start = 0
+            self._size = 0
+
+    def latest(self) -> Optional[Tuple[float, Tuple[float, ...]]]:
+        """Most recent (timestamp, values) or None when empty"""
+        with self._lock:
+            if not self._size:
+                return None
+            row = self._row((self._start + self._size - 1) % self.capacity)
+        return row[0], row[1:]
+
+    def window(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None
+    ) -> Tuple[Any, Any]:
+        """
+        Samples with ``since <= timestamp <= until``, oldest first.
+
+        Returns:
+            ``(timestamps, values)``: with numpy a 1-D and a 2-D array
+            (one row per sample), otherwise a list and a list of tuples
+        """
+        with self._lock:
+            lo = 0 if since is None else self._bisect(since, right=False)
+            hi = self._size if until is None else self._bisect(until, right=True)
+            return self._slice(lo, max(lo, hi))
+
+    def to_dict(self, since: Optional[float] = None) -> Dict[str, List[float]]:
+        """Window as plain column lists (``{"timestamp": [...], field: [...]}``)"""
+        timestamps, values = self.window(since)
+        columns: Dict[str, List[float]] = {"timestamp": [float(t) for t in timestamps]}
+        for position, name in enumerate(self.fields):
+            columns[name] = [float(row[position]) for row in values]
+        return columns
+
+    def aggregate(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        stats: Sequence[str] = ("mean", "max")
+    ) -> Dict[str, Dict[str, float]]:
+        """Statistics per field over a time window (see :func:`summarize`)"""
+        _, values = self.window(since, until)
+        if NUMPY_AVAILABLE:
+            columns = {name: values[:, i] for i, name in enumerate(self.fields)}
+        else:
+            columns = {name: [row[i] for row in values] for i, name in enumerate(self.fields)}
+        return summarize(columns, stats)
+
+    def _physical(self, logical: int) -> int:
+        return (self._start + logical) % self.capacity
+
+    def _timestamp(self, logical: int) -> float:
+        index = self._physical(logical)
+        if NUMPY_AVAILABLE:
+            return float(self._data[index, 0])
+        return self._columns[0][index]
+
+    def _bisect(self, timestamp: float, right: bool) -> int:
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = self._timestamp(mid)
+            if value < timestamp or (right and value == timestamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _row(self, index: int) -> Tuple[float, ...]:
+        if NUMPY_AVAILABLE:
+            return tuple(float(v) for v in self._data[index])
+        return tuple(column[index] for column in self._columns)
+
+    def _slice(self, lo: int, hi: int) -> Tuple[Any, Any]:
+        count = hi - lo
+        first = self._physical(lo)
+        # A window is at most two contiguous physical runs
+        runs = [(first, min(first + count, self.capacity))]
+        wrapped = count - (runs[0][1] - runs[0][0])
+        if wrapped > 0:
+            runs.append((0, wrapped))
+
+        if NUMPY_AVAILABLE:
+            if count == 0:
+                rows = np.empty((0, len(self.fields) + 1))
+            else:
+                rows = np.concatenate([self._data[a:b] for a, b in runs])
+            return rows[:, 0].copy(), rows[:, 1:].copy()
+
+        timestamps: List[float] = []
+        values: List[Tuple[float, ...]] = []
+        if count:
+            for a, b in runs:
+                timestamps.extend(self._columns[0][a:b])
+                values.extend(zip(*(column[a:b] for column in self._columns[1:])))
+        return timestamps, values
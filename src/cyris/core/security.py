@@ -6,7 +6,9 @@ import secrets
 import hashlib
 import base64
 import logging
+import os
 import subprocess
+from . import exec_gateway
 import shlex
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Union
@@ -14,6 +16,8 @@ from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+from .tracing import span
+
 
 logger = logging.getLogger(__name__)
 
@@ -66,16 +70,20 @@ class SecureCommandExecutor:
             
             self.logger.debug(f"Executing command: {sanitized_parts[0]} (with {len(sanitized_parts)-1} args)")
             
-            result = subprocess.run(
-                sanitized_parts,
-                input=input_data,
-                capture_output=True,
-                text=True,
-                timeout=self.timeout,
-                check=False,
-                env=env,
-                cwd=cwd
-            )
+            program = os.path.basename(sanitized_parts[0])
+            with span(f"exec {program}", "subprocess", program=sanitized_parts[0],
+                      argc=len(sanitized_parts) - 1) as exec_span:
+                result = exec_gateway.run(
+                    sanitized_parts,
+                    input=input_data,
+                    capture_output=True,
+                    text=True,
+                    timeout=self.timeout,
+                    check=False,
+                    env=env,
+                    cwd=cwd
+                )
+                exec_span.set_attribute("exit_code", result.returncode)
             
             success = result.returncode == 0
             if not success:
@@ -6,8 +6,12 @@ with Rich progress integration and intelligent output formatting.
 """
 
 import subprocess
+import sys
 import time
 import os
+import itertools
+import re
+import threading
 import pty
 import select
 import errno
@@ -17,6 +21,8 @@ from typing import List, Dict, Optional, Any
 from dataclasses import dataclass
 from pathlib import Path
 
+from .tracing import traced
+
 try:
     from ..core.unified_logger import get_logger
     from ..core.rich_progress import RichProgressManager
@@ -39,6 +45,58 @@ class CommandResult:
     command: Optional[List[str]] = None
 
 
+# Serializes prefixed output of commands running at the same time
+_OUTPUT_LOCK = threading.Lock()
+_LINE_END = re.compile(r"\r\n|\n|\r")
+
+
+class PrefixedOutput:
+    """
+    Line-by-line display of one command's output behind a ``[prefix]``, so
+    the output of commands running concurrently (parallel image builds)
+    interleaves by whole lines instead of by raw terminal writes.
+    
+    Progress bars redraw a line with carriage returns; of those redraws at
+    most one per ``progress_interval`` seconds is shown.
+    """
+    
+    def __init__(self, prefix: str, progress_interval: float = 2.0, stream=None):
+        self.prefix = prefix
+        self.progress_interval = progress_interval
+        self._stream = stream
+        self._buffer = ""
+        self._last_progress = float("-inf")
+    
+    def write(self, text: str) -> None:
+        self._buffer += text
+        while True:
+            match = _LINE_END.search(self._buffer)
+            # A trailing \r may be the first half of \r\n
+            if not match or (match.group() == "\r" and match.end() == len(self._buffer)):
+                break
+            line = self._buffer[:match.start()]
+            self._buffer = self._buffer[match.end():]
+            if match.group() == "\r":
+                now = time.monotonic()
+                if now - self._last_progress < self.progress_interval:
+                    continue
+                self._last_progress = now
+            self._emit(line)
+    
+    def flush(self) -> None:
+        """Show what is left of an unterminated last line"""
+        line, self._buffer = self._buffer.rstrip("\r"), ""
+        self._emit(line)
+    
+    def _emit(self, line: str) -> None:
+        if not line.strip():
+            return
+        stream = self._stream or sys.stdout
+        with _OUTPUT_LOCK:
+            stream.write(f"[{self.prefix}] {line}\n")
+            stream.flush()
+
+
 class StreamingCommandExecutor:
     """
     Universal streaming command executor with real-time output display.
@@ -49,8 +107,12 @@ class StreamingCommandExecutor:
     - Intelligent output formatting with contextual icons
     - Comprehensive timeout and error handling
     - Compatible with existing subprocess patterns
+    - Prefixed, line-by-line output for commands that run concurrently
     """
     
+    # Progress step ids stay unique when commands start in the same second
+    _step_numbers = itertools.count(1)
+    
     def __init__(self, progress_manager: Optional[RichProgressManager] = None, logger=None):
         """
         Initialize the streaming command executor.
@@ -68,6 +130,9 @@ class StreamingCommandExecutor:
         else:
             self.sudo_manager = None
     
+    @traced("exec {program}", "subprocess", attributes=lambda self, cmd, description, *args, **kwargs: {
+        "program": os.path.basename(cmd[0]) if cmd else "", "description": description
+    })
     def execute_with_realtime_output(
         self,
         cmd: List[str],
@@ -77,7 +142,8 @@ class StreamingCommandExecutor:
         cwd: Optional[str] = None,
         merge_streams: bool = True,
         use_pty: bool = True,
-        allow_password_prompt: bool = False
+        allow_password_prompt: bool = False,
+        output_prefix: Optional[str] = None
     ) -> CommandResult:
         """
         Execute command with real-time output streaming.
@@ -91,6 +157,8 @@ class StreamingCommandExecutor:
             merge_streams: Whether to merge stderr into stdout
             use_pty: Use pseudo-terminal for TTY-aware commands (default: True)
             allow_password_prompt: Allow interactive password prompts (default: False)
+            output_prefix: Show the output line by line behind this prefix
+                (for commands running concurrently) instead of raw
             
         Returns:
             CommandResult with execution details
@@ -112,9 +180,10 @@ class StreamingCommandExecutor:
                     self.logger.debug("🔐 Using bidirectional PTY with password support")
                 else:
                     self.logger.debug("✅ Using bidirectional PTY with cached sudo")
-            return self._execute_with_pty(cmd, description, timeout, env, cwd, start_time)
+            return self._execute_with_pty(cmd, description, timeout, env, cwd, start_time, output_prefix)
         else:
-            return self._execute_with_pipe(cmd, description, timeout, env, cwd, merge_streams, start_time)
+            return self._execute_with_pipe(cmd, description, timeout, env, cwd, merge_streams, start_time,
+                                           output_prefix)
     
     def _execute_with_pty(
         self,
@@ -123,12 +192,14 @@ class StreamingCommandExecutor:
         timeout: int,
         env: Optional[Dict[str, str]],
         cwd: Optional[str],
-        start_time: float
+        start_time: float,
+        output_prefix: Optional[str] = None
     ) -> CommandResult:
         """Execute command using single PTY session with intelligent sudo handling."""
         
         # Initialize progress tracking
-        step_id = f"cmd_{int(time.time())}"
+        step_id = f"cmd_{int(time.time())}_{next(self._step_numbers)}"
+        display = PrefixedOutput(output_prefix) if output_prefix else None
         if self.progress_manager:
             self.progress_manager.start_step(step_id, description)
         
@@ -212,14 +283,11 @@ class StreamingCommandExecutor:
                                     if self.logger:
                                         self.logger.warning("Sudo password prompt detected, but running in non-interactive environment")
                                     # Still display the decoded output so user sees the prompt
-                                    sys.stdout.write(decoded)
-                                    sys.stdout.flush()
+                                    self._show(decoded, display)
                                     output_buffer.append(decoded)
                             else:
                                 # Normal output - directly display (PTY handles \r correctly)
-                                import sys
-                                sys.stdout.write(decoded)
-                                sys.stdout.flush()
+                                self._show(decoded, display)
                                 output_buffer.append(decoded)
                                 
                     except OSError as e:
@@ -239,11 +307,12 @@ class StreamingCommandExecutor:
                     if not data:
                         break
                     decoded = data.decode('utf-8', errors='replace')
-                    sys.stdout.write(decoded)
-                    sys.stdout.flush()
+                    self._show(decoded, display)
                     output_buffer.append(decoded)
             except OSError:
                 pass
+            if display is not None:
+                display.flush()
             
             # Wait for process completion
             process.wait()
@@ -289,7 +358,15 @@ class StreamingCommandExecutor:
             # Fallback to pipe method
             if self.logger:
                 self.logger.info("Falling back to pipe execution method")
-            return self._execute_with_pipe(cmd, description, timeout, env, cwd, True, start_time)
+            return self._execute_with_pipe(cmd, description, timeout, env, cwd, True, start_time, output_prefix)
+    
+    @staticmethod
+    def _show(text: str, display: Optional[PrefixedOutput]) -> None:
+        if display is not None:
+            display.write(text)
+        else:
+            sys.stdout.write(text)
+            sys.stdout.flush()
     
     def _detect_sudo_prompt(self, output: str) -> bool:
         """Detect sudo password prompt in output"""
@@ -305,7 +382,8 @@ class StreamingCommandExecutor:
         env: Optional[Dict[str, str]],
         cwd: Optional[str],
         merge_streams: bool,
-        start_time: float
+        start_time: float,
+        output_prefix: Optional[str] = None
     ) -> CommandResult:
         """Execute command using traditional pipes (fallback method)."""
         
@@ -331,7 +409,8 @@ class StreamingCommandExecutor:
             raise subprocess.SubprocessError(error_msg)
         
         # Initialize progress tracking
-        step_id = f"cmd_pipe_{int(time.time())}"
+        step_id = f"cmd_pipe_{int(time.time())}_{next(self._step_numbers)}"
+        display = PrefixedOutput(output_prefix) if output_prefix else None
         if self.progress_manager:
             self.progress_manager.start_step(step_id, description)
         
@@ -362,14 +441,15 @@ class StreamingCommandExecutor:
                     output_lines.append(line_for_storage)
                     
                     # Direct raw output - exactly as the command intended
-                    import sys
-                    sys.stdout.write(line_for_display)
-                    sys.stdout.flush()
+                    self._show(line_for_display, display)
                     
                     # Debug logging (use cleaned version)
                     if self.logger:
                         self.logger.debug(f"Command output: {line_for_storage}")
             
+            if display is not None:
+                display.flush()
+            
             # If not merging streams, read stderr separately
             if not merge_streams and process.stderr:
                 stderr_output = process.stderr.read()
@@ -0,0 +1,337 @@
+"""
+Tracing
+
+Lightweight spans for range operations. While a trace is active (see
+:func:`start_trace`), provider calls, subprocesses, SSH commands, wait loops
+and creation steps record spans with range/guest attributes; parents follow
+the calling context, including work handed to thread pools through
+:func:`propagate`. Launches of any other subprocess are recorded as instant
+events. With no active trace, :func:`span` is a cheap no-op.
+
+A finished trace is written as Chrome-trace JSON (open in
+``chrome://tracing`` or https://ui.perfetto.dev) and as OTLP/JSON, the
+OpenTelemetry file format accepted by collectors and most trace viewers.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .unified_logger import get_logger
+
+logger = get_logger(__name__, "tracing")
+
+CHROME_TRACE_FILE = "trace.json"
+OTLP_TRACE_FILE = "trace.otlp.json"
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+CLIENT_CATEGORIES = ("provider", "subprocess", "ssh")
+
+
+@dataclass
+class Span:
+    """One timed operation"""
+    name: str
+    category: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    thread_id: int
+    thread_name: str
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    end_ns: Optional[int] = None
+    error: Optional[str] = None
+    instant: bool = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: Any) -> None:
+        self.error = str(error) or type(error).__name__
+
+    @property
+    def duration_ns(self) -> int:
+        return (self.end_ns or self.start_ns) - self.start_ns
+
+
+class _NoopSpan:
+    """Returned by span() when tracing is off"""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, error: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: contextvars.ContextVar = contextvars.ContextVar("cyris_current_span", default=None)
+_active_tracer: Optional["Tracer"] = None
+_audit_hook_installed = False
+
+
+class Tracer:
+    """Collects the spans of one trace"""
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = secrets.token_hex(16)
+        self.attributes = dict(attributes or {})
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        # Wall clock for export, monotonic clock for durations
+        self._wall_origin_ns = time.time_ns()
+        self._mono_origin_ns = time.perf_counter_ns()
+        self.root = self.start_span(name, "trace", self.attributes, parent=None)
+
+    def _now_ns(self) -> int:
+        return self._wall_origin_ns + (time.perf_counter_ns() - self._mono_origin_ns)
+
+    def start_span(self, name: str, category: str, attributes: Dict[str, Any],
+                   parent: Optional[Span]) -> Span:
+        thread = threading.current_thread()
+        parent = parent or getattr(self, "root", None)
+        span = Span(
+            name=name,
+            category=category,
+            trace_id=self.trace_id,
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start_ns=self._now_ns(),
+            thread_id=thread.ident or 0,
+            thread_name=thread.name,
+            attributes=dict(attributes),
+        )
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def end_span(self, span: Span) -> None:
+        span.end_ns = self._now_ns()
+
+    def event(self, name: str, category: str, attributes: Dict[str, Any]) -> None:
+        span = self.start_span(name, category, attributes, _current_span.get())
+        span.end_ns = span.start_ns
+        span.instant = True
+
+    def finish(self) -> None:
+        if self.root.end_ns is None:
+            self.end_span(self.root)
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Chrome trace event format (Perfetto-compatible)"""
+        origin = self.root.start_ns
+        pid = os.getpid()
+        tids: Dict[int, int] = {}
+        events: List[Dict[str, Any]] = []
+        with self._lock:
+            spans = list(self.spans)
+
+        for span in spans:
+            if span.thread_id not in tids:
+                tids[span.thread_id] = len(tids) + 1
+                events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tids[span.thread_id],
+                               "args": {"name": span.thread_name}})
+            args = dict(span.attributes)
+            if span.error:
+                args["error"] = span.error
+            event = {"name": span.name, "cat": span.category, "pid": pid, "tid": tids[span.thread_id],
+                     "ts": (span.start_ns - origin) / 1000, "args": args}
+            if span.instant:
+                event.update(ph="i", s="t")
+            else:
+                end_ns = span.end_ns if span.end_ns is not None else self._now_ns()
+                event.update(ph="X", dur=(end_ns - span.start_ns) / 1000)
+            events.append(event)
+
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"trace_id": self.trace_id, **{k: str(v) for k, v in self.attributes.items()}},
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OpenTelemetry OTLP/JSON (ExportTraceServiceRequest)"""
+        with self._lock:
+            spans = list(self.spans)
+
+        otlp_spans = []
+        for span in spans:
+            end_ns = span.end_ns if span.end_ns is not None else self._now_ns()
+            attributes = dict(span.attributes, **{"cyris.category": span.category,
+                                                  "thread.name": span.thread_name})
+            item = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": SPAN_KIND_CLIENT if span.category in CLIENT_CATEGORIES else SPAN_KIND_INTERNAL,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(end_ns),
+                "attributes": _otlp_attributes(attributes),
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                item["parentSpanId"] = span.parent_id
+            otlp_spans.append(item)
+
+        resource = {"service.name": "cyris", **self.attributes}
+        return {"resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes(resource)},
+            "scopeSpans": [{"scope": {"name": "cyris.tracing"}, "spans": otlp_spans}],
+        }]}
+
+    def export(self, directory: Path) -> Dict[str, Path]:
+        """Write both trace files into ``directory``"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = {"chrome": directory / CHROME_TRACE_FILE, "otlp": directory / OTLP_TRACE_FILE}
+        # Attributes are whatever callers passed; never fail an export on one
+        paths["chrome"].write_text(json.dumps(self.to_chrome_trace(), default=str))
+        paths["otlp"].write_text(json.dumps(self.to_otlp(), default=str))
+        return paths
+
+    def slowest(self, category: Optional[str] = None, limit: int = 5) -> List[Span]:
+        """Longest spans, optionally of one category"""
+        with self._lock:
+            spans = [s for s in self.spans if not s.instant and s is not self.root
+                     and (category is None or s.category == category)]
+        return sorted(spans, key=lambda s: s.duration_ns, reverse=True)[:limit]
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    result = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        result.append({"key": key, "value": typed})
+    return result
+
+
+# ----------------------------------------------------------------------
+# Public API
+# ----------------------------------------------------------------------
+
+def start_trace(name: str, **attributes: Any) -> Tracer:
+    """Start collecting spans process-wide; returns the new tracer"""
+    global _active_tracer
+    _install_subprocess_hook()
+    tracer = Tracer(name, attributes)
+    _active_tracer = tracer
+    _current_span.set(tracer.root)
+    return tracer
+
+
+def stop_trace() -> Optional[Tracer]:
+    """Stop collecting spans; returns the finished tracer"""
+    global _active_tracer
+    tracer, _active_tracer = _active_tracer, None
+    if tracer is not None:
+        tracer.finish()
+        _current_span.set(None)
+    return tracer
+
+
+def current_tracer() -> Optional[Tracer]:
+    return _active_tracer
+
+
+@contextmanager
+def span(name: str, category: str = "internal", **attributes: Any) -> Iterator[Any]:
+    """
+    Time the enclosed block as a child of the current span.
+
+    Exceptions are recorded on the span and re-raised.
+    """
+    tracer = _active_tracer
+    if tracer is None:
+        yield _NOOP_SPAN
+        return
+
+    current = tracer.start_span(name, category, attributes, _current_span.get())
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        tracer.end_span(current)
+
+
+def traced(name: str, category: str = "internal",
+           attributes: Optional[Callable[..., Dict[str, Any]]] = None) -> Callable:
+    """
+    Decorator form of :func:`span`.
+
+    Args:
+        name: Span name; ``{placeholders}`` are filled from the attributes
+        category: Span category
+        attributes: Optional callable receiving the call arguments and
+            returning span attributes
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active_tracer is None:
+                return func(*args, **kwargs)
+            attrs = attributes(*args, **kwargs) if attributes else {}
+            with span(name.format(**attrs) if attrs else name, category, **attrs):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def event(name: str, category: str = "internal", **attributes: Any) -> None:
+    """Record an instant event in the current trace"""
+    tracer = _active_tracer
+    if tracer is not None:
+        tracer.event(name, category, attributes)
+
+
+def propagate(func: Callable) -> Callable:
+    """Bind ``func`` to the caller's span so spans opened in a worker thread nest under it"""
+    if _active_tracer is None:
+        return func
+    context = contextvars.copy_context()
+    return functools.partial(context.run, func)
+
+
+def _install_subprocess_hook() -> None:
+    """Record every subprocess launch as an instant event (audit hooks cannot be removed)"""
+    global _audit_hook_installed
+    if _audit_hook_installed:
+        return
+
+    def hook(name, args):
+        if name == "subprocess.Popen" and _active_tracer is not None:
+            executable, argv = args[0], args[1]
+            if isinstance(argv, (list, tuple)) and argv:
+                program = str(argv[0])
+            else:
+                program = str(argv or executable).split(" ", 1)[0]
+            event(f"spawn {os.path.basename(program)}", "subprocess", program=program)
+
+    sys.addaudithook(hook)
+    _audit_hook_installed = True
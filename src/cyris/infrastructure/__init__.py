@@ -3,10 +3,18 @@ CyRIS Infrastructure Layer
 
 This module provides infrastructure abstractions for various virtualization
 and cloud providers, network management, and storage operations.
+
+Provider classes are resolved lazily so that importing a submodule such as
+``cyris.infrastructure.network.tunnel_manager`` does not pull in libvirt or
+boto3.
 """
 
-from .providers.base_provider import InfrastructureProvider
-from .providers.kvm_provider import KVMProvider
-from .providers.aws_provider import AWSProvider
+from ..core.lazy_import import lazy_exports
+
+__all__ = ["InfrastructureProvider", "KVMProvider", "AWSProvider"]
 
-__all__ = ["InfrastructureProvider", "KVMProvider", "AWSProvider"]
\ No newline at end of file
+__getattr__, __dir__ = lazy_exports(globals(), {
+    "InfrastructureProvider": ".providers.base_provider",
+    "KVMProvider": ".providers.kvm_provider",
+    "AWSProvider": ".providers.aws_provider",
+})
@@ -0,0 +1,175 @@
+"""
+Image Distribution Agent
+
+Receiving side of image distribution. The sender runs this file on each
+target host (``python3 -c <this source> <command> ...`` over SSH, or a local
+interpreter for directory targets), so it depends on nothing but the
+standard library and must stay importable on the hosts' Python 3.
+
+Commands:
+
+- ``have <chunk_dir>``: reads chunk hashes from stdin, one per line, and
+  writes back those already in the chunk store.
+- ``receive <chunk_dir>``: reads ``<sha256> <length>\\n<zlib data>`` frames
+  from stdin and stores each chunk after checking its hash.
+- ``assemble <chunk_dir> <output> [<max_age>]``: reads an image manifest
+  from stdin and writes the image from its chunks, skipping zero chunks so
+  the image stays sparse. The image replaces ``output`` only if its size and
+  SHA-256 match the manifest; the SHA-256 is written to stdout. With
+  ``max_age``, chunks no image has used for that many seconds are then
+  removed from the store.
+
+Chunks are stored zlib-compressed as ``<chunk_dir>/<sha256[:2]>/<sha256>``;
+their mtime is refreshed whenever ``have`` or ``assemble`` uses them.
+Exit status 3 from ``assemble`` means chunks were missing or corrupt; they
+are removed from the store and listed on stderr (``missing <sha256>``), so
+sending them again repairs the store.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+EXIT_BAD_CHUNKS = 3
+_ZERO_CHUNKS = {}
+
+
+def chunk_path(chunk_dir, digest):
+    return os.path.join(chunk_dir, digest[:2], digest)
+
+
+def _is_zero(data):
+    zero = _ZERO_CHUNKS.get(len(data))
+    if zero is None:
+        zero = _ZERO_CHUNKS.setdefault(len(data), bytes(len(data)))
+    return data == zero
+
+
+def have(chunk_dir, stdin, stdout):
+    for line in stdin:
+        digest = line.strip().decode()
+        if not digest:
+            continue
+        try:
+            os.utime(chunk_path(chunk_dir, digest))
+        except OSError:
+            continue
+        stdout.write(digest.encode() + b"\n")
+    return 0
+
+
+def receive(chunk_dir, stdin, stdout):
+    count = 0
+    while True:
+        header = stdin.readline()
+        if not header.strip():
+            break
+        digest, length = header.decode().split()
+        data = stdin.read(int(length))
+        if len(data) != int(length):
+            sys.stderr.write("truncated chunk %s\n" % digest)
+            return 1
+        if hashlib.sha256(zlib.decompress(data)).hexdigest() != digest:
+            sys.stderr.write("corrupt chunk %s in transfer\n" % digest)
+            return 1
+        path = chunk_path(chunk_dir, digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".recv-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        count += 1
+    stdout.write(("received %d\n" % count).encode())
+    return 0
+
+
+def prune(chunk_dir, max_age):
+    """Remove chunks (and abandoned partial receives) unused for ``max_age`` seconds"""
+    cutoff = time.time() - max_age
+    removed = 0
+    for prefix in os.listdir(chunk_dir) if os.path.isdir(chunk_dir) else []:
+        subdir = os.path.join(chunk_dir, prefix)
+        if not os.path.isdir(subdir):
+            continue
+        for name in os.listdir(subdir):
+            path = os.path.join(subdir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.unlink(path)
+                    removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def assemble(chunk_dir, output, stdin, stdout, max_age=None):
+    manifest = json.loads(stdin.read().decode())
+    output = os.path.abspath(output)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    fd, partial = tempfile.mkstemp(dir=os.path.dirname(output), prefix=".%s." % os.path.basename(output))
+    bad = []
+    whole = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for digest in manifest["chunks"]:
+                path = chunk_path(chunk_dir, digest)
+                try:
+                    with open(path, "rb") as chunk_file:
+                        data = zlib.decompress(chunk_file.read())
+                    os.utime(path)
+                except (OSError, zlib.error):
+                    data = None
+                if data is None or hashlib.sha256(data).hexdigest() != digest:
+                    if os.path.exists(path):
+                        os.unlink(path)
+                    if digest not in bad:
+                        bad.append(digest)
+                    continue
+                whole.update(data)
+                if _is_zero(data):
+                    f.seek(len(data), os.SEEK_CUR)
+                else:
+                    f.write(data)
+            f.truncate(manifest["size"])
+        if bad:
+            for digest in bad:
+                sys.stderr.write("missing %s\n" % digest)
+            return EXIT_BAD_CHUNKS
+        if os.path.getsize(partial) != manifest["size"] or whole.hexdigest() != manifest["sha256"]:
+            sys.stderr.write("checksum mismatch for %s\n" % output)
+            return 1
+        # mkstemp creates the file private; the hypervisor must be able to read it
+        os.chmod(partial, 0o644)
+        os.replace(partial, output)
+        partial = None
+    finally:
+        if partial is not None and os.path.exists(partial):
+            os.unlink(partial)
+    stdout.write(whole.hexdigest().encode() + b"\n")
+    if max_age is not None:
+        sys.stderr.write("pruned %d\n" % prune(chunk_dir, max_age))
+    return 0
+
+
+def main(argv):
+    stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+    command, chunk_dir = argv[0], argv[1]
+    if command == "have":
+        status = have(chunk_dir, stdin, stdout)
+    elif command == "receive":
+        status = receive(chunk_dir, stdin, stdout)
+    elif command == "assemble":
+        status = assemble(chunk_dir, argv[2], stdin, stdout, float(argv[3]) if len(argv) > 3 else None)
+    else:
+        sys.stderr.write("unknown command %s\n" % command)
+        status = 2
+    stdout.flush()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
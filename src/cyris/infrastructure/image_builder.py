@@ -8,8 +8,10 @@ Builds VM images locally using virt-builder and distributes to target hosts.
 from cyris.core.unified_logger import get_logger
 import os
 import subprocess
+from cyris.core import exec_gateway
 import tempfile
 import shutil
+import threading
 import time
 from pathlib import Path
 from typing import Dict, List, Optional, Any
@@ -22,6 +24,8 @@ from ..core.rich_progress import RichProgressManager
 from ..core.streaming_executor import StreamingCommandExecutor
 from ..core.sudo_manager import SudoPermissionManager
 from .providers.base_provider import ResourceCreationError
+from .image_distribution import DistributionReport, DistributionTarget, ImageDistributor
+from .template_cache import TemplateCache
 
 @dataclass
 class BuildResult:
@@ -43,9 +47,16 @@ class LocalImageBuilder:
     5. Create VMs on target hosts using virt-install
     """
     
-    def __init__(self, work_dir: Optional[Path] = None):
+    def __init__(self, work_dir: Optional[Path] = None, template_cache: Optional[TemplateCache] = None,
+                 distribution_bandwidth: Optional[float] = None):
         self.work_dir = work_dir or Path("/tmp/cyris-builds")
         self.work_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Local decompressed templates builds start from (None: always virt-builder)
+        self.template_cache = template_cache
+        
+        # Bytes per second sent to each host when distributing images (None: unlimited)
+        self.distribution_bandwidth = distribution_bandwidth
         self.logger = get_logger(__name__, "image_builder")
         
         # Rich progress manager (can be set by KVM provider)
@@ -61,6 +72,9 @@ class LocalImageBuilder:
         self.sudo_manager = SudoPermissionManager(
             progress_manager=self.progress_manager
         )
+        
+        # Builds may run concurrently; only one asks the user at a time
+        self._prompt_lock = threading.Lock()
     
     def set_progress_manager(self, progress_manager: RichProgressManager) -> None:
         """Set progress manager for rich progress reporting"""
@@ -71,57 +85,37 @@ class LocalImageBuilder:
         self.sudo_manager.progress_manager = progress_manager
     
     def check_local_dependencies(self) -> Dict[str, bool]:
-        """Check availability of required tools on local machine (without sudo verification)"""
+        """
+        Check availability of required tools on local machine (without sudo verification).
+        
+        PATH lookups and the supermin probe are cached for the life of the
+        process, so repeated checks (create, build, validation) do not fork.
+        """
         tools = {}
         
-        # Check libguestfs tools using 'which' (no sudo needed for basic availability check)
-        libguestfs_tools = ['virt-builder', 'virt-install', 'virt-customize']
-        for tool in libguestfs_tools:
-            try:
-                # Use 'which' to check if tool exists in PATH
-                result = subprocess.run(['which', tool], 
-                                      capture_output=True, timeout=5)
-                tools[tool] = result.returncode == 0
-                if tools[tool]:
-                    self.logger.debug(f"Tool {tool}: available")
-                else:
-                    self.logger.debug(f"Tool {tool}: not found in PATH")
-            except (subprocess.SubprocessError, FileNotFoundError):
-                tools[tool] = False
-                self.logger.debug(f"Tool {tool}: not found")
+        # libguestfs tools only need to be on PATH (no sudo needed for basic availability check)
+        for tool in ['virt-builder', 'virt-install', 'virt-customize', 'libguestfs-test-tool']:
+            tools[tool] = exec_gateway.has_tool(tool)
+            self.logger.debug(f"Tool {tool}: {'available' if tools[tool] else 'not found in PATH'}")
         
         # Check supermin specifically (critical for libguestfs functionality)
-        try:
-            result = subprocess.run(['which', 'supermin'], capture_output=True, timeout=5)
-            tools['supermin'] = result.returncode == 0
-            if tools['supermin']:
-                # Test supermin functionality
-                test_result = subprocess.run(['supermin', '--version'], 
-                                           capture_output=True, timeout=5)
-                tools['supermin'] = test_result.returncode == 0
-                
-            self.logger.debug(f"Tool supermin: {'available' if tools['supermin'] else 'not available'}")
-        except (subprocess.SubprocessError, FileNotFoundError):
-            tools['supermin'] = False
-            self.logger.debug("Tool supermin: not found")
+        tools['supermin'] = exec_gateway.has_tool('supermin') and exec_gateway.cached_check(
+            "supermin --version", self._supermin_works)
+        self.logger.debug(f"Tool supermin: {'available' if tools['supermin'] else 'not available'}")
         
-        # Check libguestfs-test-tool availability for diagnostics
+        return tools
+    
+    def _supermin_works(self) -> bool:
         try:
-            result = subprocess.run(['which', 'libguestfs-test-tool'], 
-                                  capture_output=True, timeout=5)
-            tools['libguestfs-test-tool'] = result.returncode == 0
-            self.logger.debug(f"Tool libguestfs-test-tool: {'available' if tools['libguestfs-test-tool'] else 'not available'}")
+            return exec_gateway.run(['supermin', '--version'], capture_output=True, timeout=5).returncode == 0
         except (subprocess.SubprocessError, FileNotFoundError):
-            tools['libguestfs-test-tool'] = False
-            self.logger.debug("Tool libguestfs-test-tool: not found")
-            
-        return tools
+            return False
     
     def get_available_images(self) -> List[str]:
         """Get list of available virt-builder images (without sudo for basic listing)"""
         try:
             # Try virt-builder --list without sudo first (many systems allow this)
-            result = subprocess.run(['virt-builder', '--list'], 
+            result = exec_gateway.run(['virt-builder', '--list'], 
                                   capture_output=True, text=True, timeout=30)
             if result.returncode == 0:
                 # Parse virt-builder --list output
@@ -141,8 +135,16 @@ class LocalImageBuilder:
             self.logger.warning(f"Failed to get image list: {e}")
             return []
     
-    def build_image_locally(self, guest: Guest, build_only: bool = False) -> BuildResult:
-        """Build VM image locally using virt-builder with Rich progress tracking"""
+    def build_image_locally(self, guest: Guest, build_only: bool = False,
+                            output_prefix: Optional[str] = None) -> BuildResult:
+        """
+        Build VM image locally using virt-builder with Rich progress tracking.
+        
+        Safe to call from several threads for different guests: each build
+        gets its own temporary directory, and with ``output_prefix`` its
+        streamed output is written line by line behind that prefix so that
+        concurrent builds can be told apart.
+        """
         start_time = time.time()
         
         start_msg = f"🔧 Starting image build for guest '{guest.guest_id}'"
@@ -176,105 +178,117 @@ class LocalImageBuilder:
         
         # Check if image already exists and prompt user for action
         if image_path.exists():
-            action = self._prompt_for_existing_image_action(image_path, guest)
+            with self._prompt_lock:
+                action = self._prompt_for_existing_image_action(image_path, guest)
             if action == 'skip':
                 return self._create_reuse_result(image_path, start_time)
             elif action == 'overwrite':
                 image_path.unlink()  # Remove existing image
             # Continue with normal build if overwrite chosen
         
+        build_tmp = None
         try:
-            # Build base image with virt-builder (StreamingExecutor will handle sudo intelligently)
-            build_cmd = [
-                'sudo', 'virt-builder', guest.image_name,
-                '--size', guest.disk_size,
-                '--format', 'qcow2',
-                '--output', str(image_path)
-            ]
+            # Per-build temporary directory for virt-builder's scratch disk
+            (self.work_dir / "tmp").mkdir(parents=True, exist_ok=True)
+            build_tmp = tempfile.mkdtemp(prefix=f"{guest.guest_id}-", dir=self.work_dir / "tmp")
             
             # Add libguestfs debugging environment for better error reporting
             build_env = os.environ.copy()
             build_env.update({
                 'LIBGUESTFS_DEBUG': '1',
                 'LIBGUESTFS_TRACE': '1',
-                'TMPDIR': '/tmp'  # Ensure writable temp directory
+                'TMPDIR': build_tmp  # Writable and not shared with concurrent builds
             })
             
-            cmd_msg = f"🚀 Executing virt-builder command:"
-            cmd_detail = f"    {' '.join(build_cmd)}"
-            time_msg = f"⏳ This may take several minutes for image download and creation..."
-            
-            if self.progress_manager:
-                self.progress_manager.log_info(cmd_msg)
-                self.progress_manager.log_command(' '.join(build_cmd))
-                self.progress_manager.log_info(time_msg)
-            else:
-                self.logger.info(cmd_msg)
-                self.logger.info(cmd_detail)
-                self.logger.info(time_msg)
-            
-            # Execute with progress monitoring (allow interactive sudo)
-            if self.progress_manager:
-                result = self._run_command_with_progress(build_cmd, "Building VM image", timeout=3600, env=build_env)
-            else:
-                # Use cached sudo authentication for virt-builder
-                result = subprocess.run(build_cmd, capture_output=True, text=True, timeout=None, env=build_env)
-            
-            # Enhanced debugging: Log return code immediately
-            debug_msg = f"🔍 virt-builder completed with return code: {result.returncode}"
-            if self.progress_manager:
-                self.progress_manager.log_info(debug_msg)
-            else:
-                self.logger.info(debug_msg)
+            # A cached template turns the build into a local overlay or resize
+            from_template = self.template_cache is not None and self.template_cache.create_image(
+                guest.image_name, guest.disk_size, image_path,
+                lambda cmd, description: self._run_build_command(cmd, description, build_env, output_prefix)
+            )
             
-            # Log command output for debugging
-            if result.stdout:
+            if not from_template:
+                # Build base image with virt-builder (StreamingExecutor will handle sudo intelligently)
+                build_cmd = [
+                    'sudo', 'virt-builder', guest.image_name,
+                    '--size', guest.disk_size,
+                    '--format', 'qcow2',
+                    '--output', str(image_path)
+                ]
+                if self.template_cache is not None:
+                    build_cmd += self.template_cache.source_args()
+                
+                cmd_msg = f"🚀 Executing virt-builder command:"
+                cmd_detail = f"    {' '.join(build_cmd)}"
+                time_msg = f"⏳ This may take several minutes for image download and creation..."
+                
                 if self.progress_manager:
-                    self.progress_manager.log_info(f"virt-builder output: {result.stdout[:200]}...") 
+                    self.progress_manager.log_info(cmd_msg)
+                    self.progress_manager.log_command(' '.join(build_cmd))
+                    self.progress_manager.log_info(time_msg)
                 else:
-                    self.logger.debug(f"virt-builder stdout: {result.stdout}")
-            if result.stderr:
-                # Always log stderr for failed commands, regardless of whether it's treated as progress
-                stderr_msg = f"virt-builder stderr: {result.stderr[:500]}..."
-                if result.returncode == 0:
-                    # virt-builder often outputs progress to stderr even on success
-                    if self.progress_manager:
-                        self.progress_manager.log_info(f"virt-builder progress: {result.stderr[:200]}...")
-                    else:
-                        self.logger.debug(stderr_msg)
+                    self.logger.info(cmd_msg)
+                    self.logger.info(cmd_detail)
+                    self.logger.info(time_msg)
+                
+                # Execute with progress monitoring (allow interactive sudo)
+                result = self._run_build_command(build_cmd, f"Building VM image for {guest.guest_id}",
+                                                 build_env, output_prefix)
+                
+                # Enhanced debugging: Log return code immediately
+                debug_msg = f"🔍 virt-builder completed with return code: {result.returncode}"
+                if self.progress_manager:
+                    self.progress_manager.log_info(debug_msg)
                 else:
+                    self.logger.info(debug_msg)
+                
+                # Log command output for debugging
+                if result.stdout:
                     if self.progress_manager:
-                        self.progress_manager.log_error(stderr_msg)
+                        self.progress_manager.log_info(f"virt-builder output: {result.stdout[:200]}...") 
                     else:
-                        self.logger.error(stderr_msg)
-            
-            # CRITICAL: Check for libguestfs/supermin errors even if return code is 0
-            has_libguestfs_error = (result.stderr and 
-                                  ('libguestfs error' in result.stderr or 
-                                   'supermin exited with error' in result.stderr or
-                                   'virt-resize: error' in result.stderr))
-            
-            if result.returncode != 0 or has_libguestfs_error:
-                error_reason = "exit code" if result.returncode != 0 else "libguestfs error"
-                error_msg = f"virt-builder failed ({error_reason} {result.returncode}): {result.stderr}"
-                if self.progress_manager:
-                    self.progress_manager.log_error(error_msg)
-                    if has_libguestfs_error:
-                        self.progress_manager.log_error("🔧 Libguestfs troubleshooting:")
-                        self.progress_manager.log_error("   1. sudo apt-get update && sudo apt-get install libguestfs-tools supermin")
-                        self.progress_manager.log_error("   2. Run: libguestfs-test-tool (if available)")
-                        self.progress_manager.log_error("   3. Check /tmp permissions and disk space")
+                        self.logger.debug(f"virt-builder stdout: {result.stdout}")
+                if result.stderr:
+                    # Always log stderr for failed commands, regardless of whether it's treated as progress
+                    stderr_msg = f"virt-builder stderr: {result.stderr[:500]}..."
+                    if result.returncode == 0:
+                        # virt-builder often outputs progress to stderr even on success
+                        if self.progress_manager:
+                            self.progress_manager.log_info(f"virt-builder progress: {result.stderr[:200]}...")
+                        else:
+                            self.logger.debug(stderr_msg)
                     else:
-                        self.progress_manager.log_error("💡 Try running: sudo apt-get update && sudo apt-get install libguestfs-tools")
-                else:
-                    self.logger.error(error_msg)
+                        if self.progress_manager:
+                            self.progress_manager.log_error(stderr_msg)
+                        else:
+                            self.logger.error(stderr_msg)
+                
+                # CRITICAL: Check for libguestfs/supermin errors even if return code is 0
+                has_libguestfs_error = (result.stderr and 
+                                      ('libguestfs error' in result.stderr or 
+                                       'supermin exited with error' in result.stderr or
+                                       'virt-resize: error' in result.stderr))
+                
+                if result.returncode != 0 or has_libguestfs_error:
+                    error_reason = "exit code" if result.returncode != 0 else "libguestfs error"
+                    error_msg = f"virt-builder failed ({error_reason} {result.returncode}): {result.stderr}"
+                    if self.progress_manager:
+                        self.progress_manager.log_error(error_msg)
+                        if has_libguestfs_error:
+                            self.progress_manager.log_error("🔧 Libguestfs troubleshooting:")
+                            self.progress_manager.log_error("   1. sudo apt-get update && sudo apt-get install libguestfs-tools supermin")
+                            self.progress_manager.log_error("   2. Run: libguestfs-test-tool (if available)")
+                            self.progress_manager.log_error("   3. Check /tmp permissions and disk space")
+                        else:
+                            self.progress_manager.log_error("💡 Try running: sudo apt-get update && sudo apt-get install libguestfs-tools")
+                    else:
+                        self.logger.error(error_msg)
+                    
+                    return BuildResult(
+                        success=False,
+                        error_message=error_msg,
+                        build_time=time.time() - start_time
+                    )
                 
-                return BuildResult(
-                    success=False,
-                    error_message=error_msg,
-                    build_time=time.time() - start_time
-                )
-            
             # Check if output file was created
             if not image_path.exists():
                 error_msg = f"virt-builder succeeded but output file not found: {image_path}"
@@ -367,8 +381,21 @@ class LocalImageBuilder:
                 error_message=f"Build failed: {str(e)}",
                 build_time=time.time() - start_time
             )
+        finally:
+            if build_tmp:
+                shutil.rmtree(build_tmp, ignore_errors=True)
+    
+    def _run_build_command(self, cmd: List[str], description: str, env: Optional[Dict[str, str]] = None,
+                           output_prefix: Optional[str] = None):
+        """Run one build step, streamed when there is a progress display"""
+        if self.progress_manager:
+            return self._run_command_with_progress(cmd, description, timeout=3600, env=env,
+                                                   output_prefix=output_prefix)
+        # Use cached sudo authentication for virt-builder
+        return exec_gateway.run(cmd, capture_output=True, text=True, timeout=None, env=env)
     
-    def _run_command_with_progress(self, cmd: List[str], description: str, timeout = 300, env=None):
+    def _run_command_with_progress(self, cmd: List[str], description: str, timeout = 300, env=None,
+                                   output_prefix: Optional[str] = None):
         """Run a command with real-time output streaming using StreamingCommandExecutor"""
         return self.command_executor.execute_with_realtime_output(
             cmd=cmd,
@@ -377,32 +404,30 @@ class LocalImageBuilder:
             env=env,
             merge_streams=True,  # Merge stderr into stdout for unified display
             use_pty=True,  # Use PTY for better progress bar behavior
-            allow_password_prompt=True  # Allow sudo password prompts when needed
+            allow_password_prompt=True,  # Allow sudo password prompts when needed
+            output_prefix=output_prefix
         )
     
     def distribute_image_to_host(self, image_path: str, target_host: Host, 
                                remote_path: str) -> bool:
-        """Copy built image to target host using scp"""
-        try:
-            scp_cmd = [
-                'scp', '-o', 'StrictHostKeyChecking=no',
-                image_path,
-                f"{target_host.account}@{target_host.mgmt_addr}:{remote_path}"
-            ]
-            
-            self.logger.info(f"Distributing image to {target_host.host_id}: {image_path} -> {remote_path}")
-            result = subprocess.run(scp_cmd, capture_output=True, text=True, timeout=300)
-            
-            if result.returncode == 0:
-                self.logger.info(f"Image distributed successfully to {target_host.host_id}")
-                return True
+        """Copy built image to target host, sending only chunks it does not have yet"""
+        return self.distribute_image(image_path, [target_host], remote_path).succeeded
+    
+    def distribute_image(self, image_path: str, target_hosts: List[Host],
+                         remote_path: str) -> DistributionReport:
+        """Copy built image to all target hosts concurrently, verified by checksum"""
+        self.logger.info(f"Distributing image to {len(target_hosts)} hosts: {image_path} -> {remote_path}")
+        distributor = ImageDistributor(bandwidth=self.distribution_bandwidth)
+        report = distributor.distribute(
+            image_path, [DistributionTarget.host(host, remote_path) for host in target_hosts]
+        )
+        for result in report.results.values():
+            if result.ok:
+                self.logger.info(f"Image distributed successfully to {result.target} "
+                                 f"({result.chunks_sent}/{result.chunks_total} chunks sent)")
             else:
-                self.logger.error(f"SCP failed: {result.stderr}")
-                return False
-                
-        except subprocess.SubprocessError as e:
-            self.logger.error(f"Failed to distribute image: {e}")
-            return False
+                self.logger.error(f"Image distribution to {result.target} failed: {result.error}")
+        return report
     
     def _validate_build_requirements(self, guest: Guest) -> bool:
         """Validate that all requirements for building are met"""
@@ -498,7 +523,7 @@ class LocalImageBuilder:
             
             self.logger.debug(f"Adding account: {account}")
             # Use cached sudo authentication for virt-customize
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+            result = exec_gateway.run(cmd, capture_output=True, text=True, timeout=120)
             
             if result.returncode != 0:
                 self.logger.error(f"Failed to add account {account}: {result.stderr}")
@@ -525,7 +550,7 @@ class LocalImageBuilder:
             
             self.logger.debug(f"Modifying account: {account}")
             # Use cached sudo authentication for virt-customize
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+            result = exec_gateway.run(cmd, capture_output=True, text=True, timeout=120)
             
             if result.returncode != 0:
                 self.logger.error(f"Failed to modify account {account}: {result.stderr}")
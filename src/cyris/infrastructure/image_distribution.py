@@ -0,0 +1,428 @@
+"""
+Image Distribution
+
+Copies built images to the hypervisor hosts of a multi-host range. Instead
+of sending the whole image to every host (as the legacy ``parallel-scp``
+step did), an image is split into fixed-size chunks named by their SHA-256
+(the manifest). Each host keeps a chunk store next to its images and is
+asked which chunks it already has; only the others are sent, zlib-compressed,
+in one stream per host. The host then assembles the image from its store and
+the result is verified against the manifest's SHA-256. Rebuilding an image
+or distributing a sibling image built from the same template therefore only
+sends the chunks that changed.
+
+Images with a qcow2 backing file (overlays on a cached template) are
+flattened with ``qemu-img convert`` first, since the backing file does not
+exist on the other hosts. Chunks no distributed image has used for
+``chunk_ttl`` seconds are pruned from a host's store after each transfer;
+until then the store holds up to one extra copy of the data of the images
+distributed to that host.
+
+Hosts are served concurrently, each with an optional bandwidth limit. The
+receiving side is :mod:`cyris.infrastructure.distribution_agent`, run on the
+host with its own ``python3`` (over SSH), or locally for directory targets,
+which stand in for hosts in tests and single-machine setups.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import shlex
+import struct
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from cyris.core import exec_gateway
+from cyris.core.unified_logger import get_logger
+
+from . import distribution_agent
+from .distribution_agent import EXIT_BAD_CHUNKS
+
+logger = get_logger(__name__, "image_distribution")
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+CHUNK_DIR = ".cyris-chunks"
+MANIFEST_SUFFIX = ".manifest.json"
+DEFAULT_CHUNK_TTL = 14 * 24 * 3600
+QCOW2_MAGIC = b"QFI\xfb"
+
+_AGENT_SOURCE = inspect.getsource(distribution_agent)
+
+
+@dataclass
+class ImageManifest:
+    """Chunk hashes of an image"""
+    size: int
+    chunk_size: int
+    chunks: List[str]
+    sha256: str
+    mtime_ns: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ImageManifest":
+        return cls(**data)
+
+
+def build_manifest(image_path: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE) -> ImageManifest:
+    """
+    Manifest of an image, reusing ``<image>.manifest.json`` while the image is unchanged.
+    """
+    image_path = Path(image_path)
+    stat = image_path.stat()
+    cache = image_path.with_name(image_path.name + MANIFEST_SUFFIX)
+    try:
+        with open(cache) as f:
+            cached = ImageManifest.from_dict(json.load(f))
+        if (cached.size, cached.mtime_ns, cached.chunk_size) == (stat.st_size, stat.st_mtime_ns, chunk_size):
+            return cached
+    except (OSError, ValueError, TypeError):
+        pass
+
+    chunks = []
+    whole = hashlib.sha256()
+    with open(image_path, "rb") as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            whole.update(data)
+            chunks.append(hashlib.sha256(data).hexdigest())
+    manifest = ImageManifest(size=stat.st_size, chunk_size=chunk_size, chunks=chunks,
+                             sha256=whole.hexdigest(), mtime_ns=stat.st_mtime_ns)
+    try:
+        with open(cache, "w") as f:
+            json.dump(manifest.to_dict(), f)
+    except OSError as e:
+        logger.debug(f"Could not cache manifest of {image_path}: {e}")
+    return manifest
+
+
+def backing_file(image_path: Union[str, Path]) -> Optional[str]:
+    """Backing file named in a qcow2 image header, None for standalone images"""
+    with open(image_path, "rb") as f:
+        header = f.read(20)
+        if len(header) < 20 or header[:4] != QCOW2_MAGIC:
+            return None
+        offset, size = struct.unpack(">QI", header[8:20])
+        if not offset or not size:
+            return None
+        f.seek(offset)
+        return f.read(size).decode(errors="replace")
+
+
+def _read_into(output: Dict[str, bytes], name: str, stream: Any) -> None:
+    output[name] = stream.read()
+
+
+@dataclass
+class DistributionTarget:
+    """
+    Where one copy of the image goes.
+
+    ``ssh`` is the ssh command line up to and including the destination
+    (``None`` runs the agent locally). ``chunk_dir`` defaults to a chunk store
+    next to ``path``, shared by all images distributed to that directory.
+    """
+    name: str
+    path: str
+    ssh: Optional[List[str]] = None
+    chunk_dir: Optional[str] = None
+
+    def __post_init__(self):
+        if self.chunk_dir is None:
+            self.chunk_dir = os.path.join(os.path.dirname(self.path), CHUNK_DIR)
+
+    @classmethod
+    def directory(cls, directory: Union[str, Path], path: Union[str, Path]) -> "DistributionTarget":
+        """A local directory standing in for a host; ``path`` is relative to it"""
+        directory = Path(directory)
+        return cls(name=str(directory), path=str(directory / path))
+
+    @classmethod
+    def host(cls, host: Any, path: str, ssh_options: Optional[List[str]] = None) -> "DistributionTarget":
+        """A hypervisor host reached over SSH as its account"""
+        options = ssh_options if ssh_options is not None else [
+            '-o', 'BatchMode=yes', '-o', 'StrictHostKeyChecking=no'
+        ]
+        return cls(name=host.host_id, path=path,
+                   ssh=['ssh'] + options + [f"{host.account}@{host.mgmt_addr}"])
+
+    def agent_command(self, *args: str) -> List[str]:
+        if self.ssh is None:
+            return [sys.executable, "-c", _AGENT_SOURCE] + list(args)
+        # ssh hands the remote shell a single command line
+        return self.ssh + [" ".join(shlex.quote(a) for a in ["python3", "-c", _AGENT_SOURCE] + list(args))]
+
+
+@dataclass
+class TransferResult:
+    """Outcome of distributing an image to one target"""
+    target: str
+    status: str                     # "ok" or "failed"
+    chunks_total: int = 0
+    chunks_sent: int = 0
+    bytes_sent: int = 0
+    sha256: Optional[str] = None
+    error: Optional[str] = None
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+@dataclass
+class DistributionReport:
+    """Per-target results of distributing one image"""
+    image: str
+    size: int = 0
+    results: Dict[str, TransferResult] = field(default_factory=dict)
+    duration: float = 0.0
+
+    @property
+    def failed(self) -> List[TransferResult]:
+        return [r for r in self.results.values() if not r.ok]
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.failed
+
+    @property
+    def bytes_sent(self) -> int:
+        return sum(r.bytes_sent for r in self.results.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "image": self.image,
+            "size": self.size,
+            "succeeded": self.succeeded,
+            "duration": round(self.duration, 3),
+            "bytes_sent": self.bytes_sent,
+            "targets": [asdict(r) for r in self.results.values()],
+        }
+
+
+class RateLimiter:
+    """Token bucket holding a stream to ``rate`` bytes per second"""
+
+    def __init__(self, rate: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self._clock = clock
+        self._sleep = sleep
+        self._allowance = rate
+        self._last = clock()
+
+    def consume(self, nbytes: int) -> None:
+        now = self._clock()
+        # At most one second of burst
+        self._allowance = min(self.rate, self._allowance + (now - self._last) * self.rate)
+        self._last = now
+        self._allowance -= nbytes
+        if self._allowance < 0:
+            self._sleep(-self._allowance / self.rate)
+
+
+class DistributionError(Exception):
+    """A step of a transfer to one target failed"""
+
+    def __init__(self, message: str, missing: Optional[List[str]] = None):
+        super().__init__(message)
+        self.missing = missing or []
+
+
+class ImageDistributor:
+    """
+    Chunk-deduplicated image copies to several targets at once.
+
+    Args:
+        max_workers: Targets served concurrently
+        bandwidth: Bytes per second sent to each target (None: unlimited)
+        chunk_size: Manifest chunk size
+        compress_level: zlib level of sent chunks
+        timeout: Seconds allowed for the agent's short commands, and for a
+            chunk transfer to go without progress before it is killed
+        chunk_ttl: Seconds a chunk unused by any distributed image stays in
+            a host's chunk store (None: never pruned)
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        bandwidth: Optional[float] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        compress_level: int = 3,
+        timeout: float = 600,
+        chunk_ttl: Optional[float] = DEFAULT_CHUNK_TTL
+    ):
+        self.max_workers = max_workers
+        self.bandwidth = bandwidth
+        self.chunk_size = chunk_size
+        self.compress_level = compress_level
+        self.timeout = timeout
+        self.chunk_ttl = chunk_ttl
+        self.logger = logger
+
+    def distribute(self, image_path: Union[str, Path], targets: Iterable[DistributionTarget]) -> DistributionReport:
+        """Copy ``image_path`` to every target, verified by checksum"""
+        started = time.monotonic()
+        image_path = Path(image_path)
+        targets = list(targets)
+        report = DistributionReport(image=str(image_path))
+        if not targets:
+            return report
+
+        try:
+            flat = self._flatten(image_path)
+        except (DistributionError, OSError, subprocess.SubprocessError) as e:
+            self.logger.error(f"Cannot distribute {image_path.name}: {e}")
+            for target in targets:
+                report.results[target.name] = TransferResult(target=target.name, status="failed", error=str(e))
+            return report
+        source = flat or image_path
+        try:
+            manifest = build_manifest(source, self.chunk_size)
+            report.size = manifest.size
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(targets)))) as pool:
+                for result in pool.map(lambda target: self._transfer(source, manifest, target), targets):
+                    report.results[result.target] = result
+        finally:
+            if flat is not None:
+                flat.unlink(missing_ok=True)
+                flat.with_name(flat.name + MANIFEST_SUFFIX).unlink(missing_ok=True)
+
+        report.duration = time.monotonic() - started
+        self.logger.info(f"Distributed {image_path.name} ({manifest.size} bytes) to {len(targets)} targets "
+                         f"in {report.duration:.1f}s: {report.bytes_sent} bytes sent, "
+                         f"{len(report.failed)} failed")
+        return report
+
+    def _flatten(self, image_path: Path) -> Optional[Path]:
+        """Standalone copy of an image that has a backing file, None if it has none"""
+        backing = backing_file(image_path)
+        if backing is None:
+            return None
+        flat = image_path.with_name(f".{image_path.name}.flat")
+        self.logger.info(f"{image_path.name} is backed by {backing}, flattening it for distribution")
+        result = exec_gateway.run(["qemu-img", "convert", "-O", "qcow2", str(image_path), str(flat)],
+                                  capture_output=True, text=True, timeout=None)
+        if result.returncode != 0:
+            flat.unlink(missing_ok=True)
+            raise DistributionError(f"could not flatten {image_path.name}: {result.stderr.strip()}")
+        return flat
+
+    def _transfer(self, image_path: Path, manifest: ImageManifest, target: DistributionTarget) -> TransferResult:
+        begin = time.monotonic()
+        result = TransferResult(target=target.name, status="failed", chunks_total=len(manifest.chunks))
+        try:
+            # A second round re-sends chunks the target found corrupt
+            for attempt in range(2):
+                try:
+                    self._send_missing(image_path, manifest, target, result)
+                    result.sha256 = self._assemble(manifest, target)
+                    break
+                except DistributionError as e:
+                    if not e.missing or attempt:
+                        raise
+                    self.logger.warning(f"{target.name}: {len(e.missing)} chunks missing or corrupt, re-sending")
+            if result.sha256 != manifest.sha256:
+                raise DistributionError(f"checksum mismatch: {result.sha256} != {manifest.sha256}")
+            result.status = "ok"
+        except (DistributionError, OSError, subprocess.SubprocessError) as e:
+            result.error = str(e)
+            self.logger.error(f"Distributing {image_path.name} to {target.name} failed: {e}")
+        result.duration = time.monotonic() - begin
+        return result
+
+    def _agent(self, target: DistributionTarget, args: List[str], data: bytes) -> subprocess.CompletedProcess:
+        return exec_gateway.run(target.agent_command(*args), input=data, capture_output=True, timeout=self.timeout)
+
+    def _send_missing(self, image_path: Path, manifest: ImageManifest, target: DistributionTarget,
+                      result: TransferResult) -> None:
+        wanted = list(dict.fromkeys(manifest.chunks))
+        present = self._agent(target, ["have", target.chunk_dir], "\n".join(wanted).encode())
+        if present.returncode != 0:
+            raise DistributionError(f"chunk query failed: {present.stderr.decode().strip()}")
+        have = set(present.stdout.decode().split())
+        missing = [digest for digest in wanted if digest not in have]
+        if not missing:
+            return
+
+        # Offset of the first occurrence of each chunk in the image
+        offsets: Dict[str, int] = {}
+        for index, digest in enumerate(manifest.chunks):
+            offsets.setdefault(digest, index * manifest.chunk_size)
+        limiter = RateLimiter(self.bandwidth) if self.bandwidth else None
+
+        process = exec_gateway.popen(target.agent_command("receive", target.chunk_dir),
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        # Drained while sending, so a chatty agent (or ssh) cannot block on a full pipe
+        output: Dict[str, bytes] = {}
+        readers = [threading.Thread(target=_read_into, args=(output, name, stream), daemon=True)
+                   for name, stream in (("stdout", process.stdout), ("stderr", process.stderr))]
+        for reader in readers:
+            reader.start()
+        # A stalled target is killed, which also unblocks the writes and reads below
+        progress = [time.monotonic()]
+        done = threading.Event()
+
+        def watchdog() -> None:
+            while not done.wait(min(1.0, self.timeout)):
+                if time.monotonic() - progress[0] > self.timeout:
+                    process.expire()
+                    return
+
+        threading.Thread(target=watchdog, daemon=True).start()
+        try:
+            with open(image_path, "rb") as image:
+                for digest in missing:
+                    image.seek(offsets[digest])
+                    data = zlib.compress(image.read(manifest.chunk_size), self.compress_level)
+                    if limiter:
+                        limiter.consume(len(data))
+                    process.stdin.write(f"{digest} {len(data)}\n".encode() + data)
+                    progress[0] = time.monotonic()
+                    result.chunks_sent += 1
+                    result.bytes_sent += len(data)
+            process.stdin.write(b"\n")
+        except BrokenPipeError:
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+        try:
+            for reader in readers:
+                reader.join()
+            returncode = process.wait()
+        finally:
+            done.set()
+        if process.expired:
+            raise DistributionError(f"chunk transfer made no progress for {self.timeout}s")
+        if returncode != 0:
+            raise DistributionError(f"chunk transfer failed: {output.get('stderr', b'').decode().strip()}")
+
+    def _assemble(self, manifest: ImageManifest, target: DistributionTarget) -> str:
+        args = ["assemble", target.chunk_dir, target.path]
+        if self.chunk_ttl is not None:
+            args.append(str(self.chunk_ttl))
+        done = self._agent(target, args, json.dumps(manifest.to_dict()).encode())
+        stderr = done.stderr.decode()
+        if done.returncode == EXIT_BAD_CHUNKS:
+            missing = [line.split()[1] for line in stderr.splitlines() if line.startswith("missing ")]
+            raise DistributionError(f"{len(missing)} chunks missing or corrupt", missing)
+        if done.returncode != 0:
+            raise DistributionError(f"assembly failed: {stderr.strip()}")
+        return done.stdout.decode().strip()
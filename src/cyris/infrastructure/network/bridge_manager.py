@@ -3,22 +3,35 @@ Bridge Manager
 
 This module manages network bridges for cyber range networking,
 including creation, configuration, and cleanup of virtual network bridges.
+
+All link and address changes for a range are compiled into one
+:class:`NetworkPlan` and applied with a single ``ip -batch`` invocation, so
+a topology costs one process launch instead of several per bridge. Planning
+refuses bridges that already exist on the host, a failed batch is rolled
+back by deleting the bridges it created, and plans can be compiled (dry
+run) without root.
 """
 
 # import logging  # Replaced with unified logger
 from cyris.core.unified_logger import get_logger
 import logging  # Keep for type annotations
 import subprocess
+from cyris.core import exec_gateway
 import ipaddress
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 import json
+import re
 import time
 
 from ..providers.base_provider import InfrastructureError
 
 
+# Linux interface names are limited to IFNAMSIZ - 1 characters
+MAX_INTERFACE_NAME = 15
+
+
 @dataclass
 class BridgeConfig:
     """Configuration for a network bridge"""
@@ -48,6 +61,82 @@ class BridgeInfo:
     metadata: Optional[Dict[str, Any]] = None
 
 
+@dataclass
+class PlannedBridge:
+    """One bridge of a network plan"""
+    bridge_name: str
+    network_name: str
+    config: BridgeConfig
+    gateway_ip: Optional[str] = None
+    prefixlen: Optional[int] = None
+    ports: List[str] = field(default_factory=list)
+
+    def create_commands(self) -> List[str]:
+        """``ip -batch`` lines creating and configuring the bridge"""
+        config = self.config
+        add = f"link add name {self.bridge_name}"
+        if config.mtu != 1500:
+            add += f" mtu {config.mtu}"
+        add += " type bridge"
+        if config.stp_enabled:
+            add += (
+                f" stp_state 1 forward_delay {config.forward_delay}"
+                f" hello_time {config.hello_time} max_age {config.max_age}"
+            )
+
+        commands = [add]
+        if self.gateway_ip:
+            commands.append(f"addr add {self.gateway_ip}/{self.prefixlen} dev {self.bridge_name}")
+        commands.extend(f"link set dev {port} master {self.bridge_name}" for port in self.ports)
+        commands.append(f"link set dev {self.bridge_name} up")
+        return commands
+
+
+@dataclass
+class NetworkPlan:
+    """
+    Compiled network plumbing for one range.
+
+    ``commands`` is applied as a single ``ip -batch`` script;
+    ``rollback_commands`` undoes it (deleting a bridge also releases its
+    ports and addresses) and is run with ``ip -force`` so bridges that were
+    never created are skipped. ``rollback_until`` undoes only the bridges a
+    batch that failed at a given line had created.
+    """
+    range_id: str
+    bridges: List[PlannedBridge] = field(default_factory=list)
+
+    @property
+    def bridge_names(self) -> List[str]:
+        return [bridge.bridge_name for bridge in self.bridges]
+
+    @property
+    def commands(self) -> List[str]:
+        return [command for bridge in self.bridges for command in bridge.create_commands()]
+
+    @property
+    def rollback_commands(self) -> List[str]:
+        return self.rollback_until(None)
+
+    def created_before(self, line: Optional[int]) -> List[str]:
+        """Bridges whose ``link add`` precedes batch line ``line`` (1-based; None: all)"""
+        names, first_line = [], 1
+        for bridge in self.bridges:
+            if line is not None and first_line >= line:
+                break
+            names.append(bridge.bridge_name)
+            first_line += len(bridge.create_commands())
+        return names
+
+    def rollback_until(self, line: Optional[int]) -> List[str]:
+        """Commands deleting the bridges created before batch line ``line`` failed"""
+        return [f"link del {name}" for name in reversed(self.created_before(line))]
+
+    def script(self) -> str:
+        """The batch script as fed to ``ip -batch -``"""
+        return "".join(f"{command}\n" for command in self.commands)
+
+
 class BridgeManager:
     """
     Network bridge management service.
@@ -118,82 +207,167 @@ class BridgeManager:
         Raises:
             InfrastructureError: If bridge creation fails
         """
-        bridge_name = f"{self.bridge_prefix}-{range_id}-{network_name}"
-        
-        if bridge_name in self._bridges:
-            raise InfrastructureError(f"Bridge {bridge_name} already exists")
+        plan = self.plan_range_network(range_id, {network_name: config})
+        bridge_name = plan.bridge_names[0]
         
         self.logger.info(f"Creating bridge {bridge_name} with CIDR {config.network_cidr}")
+        self.apply_network_plan(plan)
+        return bridge_name
+    
+    def plan_range_network(
+        self,
+        range_id: str,
+        networks: Dict[str, BridgeConfig],
+        ports: Optional[Dict[str, List[str]]] = None
+    ) -> NetworkPlan:
+        """
+        Compile the bridges, addresses and ports of a range without changing
+        the host (dry run); the host's links are only listed.
         
-        try:
-            # Create the bridge
-            self._run_command(["ip", "link", "add", "name", bridge_name, "type", "bridge"])
-            
-            # Configure bridge parameters
-            if config.stp_enabled:
-                self._run_command(["ip", "link", "set", "dev", bridge_name, "type", "bridge", "stp_state", "1"])
-                self._run_command(["ip", "link", "set", "dev", bridge_name, "type", "bridge", 
-                                "forward_delay", str(config.forward_delay)])
-                self._run_command(["ip", "link", "set", "dev", bridge_name, "type", "bridge", 
-                                "hello_time", str(config.hello_time)])
-                self._run_command(["ip", "link", "set", "dev", bridge_name, "type", "bridge", 
-                                "max_age", str(config.max_age)])
-            
-            # Set MTU
-            if config.mtu != 1500:
-                self._run_command(["ip", "link", "set", "dev", bridge_name, "mtu", str(config.mtu)])
-            
-            # Bring bridge up
-            self._run_command(["ip", "link", "set", "dev", bridge_name, "up"])
-            
-            # Assign IP address if specified
-            gateway_ip = config.gateway_ip
-            if not gateway_ip and config.network_cidr:
-                # Use first IP in the network as gateway
-                network = ipaddress.ip_network(config.network_cidr, strict=False)
-                gateway_ip = str(list(network.hosts())[0])
+        Args:
+            range_id: Cyber range identifier
+            networks: Network name -> bridge configuration
+            ports: Optional network name -> interfaces to enslave
+        
+        Returns:
+            The compiled plan
+        
+        Raises:
+            InfrastructureError: If a bridge exists or a configuration is invalid
+        """
+        ports = ports or {}
+        unknown = set(ports) - set(networks)
+        if unknown:
+            raise InfrastructureError(f"Ports given for unknown networks: {sorted(unknown)}")
+        
+        plan = NetworkPlan(range_id=range_id)
+        for network_name, config in networks.items():
+            bridge_name = f"{self.bridge_prefix}-{range_id}-{network_name}"
+            if bridge_name in self._bridges:
+                raise InfrastructureError(f"Bridge {bridge_name} already exists")
+            if len(bridge_name) > MAX_INTERFACE_NAME:
+                raise InfrastructureError(
+                    f"Bridge name {bridge_name} exceeds {MAX_INTERFACE_NAME} characters"
+                )
             
-            if gateway_ip:
-                self._run_command(["ip", "addr", "add", f"{gateway_ip}/{network.prefixlen}", 
-                                 "dev", bridge_name])
+            gateway_ip, prefixlen = config.gateway_ip, None
+            if config.network_cidr:
+                try:
+                    network = ipaddress.ip_network(config.network_cidr, strict=False)
+                except ValueError as e:
+                    raise InfrastructureError(f"Invalid CIDR for {network_name}: {e}")
+                prefixlen = network.prefixlen
+                if not gateway_ip:
+                    # Use first IP in the network as gateway
+                    gateway_ip = str(next(network.hosts()))
+            elif gateway_ip:
+                raise InfrastructureError(f"Gateway IP for {network_name} requires a network CIDR")
             
-            # Create bridge info
-            bridge_info = BridgeInfo(
+            plan.bridges.append(PlannedBridge(
                 bridge_name=bridge_name,
-                bridge_id=bridge_name,  # For Linux bridges, name is the ID
-                ip_address=gateway_ip,
-                network_cidr=config.network_cidr,
+                network_name=network_name,
+                config=config,
+                gateway_ip=gateway_ip,
+                prefixlen=prefixlen,
+                ports=list(ports.get(network_name, []))
+            ))
+        
+        # A bridge created outside this manager would make ``link add`` fail
+        # and the rollback would delete it
+        existing = self._existing_links()
+        on_host = [name for name in plan.bridge_names if name in existing]
+        if on_host:
+            raise InfrastructureError(f"Bridges already exist on the host: {', '.join(on_host)}")
+        
+        return plan
+    
+    def create_range_network(
+        self,
+        range_id: str,
+        networks: Dict[str, BridgeConfig],
+        ports: Optional[Dict[str, List[str]]] = None,
+        dry_run: bool = False
+    ) -> NetworkPlan:
+        """
+        Create all bridges of a range in one batch.
+        
+        Args:
+            range_id: Cyber range identifier
+            networks: Network name -> bridge configuration
+            ports: Optional network name -> interfaces to enslave
+            dry_run: Only compile the plan
+        
+        Returns:
+            The (applied unless dry_run) plan
+        
+        Raises:
+            InfrastructureError: If compilation or application fails
+        """
+        plan = self.plan_range_network(range_id, networks, ports)
+        if dry_run:
+            self.logger.info(
+                f"Dry run: {len(plan.commands)} commands for {len(plan.bridges)} bridges"
+            )
+        else:
+            self.apply_network_plan(plan)
+        return plan
+    
+    def apply_network_plan(self, plan: NetworkPlan) -> List[str]:
+        """
+        Apply a compiled plan with a single ``ip -batch``; on failure the
+        bridges whose ``link add`` ran before the failed line are deleted again.
+        
+        Args:
+            plan: Plan from :meth:`plan_range_network`
+        
+        Returns:
+            Names of the created bridges
+        
+        Raises:
+            InfrastructureError: If the batch fails (after rollback)
+        """
+        if not plan.bridges:
+            return []
+        
+        commands = plan.commands
+        result = self._run_batch(commands)
+        if result.returncode != 0:
+            failed = self._failed_batch_command(result.stderr, commands)
+            self.logger.error(f"Network plan for range {plan.range_id} failed at: {failed}")
+            rollback_commands = plan.rollback_until(self._failed_batch_line(result.stderr, commands))
+            if rollback_commands:
+                rollback = self._run_batch(rollback_commands, force=True)
+                if rollback.returncode != 0:
+                    self.logger.warning(f"Rollback incomplete: {rollback.stderr.strip()}")
+            raise InfrastructureError(
+                f"Bridge creation failed at '{failed}': {result.stderr.strip()}"
+            )
+        
+        created_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        for bridge in plan.bridges:
+            bridge_info = BridgeInfo(
+                bridge_name=bridge.bridge_name,
+                bridge_id=bridge.bridge_name,  # For Linux bridges, name is the ID
+                ip_address=bridge.gateway_ip,
+                network_cidr=bridge.config.network_cidr,
                 state="up",
-                interfaces=[],
-                created_at=time.strftime("%Y-%m-%d %H:%M:%S"),
+                interfaces=list(bridge.ports),
+                created_at=created_at,
                 metadata={
-                    "range_id": range_id,
-                    "network_name": network_name,
-                    "mtu": config.mtu,
-                    "stp_enabled": config.stp_enabled
+                    "range_id": plan.range_id,
+                    "network_name": bridge.network_name,
+                    "mtu": bridge.config.mtu,
+                    "stp_enabled": bridge.config.stp_enabled
                 }
             )
-            
-            # Register bridge
-            self._bridges[bridge_name] = bridge_info
-            
-            # Save configuration
-            self._save_bridge_config(bridge_name, config, bridge_info)
-            
-            self.logger.info(f"Successfully created bridge {bridge_name}")
-            return bridge_name
-            
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"Failed to create bridge {bridge_name}: {e}")
-            # Attempt cleanup
-            try:
-                self._run_command(["ip", "link", "del", bridge_name], check=False)
-            except:
-                pass
-            raise InfrastructureError(f"Bridge creation failed: {e}")
-        except Exception as e:
-            self.logger.error(f"Unexpected error creating bridge {bridge_name}: {e}")
-            raise InfrastructureError(f"Bridge creation failed: {e}")
+            self._bridges[bridge.bridge_name] = bridge_info
+            self._save_bridge_config(bridge.bridge_name, bridge.config, bridge_info)
+        
+        self.logger.info(
+            f"Created {len(plan.bridges)} bridges for range {plan.range_id} "
+            f"with {len(commands)} batched commands"
+        )
+        return plan.bridge_names
     
     def delete_bridge(self, bridge_id: str) -> None:
         """
@@ -333,14 +507,28 @@ class BridgeManager:
             Number of bridges cleaned up
         """
         range_bridges = self.list_bridges(range_id)
-        cleaned_count = 0
+        if not range_bridges:
+            return 0
+        
+        # One forced batch: bridges already gone do not stop the others
+        result = self._run_batch(
+            [f"link del {bridge_info.bridge_id}" for bridge_info in range_bridges], force=True
+        )
+        if result.returncode != 0:
+            self.logger.warning(f"Some bridges of range {range_id} could not be deleted: "
+                                f"{result.stderr.strip()}")
         
+        remaining = self._existing_links() if result.returncode != 0 else set()
+        cleaned_count = 0
         for bridge_info in range_bridges:
-            try:
-                self.delete_bridge(bridge_info.bridge_id)
-                cleaned_count += 1
-            except Exception as e:
-                self.logger.error(f"Failed to cleanup bridge {bridge_info.bridge_id}: {e}")
+            if bridge_info.bridge_id in remaining:
+                self.logger.error(f"Failed to cleanup bridge {bridge_info.bridge_id}")
+                continue
+            del self._bridges[bridge_info.bridge_id]
+            config_file = self.config_dir / f"{bridge_info.bridge_id}.json"
+            if config_file.exists():
+                config_file.unlink()
+            cleaned_count += 1
         
         self.logger.info(f"Cleaned up {cleaned_count} bridges for range {range_id}")
         return cleaned_count
@@ -369,7 +557,7 @@ class BridgeManager:
         """Run a system command"""
         self.logger.debug(f"Running command: {' '.join(command)}")
         
-        result = subprocess.run(
+        result = exec_gateway.run(
             command,
             capture_output=True,
             text=True,
@@ -382,6 +570,44 @@ class BridgeManager:
         
         return result
     
+    def _run_batch(self, commands: List[str], force: bool = False) -> subprocess.CompletedProcess:
+        """Feed ``commands`` to one ``ip -batch -`` process"""
+        command = ["ip"] + (["-force"] if force else []) + ["-batch", "-"]
+        self.logger.debug(f"Running {' '.join(command)} with {len(commands)} commands")
+        return exec_gateway.run(
+            command,
+            input="".join(f"{line}\n" for line in commands),
+            capture_output=True,
+            text=True,
+            check=False
+        )
+    
+    @staticmethod
+    def _failed_batch_line(stderr: str, commands: List[str]) -> Optional[int]:
+        """Batch line (1-based) of ip's ``Command failed -:N`` report, None if unknown"""
+        match = re.search(r"Command failed -:(\d+)", stderr or "")
+        if match and 0 < int(match.group(1)) <= len(commands):
+            return int(match.group(1))
+        return None
+    
+    @classmethod
+    def _failed_batch_command(cls, stderr: str, commands: List[str]) -> str:
+        """Map ip's ``Command failed -:N`` report back to the batch line"""
+        line = cls._failed_batch_line(stderr, commands)
+        return commands[line - 1] if line is not None else "unknown command"
+    
+    def _existing_links(self) -> set:
+        """Names of the links currently present on the host"""
+        try:
+            result = self._run_command(["ip", "-o", "link", "show"], check=False)
+        except OSError as e:
+            self.logger.debug(f"Cannot list links: {e}")
+            return set()
+        return {
+            line.split(":")[1].strip().split("@")[0]
+            for line in result.stdout.splitlines() if line.count(":") >= 2
+        }
+    
     def _save_bridge_config(
         self, 
         bridge_name: str, 
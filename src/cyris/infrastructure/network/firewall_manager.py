@@ -9,6 +9,7 @@ including iptables configuration and network isolation policies.
 from cyris.core.unified_logger import get_logger
 import logging  # Keep for type annotations
 import subprocess
+from cyris.core import exec_gateway
 from typing import Dict, List, Optional, Any, Set
 from dataclasses import dataclass, field
 from enum import Enum
@@ -639,7 +640,7 @@ class FirewallManager:
         """Run a system command"""
         self.logger.debug(f"Running command: {' '.join(command)}")
         
-        result = subprocess.run(
+        result = exec_gateway.run(
             command,
             capture_output=True,
             text=True,
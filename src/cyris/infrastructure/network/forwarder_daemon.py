@@ -0,0 +1,288 @@
+"""
+Port Forwarder Daemon
+
+Hosts a :class:`PortForwarder` in a detached, long-lived process so that
+entry-point listeners outlive the CLI invocation that created them. CLI
+processes talk to it through :class:`ForwarderClient`, which has the same
+``open``/``close``/``close_range``/``stats`` interface as the in-process
+forwarder and starts the daemon on first use.
+
+Control protocol: one JSON request line per unix-socket connection
+(``{"op": ..., "args": {...}}``), answered by one JSON line holding either
+``result`` or ``error``. The daemon keeps running until it is sent
+``shutdown`` (or the host reboots, which also ends every forward).
+
+Usage::
+
+    python -m cyris.infrastructure.network.forwarder_daemon SOCKET [--foreground]
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from cyris.core import exec_gateway
+from cyris.core.exceptions import TunnelError
+from cyris.core.unified_logger import get_logger
+from cyris.infrastructure.network.port_forwarder import ForwardStats, PortForwarder
+
+
+logger = get_logger(__name__, "forwarder_daemon")
+
+SOCKET_NAME = ".port-forwarder.sock"
+
+
+def default_socket_path(cyber_range_dir: Path) -> Path:
+    """Control socket of the forwarder serving a cyber range directory"""
+    return Path(cyber_range_dir) / SOCKET_NAME
+
+
+# ----------------------------------------------------------------------
+# Daemon side
+# ----------------------------------------------------------------------
+
+class _ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, forwarder: PortForwarder):
+        super().__init__(socket_path, _ControlHandler)
+        self.forwarder = forwarder
+
+    def dispatch(self, op: str, args: Dict[str, Any]) -> Any:
+        forwarder = self.forwarder
+        if op == "ping":
+            return os.getpid()
+        if op == "open":
+            return forwarder.open(**args)
+        if op == "close":
+            return forwarder.close(args["tunnel_id"])
+        if op == "close_range":
+            return forwarder.close_range(args["range_id"])
+        if op == "stats":
+            stats = forwarder.stats(args["tunnel_id"])
+            return stats.to_dict() if stats else None
+        if op == "range_tunnels":
+            return forwarder.range_tunnels(args["range_id"])
+        if op == "shutdown":
+            # shutdown() waits for serve_forever, which runs in another thread
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return True
+        raise TunnelError(f"Unknown forwarder operation: {op}")
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+            response = {"result": self.server.dispatch(request["op"], request.get("args", {}))}
+        except (TunnelError, KeyError, TypeError, ValueError) as e:
+            response = {"error": str(e)}
+        except Exception as e:
+            logger.error(f"Forwarder request failed: {e}")
+            response = {"error": str(e)}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+def _ping(socket_path: str, timeout: float = 2.0) -> bool:
+    try:
+        _request(socket_path, "ping", {}, timeout)
+        return True
+    except (OSError, TunnelError):
+        return False
+
+
+def serve(socket_path: str, ready: Optional[int] = None) -> int:
+    """
+    Run the daemon in the current process until it is told to shut down.
+
+    Args:
+        socket_path: Control socket to listen on
+        ready: File descriptor told ``ok`` (or the error) once listening
+
+    Returns:
+        int: Exit status
+    """
+    def report(message: str) -> None:
+        if ready is not None:
+            os.write(ready, message.encode())
+            os.close(ready)
+
+    if os.path.exists(socket_path):
+        if _ping(socket_path):
+            report("ok")
+            return 0
+        os.unlink(socket_path)
+
+    forwarder = PortForwarder()
+    try:
+        server = _ControlServer(socket_path, forwarder)
+    except OSError as e:
+        report(f"cannot listen on {socket_path}: {e}")
+        return 1
+    os.chmod(socket_path, 0o600)
+
+    logger.info(f"Port forwarder daemon listening on {socket_path} (pid {os.getpid()})")
+    report("ok")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        forwarder.shutdown()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+    return 0
+
+
+def daemonize(socket_path: str) -> int:
+    """
+    Fork the daemon into its own session and wait until it listens.
+
+    Returns:
+        int: 0 once the daemon accepts requests, 1 otherwise
+    """
+    read_end, write_end = os.pipe()
+    if os.fork() > 0:
+        os.close(write_end)
+        with os.fdopen(read_end) as pipe:
+            message = pipe.read()
+        if message != "ok":
+            print(message or "port forwarder daemon exited", file=sys.stderr)
+            return 1
+        return 0
+
+    os.close(read_end)
+    os.setsid()
+    # Let the caller's pipes close so it is not kept waiting for our output
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.close(devnull)
+    os._exit(serve(socket_path, ready=write_end))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="CyRIS port forwarder daemon")
+    parser.add_argument("socket", help="Control socket path")
+    parser.add_argument("--foreground", action="store_true", help="Do not detach")
+    args = parser.parse_args(argv)
+    if args.foreground:
+        return serve(args.socket)
+    return daemonize(args.socket)
+
+
+# ----------------------------------------------------------------------
+# Client side
+# ----------------------------------------------------------------------
+
+def _request(socket_path: str, op: str, args: Dict[str, Any], timeout: float) -> Any:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps({"op": op, "args": args}).encode() + b"\n")
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+    if not line:
+        raise TunnelError(f"Port forwarder closed the connection during {op}")
+    response = json.loads(line)
+    if "error" in response:
+        raise TunnelError(response["error"])
+    return response["result"]
+
+
+class ForwarderClient:
+    """
+    Port forwarder living in the daemon process.
+
+    Args:
+        socket_path: Daemon control socket
+        timeout: Seconds to wait for a reply (and for a new daemon to start)
+    """
+
+    def __init__(self, socket_path: Path, timeout: float = 10.0):
+        self.socket_path = str(socket_path)
+        self.timeout = timeout
+
+    def _call(self, op: str, start: bool = False, **args: Any) -> Any:
+        try:
+            return _request(self.socket_path, op, args, self.timeout)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if not start:
+                raise
+        # No daemon yet (first entry point since boot)
+        self._start_daemon()
+        return _request(self.socket_path, op, args, self.timeout)
+
+    def _start_daemon(self) -> None:
+        command = [sys.executable, "-m", __name__, self.socket_path]
+        # The daemon imports this package from wherever the caller did
+        package_root = str(Path(__file__).resolve().parents[3])
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+        try:
+            result = exec_gateway.run(
+                command, capture_output=True, text=True, timeout=self.timeout, env=env
+            )
+        except Exception as e:
+            raise TunnelError(f"Failed to start port forwarder daemon: {e}")
+        if result.returncode != 0:
+            raise TunnelError(f"Failed to start port forwarder daemon: {result.stderr.strip()}")
+
+    def open(
+        self,
+        tunnel_id: str,
+        listen_port: int,
+        target_host: str,
+        target_port: int,
+        range_id: Any = None,
+        listen_host: str = "0.0.0.0"
+    ) -> int:
+        """Start a forward in the daemon; returns the bound listen port"""
+        return self._call(
+            "open", start=True, tunnel_id=tunnel_id, listen_port=listen_port,
+            target_host=target_host, target_port=target_port, range_id=range_id,
+            listen_host=listen_host
+        )
+
+    def close(self, tunnel_id: str) -> bool:
+        try:
+            return self._call("close", tunnel_id=tunnel_id)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return False
+
+    def close_range(self, range_id: Any) -> int:
+        try:
+            return self._call("close_range", range_id=range_id)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return 0
+
+    def stats(self, tunnel_id: str) -> Optional[ForwardStats]:
+        try:
+            stats = self._call("stats", tunnel_id=tunnel_id)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        return ForwardStats(**stats) if stats else None
+
+    def range_tunnels(self, range_id: Any) -> List[str]:
+        try:
+            return self._call("range_tunnels", range_id=range_id)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return []
+
+    def shutdown(self) -> None:
+        """Stop the daemon and every forward it serves"""
+        try:
+            self._call("shutdown")
+        except (FileNotFoundError, ConnectionRefusedError):
+            pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
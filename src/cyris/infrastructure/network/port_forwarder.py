@@ -0,0 +1,303 @@
+"""
+In-process TCP Port Forwarder
+
+Serves entry-point forwards from a single asyncio event loop running in a
+daemon thread, instead of one ``ssh -L`` process per entry point. Every
+forwarded port gets its own listener; each accepted connection is relayed to
+its target with two copy loops (one per direction) using large read buffers,
+and byte and connection counters are kept per tunnel. Tunnels are indexed by
+range so a whole range is torn down without scanning every tunnel or process.
+
+The listeners die with the hosting process, so only a long-lived process
+(not a CLI invocation) should hand a forwarder to ``TunnelManager``.
+"""
+
+import asyncio
+import socket
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from cyris.core.exceptions import TunnelError
+from cyris.core.unified_logger import get_logger
+
+
+logger = get_logger(__name__, "port_forwarder")
+
+# Bytes moved per read; interactive SSH sessions never fill it, bulk copies
+# (scp, file downloads) move fewer, larger chunks through the loop
+DEFAULT_BUFFER_SIZE = 256 * 1024
+
+
+@dataclass
+class ForwardStats:
+    """Traffic counters of one forwarded port"""
+    listen_port: int
+    bytes_to_target: int = 0
+    bytes_from_target: int = 0
+    connections_total: int = 0
+    connections_active: int = 0
+    connect_failures: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            'listen_port': self.listen_port,
+            'bytes_to_target': self.bytes_to_target,
+            'bytes_from_target': self.bytes_from_target,
+            'connections_total': self.connections_total,
+            'connections_active': self.connections_active,
+            'connect_failures': self.connect_failures,
+        }
+
+
+@dataclass
+class _Tunnel:
+    """Listener state owned by the event loop"""
+    tunnel_id: str
+    range_id: Any
+    target_host: str
+    target_port: int
+    stats: ForwardStats
+    server: Optional[asyncio.AbstractServer] = None
+    tasks: Set["asyncio.Task"] = field(default_factory=set)
+
+
+class PortForwarder:
+    """
+    Asyncio TCP forwarding gateway.
+
+    All public methods are thread-safe and block until the event loop has
+    applied the change; the loop thread is started on first use.
+
+    Args:
+        buffer_size: Maximum bytes read per copy step
+        connect_timeout: Seconds to wait for the target to accept
+    """
+
+    def __init__(self, buffer_size: int = DEFAULT_BUFFER_SIZE, connect_timeout: float = 10.0):
+        self.buffer_size = buffer_size
+        self.connect_timeout = connect_timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._tunnels: Dict[str, _Tunnel] = {}
+        self._ranges: Dict[Any, Set[str]] = {}
+
+    # ------------------------------------------------------------------
+    # Event loop thread
+    # ------------------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="cyris-port-forwarder", daemon=True
+                )
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def _call(self, coro, timeout: Optional[float] = None):
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        return future.result(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def open(
+        self,
+        tunnel_id: str,
+        listen_port: int,
+        target_host: str,
+        target_port: int,
+        range_id: Any = None,
+        listen_host: str = "0.0.0.0"
+    ) -> int:
+        """
+        Start forwarding ``listen_host:listen_port`` to ``target_host:target_port``.
+
+        Args:
+            tunnel_id: Unique tunnel identifier
+            listen_port: Port to listen on (0 picks a free port)
+            target_host: Destination address
+            target_port: Destination port
+            range_id: Range owning the tunnel, used by :meth:`close_range`
+            listen_host: Address to bind
+
+        Returns:
+            int: The bound listen port
+
+        Raises:
+            TunnelError: Duplicate tunnel ID or the port cannot be bound
+        """
+        with self._lock:
+            if tunnel_id in self._tunnels:
+                raise TunnelError(f"Tunnel already exists: {tunnel_id}")
+
+        tunnel = _Tunnel(
+            tunnel_id=tunnel_id,
+            range_id=range_id,
+            target_host=target_host,
+            target_port=target_port,
+            stats=ForwardStats(listen_port=listen_port),
+        )
+        try:
+            self._call(self._start(tunnel, listen_host, listen_port))
+        except OSError as e:
+            raise TunnelError(f"Failed to listen on {listen_host}:{listen_port}: {e}")
+
+        with self._lock:
+            self._tunnels[tunnel_id] = tunnel
+            self._ranges.setdefault(range_id, set()).add(tunnel_id)
+
+        logger.debug(
+            f"Forwarding {listen_host}:{tunnel.stats.listen_port} -> "
+            f"{target_host}:{target_port} ({tunnel_id})"
+        )
+        return tunnel.stats.listen_port
+
+    def close(self, tunnel_id: str) -> bool:
+        """
+        Stop a listener and drop its open connections.
+
+        Returns:
+            bool: False when the tunnel does not exist
+        """
+        with self._lock:
+            tunnel = self._detach(tunnel_id)
+        if tunnel is None:
+            return False
+        self._call(self._stop([tunnel]))
+        return True
+
+    def close_range(self, range_id: Any) -> int:
+        """
+        Stop every tunnel of a range.
+
+        Returns:
+            int: Number of tunnels closed
+        """
+        with self._lock:
+            tunnels = [self._detach(tunnel_id) for tunnel_id in list(self._ranges.get(range_id, ()))]
+        if tunnels:
+            self._call(self._stop(tunnels))
+        return len(tunnels)
+
+    def stats(self, tunnel_id: str) -> Optional[ForwardStats]:
+        """Live counters of a tunnel, or None when it does not exist"""
+        tunnel = self._tunnels.get(tunnel_id)
+        return tunnel.stats if tunnel else None
+
+    def range_tunnels(self, range_id: Any) -> List[str]:
+        """IDs of the tunnels owned by a range"""
+        return sorted(self._ranges.get(range_id, ()))
+
+    def shutdown(self) -> None:
+        """Close all tunnels and stop the event loop thread"""
+        with self._lock:
+            tunnels = [self._detach(tunnel_id) for tunnel_id in list(self._tunnels)]
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        if tunnels:
+            asyncio.run_coroutine_threadsafe(self._stop(tunnels), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
+
+    def __len__(self) -> int:
+        return len(self._tunnels)
+
+    def _detach(self, tunnel_id: str) -> Optional[_Tunnel]:
+        tunnel = self._tunnels.pop(tunnel_id, None)
+        if tunnel is not None:
+            owned = self._ranges.get(tunnel.range_id)
+            if owned is not None:
+                owned.discard(tunnel_id)
+                if not owned:
+                    del self._ranges[tunnel.range_id]
+        return tunnel
+
+    # ------------------------------------------------------------------
+    # Coroutines (run on the loop thread)
+    # ------------------------------------------------------------------
+
+    async def _start(self, tunnel: _Tunnel, host: str, port: int) -> None:
+        async def handle(reader, writer):
+            task = asyncio.current_task()
+            tunnel.tasks.add(task)
+            try:
+                await self._relay(tunnel, reader, writer)
+            finally:
+                tunnel.tasks.discard(task)
+
+        tunnel.server = await asyncio.start_server(
+            handle, host, port, limit=self.buffer_size, reuse_address=True
+        )
+        tunnel.stats.listen_port = tunnel.server.sockets[0].getsockname()[1]
+
+    async def _stop(self, tunnels: List[_Tunnel]) -> None:
+        for tunnel in tunnels:
+            tunnel.server.close()
+            for task in list(tunnel.tasks):
+                task.cancel()
+        await asyncio.gather(
+            *(tunnel.server.wait_closed() for tunnel in tunnels),
+            *(task for tunnel in tunnels for task in tunnel.tasks),
+            return_exceptions=True
+        )
+
+    async def _relay(self, tunnel: _Tunnel, client_reader, client_writer) -> None:
+        stats = tunnel.stats
+        try:
+            target_reader, target_writer = await asyncio.wait_for(
+                asyncio.open_connection(tunnel.target_host, tunnel.target_port, limit=self.buffer_size),
+                timeout=self.connect_timeout
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            stats.connect_failures += 1
+            logger.warning(
+                f"{tunnel.tunnel_id}: cannot reach {tunnel.target_host}:{tunnel.target_port}: {e}"
+            )
+            client_writer.close()
+            return
+
+        for writer in (client_writer, target_writer):
+            sock = writer.get_extra_info("socket")
+            if sock is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        stats.connections_total += 1
+        stats.connections_active += 1
+        try:
+            await asyncio.gather(
+                self._copy(client_reader, target_writer, stats, "bytes_to_target"),
+                self._copy(target_reader, client_writer, stats, "bytes_from_target"),
+            )
+        finally:
+            stats.connections_active -= 1
+            for writer in (client_writer, target_writer):
+                writer.close()
+
+    async def _copy(self, reader, writer, stats: ForwardStats, counter: str) -> None:
+        """Copy one direction until EOF, then half-close the other side"""
+        try:
+            while True:
+                chunk = await reader.read(self.buffer_size)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                setattr(stats, counter, getattr(stats, counter) + len(chunk))
+                await writer.drain()
+            if writer.can_write_eof():
+                writer.write_eof()
+        except (ConnectionError, OSError):
+            # The peer went away; closing both ends ends the other direction
+            writer.close()
@@ -9,6 +9,7 @@ for cyber ranges based on YAML specifications.
 from cyris.core.unified_logger import get_logger
 import ipaddress
 import subprocess
+from cyris.core import exec_gateway
 import json
 import time
 from typing import Dict, List, Optional, Any, Tuple
@@ -79,6 +80,68 @@ class NetworkTopologyManager:
         
         return self.ip_assignments
     
+    def update_topology(
+        self,
+        topology_config: Dict[str, Any],
+        guests: List[Any],
+        range_id: str,
+        stale_networks: Optional[List[str]] = None,
+        rules_changed: bool = False
+    ) -> Dict[str, str]:
+        """
+        Patch the topology of an existing range in place.
+        
+        Segments in ``stale_networks`` (removed or redefined) are destroyed,
+        segments that do not exist yet are created and guest IPs are
+        reassigned. The range's forwarding rules are replaced only when
+        ``rules_changed``, so unchanged rules are not applied twice.
+        
+        Args:
+            topology_config: Desired topology configuration
+            guests: All guests of the range
+            range_id: Range identifier
+            stale_networks: Network names to tear down first
+            rules_changed: Whether the forwarding rules differ from the applied ones
+        
+        Returns:
+            Dictionary mapping guest_id to assigned IP address
+        """
+        self.logger.info(f"Updating network topology for range {range_id}")
+        
+        for network_name in stale_networks or []:
+            self._destroy_network_segment(network_name, range_id)
+        
+        for network_config in topology_config.get('networks', []):
+            self._create_network_segment(network_config['name'], network_config, range_id)
+        
+        self._assign_guest_ips(topology_config, guests, range_id)
+        
+        if rules_changed:
+            try:
+                from ...services.layer3_network_service import Layer3NetworkService
+                Layer3NetworkService(logger=self.logger).remove_network_policy(range_id)
+            except Exception as e:
+                self.logger.warning(f"Could not remove forwarding rules of range {range_id}: {e}")
+            self.forwarding_rules = []
+            if topology_config.get('forwarding_rules'):
+                self._configure_forwarding_rules(topology_config['forwarding_rules'], range_id)
+        
+        return self.ip_assignments
+    
+    def _destroy_network_segment(self, network_name: str, range_id: str) -> None:
+        """Destroy one network segment of a range"""
+        full_network_name = f"cyris-{range_id}-{network_name}"
+        if self.libvirt_connection:
+            try:
+                network = self.libvirt_connection.networkLookupByName(full_network_name)
+                if network.isActive():
+                    network.destroy()
+                network.undefine()
+                self.logger.info(f"Destroyed network {full_network_name}")
+            except libvirt.libvirtError:
+                self.logger.warning(f"Network {full_network_name} not found or already destroyed")
+        self.networks.pop(network_name, None)
+    
     def _create_network_segment(
         self, 
         network_name: str, 
@@ -400,7 +463,7 @@ class NetworkTopologyManager:
         if hasattr(self, 'forwarding_rules'):
             for rule in self.forwarding_rules:
                 try:
-                    subprocess.run(rule.split(), check=False, capture_output=True)
+                    exec_gateway.run(rule.split(), check=False, capture_output=True)
                     self.logger.debug(f"Applied rule: {rule}")
                 except Exception as e:
                     self.logger.warning(f"Failed to apply rule {rule}: {e}")
@@ -571,7 +634,7 @@ class NetworkTopologyManager:
     def _discover_ip_virsh(self, vm_name: str) -> Optional[str]:
         """Discover IP using virsh domifaddr command"""
         try:
-            result = subprocess.run([
+            result = exec_gateway.run([
                 'virsh', 'domifaddr', vm_name
             ], capture_output=True, text=True, timeout=10)
             
@@ -638,7 +701,7 @@ class NetworkTopologyManager:
                             test_ip = str(list(network.hosts())[host_offset])
                             
                             # Quick ping test
-                            ping_result = subprocess.run([
+                            ping_result = exec_gateway.run([
                                 'ping', '-c', '1', '-W', '1', test_ip
                             ], capture_output=True, timeout=2)
                             
@@ -1,17 +1,23 @@
 """
 SSH Tunnel Manager - Core component implementing gw_mode functionality
 Supports creating and managing SSH tunnels in both direct and gateway modes
+
+Local forwards are served by a forwarder (the orchestrator hands in a
+:class:`ForwarderClient` of the port forwarder daemon, so one asyncio process
+serves every trainee tunnel and outlives the CLI). Without a forwarder they
+fall back to detached ``ssh -f -L`` processes, one per tunnel.
 """
 # import logging  # Replaced with unified logger
 from cyris.core.unified_logger import get_logger
-import subprocess
+from cyris.core import exec_gateway
 import uuid
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set, Tuple
 from datetime import datetime
 
 from cyris.config.settings import CyRISSettings
 from cyris.core.exceptions import TunnelError
+from cyris.infrastructure.network.port_forwarder import ForwardStats
 
 
 logger = get_logger(__name__, "tunnel_manager")
@@ -44,20 +50,26 @@ class TunnelInfo:
     config: TunnelConfiguration
     created_at: datetime
     process_names: List[str]  # List of tunnel process names
+    listen_port: Optional[int] = None  # Bound port of the forwarder listener, if any
 
 
 class TunnelManager:
     """SSH tunnel manager"""
     
-    def __init__(self, settings: CyRISSettings):
+    def __init__(self, settings: CyRISSettings, forwarder: Optional[Any] = None):
         """
         Initialize tunnel manager
         
         Args:
             settings: CyRIS configuration
+            forwarder: Port forwarder for local forwards, a
+                :class:`PortForwarder` or a daemon :class:`ForwarderClient`
+                (default: detached ssh processes)
         """
         self.settings = settings
         self.active_tunnels: Dict[str, TunnelInfo] = {}
+        self._range_tunnels: Dict[int, Set[str]] = {}
+        self._forwarder = forwarder
         logger.info(f"TunnelManager initialized, gw_mode={settings.gw_mode}")
     
     def create_tunnel(self, config: TunnelConfiguration) -> str:
@@ -74,45 +86,58 @@ class TunnelManager:
             TunnelError: Tunnel creation failed
         """
         tunnel_id = f"tunnel_{config.range_id}_{config.port}_{uuid.uuid4().hex[:8]}"
-        process_names = []
         
         try:
             if config.gw_mode:
                 # Gateway mode: create two-level tunnel
-                process_names = self._create_gateway_tunnel(config)
+                process_names, listen_port = self._create_gateway_tunnel(config, tunnel_id)
             else:
                 # Direct mode: create direct tunnel
-                process_names = self._create_direct_tunnel(config)
+                process_names, listen_port = self._create_direct_tunnel(config, tunnel_id)
             
             # Record tunnel information
             tunnel_info = TunnelInfo(
                 tunnel_id=tunnel_id,
                 config=config,
                 created_at=datetime.now(),
-                process_names=process_names
+                process_names=process_names,
+                listen_port=listen_port
             )
             self.active_tunnels[tunnel_id] = tunnel_info
+            self._range_tunnels.setdefault(config.range_id, set()).add(tunnel_id)
             
             logger.info(f"Tunnel created successfully: {tunnel_id}")
             return tunnel_id
             
         except Exception as e:
             logger.error(f"Failed to create tunnel: {e}")
-            # Clean up potentially partially created tunnel
-            for process_name in process_names:
-                self._kill_process_by_name(process_name)
             raise TunnelError(f"Failed to create tunnel: {e}")
     
-    def _create_direct_tunnel(self, config: TunnelConfiguration) -> List[str]:
+    def _create_direct_tunnel(
+        self, config: TunnelConfiguration, tunnel_id: str
+    ) -> Tuple[List[str], Optional[int]]:
         """
         Create direct mode tunnel
         
         Args:
             config: Tunnel configuration
+            tunnel_id: Tunnel ID
             
         Returns:
-            List[str]: List of created process names
+            Tuple: Created process names (none with a forwarder) and the
+            bound forwarder port (None for ssh processes)
         """
+        if self._forwarder is not None:
+            logger.debug(
+                f"Opening local forward 0.0.0.0:{config.port} -> "
+                f"{config.target_host}:{config.target_port}"
+            )
+            listen_port = self._forwarder.open(
+                tunnel_id, config.port, config.target_host, config.target_port,
+                range_id=config.range_id
+            )
+            return [], listen_port
+        
         process_name = f"ct{config.range_id}_{config.port}"
         
         command = [
@@ -123,28 +148,29 @@ class TunnelManager:
         ]
         
         logger.debug(f"Executing direct tunnel command: {' '.join(command)}")
-        result = subprocess.run(command, capture_output=True, text=True)
+        result = exec_gateway.run(command, capture_output=True, text=True)
         
         if result.returncode != 0:
             raise TunnelError(
                 f"Failed to create direct tunnel: {result.stderr}"
             )
         
-        return [process_name]
+        return [process_name], None
     
-    def _create_gateway_tunnel(self, config: TunnelConfiguration) -> List[str]:
+    def _create_gateway_tunnel(
+        self, config: TunnelConfiguration, tunnel_id: str
+    ) -> Tuple[List[str], Optional[int]]:
         """
         Create gateway mode tunnel
         
         Args:
             config: Tunnel configuration
+            tunnel_id: Tunnel ID
             
         Returns:
-            List[str]: List of created process names
+            Tuple: Created process names and the bound forwarder port
         """
-        process_names = []
         gateway_process = f"ct{config.range_id}_{config.port}_gw"
-        local_process = f"ct{config.range_id}_{config.port}"
         
         # 1. Create tunnel on gateway server
         gateway_command = [
@@ -159,35 +185,22 @@ class TunnelManager:
         ]
         
         logger.debug(f"Executing gateway tunnel command: {' '.join(gateway_command)}")
-        result = subprocess.run(gateway_command, capture_output=True, text=True)
+        result = exec_gateway.run(gateway_command, capture_output=True, text=True)
         
         if result.returncode != 0:
             raise TunnelError(
                 f"Failed to create gateway tunnel: {result.stderr}"
             )
         
-        process_names.append(gateway_process)
-        
         # 2. Create tunnel on local host
-        local_command = [
-            'bash', '-c',
-            f"exec -a {local_process} ssh -o UserKnownHostsFile=/dev/null "
-            f"-o StrictHostKeyChecking=no -f -L 0.0.0.0:{config.port}:"
-            f"{config.target_host}:{config.target_port} {config.local_user}@localhost -N"
-        ]
-        
-        logger.debug(f"Executing local tunnel command: {' '.join(local_command)}")
-        result = subprocess.run(local_command, capture_output=True, text=True)
-        
-        if result.returncode != 0:
+        try:
+            local_processes, listen_port = self._create_direct_tunnel(config, tunnel_id)
+        except TunnelError as e:
             # Clean up gateway tunnel
             self._kill_process_on_gateway(gateway_process, config.gw_account, config.gw_host)
-            raise TunnelError(
-                f"Failed to create local tunnel: {result.stderr}"
-            )
+            raise TunnelError(f"Failed to create local tunnel: {e}")
         
-        process_names.append(local_process)
-        return process_names
+        return [gateway_process] + local_processes, listen_port
     
     def destroy_tunnel(self, tunnel_id: str) -> None:
         """
@@ -211,13 +224,54 @@ class TunnelManager:
                 self._destroy_direct_tunnel(tunnel_info)
             
             # Remove from active tunnel list
-            del self.active_tunnels[tunnel_id]
+            self._forget_tunnel(tunnel_info)
             logger.info(f"Tunnel destroyed successfully: {tunnel_id}")
             
         except Exception as e:
             logger.error(f"Failed to destroy tunnel {tunnel_id}: {e}")
             raise TunnelError(f"Failed to destroy tunnel: {e}")
     
+    def destroy_range_tunnels(self, range_id: int) -> int:
+        """
+        Destroy every tunnel of a range
+        
+        Forwarder listeners are closed in one round trip, including ones
+        opened by an earlier CLI process; tunnel processes are stopped one
+        call each.
+        
+        Args:
+            range_id: Range ID
+            
+        Returns:
+            int: Number of tunnels destroyed
+        """
+        tunnel_ids = self._range_tunnels.pop(range_id, set())
+        closed = 0
+        if self._forwarder is not None:
+            closed = self._forwarder.close_range(range_id)
+        if not tunnel_ids:
+            return closed
+        
+        for tunnel_id in tunnel_ids:
+            tunnel_info = self.active_tunnels.pop(tunnel_id)
+            try:
+                self._kill_tunnel_processes(tunnel_info)
+            except Exception as e:
+                logger.error(f"Failed to stop tunnel processes of {tunnel_id}: {e}")
+        
+        logger.info(f"Destroyed {len(tunnel_ids)} tunnels for range {range_id}")
+        return len(tunnel_ids)
+    
+    def _forget_tunnel(self, tunnel_info: TunnelInfo) -> None:
+        """Drop a tunnel from the active and per-range indexes"""
+        del self.active_tunnels[tunnel_info.tunnel_id]
+        range_id = tunnel_info.config.range_id
+        owned = self._range_tunnels.get(range_id)
+        if owned is not None:
+            owned.discard(tunnel_info.tunnel_id)
+            if not owned:
+                del self._range_tunnels[range_id]
+    
     def _destroy_direct_tunnel(self, tunnel_info: TunnelInfo) -> None:
         """
         Destroy direct mode tunnel
@@ -225,8 +279,9 @@ class TunnelManager:
         Args:
             tunnel_info: Tunnel information
         """
-        for process_name in tunnel_info.process_names:
-            self._kill_process_by_name(process_name)
+        self._kill_tunnel_processes(tunnel_info)
+        if tunnel_info.listen_port is not None and self._forwarder is not None:
+            self._forwarder.close(tunnel_info.tunnel_id)
     
     def _destroy_gateway_tunnel(self, tunnel_info: TunnelInfo) -> None:
         """
@@ -235,8 +290,17 @@ class TunnelManager:
         Args:
             tunnel_info: Tunnel information
         """
-        config = tunnel_info.config
+        # Gateway and local processes are told apart by name
+        self._destroy_direct_tunnel(tunnel_info)
+    
+    def _kill_tunnel_processes(self, tunnel_info: TunnelInfo) -> None:
+        """
+        Kill the gateway and local processes of a tunnel
         
+        Args:
+            tunnel_info: Tunnel information
+        """
+        config = tunnel_info.config
         for process_name in tunnel_info.process_names:
             if process_name.endswith('_gw'):
                 # Destroy tunnel on gateway
@@ -256,7 +320,7 @@ class TunnelManager:
         """
         command = ['pkill', '-f', process_name]
         logger.debug(f"Killing local process: {process_name}")
-        subprocess.run(command, capture_output=True, text=True)
+        exec_gateway.run(command, capture_output=True, text=True)
     
     def _kill_process_on_gateway(self, process_name: str, gw_account: str, gw_host: str) -> None:
         """
@@ -276,7 +340,7 @@ class TunnelManager:
         ]
         
         logger.debug(f"Killing gateway process: {process_name}")
-        subprocess.run(command, capture_output=True, text=True)
+        exec_gateway.run(command, capture_output=True, text=True)
     
     def list_active_tunnels(self) -> List[Dict[str, Any]]:
         """
@@ -289,6 +353,7 @@ class TunnelManager:
         
         for tunnel_id, tunnel_info in self.active_tunnels.items():
             config = tunnel_info.config
+            stats = self.get_tunnel_stats(tunnel_id)
             tunnels.append({
                 'tunnel_id': tunnel_id,
                 'range_id': config.range_id,
@@ -297,7 +362,8 @@ class TunnelManager:
                 'target_port': config.target_port,
                 'gw_mode': config.gw_mode,
                 'created_at': tunnel_info.created_at,
-                'process_names': tunnel_info.process_names
+                'process_names': tunnel_info.process_names,
+                'traffic': stats.to_dict() if stats else None
             })
         
         return tunnels
@@ -314,14 +380,28 @@ class TunnelManager:
         """
         return self.active_tunnels.get(tunnel_id)
     
+    def get_tunnel_stats(self, tunnel_id: str) -> Optional[ForwardStats]:
+        """
+        Get byte and connection counters of a tunnel's local listener
+        
+        Args:
+            tunnel_id: Tunnel ID
+            
+        Returns:
+            ForwardStats: Counters, returns None if not found
+        """
+        if self._forwarder is None:
+            return None
+        return self._forwarder.stats(tunnel_id)
+    
     def cleanup_all_tunnels(self) -> None:
         """Clean up all tunnels"""
         tunnel_ids = list(self.active_tunnels.keys())
         
-        for tunnel_id in tunnel_ids:
+        for range_id in list(self._range_tunnels):
             try:
-                self.destroy_tunnel(tunnel_id)
+                self.destroy_range_tunnels(range_id)
             except Exception as e:
-                logger.error(f"Failed to cleanup tunnel {tunnel_id}: {e}")
+                logger.error(f"Failed to cleanup tunnels of range {range_id}: {e}")
         
         logger.info(f"Cleaned up {len(tunnel_ids)} tunnels")
\ No newline at end of file
@@ -10,7 +10,7 @@ from cyris.core.unified_logger import get_logger
 import os
 import pwd
 import grp
-import subprocess
+from cyris.core import exec_gateway
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 
@@ -70,7 +70,7 @@ class PermissionManager:
             return True
             
         try:
-            result = subprocess.run(
+            result = exec_gateway.run(
                 cmd, 
                 capture_output=True, 
                 text=True, 
@@ -245,12 +245,7 @@ class PermissionManager:
     
     def _check_acl_support(self) -> bool:
         """Check if ACL commands are available."""
-        try:
-            subprocess.run(["which", "setfacl"], capture_output=True, check=True)
-            subprocess.run(["which", "getfacl"], capture_output=True, check=True)
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
+        return exec_gateway.has_tool("setfacl") and exec_gateway.has_tool("getfacl")
     
     def _get_current_user_groups(self) -> List[str]:
         """Get list of groups for current user."""
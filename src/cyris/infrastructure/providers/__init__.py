@@ -3,10 +3,16 @@ Infrastructure Providers
 
 This module contains abstractions and implementations for various
 infrastructure providers (KVM, AWS, etc.).
+
+Providers are imported on first access; see ``cyris.core.lazy_import``.
 """
 
-from .base_provider import InfrastructureProvider
-from .kvm_provider import KVMProvider
-from .aws_provider import AWSProvider
+from ...core.lazy_import import lazy_exports
+
+__all__ = ["InfrastructureProvider", "KVMProvider", "AWSProvider"]
 
-__all__ = ["InfrastructureProvider", "KVMProvider", "AWSProvider"]
\ No newline at end of file
+__getattr__, __dir__ = lazy_exports(globals(), {
+    "InfrastructureProvider": ".base_provider",
+    "KVMProvider": ".kvm_provider",
+    "AWSProvider": ".aws_provider",
+})
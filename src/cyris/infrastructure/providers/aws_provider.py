@@ -7,8 +7,9 @@ implementing the infrastructure provider interface for cloud deployments.
 
 # import logging  # Replaced with unified logger
 from cyris.core.unified_logger import get_logger
+from cyris.core.tracing import traced
 import time
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any, Tuple
 import boto3
 from botocore.exceptions import ClientError, BotoCoreError
 import json
@@ -22,6 +23,20 @@ from cyris.domain.entities.host import Host
 from cyris.domain.entities.guest import Guest
 
 
+# EC2 accepts at most 200 values per describe filter
+DESCRIBE_FILTER_LIMIT = 200
+
+# Instance states mapped to CyRIS status strings
+INSTANCE_STATUS = {
+    "running": "active",
+    "pending": "creating",
+    "stopping": "creating",
+    "starting": "creating",
+    "stopped": "stopped",
+    "terminated": "terminated",
+}
+
+
 class AWSProvider(InfrastructureProvider):
     """
     AWS cloud infrastructure provider implementation.
@@ -45,6 +60,8 @@ class AWSProvider(InfrastructureProvider):
     - instance_profile: IAM instance profile for EC2 instances
     - key_pair: EC2 key pair name for SSH access
     - default_ami: Default AMI ID for instances
+    - poll_interval: Seconds between state polls while waiting (default: 10)
+    - wait_timeout: Seconds to wait for instances to change state (default: 300)
     """
     
     def __init__(self, config: Dict[str, Any]):
@@ -64,6 +81,8 @@ class AWSProvider(InfrastructureProvider):
         self.instance_profile = config.get("instance_profile")
         self.key_pair = config.get("key_pair")
         self.default_ami = config.get("default_ami", "ami-0abcdef1234567890")  # Ubuntu 20.04 LTS
+        self.poll_interval = config.get("poll_interval", 10)
+        self.wait_timeout = config.get("wait_timeout", 300)
         
         # AWS clients
         self._ec2_client: Optional[boto3.client] = None
@@ -214,110 +233,190 @@ class AWSProvider(InfrastructureProvider):
         if not self.is_connected():
             self.connect()
         
-        guest_ids = []
-        
+        # Group guests with identical launch parameters: one run_instances each
+        groups: Dict[Tuple, List[Guest]] = {}
+        specs: Dict[Tuple, Dict[str, Any]] = {}
         for guest in guests:
             try:
-                self.logger.info(f"Creating EC2 instance for guest {guest.id}")
-                
-                # Determine host and subnet
-                host_id = host_mapping.get(guest.host_id, list(host_mapping.values())[0])
-                host_resource = self._resources.get(host_id)
-                
-                if not host_resource or "subnet_ids" not in host_resource.metadata:
-                    raise ResourceCreationError(f"Host {host_id} not found or not properly configured")
-                
-                subnet_id = host_resource.metadata["subnet_ids"][0]  # Use first subnet
-                security_group_id = host_resource.metadata["security_group_id"]
-                
-                # Select AMI based on OS type
-                ami_id = self._get_ami_for_os(guest.os_type)
-                
-                # Select instance type based on guest specifications
-                instance_type = self._get_instance_type(guest.memory_mb, guest.vcpus)
-                
-                # Prepare instance configuration
-                instance_config = {
-                    "ImageId": ami_id,
-                    "MinCount": 1,
-                    "MaxCount": 1,
-                    "InstanceType": instance_type,
-                    "KeyName": self.key_pair,
-                    "SubnetId": subnet_id,
-                    "SecurityGroupIds": [security_group_id],
-                    "TagSpecifications": [
-                        {
-                            "ResourceType": "instance",
-                            "Tags": [
-                                {"Key": "Name", "Value": f"cyris-{guest.id}"},
-                                {"Key": "CyRIS-GuestId", "Value": guest.id},
-                                {"Key": "CyRIS-HostId", "Value": host_id},
-                                {"Key": "CyRIS-Provider", "Value": "aws"}
-                            ]
-                        }
-                    ]
-                }
-                
-                # Add IAM instance profile if specified
-                if self.instance_profile:
-                    instance_config["IamInstanceProfile"] = {"Name": self.instance_profile}
-                
-                # Add user data if specified
-                if hasattr(guest, 'user_data') and guest.user_data:
-                    instance_config["UserData"] = guest.user_data
-                
-                # Launch instance
-                response = self._ec2_client.run_instances(**instance_config)
-                
-                if not response["Instances"]:
-                    raise ResourceCreationError("Failed to launch EC2 instance")
-                
-                instance = response["Instances"][0]
-                instance_id = instance["InstanceId"]
-                
-                # Wait for instance to be running
-                self._wait_for_instance_state(instance_id, "running")
-                
-                # Get updated instance info
-                instance_info = self._get_instance_info(instance_id)
-                
-                # Register guest resource
-                guest_resource = ResourceInfo(
-                    resource_id=instance_id,
-                    resource_type="guest",
-                    name=guest.id,
-                    status=ResourceStatus.ACTIVE,
-                    metadata={
-                        "provider": "aws",
-                        "guest_id": guest.id,
-                        "instance_id": instance_id,
-                        "instance_type": instance_type,
-                        "ami_id": ami_id,
-                        "subnet_id": subnet_id,
-                        "security_group_id": security_group_id,
-                        "private_ip": instance_info.get("private_ip"),
-                        "public_ip": instance_info.get("public_ip"),
-                        "os_type": guest.os_type
-                    },
-                    created_at=time.strftime("%Y-%m-%d %H:%M:%S"),
-                    ip_addresses=[
-                        ip for ip in [
-                            instance_info.get("private_ip"),
-                            instance_info.get("public_ip")
-                        ] if ip
-                    ]
-                )
-                
-                self._register_resource(guest_resource)
-                guest_ids.append(instance_id)
-                
-                self.logger.info(f"Successfully created EC2 instance {instance_id} for guest {guest.id}")
-                
+                spec = self._launch_spec(guest, host_mapping)
             except Exception as e:
                 self.logger.error(f"Failed to create guest {guest.id}: {e}")
                 raise ResourceCreationError(f"Guest creation failed: {e}", "aws", guest.id)
+            key = tuple(sorted(spec.items()))
+            specs[key] = spec
+            groups.setdefault(key, []).append(guest)
         
-        return guest_ids
+        # Every instance is registered as soon as it is launched, so a later
+        # failure can never leave a billed instance untracked
+        launched: List[str] = []
+        try:
+            for key, group in groups.items():
+                spec = specs[key]
+                try:
+                    self.logger.info(
+                        f"Launching {len(group)} EC2 instances ({spec['instance_type']}, "
+                        f"{spec['ami_id']}, {spec['subnet_id']})"
+                    )
+                    for guest, instance_id in zip(group, self._run_instances(spec, group)):
+                        self._register_resource(ResourceInfo(
+                            resource_id=instance_id,
+                            resource_type="guest",
+                            name=guest.id,
+                            status=ResourceStatus.CREATING,
+                            metadata={
+                                "provider": "aws",
+                                "guest_id": guest.id,
+                                "instance_id": instance_id,
+                                "instance_type": spec["instance_type"],
+                                "ami_id": spec["ami_id"],
+                                "subnet_id": spec["subnet_id"],
+                                "security_group_id": spec["security_group_id"],
+                                "private_ip": None,
+                                "public_ip": None,
+                                "os_type": spec["os_type"]
+                            },
+                            created_at=time.strftime("%Y-%m-%d %H:%M:%S")
+                        ))
+                        launched.append(instance_id)
+                except Exception as e:
+                    self.logger.error(f"Failed to launch guests {[g.id for g in group]}: {e}")
+                    raise ResourceCreationError(f"Guest creation failed: {e}", "aws", group[0].id)
+            
+            # Track readiness of every launched instance in one polling loop
+            try:
+                instances = self._wait_for_instances_state(launched, "running")
+            except ResourceCreationError as e:
+                raise ResourceCreationError(f"Guest creation failed: {e}", "aws", e.resource_id)
+        except Exception:
+            self._abandon_instances(launched)
+            raise
+        
+        for instance_id in launched:
+            instance_info = self._instance_info(instances[instance_id])
+            guest_resource = self._resources[instance_id]
+            guest_resource.metadata["private_ip"] = instance_info.get("private_ip")
+            guest_resource.metadata["public_ip"] = instance_info.get("public_ip")
+            guest_resource.ip_addresses = [
+                ip for ip in [
+                    instance_info.get("private_ip"),
+                    instance_info.get("public_ip")
+                ] if ip
+            ]
+            guest_resource.status = ResourceStatus.ACTIVE
+            
+            self.logger.info(f"Successfully created EC2 instance {instance_id} for guest {guest_resource.name}")
+        
+        return launched
+    
+    def _abandon_instances(self, instance_ids: List[str]) -> None:
+        """
+        Terminate instances of a failed creation.
+        
+        Instances that could not be terminated stay registered (status
+        ERROR) so that a later destroy still finds them.
+        """
+        if not instance_ids:
+            return
+        try:
+            self._ec2_client.terminate_instances(InstanceIds=instance_ids)
+        except Exception as e:
+            self.logger.error(f"Failed to terminate instances {instance_ids} of failed creation: {e}")
+            for instance_id in instance_ids:
+                self._update_resource_status(instance_id, ResourceStatus.ERROR)
+            return
+        self.logger.info(f"Terminated {len(instance_ids)} instances of failed creation")
+        for instance_id in instance_ids:
+            self._unregister_resource(instance_id)
+    
+    def _launch_spec(self, guest: Guest, host_mapping: Dict[str, str]) -> Dict[str, Any]:
+        """Launch parameters of a guest; guests with equal specs share a run_instances call"""
+        # Guest entities name these basevm_host / basevm_os_type / memory
+        host_ref = getattr(guest, "host_id", None) or getattr(guest, "basevm_host", None)
+        os_type = getattr(guest, "os_type", None) or getattr(guest, "basevm_os_type", None)
+        memory_mb = getattr(guest, "memory_mb", None) or getattr(guest, "memory", None)
+        
+        # Determine host and subnet
+        host_id = host_mapping.get(host_ref, list(host_mapping.values())[0])
+        host_resource = self._resources.get(host_id)
+        
+        if not host_resource or "subnet_ids" not in host_resource.metadata:
+            raise ResourceCreationError(f"Host {host_id} not found or not properly configured")
+        
+        os_type = getattr(os_type, "value", os_type)
+        return {
+            "host_id": host_id,
+            "subnet_id": host_resource.metadata["subnet_ids"][0],  # Use first subnet
+            "security_group_id": host_resource.metadata["security_group_id"],
+            # Select AMI based on OS type
+            "os_type": os_type,
+            "ami_id": self._get_ami_for_os(os_type),
+            # Select instance type based on guest specifications
+            "instance_type": self._get_instance_type(memory_mb, getattr(guest, "vcpus", None)),
+            "user_data": getattr(guest, "user_data", None) or None,
+        }
+    
+    def _run_instances(self, spec: Dict[str, Any], group: List[Guest]) -> List[str]:
+        """
+        Launch all guests of a group with one run_instances call.
+        
+        Returns:
+            Instance IDs in the order of ``group``
+        """
+        common_tags = [
+            {"Key": "CyRIS-HostId", "Value": spec["host_id"]},
+            {"Key": "CyRIS-Provider", "Value": "aws"}
+        ]
+        
+        def guest_tags(guest: Guest) -> List[Dict[str, str]]:
+            return [
+                {"Key": "Name", "Value": f"cyris-{guest.id}"},
+                {"Key": "CyRIS-GuestId", "Value": guest.id}
+            ]
+        
+        # A single guest gets all tags at launch; larger groups are tagged
+        # per instance afterwards (tags are the only per-guest difference)
+        launch_tags = guest_tags(group[0]) + common_tags if len(group) == 1 else common_tags
+        
+        # Prepare instance configuration
+        instance_config = {
+            "ImageId": spec["ami_id"],
+            "MinCount": len(group),
+            "MaxCount": len(group),
+            "InstanceType": spec["instance_type"],
+            "SubnetId": spec["subnet_id"],
+            "SecurityGroupIds": [spec["security_group_id"]],
+            "TagSpecifications": [{"ResourceType": "instance", "Tags": launch_tags}]
+        }
+        if self.key_pair:
+            instance_config["KeyName"] = self.key_pair
+        
+        # Add IAM instance profile if specified
+        if self.instance_profile:
+            instance_config["IamInstanceProfile"] = {"Name": self.instance_profile}
+        
+        # Add user data if specified
+        if spec["user_data"]:
+            instance_config["UserData"] = spec["user_data"]
+        
+        # Launch instances
+        response = self._ec2_client.run_instances(**instance_config)
+        instances = sorted(response.get("Instances", []), key=lambda i: i.get("AmiLaunchIndex", 0))
+        instance_ids = [instance["InstanceId"] for instance in instances]
+        try:
+            if len(instances) != len(group):
+                raise ResourceCreationError(
+                    f"Requested {len(group)} EC2 instances, launched {len(instances)}"
+                )
+            
+            if len(group) > 1:
+                for guest, instance_id in zip(group, instance_ids):
+                    self._ec2_client.create_tags(Resources=[instance_id], Tags=guest_tags(guest))
+        except Exception:
+            # Not yet known to the caller: clean up here
+            if instance_ids:
+                self._ec2_client.terminate_instances(InstanceIds=instance_ids)
+            raise
+        return instance_ids
     
     def destroy_hosts(self, host_ids: List[str]) -> None:
         """
@@ -384,31 +483,35 @@ class AWSProvider(InfrastructureProvider):
         if not self.is_connected():
             self.connect()
         
-        for guest_id in guest_ids:
-            try:
-                self.logger.info(f"Terminating EC2 instance {guest_id}")
-                
-                # Terminate instance
-                self._ec2_client.terminate_instances(InstanceIds=[guest_id])
+        if not guest_ids:
+            return
+        
+        try:
+            # Only terminate instances that still exist; a missing ID would
+            # fail the whole batch
+            existing = self._describe_instances(guest_ids)
+            for guest_id in guest_ids:
+                if guest_id not in existing:
+                    self.logger.warning(f"Instance {guest_id} not found, may already be terminated")
+            
+            live = [i for i, inst in existing.items() if inst["State"]["Name"] != "terminated"]
+            if live:
+                self.logger.info(f"Terminating {len(live)} EC2 instances")
+                self._ec2_client.terminate_instances(InstanceIds=live)
                 
                 # Wait for termination
-                self._wait_for_instance_state(guest_id, "terminated")
-                
-                # Unregister resource
-                self._unregister_resource(guest_id)
-                
-                self.logger.info(f"Successfully terminated instance {guest_id}")
-                
-            except ClientError as e:
-                if e.response["Error"]["Code"] == "InvalidInstanceID.NotFound":
-                    self.logger.warning(f"Instance {guest_id} not found, may already be terminated")
-                    self._unregister_resource(guest_id)
-                else:
-                    self.logger.error(f"Failed to destroy guest {guest_id}: {e}")
-                    raise ResourceDestructionError(f"Guest destruction failed: {e}", "aws", guest_id)
-            except Exception as e:
-                self.logger.error(f"Failed to destroy guest {guest_id}: {e}")
-                raise ResourceDestructionError(f"Guest destruction failed: {e}", "aws", guest_id)
+                self._wait_for_instances_state(live, "terminated")
+        
+        except Exception as e:
+            self.logger.error(f"Failed to destroy guests {guest_ids}: {e}")
+            resource_id = getattr(e, "resource_id", None) or guest_ids[0]
+            raise ResourceDestructionError(f"Guest destruction failed: {e}", "aws", resource_id)
+        
+        for guest_id in guest_ids:
+            # Unregister resource
+            self._unregister_resource(guest_id)
+        
+        self.logger.info(f"Successfully terminated {len(guest_ids)} instances")
     
     def get_status(self, resource_ids: List[str]) -> Dict[str, str]:
         """
@@ -424,6 +527,7 @@ class AWSProvider(InfrastructureProvider):
             self.connect()
         
         status_map = {}
+        guest_instances: Dict[str, str] = {}  # resource ID -> instance ID
         
         for resource_id in resource_ids:
             try:
@@ -445,34 +549,8 @@ class AWSProvider(InfrastructureProvider):
                         status_map[resource_id] = "active"
                 
                 elif resource.resource_type == "guest":
-                    # For guests, check EC2 instance status
-                    instance_id = resource.metadata.get("instance_id", resource_id)
-                    try:
-                        response = self._ec2_client.describe_instances(InstanceIds=[instance_id])
-                        
-                        if not response["Reservations"]:
-                            status_map[resource_id] = "not_found"
-                            continue
-                        
-                        instance = response["Reservations"][0]["Instances"][0]
-                        state = instance["State"]["Name"]
-                        
-                        if state == "running":
-                            status_map[resource_id] = "active"
-                        elif state in ["pending", "stopping", "starting"]:
-                            status_map[resource_id] = "creating"
-                        elif state == "stopped":
-                            status_map[resource_id] = "stopped"
-                        elif state == "terminated":
-                            status_map[resource_id] = "terminated"
-                        else:
-                            status_map[resource_id] = "unknown"
-                    
-                    except ClientError as e:
-                        if e.response["Error"]["Code"] == "InvalidInstanceID.NotFound":
-                            status_map[resource_id] = "not_found"
-                        else:
-                            status_map[resource_id] = "error"
+                    # Guests are described together below
+                    guest_instances[resource_id] = resource.metadata.get("instance_id", resource_id)
                 
                 else:
                     status_map[resource_id] = "unknown"
@@ -481,6 +559,23 @@ class AWSProvider(InfrastructureProvider):
                 self.logger.error(f"Failed to get status for {resource_id}: {e}")
                 status_map[resource_id] = "error"
         
+        if guest_instances:
+            # For guests, check EC2 instance status with paginated batch describes
+            try:
+                instances = self._describe_instances(guest_instances.values())
+            except Exception as e:
+                self.logger.error(f"Failed to describe instances: {e}")
+                instances = None
+            
+            for resource_id, instance_id in guest_instances.items():
+                if instances is None:
+                    status_map[resource_id] = "error"
+                elif instance_id not in instances:
+                    status_map[resource_id] = "not_found"
+                else:
+                    state = instances[instance_id]["State"]["Name"]
+                    status_map[resource_id] = INSTANCE_STATUS.get(state, "unknown")
+        
         return status_map
     
     def get_resource_info(self, resource_id: str) -> Optional[ResourceInfo]:
@@ -671,47 +766,105 @@ class AWSProvider(InfrastructureProvider):
     def _get_instance_info(self, instance_id: str) -> Dict[str, Any]:
         """Get current instance information"""
         try:
-            response = self._ec2_client.describe_instances(InstanceIds=[instance_id])
-            
-            if not response["Reservations"]:
-                return {}
-            
-            instance = response["Reservations"][0]["Instances"][0]
-            
-            return {
-                "instance_state": instance["State"]["Name"],
-                "private_ip": instance.get("PrivateIpAddress"),
-                "public_ip": instance.get("PublicIpAddress"),
-                "instance_type": instance["InstanceType"],
-                "launch_time": instance.get("LaunchTime", "").strftime("%Y-%m-%d %H:%M:%S") if instance.get("LaunchTime") else None,
-                "availability_zone": instance["Placement"]["AvailabilityZone"]
-            }
-            
+            instance = self._describe_instances([instance_id]).get(instance_id)
         except ClientError:
             return {}
+        return self._instance_info(instance) if instance else {}
+    
+    @staticmethod
+    def _instance_info(instance: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the tracked fields of a described instance"""
+        return {
+            "instance_state": instance["State"]["Name"],
+            "private_ip": instance.get("PrivateIpAddress"),
+            "public_ip": instance.get("PublicIpAddress"),
+            "instance_type": instance.get("InstanceType"),
+            "launch_time": instance["LaunchTime"].strftime("%Y-%m-%d %H:%M:%S") if instance.get("LaunchTime") else None,
+            "availability_zone": instance.get("Placement", {}).get("AvailabilityZone")
+        }
+    
+    def _describe_instances(self, instance_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Describe many instances with paginated, filter-based calls.
+        
+        An ``instance-id`` filter (unlike ``InstanceIds``) silently skips IDs
+        that do not exist, so one missing instance cannot fail the batch.
+        
+        Returns:
+            Mapping of instance ID -> instance description (missing IDs absent)
+        """
+        ids = list(dict.fromkeys(instance_ids))
+        paginator = self._ec2_client.get_paginator("describe_instances")
+        instances: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(ids), DESCRIBE_FILTER_LIMIT):
+            chunk = ids[start:start + DESCRIBE_FILTER_LIMIT]
+            pages = paginator.paginate(Filters=[{"Name": "instance-id", "Values": chunk}])
+            for page in pages:
+                for reservation in page.get("Reservations", []):
+                    for instance in reservation.get("Instances", []):
+                        instances[instance["InstanceId"]] = instance
+        return instances
     
     def _wait_for_instance_state(self, instance_id: str, expected_state: str, timeout: int = 300) -> None:
         """Wait for instance to reach expected state"""
-        start_time = time.time()
+        self._wait_for_instances_state([instance_id], expected_state, timeout)
+    
+    @traced("wait instances_{state}", "wait", attributes=lambda self, instance_ids, expected_state, timeout=None: {
+        "state": expected_state, "instances": len(instance_ids)
+    })
+    def _wait_for_instances_state(
+        self,
+        instance_ids: List[str],
+        expected_state: str,
+        timeout: Optional[int] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Wait until all instances reach ``expected_state``, polling them
+        together with one batched describe per round.
         
-        while time.time() - start_time < timeout:
-            try:
-                response = self._ec2_client.describe_instances(InstanceIds=[instance_id])
-                
-                if response["Reservations"]:
-                    current_state = response["Reservations"][0]["Instances"][0]["State"]["Name"]
-                    if current_state == expected_state:
-                        return
-                    
-                    # Check for error states
-                    if current_state in ["terminated", "shutting-down"] and expected_state not in ["terminated", "shutting-down"]:
-                        raise ResourceCreationError(f"Instance {instance_id} entered unexpected state: {current_state}")
+        Returns:
+            Final descriptions of the instances
+        
+        Raises:
+            ResourceCreationError: An instance failed or the timeout expired
+        """
+        timeout = self.wait_timeout if timeout is None else timeout
+        deadline = time.time() + timeout
+        pending = list(instance_ids)
+        described: Dict[str, Dict[str, Any]] = {}
+        
+        while pending:
+            current = self._describe_instances(pending)
+            still_pending = []
+            for instance_id in pending:
+                instance = current.get(instance_id)
+                if instance is None:
+                    if expected_state == "terminated":
+                        continue  # Instance was terminated
+                    still_pending.append(instance_id)  # Not yet visible (eventual consistency)
+                    continue
                 
-                time.sleep(10)
+                described[instance_id] = instance
+                current_state = instance["State"]["Name"]
+                if current_state == expected_state:
+                    continue
                 
-            except ClientError as e:
-                if e.response["Error"]["Code"] == "InvalidInstanceID.NotFound" and expected_state == "terminated":
-                    return  # Instance was terminated
-                raise
+                # Check for error states
+                if current_state in ["terminated", "shutting-down"] and expected_state not in ["terminated", "shutting-down"]:
+                    raise ResourceCreationError(
+                        f"Instance {instance_id} entered unexpected state: {current_state}",
+                        "aws", instance_id
+                    )
+                still_pending.append(instance_id)
+            
+            pending = still_pending
+            if not pending:
+                break
+            if time.time() >= deadline:
+                raise ResourceCreationError(
+                    f"Instances {pending} did not reach {expected_state} within {timeout} seconds",
+                    "aws", pending[0]
+                )
+            time.sleep(self.poll_interval)
         
-        raise ResourceCreationError(f"Instance {instance_id} did not reach state {expected_state} within {timeout} seconds")
\ No newline at end of file
+        return described
@@ -0,0 +1,252 @@
+"""
+Parsed Domain Model Cache
+
+A domain's XML is parsed once into a compact, read-only model (interfaces,
+MACs, bridges, disks, memory, vCPUs) that is shared by every
+LibvirtDomainWrapper for the same domain UUID. IP discovery asks for MACs,
+interfaces and disks of one VM several times per pass; with the model cache
+that is one parse per definition instead of one per question.
+
+Entries stay valid until a libvirt define/undefine, start/stop or device
+event invalidates them (see ``watch_domain_events`` in
+libvirt_domain_wrapper). Without an event subscription each lookup fetches
+the XML and compares its hash, so a changed definition is re-parsed and an
+unchanged one is not.
+
+This module does not import libvirt: anything with ``UUIDString()`` and
+``XMLDesc(flags)`` can be modelled.
+"""
+
+import hashlib
+import threading
+import xml.etree.ElementTree as ET
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from cyris.core.unified_logger import get_logger
+
+logger = get_logger(__name__, "domain_model")
+
+# Multipliers from libvirt's memory units to KiB
+_MEMORY_UNITS = {
+    'b': 1 / 1024, 'bytes': 1 / 1024,
+    'kb': 1000 / 1024, 'k': 1, 'kib': 1,
+    'mb': 1000 ** 2 / 1024, 'm': 1024, 'mib': 1024,
+    'gb': 1000 ** 3 / 1024, 'g': 1024 ** 2, 'gib': 1024 ** 2,
+    'tb': 1000 ** 4 / 1024, 't': 1024 ** 3, 'tib': 1024 ** 3,
+}
+
+
+def xml_digest(xml_desc: str) -> bytes:
+    """Hash used to tell whether a domain definition changed"""
+    return hashlib.blake2b(xml_desc.encode('utf-8'), digest_size=16).digest()
+
+
+def _memory_kib(elem: Optional[ET.Element]) -> int:
+    if elem is None or not (elem.text or '').strip():
+        return 0
+    factor = _MEMORY_UNITS.get(elem.get('unit', 'KiB').lower(), 1)
+    return int(int(elem.text.strip()) * factor)
+
+
+class DomainInterface:
+    """One <interface> of a domain definition"""
+
+    __slots__ = ('interface_type', 'mac', 'target', 'bridge', 'network', 'model', 'static_ips')
+
+    def __init__(self, interface_type: str, mac: Optional[str], target: Optional[str],
+                 bridge: Optional[str], network: Optional[str], model: Optional[str],
+                 static_ips: Tuple[str, ...]):
+        self.interface_type = interface_type
+        self.mac = mac
+        self.target = target
+        self.bridge = bridge
+        self.network = network
+        self.model = model
+        self.static_ips = static_ips
+
+    @classmethod
+    def from_element(cls, elem: ET.Element) -> 'DomainInterface':
+        mac = elem.find('mac')
+        target = elem.find('target')
+        source = elem.find('source')
+        model = elem.find('model')
+        return cls(
+            interface_type=elem.get('type', 'bridge'),
+            mac=mac.get('address') if mac is not None else None,
+            target=target.get('dev') if target is not None else None,
+            bridge=source.get('bridge') if source is not None else None,
+            network=source.get('network') if source is not None else None,
+            model=model.get('type') if model is not None else None,
+            static_ips=tuple(ip.get('address') for ip in elem.iter('ip') if ip.get('address')),
+        )
+
+    def __repr__(self) -> str:
+        return (f"DomainInterface(type={self.interface_type!r}, mac={self.mac!r}, "
+                f"target={self.target!r}, bridge={self.bridge!r}, network={self.network!r})")
+
+
+class DomainDisk:
+    """One <disk> of a domain definition"""
+
+    __slots__ = ('target', 'source', 'driver_type', 'device_type', 'bus', 'readonly')
+
+    def __init__(self, target: str, source: str, driver_type: str, device_type: str,
+                 bus: str, readonly: bool):
+        self.target = target
+        self.source = source
+        self.driver_type = driver_type
+        self.device_type = device_type
+        self.bus = bus
+        self.readonly = readonly
+
+    @classmethod
+    def from_element(cls, elem: ET.Element) -> 'DomainDisk':
+        target = elem.find('target')
+        source = elem.find('source')
+        driver = elem.find('driver')
+        return cls(
+            target=target.get('dev', 'unknown') if target is not None else 'unknown',
+            source=(source.get('file') or source.get('dev') or source.get('name') or '')
+            if source is not None else '',
+            driver_type=driver.get('type', 'raw') if driver is not None else 'raw',
+            device_type=elem.get('device', 'disk'),
+            bus=target.get('bus', 'unknown') if target is not None else 'unknown',
+            readonly=elem.find('readonly') is not None,
+        )
+
+    def __repr__(self) -> str:
+        return f"DomainDisk(target={self.target!r}, source={self.source!r}, type={self.driver_type!r})"
+
+
+class DomainModel:
+    """Read-only parse of one domain definition"""
+
+    __slots__ = ('uuid', 'name', 'digest', 'memory_kib', 'current_memory_kib', 'vcpus',
+                 'interfaces', 'disks')
+
+    def __init__(self, uuid: str, name: str, digest: bytes, memory_kib: int,
+                 current_memory_kib: int, vcpus: int,
+                 interfaces: Tuple[DomainInterface, ...], disks: Tuple[DomainDisk, ...]):
+        self.uuid = uuid
+        self.name = name
+        self.digest = digest
+        self.memory_kib = memory_kib
+        self.current_memory_kib = current_memory_kib
+        self.vcpus = vcpus
+        self.interfaces = interfaces
+        self.disks = disks
+
+    @classmethod
+    def from_xml(cls, xml_desc: str, digest: Optional[bytes] = None) -> 'DomainModel':
+        """Parse a domain XML description"""
+        root = ET.fromstring(xml_desc)
+        devices = root.find('devices')
+        if devices is None:
+            devices = ET.Element('devices')
+        vcpu = root.find('vcpu')
+        return cls(
+            uuid=(root.findtext('uuid') or '').strip(),
+            name=(root.findtext('name') or '').strip(),
+            digest=digest or xml_digest(xml_desc),
+            memory_kib=_memory_kib(root.find('memory')),
+            current_memory_kib=_memory_kib(root.find('currentMemory')) or _memory_kib(root.find('memory')),
+            vcpus=int(vcpu.text.strip()) if vcpu is not None and (vcpu.text or '').strip() else 0,
+            interfaces=tuple(DomainInterface.from_element(e) for e in devices.findall('interface')),
+            disks=tuple(DomainDisk.from_element(e) for e in devices.findall('disk')),
+        )
+
+    @property
+    def macs(self) -> Tuple[str, ...]:
+        return tuple(iface.mac for iface in self.interfaces if iface.mac)
+
+    @property
+    def bridges(self) -> Tuple[str, ...]:
+        return tuple(iface.bridge for iface in self.interfaces if iface.bridge)
+
+    @property
+    def static_ips(self) -> Tuple[str, ...]:
+        return tuple(ip for iface in self.interfaces for ip in iface.static_ips)
+
+    def __repr__(self) -> str:
+        return (f"DomainModel(name={self.name!r}, uuid={self.uuid!r}, vcpus={self.vcpus}, "
+                f"interfaces={len(self.interfaces)}, disks={len(self.disks)})")
+
+
+class DomainModelCache:
+    """
+    Parsed domain models keyed by domain UUID.
+
+    For a connection URI with a live event subscription (see
+    ``set_watching``) a cached model is returned without contacting libvirt.
+    Otherwise the XML is fetched and only re-parsed when its hash differs
+    from the cached model's.
+    """
+
+    def __init__(self):
+        self._models: Dict[str, DomainModel] = {}
+        self._lock = threading.Lock()
+        self._watched: Set[str] = set()
+        self.stats = {'hits': 0, 'revalidated': 0, 'parses': 0, 'invalidations': 0}
+
+    def lookup(self, uuid: str, fetch_xml: Callable[[], str], uri: Optional[str] = None) -> DomainModel:
+        """
+        Return the model for ``uuid``, calling ``fetch_xml`` only when needed.
+
+        Args:
+            uuid: Domain UUID
+            fetch_xml: Returns the current domain XML
+            uri: Connection URI the domain belongs to, if known
+        """
+        with self._lock:
+            model = self._models.get(uuid)
+            if model is not None and uri in self._watched:
+                self.stats['hits'] += 1
+                return model
+
+        xml_desc = fetch_xml()
+        digest = xml_digest(xml_desc)
+        with self._lock:
+            model = self._models.get(uuid)
+            if model is not None and model.digest == digest:
+                self.stats['revalidated'] += 1
+                return model
+
+        model = DomainModel.from_xml(xml_desc, digest)
+        with self._lock:
+            self._models[uuid] = model
+            self.stats['parses'] += 1
+        return model
+
+    def for_domain(self, domain: Any, uri: Optional[str] = None) -> DomainModel:
+        """Model for a raw libvirt domain object"""
+        return self.lookup(domain.UUIDString(), lambda: domain.XMLDesc(0), uri)
+
+    def invalidate(self, uuid: Optional[str] = None) -> None:
+        """Drop one domain's model, or every model when ``uuid`` is None"""
+        with self._lock:
+            if uuid is None:
+                self._models.clear()
+            elif self._models.pop(uuid, None) is None:
+                return
+            self.stats['invalidations'] += 1
+
+    def is_watching(self, uri: Optional[str]) -> bool:
+        return uri in self._watched
+
+    def set_watching(self, uri: str, watching: bool) -> None:
+        """Switch a connection URI between event-driven and hash-validated lookups"""
+        with self._lock:
+            if watching:
+                self._watched.add(uri)
+            elif uri in self._watched:
+                # Events may have been missed; start over with hash checks
+                self._watched.discard(uri)
+                self._models.clear()
+        logger.debug(f"Domain models for {uri} are {'event-driven' if watching else 'hash-validated'}")
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+
+# Shared by all wrappers and providers in the process
+DOMAIN_MODELS = DomainModelCache()
@@ -8,7 +8,9 @@ implementing the infrastructure provider interface for local virtualization.
 # import logging  # Replaced with unified logger
 from cyris.core.unified_logger import get_logger, get_virt_install_debug_log_path
 from cyris.core.streaming_executor import StreamingCommandExecutor
+from cyris.core.tracing import traced
 import subprocess
+from cyris.core import exec_gateway
 import xml.etree.ElementTree as ET
 from typing import Dict, List, Optional, Any
 from pathlib import Path
@@ -21,6 +23,7 @@ import re
 import socket
 import ipaddress
 import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Import permission manager for automatic libvirt access setup
 from ..permissions import PermissionManager
@@ -38,7 +41,13 @@ from .base_provider import (
 from cyris.domain.entities.host import Host
 from cyris.domain.entities.guest import Guest, BaseVMType
 from ..image_builder import LocalImageBuilder, BuildResult
+from ..template_cache import TEMPLATE_DIR, TemplateCache
+from .libvirt_teardown import TeardownPipeline, TeardownReport, ensure_event_loop
+from .libvirt_snapshots import SnapshotManager, SnapshotReport
+from .warm_pool import MODE_SAVED, POOL_DIR, WarmPool, pool_key
+from .domain_model import DOMAIN_MODELS
 from cyris.core.rich_progress import RichProgressManager
+from cyris.services.creation_journal import STEP_DISK_CREATED, STEP_DOMAIN_DEFINED, STEP_IMAGE_BUILT
 
 
 class KVMProvider(InfrastructureProvider):
@@ -60,6 +69,8 @@ class KVMProvider(InfrastructureProvider):
     - storage_pool: Default storage pool name
     - network_prefix: Prefix for created networks
     - vm_template_dir: Directory containing VM templates
+    - warm_pool_size / warm_pool_sizes: Standby VMs kept per kvm-auto image
+      configuration (see ``warm_pool``)
     """
     
     def __init__(self, config: Dict[str, Any]):
@@ -92,7 +103,13 @@ class KVMProvider(InfrastructureProvider):
         self.permission_manager = PermissionManager()
         
         # Initialize image builder for kvm-auto support with configurable build directory
-        self.image_builder = LocalImageBuilder(work_dir=self.build_storage_dir)
+        self.image_builder = LocalImageBuilder(
+            work_dir=self.build_storage_dir,
+            template_cache=TemplateCache(
+                self.build_storage_dir / TEMPLATE_DIR, config.get("template_mirror_dir")
+            ) if config.get("template_cache", True) else None,
+            distribution_bandwidth=(config.get("image_distribution_mbps") or 0) * 125000 or None
+        )
         
         # Rich progress manager (can be set by orchestrator)
         self.progress_manager: Optional[RichProgressManager] = None
@@ -103,6 +120,20 @@ class KVMProvider(InfrastructureProvider):
             logger=self.logger
         )
         
+        # Standby VMs that kvm-auto guests claim instead of booting
+        self.warm_pool: Optional[WarmPool] = None
+        if config.get("warm_pool_size", 0) or config.get("warm_pool_sizes"):
+            self.warm_pool = WarmPool(
+                pool_dir=self.base_image_dir / POOL_DIR,
+                connection_factory=self._pool_connection,
+                boot=self._boot_pool_member,
+                size=config.get("warm_pool_size", 0),
+                sizes=config.get("warm_pool_sizes"),
+                memory_budget_mb=config.get("warm_pool_memory_mb", 8192),
+                mode=config.get("warm_pool_mode", MODE_SAVED),
+                prefix=self.network_prefix
+            )
+        
         self.logger.info(f"KVMProvider initialized with URI: {self.libvirt_uri}")
         self.logger.info("Using native libvirt-python API")
     
@@ -131,6 +162,8 @@ class KVMProvider(InfrastructureProvider):
                     self._connection.close()
             
             self.logger.info(f"Connecting to libvirt at {self.libvirt_uri}")
+            # Lifecycle events (used by teardown) need the loop before open()
+            ensure_event_loop()
             self._connection = libvirt.open(self.libvirt_uri)
             
             if self._connection is None:
@@ -149,6 +182,9 @@ class KVMProvider(InfrastructureProvider):
     
     def disconnect(self) -> None:
         """Clean up and close connections"""
+        if self.warm_pool is not None:
+            # Background refills use the connection
+            self.warm_pool.wait()
         if self._connection is not None:
             try:
                 self._connection.close()
@@ -316,6 +352,74 @@ class KVMProvider(InfrastructureProvider):
         
         return host_ids
     
+    def _journal_step(self, resource: str, step: str, data: Any = None) -> None:
+        """Record a completed creation step when the orchestrator journals this run"""
+        journal = getattr(self, '_creation_journal', None)
+        if journal is not None:
+            journal.mark(resource, step, data)
+    
+    def _journal_data(self, resource: str, step: str) -> Any:
+        """Data of a step the journaled run completed before, None if it did not"""
+        journal = getattr(self, '_creation_journal', None)
+        return journal.data(resource, step) if journal is not None else None
+    
+    def _journaled_disk(self, vm_name: str) -> Optional[str]:
+        """Disk a previous run created for ``vm_name`` but never attached to a domain"""
+        journal = getattr(self, '_creation_journal', None)
+        if journal is None or journal.done(vm_name, STEP_DOMAIN_DEFINED):
+            return None
+        disk_path = journal.data(vm_name, STEP_DISK_CREATED)
+        return disk_path if disk_path and Path(disk_path).exists() else None
+    
+    def _pool_connection(self):
+        if not self.is_connected():
+            self.connect()
+        return self._connection
+    
+    def _boot_pool_member(self, guest: Guest, vm_name: str, disk_path: str) -> bool:
+        """Define and start a standby VM, returning once it has an IP address"""
+        if self._create_vm_with_virt_install(guest, vm_name, disk_path) is None:
+            return False
+        deadline = time.monotonic() + self.config.get("warm_pool_boot_timeout", 300)
+        while time.monotonic() < deadline:
+            if self.get_vm_ip(vm_name):
+                return True
+            time.sleep(5)
+        return False
+    
+    def _claim_pool_vm(self, guest: Guest, image_path: str, vm_name: str) -> Optional[str]:
+        """Claim a standby VM for ``guest`` from the warm pool, None if there is none"""
+        if self.warm_pool is None or not self.warm_pool.target(guest.image_name):
+            return None
+        if not Path(image_path).exists():
+            return None
+        claimed = self.warm_pool.claim(pool_key(image_path, guest), vm_name)
+        if claimed is None:
+            return None
+        
+        self._journal_step(claimed.vm_name, STEP_DISK_CREATED, claimed.disk_path)
+        self._journal_step(claimed.vm_name, STEP_DOMAIN_DEFINED)
+        guest_resource = ResourceInfo(
+            resource_id=claimed.vm_name,
+            resource_type="guest",
+            name=guest.guest_id,
+            status=ResourceStatus.ACTIVE,
+            metadata={
+                "provider": "kvm-auto",
+                "guest_id": guest.guest_id,
+                "vm_name": claimed.vm_name,
+                "disk_path": claimed.disk_path,
+                "image_name": guest.image_name,
+                "memory_mb": guest.memory,
+                "vcpus": guest.vcpus,
+                "build_method": "warm-pool",
+                "pool_vm": claimed.pool_name
+            },
+            created_at=time.strftime("%Y-%m-%d %H:%M:%S")
+        )
+        self._register_resource(guest_resource)
+        return claimed.vm_name
+    
     def _generate_deterministic_vm_name(self, guest: Guest) -> str:
         """
         Generate deterministic VM name based on guest configuration.
@@ -458,8 +562,12 @@ class KVMProvider(InfrastructureProvider):
                 # VM doesn't exist, create it
                 self.logger.info(f"Creating new VM {vm_name} for guest {guest_id}")
                 
-                # Create VM disk from base image
-                disk_path = self._create_vm_disk(vm_name, guest)
+                # Create VM disk from base image, unless an interrupted
+                # creation left one that was never booted
+                disk_path = self._journaled_disk(vm_name)
+                if disk_path is None:
+                    disk_path = self._create_vm_disk(vm_name, guest)
+                    self._journal_step(vm_name, STEP_DISK_CREATED, disk_path)
                 
                 # Generate VM XML configuration
                 vm_xml = self._generate_vm_xml(vm_name, guest, disk_path, host_mapping)
@@ -468,6 +576,7 @@ class KVMProvider(InfrastructureProvider):
                 domain = self._connection.defineXML(vm_xml)
                 if domain is None:
                     raise ResourceCreationError(f"Failed to define VM {vm_name}")
+                self._journal_step(vm_name, STEP_DOMAIN_DEFINED)
                 
                 # Start the VM
                 if domain.create() < 0:
@@ -507,14 +616,18 @@ class KVMProvider(InfrastructureProvider):
         return guest_ids
     
     def _create_kvm_auto_guests(self, guests: List[Guest], host_mapping: Dict[str, str], build_only: bool = False, skip_builder: bool = False, recreate: bool = False) -> List[str]:
-        """Create guests using kvm-auto workflow with Rich progress tracking"""
+        """
+        Create guests using kvm-auto workflow with Rich progress tracking.
+        
+        The images of different groups are built concurrently (at most
+        ``image_build_workers`` at a time), and the VMs of a group are created
+        as soon as its image is ready rather than after every build finished.
+        """
         if self.progress_manager:
             self.progress_manager.log_info(f"🤖 Starting kvm-auto workflow for {len(guests)} guests")
         else:
             self.logger.info(f"🤖 Starting kvm-auto workflow for {len(guests)} guests")
         
-        guest_ids = []
-        
         # Group guests by image configuration to avoid rebuilding same images
         image_groups = self._group_guests_by_image_config(guests)
         
@@ -526,153 +639,92 @@ class KVMProvider(InfrastructureProvider):
         # Add progress step for image building and VM creation
         if self.progress_manager:
             self.progress_manager.start_step("kvm_auto", f"Building images and creating VMs...", total=len(guests))
-            completed_vms = 0
-        for i, (image_config, guest_list) in enumerate(image_groups.items(), 1):
-            group_msg = f"🔨 Processing image group {i}/{len(image_groups)}: {image_config}"
-            guest_list_msg = f"   📋 This group contains {len(guest_list)} guests: {[g.guest_id for g in guest_list]}"
-            
-            if self.progress_manager:
-                self.progress_manager.log_info(group_msg)
-                self.progress_manager.log_info(guest_list_msg)
-            else:
-                self.logger.info(group_msg)
-                self.logger.info(guest_list_msg)
-            
-            # Build image locally (use first guest as template)
-            template_guest = guest_list[0]
-            template_msg = f"🧩 Using guest '{template_guest.guest_id}' as template for image building"
-            
-            if self.progress_manager:
-                self.progress_manager.log_info(template_msg)
-                # Start image building sub-step
-                self.progress_manager.start_step(f"image_build_{i}", f"Building image for {template_guest.image_name}...")
-            else:
-                self.logger.info(template_msg)
-            
-            try:
-                if skip_builder:
-                    # Skip image building, use existing image
-                    expected_image_path = str(self.build_storage_dir / f"{template_guest.guest_id}-{template_guest.image_name}.qcow2")
-                    if Path(expected_image_path).exists():
-                        skip_msg = f"🏃‍♂️ Skipping image building (--skip-builder), using existing image: {expected_image_path}"
-                        if self.progress_manager:
-                            self.progress_manager.complete_step(f"image_build_{i}")
-                            self.progress_manager.log_info(skip_msg)
-                        else:
-                            self.logger.info(skip_msg)
-                        
-                        # Create a mock build result
-                        build_result = type('BuildResult', (), {
-                            'success': True,
-                            'image_path': expected_image_path,
-                            'build_time': 0.0
-                        })()
-                    else:
-                        # Enhanced error messaging for missing images
-                        error_msg = f"❌ Skip-builder enabled but image not found: {expected_image_path}"
-                        available_images_dir = self.build_storage_dir
-                        if available_images_dir.exists():
-                            available_images = list(available_images_dir.glob("*.qcow2"))
-                            if available_images:
-                                help_msg = f"   💡 Available images in {available_images_dir}: {[img.name for img in available_images[:3]]}"
-                            else:
-                                help_msg = f"   💡 No images found in {available_images_dir}. Run without --skip-builder first."
-                        else:
-                            help_msg = f"   💡 Build directory {available_images_dir} doesn't exist. Run without --skip-builder first."
-                        
-                        skip_msg = f"   🚫 Skipping {len(guest_list)} guests in this group"
-                        
-                        if self.progress_manager:
-                            self.progress_manager.fail_step(f"image_build_{i}", f"Image not found: {expected_image_path}")
-                            self.progress_manager.log_error(help_msg)
-                            self.progress_manager.log_error(skip_msg)
-                        else:
-                            self.logger.error(error_msg)
-                            self.logger.error(help_msg)
-                            self.logger.error(skip_msg)
-                        continue
-                else:
-                    build_result = self.image_builder.build_image_locally(template_guest, build_only=build_only)
-                    
-                    if not build_result.success:
-                        error_msg = f"❌ Image build failed: {build_result.error_message}"
-                        skip_msg = f"   🚫 Skipping {len(guest_list)} guests in this group"
-                        
-                        if self.progress_manager:
-                            self.progress_manager.fail_step(f"image_build_{i}", f"Image build failed: {build_result.error_message}")
-                            self.progress_manager.log_error(skip_msg)
-                        else:
-                            self.logger.error(error_msg)
-                            self.logger.error(skip_msg)
-                        continue
-                    
-                    success_msg = f"✅ Image built successfully in {build_result.build_time:.2f}s"
-                    path_msg = f"   📁 Image path: {build_result.image_path}"
-                    
-                    if self.progress_manager:
-                        self.progress_manager.complete_step(f"image_build_{i}")
-                        self.progress_manager.log_success(success_msg)
-                        self.progress_manager.log_info(path_msg)
-                    else:
-                        self.logger.info(success_msg)
-                        self.logger.info(path_msg)
+        completed_vms = 0
+        
+        workers = max(1, min(self.config.get("image_build_workers", 2), len(image_groups)))
+        if workers > 1 and not skip_builder:
+            # Concurrent builds must not all ask for the sudo password
+            self.image_builder.sudo_manager.ensure_sudo_access("parallel image builds", ["virt-builder"])
+            self.logger.info(f"Building up to {workers} images concurrently")
+        
+        group_vm_ids: Dict[str, List[str]] = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-build") as pool:
+            builds = {
+                pool.submit(self._build_group_image, i, len(image_groups), image_config, guest_list,
+                            build_only, skip_builder): image_config
+                for i, (image_config, guest_list) in enumerate(image_groups.items(), 1)
+            }
+            for future in as_completed(builds):
+                image_config = builds[future]
+                guest_list = image_groups[image_config]
+                build_result = future.result()
                 
                 # In build-only mode, we're done after successful image build
-                if build_only:
-                    if self.progress_manager:
-                        self.progress_manager.log_success(f"🏁 Build-only mode: Image ready for later use")
-                    else:
-                        self.logger.info(f"🏁 Build-only mode: Image ready for later use")
-                    continue  # Skip VM creation for this group
-                
-                # Create VMs from built image
-                create_msg = f"🚀 Creating {len(guest_list)} VMs from built image"
-                
-                if self.progress_manager:
-                    self.progress_manager.log_info(create_msg)
-                else:
-                    self.logger.info(create_msg)
+                if build_result is None or build_only:
+                    continue
                 
-                for j, guest in enumerate(guest_list, 1):
-                    vm_msg = f"   📱 Creating VM {j}/{len(guest_list)}: {guest.guest_id}"
-                    
-                    if self.progress_manager:
-                        self.progress_manager.log_info(vm_msg)
-                    else:
-                        self.logger.info(vm_msg)
+                try:
+                    template_guest = guest_list[0]
+                    vm_ids = group_vm_ids.setdefault(image_config, [])
                     
-                    # Add detailed logging before VM creation
-                    details = [
-                        f"   🔍 VM creation details:",
-                        f"      - Guest ID: {guest.guest_id}",
-                        f"      - Memory: {getattr(guest, 'memory', 'N/A')} MB",
-                        f"      - VCPUs: {getattr(guest, 'vcpus', 'N/A')}",
-                        f"      - Image path: {build_result.image_path}"
-                    ]
+                    # Create VMs from built image
+                    create_msg = f"🚀 Creating {len(guest_list)} VMs from built image for {image_config}"
                     
                     if self.progress_manager:
-                        for detail in details:
-                            self.progress_manager.log_info(detail)
+                        self.progress_manager.log_info(create_msg)
                     else:
-                        for detail in details:
-                            self.logger.debug(detail)
+                        self.logger.info(create_msg)
                     
-                    try:
-                        vm_id = self._create_vm_from_built_image(guest, build_result.image_path, host_mapping, recreate)
-                        if vm_id:
-                            guest_ids.append(vm_id)
-                            completed_vms += 1
-                            
-                            success_msg = f"   ✅ VM created successfully: {vm_id}"
-                            if self.progress_manager:
-                                self.progress_manager.log_success(success_msg)
-                                # Update overall progress
-                                self.progress_manager.update_step("kvm_auto", completed=completed_vms)
-                            else:
-                                self.logger.info(success_msg)
+                    for j, guest in enumerate(guest_list, 1):
+                        vm_msg = f"   📱 Creating VM {j}/{len(guest_list)}: {guest.guest_id}"
+                        
+                        if self.progress_manager:
+                            self.progress_manager.log_info(vm_msg)
+                        else:
+                            self.logger.info(vm_msg)
+                        
+                        # Add detailed logging before VM creation
+                        details = [
+                            f"   🔍 VM creation details:",
+                            f"      - Guest ID: {guest.guest_id}",
+                            f"      - Memory: {getattr(guest, 'memory', 'N/A')} MB",
+                            f"      - VCPUs: {getattr(guest, 'vcpus', 'N/A')}",
+                            f"      - Image path: {build_result.image_path}"
+                        ]
+                        
+                        if self.progress_manager:
+                            for detail in details:
+                                self.progress_manager.log_info(detail)
                         else:
-                            error_msg1 = f"   ❌ VM creation returned None for guest: {guest.guest_id}"
-                            error_msg2 = f"      🔍 Check virt-install logs above for detailed error information"
+                            for detail in details:
+                                self.logger.debug(detail)
+                        
+                        try:
+                            vm_id = self._create_vm_from_built_image(guest, build_result.image_path, host_mapping, recreate)
+                            if vm_id:
+                                vm_ids.append(vm_id)
+                                completed_vms += 1
+                                
+                                success_msg = f"   ✅ VM created successfully: {vm_id}"
+                                if self.progress_manager:
+                                    self.progress_manager.log_success(success_msg)
+                                    # Update overall progress
+                                    self.progress_manager.update_step("kvm_auto", completed=completed_vms)
+                                else:
+                                    self.logger.info(success_msg)
+                            else:
+                                error_msg1 = f"   ❌ VM creation returned None for guest: {guest.guest_id}"
+                                error_msg2 = f"      🔍 Check virt-install logs above for detailed error information"
+                                
+                                if self.progress_manager:
+                                    self.progress_manager.log_error(error_msg1)
+                                    self.progress_manager.log_error(error_msg2)
+                                else:
+                                    self.logger.error(error_msg1)
+                                    self.logger.error(error_msg2)
+                        except Exception as vm_e:
+                            error_msg1 = f"   💥 Exception during VM creation for {guest.guest_id}: {vm_e}"
+                            error_msg2 = f"      📋 Exception type: {type(vm_e).__name__}"
                             
                             if self.progress_manager:
                                 self.progress_manager.log_error(error_msg1)
@@ -680,31 +732,21 @@ class KVMProvider(InfrastructureProvider):
                             else:
                                 self.logger.error(error_msg1)
                                 self.logger.error(error_msg2)
-                    except Exception as vm_e:
-                        error_msg1 = f"   💥 Exception during VM creation for {guest.guest_id}: {vm_e}"
-                        error_msg2 = f"      📋 Exception type: {type(vm_e).__name__}"
-                        
-                        if self.progress_manager:
-                            self.progress_manager.log_error(error_msg1)
-                            self.progress_manager.log_error(error_msg2)
-                        else:
-                            self.logger.error(error_msg1)
-                            self.logger.error(error_msg2)
-                            import traceback
-                            self.logger.error(f"      📋 Stack trace: {traceback.format_exc()}")
-                
-            except Exception as e:
-                self.logger.error(f"💥 Exception during image group processing: {e}")
-                import traceback
-                self.logger.error(f"💥 Full traceback: {traceback.format_exc()}")
-            finally:
-                # Always preserve build images for development efficiency
-                if 'build_result' in locals() and build_result.image_path:
-                    if build_only:
-                        reason = "build-only mode"
-                    else:
-                        reason = "default preservation for development"
-                    self.logger.info(f"🔒 Preserving build image for later use ({reason}): {build_result.image_path}")
+                                import traceback
+                                self.logger.error(f"      📋 Stack trace: {traceback.format_exc()}")
+                    
+                    # Replace claimed standby VMs (and warm up new image configurations)
+                    if self.warm_pool is not None and self.warm_pool.target(template_guest.image_name):
+                        self.warm_pool.refill(pool_key(build_result.image_path, template_guest),
+                                              template_guest, build_result.image_path)
+                    
+                except Exception as e:
+                    self.logger.error(f"💥 Exception during image group processing: {e}")
+                    import traceback
+                    self.logger.error(f"💥 Full traceback: {traceback.format_exc()}")
+        
+        # VMs are reported in group order, whichever image was ready first
+        guest_ids = [vm_id for image_config in image_groups for vm_id in group_vm_ids.get(image_config, [])]
         
         # Complete the overall kvm-auto step
         completion_msg = f"🏁 kvm-auto workflow completed: {len(guest_ids)} VMs created successfully"
@@ -717,6 +759,135 @@ class KVMProvider(InfrastructureProvider):
             self.logger.info(completion_msg)
         return guest_ids
     
+    def _build_group_image(self, i: int, group_count: int, image_config: str, guest_list: List[Guest],
+                           build_only: bool = False, skip_builder: bool = False) -> Optional[BuildResult]:
+        """
+        Build (or find) the image of one image group; runs on the build pool.
+        
+        Returns:
+            The build result, or None when the group's guests must be skipped
+        """
+        group_msg = f"🔨 Processing image group {i}/{group_count}: {image_config}"
+        guest_list_msg = f"   📋 This group contains {len(guest_list)} guests: {[g.guest_id for g in guest_list]}"
+        
+        if self.progress_manager:
+            self.progress_manager.log_info(group_msg)
+            self.progress_manager.log_info(guest_list_msg)
+        else:
+            self.logger.info(group_msg)
+            self.logger.info(guest_list_msg)
+        
+        # Build image locally (use first guest as template)
+        template_guest = guest_list[0]
+        template_msg = f"🧩 Using guest '{template_guest.guest_id}' as template for image building"
+        
+        if self.progress_manager:
+            self.progress_manager.log_info(template_msg)
+            # Start image building sub-step
+            self.progress_manager.start_step(f"image_build_{i}", f"Building image for {template_guest.image_name}...")
+        else:
+            self.logger.info(template_msg)
+        
+        build_result = None
+        try:
+            if skip_builder:
+                # Skip image building, use existing image
+                expected_image_path = str(self.build_storage_dir / f"{template_guest.guest_id}-{template_guest.image_name}.qcow2")
+                if Path(expected_image_path).exists():
+                    skip_msg = f"🏃‍♂️ Skipping image building (--skip-builder), using existing image: {expected_image_path}"
+                    if self.progress_manager:
+                        self.progress_manager.complete_step(f"image_build_{i}")
+                        self.progress_manager.log_info(skip_msg)
+                    else:
+                        self.logger.info(skip_msg)
+                    
+                    # Create a mock build result
+                    build_result = type('BuildResult', (), {
+                        'success': True,
+                        'image_path': expected_image_path,
+                        'build_time': 0.0
+                    })()
+                else:
+                    # Enhanced error messaging for missing images
+                    error_msg = f"❌ Skip-builder enabled but image not found: {expected_image_path}"
+                    available_images_dir = self.build_storage_dir
+                    if available_images_dir.exists():
+                        available_images = list(available_images_dir.glob("*.qcow2"))
+                        if available_images:
+                            help_msg = f"   💡 Available images in {available_images_dir}: {[img.name for img in available_images[:3]]}"
+                        else:
+                            help_msg = f"   💡 No images found in {available_images_dir}. Run without --skip-builder first."
+                    else:
+                        help_msg = f"   💡 Build directory {available_images_dir} doesn't exist. Run without --skip-builder first."
+                    
+                    skip_msg = f"   🚫 Skipping {len(guest_list)} guests in this group"
+                    
+                    if self.progress_manager:
+                        self.progress_manager.fail_step(f"image_build_{i}", f"Image not found: {expected_image_path}")
+                        self.progress_manager.log_error(help_msg)
+                        self.progress_manager.log_error(skip_msg)
+                    else:
+                        self.logger.error(error_msg)
+                        self.logger.error(help_msg)
+                        self.logger.error(skip_msg)
+                    return None
+            else:
+                # An interrupted creation may have built this image already
+                built_image = self._journal_data(image_config, STEP_IMAGE_BUILT)
+                if built_image and Path(built_image).exists():
+                    self.logger.info(f"Reusing image built before the interruption: {built_image}")
+                    build_result = BuildResult(success=True, image_path=built_image)
+                else:
+                    build_result = self.image_builder.build_image_locally(
+                        template_guest, build_only=build_only, output_prefix=template_guest.guest_id
+                    )
+                    if build_result.success:
+                        self._journal_step(image_config, STEP_IMAGE_BUILT, build_result.image_path)
+                
+                if not build_result.success:
+                    error_msg = f"❌ Image build failed: {build_result.error_message}"
+                    skip_msg = f"   🚫 Skipping {len(guest_list)} guests in this group"
+                    
+                    if self.progress_manager:
+                        self.progress_manager.fail_step(f"image_build_{i}", f"Image build failed: {build_result.error_message}")
+                        self.progress_manager.log_error(skip_msg)
+                    else:
+                        self.logger.error(error_msg)
+                        self.logger.error(skip_msg)
+                    return None
+                
+                success_msg = f"✅ Image built successfully in {build_result.build_time:.2f}s"
+                path_msg = f"   📁 Image path: {build_result.image_path}"
+                
+                if self.progress_manager:
+                    self.progress_manager.complete_step(f"image_build_{i}")
+                    self.progress_manager.log_success(success_msg)
+                    self.progress_manager.log_info(path_msg)
+                else:
+                    self.logger.info(success_msg)
+                    self.logger.info(path_msg)
+            
+            if build_only:
+                if self.progress_manager:
+                    self.progress_manager.log_success(f"🏁 Build-only mode: Image ready for later use")
+                else:
+                    self.logger.info(f"🏁 Build-only mode: Image ready for later use")
+            return build_result
+            
+        except Exception as e:
+            self.logger.error(f"💥 Exception during image group processing: {e}")
+            import traceback
+            self.logger.error(f"💥 Full traceback: {traceback.format_exc()}")
+            return None
+        finally:
+            # Always preserve build images for development efficiency
+            if build_result is not None and build_result.image_path:
+                if build_only:
+                    reason = "build-only mode"
+                else:
+                    reason = "default preservation for development"
+                self.logger.info(f"🔒 Preserving build image for later use ({reason}): {build_result.image_path}")
+    
     def _group_guests_by_image_config(self, guests: List[Guest]) -> Dict[str, List[Guest]]:
         """Group guests by their image configuration to avoid duplicate builds"""
         groups = {}
@@ -795,6 +966,11 @@ class KVMProvider(InfrastructureProvider):
                         self.logger.error(f"Failed to start existing VM {vm_name}")
                         return None
             
+            # A standby VM of the same image and shape is usable in seconds
+            claimed_vm = self._claim_pool_vm(guest, local_image_path, vm_name)
+            if claimed_vm:
+                return claimed_vm
+            
             # VM doesn't exist, create it
             self.logger.info(f"Creating new VM {vm_name} from built image for guest {guest_id}")
             self.logger.info(f"🔧 [DEBUG] Source image path: {local_image_path}")
@@ -832,11 +1008,16 @@ class KVMProvider(InfrastructureProvider):
                 self.logger.error(f"❌ [ERROR] Cannot write to {self.base_image_dir}: {e}")
                 return None
             
-            # Copy the built image to final location
+            # Copy the built image to final location (an interrupted creation
+            # may have copied it already without booting it)
             self.logger.info(f"🔧 [DEBUG] About to copy image from {local_image_path} to {vm_disk_path}")
             try:
-                import shutil
-                shutil.copy2(local_image_path, vm_disk_path)
+                if self._journaled_disk(vm_name) == str(vm_disk_path):
+                    self.logger.info(f"Reusing disk copied before the interruption: {vm_disk_path}")
+                else:
+                    import shutil
+                    shutil.copy2(local_image_path, vm_disk_path)
+                    self._journal_step(vm_name, STEP_DISK_CREATED, str(vm_disk_path))
                 self.logger.info(f"✅ [DEBUG] Successfully copied image to: {vm_disk_path}")
                 
                 # Verify the copied file
@@ -863,6 +1044,8 @@ class KVMProvider(InfrastructureProvider):
             self.logger.info(f"🔧 [DEBUG] _create_vm_with_virt_install returned: {vm_id}")
             
             if vm_id:
+                self._journal_step(vm_name, STEP_DOMAIN_DEFINED)
+                
                 # Register guest resource
                 guest_resource = ResourceInfo(
                     resource_id=vm_id,
@@ -1035,7 +1218,7 @@ class KVMProvider(InfrastructureProvider):
                 
                 # Verify VM was actually created
                 try:
-                    check_result = subprocess.run(['virsh', 'dominfo', vm_name], 
+                    check_result = exec_gateway.run(['virsh', 'dominfo', vm_name], 
                                                 capture_output=True, text=True, timeout=10)
                     if check_result.returncode == 0:
                         self.logger.info(f"✅ [DEBUG] VM verification successful - VM {vm_name} exists in libvirt")
@@ -1174,60 +1357,97 @@ class KVMProvider(InfrastructureProvider):
         Raises:
             InfrastructureError: If destruction fails
         """
+        report = self.teardown_guests(guest_ids)
+        if not report.succeeded:
+            failures = ", ".join(f"{r.resource} ({r.error})" for r in report.failed)
+            raise ResourceDestructionError(
+                f"Guest destruction failed: {failures}", "kvm", report.failed[0].resource
+            )
+    
+    def teardown_guests(
+        self,
+        guest_ids: List[str],
+        journal_path: Optional[Path] = None
+    ) -> TeardownReport:
+        """
+        Destroy virtual machines in parallel and report per resource.
+        
+        Destroy is issued to all guests at once, undefine and disk removal
+        run on a worker pool. Progress is journaled (by default under the
+        build storage directory, keyed by the guest set) so an interrupted
+        teardown resumes when called again.
+        
+        Args:
+            guest_ids: List of guest resource IDs to destroy
+            journal_path: Optional progress journal location
+        
+        Returns:
+            Per-resource teardown report
+        """
         if not self.is_connected():
             self.connect()
         
+        if journal_path is None:
+            digest = hashlib.sha256("\n".join(sorted(guest_ids)).encode()).hexdigest()[:16]
+            journal_path = self.build_storage_dir / "teardown" / f"{digest}.journal"
+        
+        # Get disk paths before undefining
+        disk_paths = {}
         for guest_id in guest_ids:
-            try:
-                self.logger.info(f"Destroying VM {guest_id}")
-                
-                # Get the domain
-                try:
-                    domain = self._connection.lookupByName(guest_id)
-                    self.logger.debug(f"Found VM {guest_id}, state: {domain.state()[0]}")
-                except libvirt.libvirtError as e:
-                    self.logger.warning(f"VM {guest_id} not found, may already be destroyed: {e}")
-                    self._unregister_resource(guest_id)
-                    continue
-                
-                # Force stop if running
-                if domain.isActive():
-                    self.logger.info(f"VM {guest_id} is active, forcing stop")
-                    domain.destroy()  # Force stop
-                else:
-                    self.logger.info(f"VM {guest_id} is already stopped")
-                
-                # Wait for VM to stop with longer timeout
-                try:
-                    self._wait_for_vm_state(domain, libvirt.VIR_DOMAIN_SHUTOFF, timeout=60)
-                    self.logger.debug(f"VM {guest_id} reached shutoff state")
-                except Exception as e:
-                    self.logger.warning(f"VM {guest_id} failed to reach shutoff state: {e}")
-                    # Continue with undefining anyway
-                    pass
-                
-                # Get disk paths before undefining
-                guest_resource = self._resources.get(guest_id)
-                disk_path = None
-                if guest_resource and "disk_path" in guest_resource.metadata:
-                    disk_path = guest_resource.metadata["disk_path"]
-                
-                # Undefine the VM
-                domain.undefine()
-                
-                # Remove disk file
-                if disk_path and Path(disk_path).exists():
-                    Path(disk_path).unlink()
-                    self.logger.info(f"Removed disk file {disk_path}")
-                
-                # Unregister resource
-                self._unregister_resource(guest_id)
-                
-                self.logger.info(f"Successfully destroyed VM {guest_id}")
-                
-            except Exception as e:
-                self.logger.error(f"Failed to destroy guest {guest_id}: {e}")
-                raise ResourceDestructionError(f"Guest destruction failed: {e}", "kvm", guest_id)
+            guest_resource = self._resources.get(guest_id)
+            if guest_resource and "disk_path" in guest_resource.metadata:
+                disk_paths[guest_id] = [guest_resource.metadata["disk_path"]]
+        
+        self.logger.info(f"Destroying {len(guest_ids)} VMs")
+        pipeline = TeardownPipeline(
+            connection_factory=lambda: self._connection,
+            max_workers=self.config.get("teardown_workers", 16),
+            shutoff_timeout=60.0
+        )
+        report = pipeline.run(guest_ids, disk_paths, journal_path)
+        
+        for result in report.results.values():
+            if result.kind == "domain" and result.ok:
+                self._unregister_resource(result.resource)
+            elif not result.ok:
+                self.logger.error(f"Failed to destroy {result.kind} {result.resource}: {result.error}")
+        
+        return report
+    
+    def _snapshot_manager(self) -> SnapshotManager:
+        if not self.is_connected():
+            self.connect()
+        return SnapshotManager(
+            connection_factory=lambda: self._connection,
+            max_workers=self.config.get("snapshot_workers", 16)
+        )
+    
+    def snapshot_guests(self, guest_ids: List[str], description: str = "") -> SnapshotReport:
+        """
+        Take the baseline snapshot of virtual machines in parallel.
+        
+        Args:
+            guest_ids: List of guest resource IDs to snapshot
+            description: Snapshot description
+        
+        Returns:
+            Per-guest snapshot report
+        """
+        self.logger.info(f"Snapshotting {len(guest_ids)} VMs")
+        return self._snapshot_manager().take(guest_ids, description)
+    
+    def revert_guests(self, guest_ids: List[str]) -> SnapshotReport:
+        """
+        Revert virtual machines to their baseline snapshot in parallel.
+        
+        Args:
+            guest_ids: List of guest resource IDs to revert
+        
+        Returns:
+            Per-guest revert report
+        """
+        self.logger.info(f"Reverting {len(guest_ids)} VMs to their baseline snapshot")
+        return self._snapshot_manager().revert(guest_ids)
     
     def get_status(self, resource_ids: List[str]) -> Dict[str, str]:
         """
@@ -1444,14 +1664,14 @@ class KVMProvider(InfrastructureProvider):
         
         if base_image_path.stat().st_size > 1024:  # If base image is substantial
             # Create COW overlay
-            subprocess.run([
+            exec_gateway.run([
                 "qemu-img", "create", "-f", "qcow2", 
                 "-b", str(base_image_path), "-F", "qcow2",
                 str(vm_disk_path)
             ], check=True)
         else:
             # Create new image
-            subprocess.run([
+            exec_gateway.run([
                 "qemu-img", "create", "-f", "qcow2", 
                 str(vm_disk_path), "10G"
             ], check=True)
@@ -1491,13 +1711,13 @@ class KVMProvider(InfrastructureProvider):
                 
                 # Convert to qcow2 and resize
                 self.logger.info("Converting and resizing image...")
-                subprocess.run([
+                exec_gateway.run([
                     "qemu-img", "convert", "-f", "qcow2", "-O", "qcow2",
                     tmp_file.name, str(base_image_path)
                 ], check=True)
                 
                 # Resize to 10GB
-                subprocess.run([
+                exec_gateway.run([
                     "qemu-img", "resize", str(base_image_path), "10G"
                 ], check=True)
                 
@@ -1510,7 +1730,7 @@ class KVMProvider(InfrastructureProvider):
             self.logger.error(f"Failed to setup bootable base image: {e}")
             # Fallback to empty image with warning
             self.logger.warning("Creating empty base image - VMs will not boot properly")
-            subprocess.run([
+            exec_gateway.run([
                 "qemu-img", "create", "-f", "qcow2", 
                 str(base_image_path), "10G"
             ], check=True)
@@ -1699,6 +1919,9 @@ ethernets:
         
         return xml
     
+    @traced("wait vm_state", "wait", attributes=lambda self, domain, expected_state, timeout=60: {
+        "vm": domain.name(), "expected_state": expected_state
+    })
     def _wait_for_vm_state(
         self, 
         domain: libvirt.virDomain, 
@@ -1749,9 +1972,8 @@ ethernets:
                     
                     # Check if bridge exists (simple check)
                     try:
-                        import subprocess
-                        result = subprocess.run(['ip', 'link', 'show', bridge_name], 
-                                              capture_output=True, text=True, timeout=5)
+                        result = exec_gateway.run(['ip', 'link', 'show', bridge_name],
+                                                  capture_output=True, text=True, timeout=5)
                         if result.returncode == 0:
                             # Bridge exists, keep bridge networking
                             self.logger.info(f"Configured session-mode bridge networking using {bridge_name}")
@@ -1895,7 +2117,7 @@ ethernets:
         ]
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = exec_gateway.run(cmd, capture_output=True, text=True, check=True)
             self.logger.info(f"Created overlay disk: {vm_disk_path}")
             return str(vm_disk_path)
         except subprocess.CalledProcessError as e:
@@ -1968,13 +2190,13 @@ ethernets:
             ]
             
             try:
-                subprocess.run(cmd, check=True, capture_output=True)
+                exec_gateway.run(cmd, check=True, capture_output=True)
                 return str(iso_path)
             except (subprocess.CalledProcessError, FileNotFoundError):
                 # Fallback to mkisofs
                 cmd[0] = "mkisofs"
                 try:
-                    subprocess.run(cmd, check=True, capture_output=True)
+                    exec_gateway.run(cmd, check=True, capture_output=True)
                     return str(iso_path)
                 except (subprocess.CalledProcessError, FileNotFoundError) as e:
                     self.logger.warning(f"Cloud-init ISO creation failed: {e}")
@@ -2193,7 +2415,7 @@ ethernets:
         vm_disk_path = vm_disk_dir / f"{vm_name}.qcow2"
         
         # Create COW overlay
-        subprocess.run([
+        exec_gateway.run([
             "qemu-img", "create", "-f", "qcow2",
             "-b", base_disk_path, "-F", "qcow2",
             str(vm_disk_path)
@@ -2292,7 +2514,7 @@ ethernets:
                 # Create ISO
                 iso_path = str(Path(disk_path).parent / f"{Path(disk_path).stem}-cloudinit.iso")
                 
-                subprocess.run([
+                exec_gateway.run([
                     "genisoimage", "-output", iso_path,
                     "-volid", "cidata", "-joliet", "-rock",
                     str(user_data_file), str(meta_data_file)
@@ -2310,7 +2532,7 @@ ethernets:
             with tempfile.TemporaryDirectory() as mount_dir:
                 # Try to mount the disk (requires root)
                 mount_cmd = ["sudo", "mount", "-o", "loop", disk_path, mount_dir]
-                result = subprocess.run(mount_cmd, capture_output=True, text=True)
+                result = exec_gateway.run(mount_cmd, capture_output=True, text=True)
                 
                 if result.returncode != 0:
                     self.logger.warning(f"Cannot mount disk for key injection: {result.stderr}")
@@ -2328,14 +2550,14 @@ ethernets:
                             f.write(f"{key}\n")
                             
                     # Set permissions
-                    subprocess.run(["sudo", "chmod", "600", str(auth_keys_file)])
-                    subprocess.run(["sudo", "chmod", "700", str(ssh_dir)])
+                    exec_gateway.run(["sudo", "chmod", "600", str(auth_keys_file)])
+                    exec_gateway.run(["sudo", "chmod", "700", str(ssh_dir)])
                     
                     return True
                     
                 finally:
                     # Always unmount
-                    subprocess.run(["sudo", "umount", mount_dir])
+                    exec_gateway.run(["sudo", "umount", mount_dir])
                     
         except Exception as e:
             self.logger.error(f"Failed to inject keys via mount: {e}")
@@ -2364,7 +2586,7 @@ ethernets:
     def _get_ip_from_domifaddr(self, vm_id: str) -> Optional[str]:
         """Get IP using virsh domifaddr command"""
         try:
-            result = subprocess.run([
+            result = exec_gateway.run([
                 "virsh", "--connect", self.libvirt_uri,
                 "domifaddr", vm_id
             ], capture_output=True, text=True, timeout=10)
@@ -2387,17 +2609,14 @@ ethernets:
         """Get IP by scanning ARP table for VM MAC address"""
         try:
             # Get VM MAC address
-            desc = domain.XMLDesc(0)
-            root = ET.fromstring(desc)
-            mac_elem = root.find('.//interface/mac')
-            
-            if mac_elem is None:
+            macs = DOMAIN_MODELS.for_domain(domain, self.libvirt_uri).macs
+            if not macs:
                 return None
                 
-            mac_addr = mac_elem.get('address').lower()
+            mac_addr = macs[0].lower()
             
             # Scan ARP table
-            result = subprocess.run(['arp', '-a'], capture_output=True, text=True)
+            result = exec_gateway.run(['arp', '-a'], capture_output=True, text=True)
             if result.returncode == 0:
                 for line in result.stdout.split('\n'):
                     if mac_addr in line.lower():
@@ -2424,10 +2643,8 @@ ethernets:
             ]
             
             # Get VM MAC for verification
-            desc = domain.XMLDesc(0)
-            root = ET.fromstring(desc)
-            mac_elem = root.find('.//interface/mac')
-            target_mac = mac_elem.get('address').lower() if mac_elem is not None else None
+            macs = DOMAIN_MODELS.for_domain(domain, self.libvirt_uri).macs
+            target_mac = macs[0].lower() if macs else None
             
             for network_range in networks_to_scan:
                 network = ipaddress.ip_network(network_range, strict=False)
@@ -2438,13 +2655,13 @@ ethernets:
                         test_ip = str(list(network.hosts())[host_num])
                         
                         # Quick ping test
-                        ping_result = subprocess.run([
+                        ping_result = exec_gateway.run([
                             'ping', '-c', '1', '-W', '1', test_ip
                         ], capture_output=True, timeout=2)
                         
                         if ping_result.returncode == 0 and target_mac:
                             # Verify MAC matches
-                            arp_result = subprocess.run([
+                            arp_result = exec_gateway.run([
                                 'arp', '-n', test_ip
                             ], capture_output=True, text=True)
                             
@@ -22,7 +22,7 @@ Usage:
 import libvirt
 # import logging  # Replaced with unified logger
 from cyris.core.unified_logger import get_logger
-import xml.etree.ElementTree as ET
+import threading
 import time
 import re
 from typing import Dict, List, Optional, Any, Tuple, Union
@@ -35,6 +35,8 @@ from .libvirt_connection_manager import (
     get_connection_manager,
     LibvirtDomainError
 )
+from .domain_model import DOMAIN_MODELS, DomainModel
+from .libvirt_teardown import ensure_event_loop
 
 logger = get_logger(__name__, "libvirt_domain_wrapper")
 
@@ -268,21 +270,8 @@ class LibvirtDomainWrapper:
     def _extract_ips_from_xml(self) -> List[str]:
         """Extract IP addresses from domain XML configuration"""
         try:
-            xml_desc = self.get_xml_config()
-            root = ET.fromstring(xml_desc)
-            
-            ip_addresses = []
-            
-            # Look for static IP configurations in interface elements
-            for interface in root.findall('.//interface'):
-                # Check for IP elements (some configurations include static IPs)
-                for ip_elem in interface.findall('.//ip'):
-                    address = ip_elem.get('address')
-                    if address:
-                        ip_addresses.append(address)
-            
-            return ip_addresses
-            
+            # Some configurations include static IPs in interface elements
+            return list(self.get_domain_model().static_ips)
         except Exception as e:
             logger.debug(f"Error parsing XML for IPs in {self.name}: {e}")
             return []
@@ -322,19 +311,7 @@ class LibvirtDomainWrapper:
     def get_mac_addresses(self) -> List[str]:
         """Get MAC addresses for all network interfaces"""
         try:
-            xml_desc = self.get_xml_config()
-            root = ET.fromstring(xml_desc)
-            
-            mac_addresses = []
-            for interface in root.findall('.//interface'):
-                mac_elem = interface.find('mac')
-                if mac_elem is not None:
-                    mac_addr = mac_elem.get('address')
-                    if mac_addr:
-                        mac_addresses.append(mac_addr)
-            
-            return mac_addresses
-            
+            return list(self.get_domain_model().macs)
         except Exception as e:
             logger.warning(f"Error getting MAC addresses for {self.name}: {e}")
             return []
@@ -342,41 +319,16 @@ class LibvirtDomainWrapper:
     def get_network_interfaces(self) -> List[NetworkInterface]:
         """Get detailed network interface information"""
         try:
-            xml_desc = self.get_xml_config()
-            root = ET.fromstring(xml_desc)
-            
             interfaces = []
             
-            # Get interface information from XML
-            for idx, interface_elem in enumerate(root.findall('.//interface')):
-                interface_type = interface_elem.get('type', 'bridge')
-                
-                # MAC address
-                mac_elem = interface_elem.find('mac')
-                mac_address = mac_elem.get('address') if mac_elem is not None else f"unknown-{idx}"
-                
-                # Target device name
-                target_elem = interface_elem.find('target')
-                target_name = target_elem.get('dev') if target_elem is not None else f"vnet{idx}"
-                
-                # Source (bridge or network)
-                source_elem = interface_elem.find('source')
-                bridge = None
-                network = None
-                
-                if source_elem is not None:
-                    if interface_type == 'bridge':
-                        bridge = source_elem.get('bridge')
-                    elif interface_type == 'network':
-                        network = source_elem.get('network')
-                
-                # Create interface object
+            # Get interface information from the parsed definition
+            for idx, parsed in enumerate(self.get_domain_model().interfaces):
                 interface = NetworkInterface(
-                    name=target_name,
-                    mac_address=mac_address,
-                    bridge=bridge,
-                    network=network,
-                    interface_type=interface_type
+                    name=parsed.target or f"vnet{idx}",
+                    mac_address=parsed.mac or f"unknown-{idx}",
+                    bridge=parsed.bridge if parsed.interface_type == 'bridge' else None,
+                    network=parsed.network if parsed.interface_type == 'network' else None,
+                    interface_type=parsed.interface_type
                 )
                 
                 interfaces.append(interface)
@@ -459,52 +411,30 @@ class LibvirtDomainWrapper:
         except libvirt.libvirtError as e:
             raise LibvirtDomainError(f"Failed to get XML config for {self.name}: {e}")
     
+    def get_domain_model(self) -> DomainModel:
+        """
+        Get the parsed domain definition.
+        
+        Models are shared per domain UUID across wrappers, so the XML is
+        parsed once per definition rather than once per query.
+        """
+        uri = self.connection_manager.uri if self.connection_manager else None
+        return DOMAIN_MODELS.lookup(self.uuid, self.get_xml_config, uri)
+    
     def get_disk_info(self) -> List[DiskInfo]:
         """Get disk information for the domain"""
         try:
-            xml_desc = self.get_xml_config()
-            root = ET.fromstring(xml_desc)
-            
-            disks = []
-            
-            for disk_elem in root.findall('.//disk'):
-                device_type = disk_elem.get('device', 'disk')
-                
-                # Target
-                target_elem = disk_elem.find('target')
-                target = target_elem.get('dev') if target_elem is not None else 'unknown'
-                bus = target_elem.get('bus') if target_elem is not None else 'unknown'
-                
-                # Source
-                source_elem = disk_elem.find('source')
-                source = ''
-                if source_elem is not None:
-                    source = (source_elem.get('file') or 
-                             source_elem.get('dev') or 
-                             source_elem.get('name') or '')
-                
-                # Driver
-                driver_elem = disk_elem.find('driver')
-                driver_type = 'raw'
-                if driver_elem is not None:
-                    driver_type = driver_elem.get('type', 'raw')
-                
-                # Readonly
-                readonly = disk_elem.find('readonly') is not None
-                
-                disk_info = DiskInfo(
-                    target=target,
-                    source=source,
-                    driver_type=driver_type,
-                    device_type=device_type,
-                    bus=bus,
-                    readonly=readonly
+            return [
+                DiskInfo(
+                    target=disk.target,
+                    source=disk.source,
+                    driver_type=disk.driver_type,
+                    device_type=disk.device_type,
+                    bus=disk.bus,
+                    readonly=disk.readonly
                 )
-                
-                disks.append(disk_info)
-            
-            return disks
-            
+                for disk in self.get_domain_model().disks
+            ]
         except Exception as e:
             logger.warning(f"Error getting disk info for {self.name}: {e}")
             return []
@@ -693,4 +623,76 @@ class LibvirtDomainWrapper:
     
     def __repr__(self) -> str:
         """Detailed representation"""
-        return f"LibvirtDomainWrapper(name='{self.name}', uuid='{self.uuid}')"
\ No newline at end of file
+        return f"LibvirtDomainWrapper(name='{self.name}', uuid='{self.uuid}')"
+
+
+# Event subscriptions that keep DOMAIN_MODELS current, by connection URI
+_event_connections: Dict[str, libvirt.virConnect] = {}
+_event_lock = threading.Lock()
+
+
+# Events that change the live XML: (un)definition, and start/stop, which
+# assign and release runtime tap devices, ports and aliases
+_MODEL_CHANGING_EVENTS = (
+    libvirt.VIR_DOMAIN_EVENT_DEFINED, libvirt.VIR_DOMAIN_EVENT_UNDEFINED,
+    libvirt.VIR_DOMAIN_EVENT_STARTED, libvirt.VIR_DOMAIN_EVENT_STOPPED,
+)
+
+
+def _on_lifecycle_event(conn, domain, event, detail, opaque) -> None:
+    if event in _MODEL_CHANGING_EVENTS:
+        DOMAIN_MODELS.invalidate(domain.UUIDString())
+
+
+def _on_device_event(conn, domain, device_alias, opaque) -> None:
+    DOMAIN_MODELS.invalidate(domain.UUIDString())
+
+
+def _on_event_connection_closed(conn, reason, uri) -> None:
+    with _event_lock:
+        _event_connections.pop(uri, None)
+    DOMAIN_MODELS.set_watching(uri, False)
+    logger.debug(f"Domain event subscription for {uri} closed (reason {reason})")
+
+
+def watch_domain_events(uri: str = "qemu:///system") -> bool:
+    """
+    Subscribe to define/undefine, start/stop and device events for a
+    connection URI.
+    
+    While subscribed, parsed domain models for that URI are served from
+    memory and only dropped when libvirt reports a change. If the event
+    connection drops, lookups fall back to comparing XML hashes.
+    
+    Args:
+        uri: Connection URI to watch
+        
+    Returns:
+        True if events for the URI are being watched
+    """
+    with _event_lock:
+        if uri in _event_connections:
+            return True
+        if not ensure_event_loop():
+            return False
+        
+        try:
+            conn = libvirt.open(uri)
+            conn.domainEventRegisterAny(
+                None, libvirt.VIR_DOMAIN_EVENT_ID_LIFECYCLE, _on_lifecycle_event, None
+            )
+            for event_name in ('VIR_DOMAIN_EVENT_ID_DEVICE_ADDED', 'VIR_DOMAIN_EVENT_ID_DEVICE_REMOVED'):
+                event_id = getattr(libvirt, event_name, None)
+                if event_id is not None:
+                    conn.domainEventRegisterAny(None, event_id, _on_device_event, None)
+            conn.registerCloseCallback(_on_event_connection_closed, uri)
+            conn.setKeepAlive(5, 3)
+        except libvirt.libvirtError as e:
+            logger.debug(f"Domain events unavailable for {uri}, using XML hashes: {e}")
+            return False
+        
+        _event_connections[uri] = conn
+    
+    DOMAIN_MODELS.set_watching(uri, True)
+    logger.debug(f"Watching domain events for {uri}")
+    return True
@@ -0,0 +1,230 @@
+"""
+LibVirt Metrics Collector
+
+Samples all domains with a single bulk ``virConnect.getAllDomainStats`` call
+(state, CPU time, vCPUs, balloon, block and interface counters) and turns the
+cumulative counters into rates using the delta to the previous sample. No
+call blocks for a measurement interval: the first sample of a domain only
+primes its counters and reports zero rates.
+
+libvirt is imported on first use so the collector can be constructed (and
+fed a fake connection in tests) without the bindings installed.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from cyris.core.unified_logger import get_logger
+
+logger = get_logger(__name__, "libvirt_metrics")
+
+# virDomainStatsTypes / virDomainState values (stable libvirt ABI), used when
+# the bindings are not importable
+VIR_DOMAIN_STATS_STATE = 1
+VIR_DOMAIN_STATS_CPU_TOTAL = 2
+VIR_DOMAIN_STATS_BALLOON = 4
+VIR_DOMAIN_STATS_VCPU = 8
+VIR_DOMAIN_STATS_INTERFACE = 16
+VIR_DOMAIN_STATS_BLOCK = 32
+VIR_DOMAIN_RUNNING = 1
+
+DEFAULT_STATS = (
+    VIR_DOMAIN_STATS_STATE | VIR_DOMAIN_STATS_CPU_TOTAL | VIR_DOMAIN_STATS_BALLOON
+    | VIR_DOMAIN_STATS_VCPU | VIR_DOMAIN_STATS_INTERFACE | VIR_DOMAIN_STATS_BLOCK
+)
+
+
+@dataclass
+class DomainMetrics:
+    """Point-in-time metrics of one domain, rates computed from deltas"""
+    name: str
+    timestamp: float
+    state: int
+    running: bool
+    vcpus: int
+    cpu_percent: float          # of the domain's vCPU capacity
+    memory_percent: float       # guest view when balloon stats exist
+    memory_kib: int
+    block_read_bps: float
+    block_write_bps: float
+    net_rx_bps: float
+    net_tx_bps: float
+    net_rx_bytes: int           # cumulative counters
+    net_tx_bytes: int
+
+    # Column order used for ring-buffer storage
+    FIELDS = (
+        "running", "cpu_percent", "memory_percent", "block_read_bps",
+        "block_write_bps", "net_rx_bps", "net_tx_bps",
+    )
+
+    def values(self) -> Tuple[float, ...]:
+        return (
+            1.0 if self.running else 0.0, self.cpu_percent, self.memory_percent,
+            self.block_read_bps, self.block_write_bps, self.net_rx_bps, self.net_tx_bps,
+        )
+
+
+@dataclass
+class _Counters:
+    """Raw cumulative counters kept between samples"""
+    monotonic: float
+    cpu_time_ns: int
+    block_rd: int
+    block_wr: int
+    net_rx: int
+    net_tx: int
+
+
+def _sum_indexed(stats: Dict[str, Any], prefix: str, suffix: str) -> int:
+    """Sum ``<prefix>.<n>.<suffix>`` over ``<prefix>.count`` devices"""
+    return sum(
+        int(stats.get(f"{prefix}.{i}.{suffix}", 0))
+        for i in range(int(stats.get(f"{prefix}.count", 0)))
+    )
+
+
+class LibvirtMetricsCollector:
+    """
+    Bulk domain statistics sampler.
+
+    Args:
+        uri: libvirt connection URI
+        connection_factory: Optional callable returning an open connection
+            (defaults to ``libvirt.open(uri)``); the connection is reused
+            across samples and reopened after an error
+        stats: ``virDomainStatsTypes`` bitmask to request
+    """
+
+    def __init__(
+        self,
+        uri: str = "qemu:///system",
+        connection_factory: Optional[Callable[[], Any]] = None,
+        stats: int = DEFAULT_STATS
+    ):
+        self.uri = uri
+        self.stats = stats
+        self._connection_factory = connection_factory or self._open_libvirt
+        self._conn = None
+        self._previous: Dict[str, _Counters] = {}
+        self.logger = logger
+
+    def _open_libvirt(self):
+        import libvirt
+        conn = libvirt.open(self.uri)
+        if conn is None:
+            raise ConnectionError(f"Failed to connect to libvirt at {self.uri}")
+        return conn
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = self._connection_factory()
+        return self._conn
+
+    def close(self) -> None:
+        """Close the cached connection"""
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def sample(self, domain_names: Optional[Iterable[str]] = None) -> Dict[str, DomainMetrics]:
+        """
+        Sample all domains in one ``getAllDomainStats`` round trip.
+
+        Args:
+            domain_names: Only return these domains (all when None)
+
+        Returns:
+            Mapping of domain name -> metrics
+
+        Raises:
+            Exception: When libvirt is unavailable or the call fails
+        """
+        wanted = set(domain_names) if domain_names is not None else None
+        try:
+            records = self._connection().getAllDomainStats(self.stats, 0)
+        except Exception:
+            # Drop a possibly broken connection; the next sample reconnects
+            self.close()
+            raise
+
+        now = time.time()
+        monotonic = time.monotonic()
+        seen = set()
+        result: Dict[str, DomainMetrics] = {}
+        for domain, stats in records:
+            name = domain.name()
+            seen.add(name)
+            metrics = self._process(name, stats, now, monotonic)
+            if wanted is None or name in wanted:
+                result[name] = metrics
+
+        # Forget counters of domains that no longer exist
+        for name in list(self._previous):
+            if name not in seen:
+                del self._previous[name]
+
+        return result
+
+    def _process(self, name: str, stats: Dict[str, Any], now: float, monotonic: float) -> DomainMetrics:
+        state = int(stats.get("state.state", 0))
+        vcpus = int(stats.get("vcpu.current", 0)) or 1
+        counters = _Counters(
+            monotonic=monotonic,
+            cpu_time_ns=int(stats.get("cpu.time", 0)),
+            block_rd=_sum_indexed(stats, "block", "rd.bytes"),
+            block_wr=_sum_indexed(stats, "block", "wr.bytes"),
+            net_rx=_sum_indexed(stats, "net", "rx.bytes"),
+            net_tx=_sum_indexed(stats, "net", "tx.bytes"),
+        )
+
+        previous = self._previous.get(name)
+        self._previous[name] = counters
+
+        def rate(current: int, before: int, elapsed: float) -> float:
+            # Counters reset when a domain restarts
+            return max(current - before, 0) / elapsed if elapsed > 0 else 0.0
+
+        cpu_percent = block_rd = block_wr = net_rx = net_tx = 0.0
+        if previous is not None:
+            elapsed = counters.monotonic - previous.monotonic
+            cpu_rate = rate(counters.cpu_time_ns, previous.cpu_time_ns, elapsed * 1e9)
+            cpu_percent = min(cpu_rate / vcpus * 100.0, 100.0)
+            block_rd = rate(counters.block_rd, previous.block_rd, elapsed)
+            block_wr = rate(counters.block_wr, previous.block_wr, elapsed)
+            net_rx = rate(counters.net_rx, previous.net_rx, elapsed)
+            net_tx = rate(counters.net_tx, previous.net_tx, elapsed)
+
+        return DomainMetrics(
+            name=name,
+            timestamp=now,
+            state=state,
+            running=state == VIR_DOMAIN_RUNNING,
+            vcpus=vcpus,
+            cpu_percent=cpu_percent,
+            memory_percent=self._memory_percent(stats),
+            memory_kib=int(stats.get("balloon.current", 0)),
+            block_read_bps=block_rd,
+            block_write_bps=block_wr,
+            net_rx_bps=net_rx,
+            net_tx_bps=net_tx,
+            net_rx_bytes=counters.net_rx,
+            net_tx_bytes=counters.net_tx,
+        )
+
+    @staticmethod
+    def _memory_percent(stats: Dict[str, Any]) -> float:
+        available = int(stats.get("balloon.available", 0))
+        if available:
+            # Guest-reported usage (needs the virtio balloon stats period)
+            usable = int(stats.get("balloon.usable", stats.get("balloon.unused", 0)))
+            return max(0.0, min(100.0, (available - usable) / available * 100.0))
+        current = int(stats.get("balloon.current", 0))
+        if current:
+            # Host view: resident set of the QEMU process
+            return max(0.0, min(100.0, int(stats.get("balloon.rss", 0)) / current * 100.0))
+        return 0.0
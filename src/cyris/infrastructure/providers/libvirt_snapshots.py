@@ -0,0 +1,190 @@
+"""
+LibVirt Range Snapshots
+
+Baseline snapshots of a range's guests, taken once the range was created
+and its tasks were applied, and reverted by ``cyris reset`` so that a range
+returns to its starting state without re-creating disks or re-running tasks.
+
+Snapshots are internal qcow2 snapshots. A running guest is captured together
+with its memory state (a system checkpoint), so after a revert it continues
+from that moment without booting; a guest that is shut off gets a disk-only
+snapshot and is started by the revert. Taking a snapshot again replaces the
+previous one of the same name. Internal snapshots live inside the guest's
+disk, so teardown removes them with it.
+
+Snapshots are taken and reverted for all guests at once on a worker pool.
+libvirt is imported on first use so the manager can be driven by a fake
+connection in tests.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from xml.sax.saxutils import escape
+
+from cyris.core.unified_logger import get_logger
+
+from .libvirt_teardown import VIR_ERR_NO_DOMAIN
+
+logger = get_logger(__name__, "libvirt_snapshots")
+
+# Name of the snapshot ``cyris reset`` reverts to
+BASELINE_SNAPSHOT = "cyris-baseline"
+
+# libvirt constants (stable ABI), used when the bindings are not importable
+VIR_ERR_NO_DOMAIN_SNAPSHOT = 72
+VIR_DOMAIN_SNAPSHOT_CREATE_ATOMIC = 128
+VIR_DOMAIN_SNAPSHOT_REVERT_RUNNING = 1
+VIR_DOMAIN_SNAPSHOT_REVERT_FORCE = 4
+
+
+@dataclass
+class SnapshotResult:
+    """Outcome of snapshotting or reverting one domain"""
+    domain: str
+    status: str                 # "created", "reverted" or "failed"
+    error: Optional[str] = None
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status != "failed"
+
+
+@dataclass
+class SnapshotReport:
+    """Per-domain results of a snapshot or revert run"""
+    action: str                 # "snapshot" or "revert"
+    snapshot: str = BASELINE_SNAPSHOT
+    results: Dict[str, SnapshotResult] = field(default_factory=dict)
+    duration: float = 0.0
+
+    @property
+    def failed(self) -> List[SnapshotResult]:
+        return [r for r in self.results.values() if not r.ok]
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.failed
+
+    @property
+    def domains(self) -> List[str]:
+        """Domains the action succeeded for"""
+        return [r.domain for r in self.results.values() if r.ok]
+
+    def add(self, result: SnapshotResult) -> None:
+        self.results[result.domain] = result
+
+    def summary(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for result in self.results.values():
+            counts[result.status] = counts.get(result.status, 0) + 1
+        return counts
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "action": self.action,
+            "snapshot": self.snapshot,
+            "succeeded": self.succeeded,
+            "duration": round(self.duration, 3),
+            "summary": self.summary(),
+            "domains": [
+                {"domain": r.domain, "status": r.status, "error": r.error,
+                 "duration": round(r.duration, 3)}
+                for r in self.results.values()
+            ],
+        }
+
+
+def _error_code(error: Exception) -> Optional[int]:
+    get_code = getattr(error, "get_error_code", None)
+    return get_code() if get_code is not None else None
+
+
+class SnapshotManager:
+    """
+    Parallel snapshot and revert of a set of domains.
+
+    Args:
+        connection_factory: Callable returning an open libvirt connection
+        max_workers: Worker threads
+        name: Snapshot name
+    """
+
+    def __init__(
+        self,
+        connection_factory: Callable[[], Any],
+        max_workers: int = 16,
+        name: str = BASELINE_SNAPSHOT
+    ):
+        self._connection_factory = connection_factory
+        self.max_workers = max_workers
+        self.name = name
+        self.logger = logger
+
+    def take(self, domain_names: Iterable[str], description: str = "") -> SnapshotReport:
+        """Snapshot every domain, replacing an earlier snapshot of the same name"""
+        xml = (f"<domainsnapshot><name>{escape(self.name)}</name>"
+               f"<description>{escape(description)}</description></domainsnapshot>")
+
+        def take_one(conn, name: str) -> SnapshotResult:
+            domain = conn.lookupByName(name)
+            self._delete(domain)
+            domain.snapshotCreateXML(xml, VIR_DOMAIN_SNAPSHOT_CREATE_ATOMIC)
+            return SnapshotResult(name, "created")
+
+        return self._run("snapshot", domain_names, take_one)
+
+    def revert(self, domain_names: Iterable[str]) -> SnapshotReport:
+        """Revert every domain to the snapshot and leave it running"""
+        def revert_one(conn, name: str) -> SnapshotResult:
+            domain = conn.lookupByName(name)
+            snapshot = domain.snapshotLookupByName(self.name, 0)
+            # Forced: a reset always wants the snapshot state, even when
+            # libvirt cannot prove the revert is safe for a running guest
+            domain.revertToSnapshot(snapshot, VIR_DOMAIN_SNAPSHOT_REVERT_RUNNING | VIR_DOMAIN_SNAPSHOT_REVERT_FORCE)
+            return SnapshotResult(name, "reverted")
+
+        return self._run("revert", domain_names, revert_one)
+
+    def _delete(self, domain) -> None:
+        try:
+            domain.snapshotLookupByName(self.name, 0).delete(0)
+        except Exception as e:
+            if _error_code(e) != VIR_ERR_NO_DOMAIN_SNAPSHOT:
+                raise
+
+    def _run(self, action: str, domain_names: Iterable[str],
+             step: Callable[[Any, str], SnapshotResult]) -> SnapshotReport:
+        started = time.monotonic()
+        domains = list(dict.fromkeys(domain_names))
+        report = SnapshotReport(action=action, snapshot=self.name)
+        if not domains:
+            return report
+        conn = self._connection_factory()
+
+        def run_one(name: str) -> SnapshotResult:
+            begin = time.monotonic()
+            try:
+                result = step(conn, name)
+            except Exception as e:
+                code = _error_code(e)
+                if code == VIR_ERR_NO_DOMAIN:
+                    error = "domain not found"
+                elif code == VIR_ERR_NO_DOMAIN_SNAPSHOT:
+                    error = f"no snapshot '{self.name}'"
+                else:
+                    error = str(e)
+                result = SnapshotResult(name, "failed", error)
+            result.duration = time.monotonic() - begin
+            return result
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(domains)))) as pool:
+            for result in pool.map(run_one, domains):
+                report.add(result)
+
+        report.duration = time.monotonic() - started
+        self.logger.info(f"{action.capitalize()} of {len(domains)} domains ('{self.name}') "
+                         f"finished in {report.duration:.1f}s: {report.summary()}")
+        return report
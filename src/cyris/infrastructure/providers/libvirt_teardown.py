@@ -0,0 +1,441 @@
+"""
+LibVirt Teardown Pipeline
+
+Removes a set of domains (and their disk files) in three phases instead of
+one domain at a time:
+
+1. ``destroy()`` is issued to every active domain concurrently;
+2. one waiter tracks all of them until they are shut off, woken by libvirt
+   lifecycle events when the connection delivers them and otherwise by a
+   single polling pass over the remaining domains;
+3. undefine and disk deletion run on a worker pool.
+
+Every completed step is appended to a JSON-lines journal, so a teardown
+interrupted by a crash is resumed by running it again with the same
+journal: finished steps are skipped and already missing domains or files
+count as removed. The journal is deleted once everything succeeded.
+
+libvirt is imported on first use so the pipeline can be driven by a fake
+connection in tests.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from cyris.core.unified_logger import get_logger
+
+logger = get_logger(__name__, "libvirt_teardown")
+
+# libvirt constants (stable ABI), used when the bindings are not importable
+VIR_ERR_NO_DOMAIN = 42
+VIR_DOMAIN_EVENT_ID_LIFECYCLE = 0
+VIR_DOMAIN_EVENT_STOPPED = 5
+VIR_DOMAIN_UNDEFINE_MANAGED_SAVE = 1
+VIR_DOMAIN_UNDEFINE_SNAPSHOTS_METADATA = 2
+VIR_DOMAIN_UNDEFINE_NVRAM = 4
+
+UNDEFINE_FLAGS = (
+    VIR_DOMAIN_UNDEFINE_MANAGED_SAVE | VIR_DOMAIN_UNDEFINE_SNAPSHOTS_METADATA
+    | VIR_DOMAIN_UNDEFINE_NVRAM
+)
+
+# Journal steps, in order
+STEP_DESTROYED = "destroyed"
+STEP_UNDEFINED = "undefined"
+STEP_REMOVED = "removed"
+
+
+@dataclass
+class ResourceResult:
+    """Outcome of tearing down one domain or file"""
+    resource: str
+    kind: str                   # "domain" or "file"
+    status: str                 # "removed", "absent", "resumed" or "failed"
+    error: Optional[str] = None
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status != "failed"
+
+
+@dataclass
+class TeardownReport:
+    """Per-resource results of a teardown run"""
+    results: Dict[str, ResourceResult] = field(default_factory=dict)
+    duration: float = 0.0
+    resumed: bool = False
+
+    @property
+    def failed(self) -> List[ResourceResult]:
+        return [r for r in self.results.values() if not r.ok]
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.failed
+
+    def add(self, result: ResourceResult) -> None:
+        self.results[f"{result.kind}:{result.resource}"] = result
+
+    def summary(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for result in self.results.values():
+            counts[result.status] = counts.get(result.status, 0) + 1
+        return counts
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "succeeded": self.succeeded,
+            "resumed": self.resumed,
+            "duration": round(self.duration, 3),
+            "summary": self.summary(),
+            "resources": [
+                {"resource": r.resource, "kind": r.kind, "status": r.status,
+                 "error": r.error, "duration": round(r.duration, 3)}
+                for r in self.results.values()
+            ],
+        }
+
+
+class TeardownJournal:
+    """
+    Append-only progress log (one JSON object per line).
+
+    The first record lists the domains and files of the run, later records
+    mark completed ``(resource, step)`` pairs.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.plan: Optional[Dict[str, Any]] = None
+        self._done: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # Torn final line from a crash
+                if "plan" in record:
+                    self.plan = record["plan"]
+                else:
+                    self._done.setdefault(record["resource"], set()).add(record["step"])
+
+    @property
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def done(self, resource: str, step: str) -> bool:
+        return step in self._done.get(resource, ())
+
+    def start(self, domains: List[str], files: Dict[str, List[str]]) -> None:
+        if self.plan is None:
+            self.plan = {"domains": domains, "files": files}
+            self._append({"plan": self.plan})
+
+    def mark(self, resource: str, step: str) -> None:
+        with self._lock:
+            self._done.setdefault(resource, set()).add(step)
+            self._append({"resource": resource, "step": step, "at": time.time()})
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+_event_loop_lock = threading.Lock()
+_event_loop_started = False
+
+
+def ensure_event_loop() -> bool:
+    """
+    Register libvirt's default event implementation and run it in a daemon
+    thread, once per process. Must happen before a connection is opened for
+    that connection to deliver lifecycle events.
+
+    Returns:
+        bool: Whether the event loop is running
+    """
+    global _event_loop_started
+    with _event_loop_lock:
+        if _event_loop_started:
+            return True
+        try:
+            import libvirt
+            libvirt.virEventRegisterDefaultImpl()
+        except Exception as e:
+            logger.debug(f"libvirt event loop unavailable: {e}")
+            return False
+
+        def run() -> None:
+            while True:
+                libvirt.virEventRunDefaultImpl()
+
+        threading.Thread(target=run, name="cyris-libvirt-events", daemon=True).start()
+        _event_loop_started = True
+        return True
+
+
+def _is_missing_domain(error: Exception) -> bool:
+    get_code = getattr(error, "get_error_code", None)
+    return get_code is not None and get_code() == VIR_ERR_NO_DOMAIN
+
+
+def remove_paths(
+    paths: Iterable[Path],
+    max_workers: int = 8,
+    journal: Optional[TeardownJournal] = None
+) -> List[ResourceResult]:
+    """
+    Unlink files on a worker pool.
+
+    Missing files are reported as ``absent``; errors are captured per file.
+    """
+    def remove(path: Path) -> ResourceResult:
+        start = time.monotonic()
+        name = str(path)
+        if journal is not None and journal.done(name, STEP_REMOVED):
+            return ResourceResult(name, "file", "resumed")
+        try:
+            Path(path).unlink()
+            status = "removed"
+        except FileNotFoundError:
+            status = "absent"
+        except OSError as e:
+            return ResourceResult(name, "file", "failed", str(e), time.monotonic() - start)
+        if journal is not None:
+            journal.mark(name, STEP_REMOVED)
+        return ResourceResult(name, "file", status, duration=time.monotonic() - start)
+
+    paths = list(dict.fromkeys(Path(p) for p in paths))
+    if len(paths) <= 1:
+        return [remove(p) for p in paths]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as pool:
+        return list(pool.map(remove, paths))
+
+
+class _ShutoffWaiter:
+    """Waits for a set of domains to stop, event-driven when possible"""
+
+    def __init__(self, conn, poll_interval: float):
+        self._conn = conn
+        self._poll_interval = poll_interval
+        self._stopped: Set[str] = set()
+        self._cond = threading.Condition()
+        self._callback_id = None
+        try:
+            self._callback_id = conn.domainEventRegisterAny(
+                None, VIR_DOMAIN_EVENT_ID_LIFECYCLE, self._on_lifecycle, None
+            )
+        except Exception as e:
+            # No event loop registered for this connection: poll instead
+            logger.debug(f"Lifecycle events unavailable, polling: {e}")
+
+    @property
+    def event_driven(self) -> bool:
+        return self._callback_id is not None
+
+    def _on_lifecycle(self, conn, domain, event, detail, opaque) -> None:
+        if event == VIR_DOMAIN_EVENT_STOPPED:
+            with self._cond:
+                self._stopped.add(domain.name())
+                self._cond.notify_all()
+
+    def wait(self, domains: Dict[str, Any], timeout: float) -> Set[str]:
+        """Return the names of the domains still active after ``timeout``"""
+        deadline = time.monotonic() + timeout
+        pending = set(domains)
+        while pending:
+            with self._cond:
+                pending -= self._stopped
+            # Events can arrive before registration completes; confirm state
+            pending = {name for name in pending if self._is_active(domains[name])}
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                break
+            with self._cond:
+                self._cond.wait(remaining if self.event_driven else min(remaining, self._poll_interval))
+        return pending
+
+    @staticmethod
+    def _is_active(domain) -> bool:
+        try:
+            return bool(domain.isActive())
+        except Exception as e:
+            return not _is_missing_domain(e)
+
+    def close(self) -> None:
+        if self._callback_id is not None:
+            try:
+                self._conn.domainEventDeregisterAny(self._callback_id)
+            except Exception:
+                pass
+            self._callback_id = None
+
+
+class TeardownPipeline:
+    """
+    Parallel, journaled domain teardown.
+
+    Args:
+        connection_factory: Callable returning an open libvirt connection
+        max_workers: Worker threads for destroy, undefine and file deletion
+        shutoff_timeout: Seconds to wait for destroyed domains to stop
+        poll_interval: Seconds between state checks without lifecycle events
+    """
+
+    def __init__(
+        self,
+        connection_factory: Callable[[], Any],
+        max_workers: int = 16,
+        shutoff_timeout: float = 60.0,
+        poll_interval: float = 0.25
+    ):
+        self._connection_factory = connection_factory
+        self.max_workers = max_workers
+        self.shutoff_timeout = shutoff_timeout
+        self.poll_interval = poll_interval
+        self.logger = logger
+
+    def run(
+        self,
+        domain_names: Iterable[str],
+        disk_paths: Optional[Dict[str, List[str]]] = None,
+        journal_path: Optional[Path] = None
+    ) -> TeardownReport:
+        """
+        Tear down domains and their disks.
+
+        Args:
+            domain_names: Domains to destroy and undefine
+            disk_paths: Domain name -> disk files to delete after undefine
+            journal_path: Progress journal; an existing journal resumes the
+                run it describes (its domains and files are included)
+
+        Returns:
+            Per-resource report
+        """
+        started = time.monotonic()
+        journal = TeardownJournal(journal_path) if journal_path else None
+        domains = list(dict.fromkeys(domain_names))
+        files = {name: list(paths) for name, paths in (disk_paths or {}).items()}
+
+        report = TeardownReport()
+        if journal is not None and journal.plan is not None:
+            report.resumed = True
+            for name in journal.plan.get("domains", []):
+                if name not in domains:
+                    domains.append(name)
+            for name, paths in journal.plan.get("files", {}).items():
+                files.setdefault(name, []).extend(p for p in paths if p not in files.get(name, []))
+            self.logger.info(f"Resuming teardown from {journal.path}")
+        if journal is not None:
+            journal.start(domains, files)
+
+        conn = self._connection_factory()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(domains) or 1))) as pool:
+            found = self._lookup(conn, domains, journal, report)
+            self._destroy_all(conn, pool, found, journal, report)
+            list(pool.map(lambda name: self._undefine(name, found[name], journal, report), list(found)))
+
+        # Disks of domains that failed to undefine are kept
+        orphan_files = [
+            path for name, paths in files.items()
+            if report.results.get(f"domain:{name}", ResourceResult(name, "domain", "absent")).ok
+            for path in paths
+        ]
+        for result in remove_paths(orphan_files, self.max_workers, journal):
+            report.add(result)
+
+        report.duration = time.monotonic() - started
+        if journal is not None and report.succeeded:
+            journal.clear()
+        self.logger.info(
+            f"Teardown of {len(domains)} domains finished in {report.duration:.1f}s: {report.summary()}"
+        )
+        return report
+
+    def _lookup(self, conn, domains, journal, report) -> Dict[str, Any]:
+        found: Dict[str, Any] = {}
+        for name in domains:
+            if journal is not None and journal.done(name, STEP_UNDEFINED):
+                report.add(ResourceResult(name, "domain", "resumed"))
+                continue
+            try:
+                found[name] = conn.lookupByName(name)
+            except Exception as e:
+                if _is_missing_domain(e):
+                    report.add(ResourceResult(name, "domain", "absent"))
+                else:
+                    report.add(ResourceResult(name, "domain", "failed", f"lookup: {e}"))
+        return found
+
+    def _destroy_all(self, conn, pool, found, journal, report) -> None:
+        waiter = _ShutoffWaiter(conn, self.poll_interval)
+        try:
+            def destroy(name: str) -> Optional[str]:
+                domain = found[name]
+                try:
+                    if domain.isActive():
+                        domain.destroy()
+                        return name
+                except Exception as e:
+                    if not _is_missing_domain(e):
+                        report.add(ResourceResult(name, "domain", "failed", f"destroy: {e}"))
+                return None
+
+            issued = [name for name in pool.map(destroy, list(found)) if name]
+            for name in list(found):
+                if f"domain:{name}" in report.results:
+                    del found[name]
+
+            still_active = waiter.wait({name: found[name] for name in issued}, self.shutoff_timeout)
+            for name in still_active:
+                report.add(ResourceResult(
+                    name, "domain", "failed",
+                    f"did not shut off within {self.shutoff_timeout:.0f}s"
+                ))
+                del found[name]
+            if journal is not None:
+                for name in found:
+                    journal.mark(name, STEP_DESTROYED)
+        finally:
+            waiter.close()
+
+    def _undefine(self, name: str, domain, journal, report) -> None:
+        start = time.monotonic()
+        try:
+            try:
+                domain.undefineFlags(UNDEFINE_FLAGS)
+            except AttributeError:
+                domain.undefine()
+            status = "removed"
+        except Exception as e:
+            if not _is_missing_domain(e):
+                report.add(ResourceResult(name, "domain", "failed", f"undefine: {e}",
+                                          time.monotonic() - start))
+                return
+            status = "absent"
+        if journal is not None:
+            journal.mark(name, STEP_UNDEFINED)
+        report.add(ResourceResult(name, "domain", status, duration=time.monotonic() - start))
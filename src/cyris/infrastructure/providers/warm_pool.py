@@ -0,0 +1,375 @@
+"""
+Warm VM Pool
+
+Standby VMs for kvm-auto guests, booted ahead of time from a built image so
+that range creation can claim one instead of copying a disk and booting a
+fresh VM.
+
+Members are kept per pool key (built image plus the VM shape virt-install
+is given). A booted member is saved to a state file with virDomainSave,
+which leaves it shut off and holding no memory. A claim renames the domain
+to the guest's VM name and restores it under that name, so range discovery
+and idempotency checks, which go by VM name, see an ordinary guest. (Members
+cannot wait paused instead: libvirt renames shut-off domains only, so a
+resumed member would keep its pool name.)
+
+After a claim the VM's network links are taken down and up again so the
+guest renews its DHCP lease, which may have expired while it waited. MAC
+addresses are left alone: every member gets its own when it is created,
+and libvirt refuses to restore a saved VM with a different MAC.
+
+Members, their disks and state files live in the pool directory and are
+listed in ``pool.json``, which is locked across processes while it changes.
+The memory of all members together is capped by a budget. Claimed members
+are replaced by ``refill`` in a background thread; it is not a daemon
+thread, so a CLI run waits for the refill before it exits.
+
+The pool only uses the libvirt connection it is given, so it can be driven
+by a fake connection in tests.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from cyris.core.unified_logger import get_logger
+
+from .libvirt_teardown import TeardownPipeline, TeardownReport
+
+logger = get_logger(__name__, "warm_pool")
+
+# Pool directory under the VM storage directory, and its index
+POOL_DIR = "warm-pool"
+POOL_INDEX = "pool.json"
+
+MODE_SAVED = "saved"
+POOL_MODES = (MODE_SAVED,)
+
+# libvirt constants (stable ABI), used when the bindings are not importable
+VIR_DOMAIN_SAVE_RUNNING = 2
+VIR_DOMAIN_AFFECT_LIVE = 1
+
+# Guest fields that end up on the virt-install command line
+GUEST_SHAPE_FIELDS = (
+    "vcpus", "memory", "network_model", "graphics_type", "graphics_port", "graphics_listen",
+    "console_type", "os_variant", "basevm_os_type", "boot_options", "cpu_model", "extra_args",
+)
+
+
+@dataclass
+class PoolMember:
+    """One standby VM"""
+    name: str
+    key: str
+    image_path: str
+    disk_path: str
+    memory_mb: int
+    mode: str
+    state_path: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+    def files(self) -> List[str]:
+        return [self.disk_path] + ([self.state_path] if self.state_path else [])
+
+
+@dataclass
+class ClaimedVM:
+    """A standby VM handed to a range"""
+    vm_name: str                # domain name after the claim
+    pool_name: str
+    disk_path: str
+    mode: str
+    duration: float = 0.0
+
+
+def pool_key(image_path: Union[str, Path], guest: Any) -> str:
+    """
+    Key of the pool a guest built from ``image_path`` can claim from.
+
+    Members are interchangeable when they run the same build of the image
+    (a rebuilt image changes size or mtime) with the same VM shape.
+    """
+    stat = Path(image_path).stat()
+    data = {
+        "image": str(image_path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "shape": {name: getattr(guest, name, None) for name in GUEST_SHAPE_FIELDS},
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+def _renamed(domain_xml: str, name: str) -> str:
+    root = ET.fromstring(domain_xml)
+    root.find("name").text = name
+    return ET.tostring(root, encoding="unicode")
+
+
+class WarmPool:
+    """
+    Standby VMs per pool key, claimed by range creation and refilled after.
+
+    Args:
+        pool_dir: Directory of the index, member disks and state files
+        connection_factory: Callable returning an open libvirt connection
+        boot: ``boot(template_guest, vm_name, disk_path) -> bool`` defines
+            and starts a VM on the disk and returns once the guest is up
+        size: Members kept per pool key (0 disables the pool)
+        sizes: Image name -> members kept for that image, overriding ``size``
+        memory_budget_mb: Total guest memory of all members
+        mode: How members wait; only ``saved``
+        prefix: VM name prefix
+        link_flap: Seconds a claimed VM's links stay down (0 skips the
+            DHCP renewal)
+    """
+
+    def __init__(
+        self,
+        pool_dir: Union[str, Path],
+        connection_factory: Callable[[], Any],
+        boot: Callable[[Any, str, str], bool],
+        size: int = 0,
+        sizes: Optional[Dict[str, int]] = None,
+        memory_budget_mb: int = 8192,
+        mode: str = MODE_SAVED,
+        prefix: str = "cyris",
+        link_flap: float = 1.0
+    ):
+        if mode not in POOL_MODES:
+            raise ValueError(f"unknown warm pool mode '{mode}' (expected one of {', '.join(POOL_MODES)})")
+        self.pool_dir = Path(pool_dir)
+        self.index_path = self.pool_dir / POOL_INDEX
+        self._connection_factory = connection_factory
+        self._boot = boot
+        self.size = size
+        self.sizes = dict(sizes or {})
+        self.memory_budget_mb = memory_budget_mb
+        self.mode = mode
+        self.prefix = prefix
+        self.link_flap = link_flap
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._fill_lock = threading.Lock()
+        self._refills: Dict[str, threading.Thread] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0 or any(size > 0 for size in self.sizes.values())
+
+    def target(self, image_name: Optional[str]) -> int:
+        """Members to keep for guests of ``image_name``"""
+        return self.sizes.get(image_name or "", self.size)
+
+    def members(self) -> List[PoolMember]:
+        with self._index() as members:
+            return list(members)
+
+    @contextmanager
+    def _index(self) -> Iterator[List[PoolMember]]:
+        """Members under an exclusive lock (threads and processes); changes are written back"""
+        self.pool_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.index_path.with_suffix(".lock"), "w") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            members = self._read()
+            before = list(members)
+            yield members
+            if members != before:
+                self._write(members)
+
+    def _read(self) -> List[PoolMember]:
+        if not self.index_path.exists():
+            return []
+        try:
+            with open(self.index_path) as f:
+                return [PoolMember(**data) for data in json.load(f).get("members", [])]
+        except (ValueError, TypeError) as e:
+            self.logger.warning(f"Ignoring unreadable warm pool index {self.index_path}: {e}")
+            return []
+
+    def _write(self, members: List[PoolMember]) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.pool_dir, prefix=f".{POOL_INDEX}.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"members": [asdict(m) for m in members]}, f, indent=2)
+            os.replace(tmp, self.index_path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def claim(self, key: str, vm_name: str) -> Optional[ClaimedVM]:
+        """
+        Hand a standby VM of pool ``key`` to a range as ``vm_name``.
+
+        Returns:
+            The claimed VM, or None when the pool is empty or the member
+            could not be woken (it is discarded then)
+        """
+        with self._index() as members:
+            member = next((m for m in members if m.key == key and m.mode == MODE_SAVED), None)
+            if member is None:
+                return None
+            members.remove(member)
+
+        started = time.monotonic()
+        current = member.name
+        try:
+            conn = self._connection_factory()
+            conn.lookupByName(member.name).rename(vm_name, 0)
+            current = vm_name
+            xml = _renamed(conn.saveImageGetXMLDesc(member.state_path, 0), vm_name)
+            conn.restoreFlags(member.state_path, xml, VIR_DOMAIN_SAVE_RUNNING)
+            Path(member.state_path).unlink(missing_ok=True)
+            self._renew_lease(conn.lookupByName(vm_name))
+        except Exception as e:
+            self.logger.warning(f"Could not claim standby VM {member.name}, discarding it: {e}")
+            self._teardown({current: member.files()})
+            return None
+
+        claimed = ClaimedVM(vm_name=current, pool_name=member.name, disk_path=member.disk_path,
+                            mode=member.mode, duration=time.monotonic() - started)
+        self.logger.info(f"Claimed standby VM {member.name} as {claimed.vm_name} in {claimed.duration:.1f}s")
+        return claimed
+
+    def _renew_lease(self, domain) -> None:
+        """Take the links down and up so the guest asks DHCP for its address again"""
+        if not self.link_flap:
+            return
+        root = ET.fromstring(domain.XMLDesc(0))
+        for state in ("down", "up"):
+            for interface in root.findall("devices/interface"):
+                link = interface.find("link")
+                if link is None:
+                    link = ET.SubElement(interface, "link")
+                link.set("state", state)
+                domain.updateDeviceFlags(ET.tostring(interface, encoding="unicode"), VIR_DOMAIN_AFFECT_LIVE)
+            if state == "down":
+                time.sleep(self.link_flap)
+
+    def fill(self, key: str, template: Any, image_path: str) -> int:
+        """
+        Boot standby VMs of pool ``key`` until it is full or the memory
+        budget is used up. Members of earlier builds of the same image, and
+        members left in another mode by an earlier release, are discarded
+        first.
+
+        Args:
+            key: Pool key of ``template`` on ``image_path``
+            template: Guest whose shape the members get
+            image_path: Built image the members boot from
+
+        Returns:
+            Number of members added
+        """
+        target = self.target(getattr(template, "image_name", None))
+        memory = int(getattr(template, "memory", 0) or 0)
+        added = 0
+        with self._fill_lock:
+            with self._index() as members:
+                stale = [m for m in members
+                         if (m.image_path == str(image_path) and m.key != key) or m.mode != self.mode]
+                members[:] = [m for m in members if m not in stale]
+            if stale:
+                self.logger.info(f"Discarding {len(stale)} stale standby VMs "
+                                 f"(earlier builds of {image_path} or another mode)")
+                self._teardown({m.name: m.files() for m in stale})
+
+            while True:
+                with self._index() as members:
+                    have = sum(1 for m in members if m.key == key)
+                    used = sum(m.memory_mb for m in members)
+                if have >= target:
+                    break
+                if used + memory > self.memory_budget_mb:
+                    self.logger.info(f"Warm pool memory budget reached ({used} of {self.memory_budget_mb} MB), "
+                                     f"pool {key} has {have} of {target} VMs")
+                    break
+                member = self._boot_member(key, template, image_path, memory)
+                if member is None:
+                    break
+                with self._index() as members:
+                    members.append(member)
+                added += 1
+
+        if added:
+            self.logger.info(f"Added {added} standby VMs to pool {key}")
+        return added
+
+    def _boot_member(self, key: str, template: Any, image_path: str, memory: int) -> Optional[PoolMember]:
+        name = f"{self.prefix}-pool-{key}-{uuid.uuid4().hex[:6]}"
+        member = PoolMember(name=name, key=key, image_path=str(image_path),
+                            disk_path=str(self.pool_dir / f"{name}.qcow2"), memory_mb=memory, mode=self.mode)
+        try:
+            shutil.copy2(image_path, member.disk_path)
+            if not self._boot(template, name, member.disk_path):
+                raise RuntimeError("the VM did not come up")
+            member.state_path = str(self.pool_dir / f"{name}.state")
+            self._connection_factory().lookupByName(name).save(member.state_path)
+        except Exception as e:
+            self.logger.warning(f"Could not add a standby VM to pool {key}: {e}")
+            files = member.files() + ([] if member.state_path else [str(self.pool_dir / f"{name}.state")])
+            self._teardown({name: files})
+            return None
+        return member
+
+    def refill(self, key: str, template: Any, image_path: str) -> threading.Thread:
+        """Run ``fill`` in a background thread (one per pool key)"""
+        with self._lock:
+            running = self._refills.get(key)
+            if running is not None and running.is_alive():
+                return running
+            thread = threading.Thread(target=self.fill, args=(key, template, image_path),
+                                      name=f"warm-pool-{key}")
+            self._refills[key] = thread
+        thread.start()
+        return thread
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Wait for running refills"""
+        with self._lock:
+            threads = list(self._refills.values())
+        for thread in threads:
+            thread.join(timeout)
+
+    def drain(self, keys: Optional[Iterable[str]] = None) -> TeardownReport:
+        """Destroy standby VMs (all, or those of ``keys``) with their files"""
+        self.wait()
+        selected = set(keys) if keys is not None else None
+        with self._index() as members:
+            drained = [m for m in members if selected is None or m.key in selected]
+            members[:] = [m for m in members if m not in drained]
+        return self._teardown({m.name: m.files() for m in drained})
+
+    def _teardown(self, files: Dict[str, List[str]]) -> TeardownReport:
+        if not files:
+            return TeardownReport()
+        pipeline = TeardownPipeline(connection_factory=self._connection_factory, shutoff_timeout=30.0)
+        report = pipeline.run(list(files), files)
+        for result in report.failed:
+            self.logger.error(f"Failed to remove standby {result.kind} {result.resource}: {result.error}")
+        return report
+
+    def status(self) -> Dict[str, Any]:
+        """Members and memory per pool key"""
+        pools: Dict[str, Dict[str, Any]] = {}
+        members = self.members()
+        for member in members:
+            pool = pools.setdefault(member.key, {"image": member.image_path, "vms": 0, "memory_mb": 0})
+            pool["vms"] += 1
+            pool["memory_mb"] += member.memory_mb
+        return {
+            "mode": self.mode,
+            "memory_mb": sum(m.memory_mb for m in members),
+            "memory_budget_mb": self.memory_budget_mb,
+            "pools": pools,
+        }
@@ -0,0 +1,263 @@
+"""
+virt-builder Template Cache
+
+Every ``virt-builder <image>`` run reads the xz-compressed template (from the
+network or virt-builder's own cache), decompresses it, resizes it and
+converts it to qcow2. The template cache does the expensive part once per
+template: it keeps each template decompressed, as qcow2, at the template's
+own size in ``<build_storage_dir>/templates``. Builds then start from the
+local template:
+
+- when the requested disk is not larger than the template, the image is a
+  qcow2 overlay on the template (``qemu-img create -b``), created
+  instantly. The template must then stay in the cache unchanged, so
+  overlays are recorded in ``<image>.overlays.json`` and a template with
+  existing overlays is neither removed nor fetched again;
+- otherwise ``virt-resize --expand`` copies the template into a disk of the
+  requested size, growing the partition virt-builder would have grown.
+
+Templates are fetched from an optional offline mirror directory first, so
+air-gapped labs build without network. The mirror may hold ready templates
+(``<image>.qcow2``, optionally with ``<image>.json`` naming the partition
+to expand) or be a virt-builder repository (an ``index`` file with the
+compressed templates next to it), which virt-builder is pointed at instead
+of the public one.
+
+Commands are run through a caller-supplied runner so that they show up in
+the builder's progress output.
+"""
+
+import fcntl
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from cyris.core import exec_gateway
+from cyris.core.unified_logger import get_logger
+
+logger = get_logger(__name__, "template_cache")
+
+TEMPLATE_DIR = "templates"
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:i?B)?\s*$", re.IGNORECASE)
+
+# runner(cmd, description) -> object with returncode, stdout and stderr
+Runner = Callable[[List[str], str], Any]
+
+
+def parse_size(size: Optional[str]) -> Optional[int]:
+    """Bytes of a virt-builder style size ("10G", "512M"), None if not a size"""
+    match = _SIZE.match(str(size or ""))
+    if not match:
+        return None
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+class TemplateCache:
+    """
+    Decompressed qcow2 copies of virt-builder templates.
+
+    Args:
+        cache_dir: Directory of the cached templates
+        mirror_dir: Offline mirror to take templates from before the network
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], mirror_dir: Optional[Union[str, Path]] = None):
+        self.cache_dir = Path(cache_dir)
+        self.mirror_dir = Path(mirror_dir) if mirror_dir else None
+        self.logger = logger
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def template_path(self, image_name: str) -> Path:
+        return self.cache_dir / f"{image_name}.qcow2"
+
+    def _overlays_file(self, image_name: str) -> Path:
+        return self.cache_dir / f"{image_name}.overlays.json"
+
+    def overlays(self, image_name: str) -> List[str]:
+        """Existing images backed by the template of ``image_name``"""
+        try:
+            with open(self._overlays_file(image_name)) as f:
+                paths = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return [path for path in paths if os.path.exists(path)]
+
+    def _add_overlay(self, image_name: str, output: Path) -> None:
+        paths = self.overlays(image_name)
+        if str(output) not in paths:
+            paths.append(str(output))
+        with open(self._overlays_file(image_name), "w") as f:
+            json.dump(paths, f, indent=2)
+
+    def remove(self, image_name: str) -> bool:
+        """
+        Remove a cached template.
+
+        Returns:
+            False if images still use it as their backing file (nothing is removed)
+        """
+        with self._locked(image_name):
+            overlays = self.overlays(image_name)
+            if overlays:
+                self.logger.warning(f"Not removing template {image_name}: backing file of "
+                                    f"{len(overlays)} images ({', '.join(overlays[:3])})")
+                return False
+            for path in (self.template_path(image_name), self.cache_dir / f"{image_name}.json",
+                         self._overlays_file(image_name)):
+                path.unlink(missing_ok=True)
+        return True
+
+    def metadata(self, image_name: str) -> Optional[Dict[str, Any]]:
+        """What is known about a cached template, None if it is not cached"""
+        info = self.cache_dir / f"{image_name}.json"
+        if not (info.exists() and self.template_path(image_name).exists()):
+            return None
+        with open(info) as f:
+            return json.load(f)
+
+    @contextmanager
+    def _locked(self, image_name: str) -> Iterator[None]:
+        """One fetch per template, across threads and processes"""
+        with self._locks_guard:
+            lock = self._locks.setdefault(image_name, threading.Lock())
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with lock, open(self.cache_dir / f".{image_name}.lock", "w") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+
+    def source_args(self) -> List[str]:
+        """virt-builder arguments that select the offline mirror's repository"""
+        if self.mirror_dir is None or not (self.mirror_dir / "index").exists():
+            return []
+        args = ["--source", f"file://{self.mirror_dir.resolve()}/index"]
+        if not (self.mirror_dir / "index.asc").exists():
+            args.append("--no-check-signature")
+        return args
+
+    def ensure(self, image_name: str, run: Runner) -> Optional[Path]:
+        """
+        Cached template of ``image_name``, fetched and converted first if needed.
+
+        Returns:
+            Template path, or None if the template could not be obtained
+        """
+        path = self.template_path(image_name)
+        with self._locked(image_name):
+            if self.metadata(image_name) is not None:
+                return path
+            if path.exists() and self.overlays(image_name):
+                # Replacing the template would corrupt the images backed by it
+                self.logger.warning(f"Template {image_name} has no metadata but images are backed by it, "
+                                    f"not fetching it again")
+                return None
+
+            started = time.monotonic()
+            partial = path.with_name(f".{path.name}.partial")
+            partial.unlink(missing_ok=True)
+            mirrored = self.mirror_dir / f"{image_name}.qcow2" if self.mirror_dir else None
+            expand = None
+            if mirrored is not None and mirrored.exists():
+                shutil.copyfile(mirrored, partial)
+                source = str(mirrored)
+                notes = mirrored.with_suffix(".json")
+                if notes.exists():
+                    with open(notes) as f:
+                        expand = json.load(f).get("expand")
+            else:
+                source = "virt-builder"
+                cmd = ["sudo", "virt-builder", image_name, "--format", "qcow2",
+                       "--output", str(partial)] + self.source_args()
+                result = run(cmd, f"Caching template {image_name}")
+                if result.returncode != 0 or not partial.exists():
+                    self.logger.warning(f"Could not cache template {image_name}: "
+                                        f"{(result.stderr or result.stdout or '').strip()[-500:]}")
+                    partial.unlink(missing_ok=True)
+                    return None
+
+            virtual_size = self._virtual_size(partial)
+            if virtual_size is None:
+                partial.unlink(missing_ok=True)
+                return None
+            if expand is None:
+                expand = self._expand_partition(image_name)
+
+            os.replace(partial, path)
+            with open(self.cache_dir / f"{image_name}.json", "w") as f:
+                json.dump({"image": image_name, "virtual_size": virtual_size, "expand": expand,
+                           "source": source, "cached_at": time.time()}, f, indent=2)
+            self.logger.info(f"Cached template {image_name} from {source} in "
+                             f"{time.monotonic() - started:.1f}s: {path}")
+            return path
+
+    def create_image(self, image_name: str, size: Optional[str], output: Union[str, Path],
+                     run: Runner) -> bool:
+        """
+        Create a build image of ``size`` from the cached template.
+
+        Returns:
+            True if ``output`` was created; False means the caller should
+            build the image with virt-builder instead
+        """
+        template = self.ensure(image_name, run)
+        if template is None:
+            return False
+        info = self.metadata(image_name)
+        wanted = parse_size(size)
+        output = Path(output)
+
+        if wanted is None or wanted <= info["virtual_size"]:
+            with self._locked(image_name):
+                result = run(["qemu-img", "create", "-f", "qcow2", "-b", str(template), "-F", "qcow2",
+                              str(output)], f"Creating {output.name} on template {image_name}")
+                if result.returncode == 0 and output.exists():
+                    self._add_overlay(image_name, output.resolve())
+            method = "overlay"
+        elif info.get("expand"):
+            result = run(["qemu-img", "create", "-f", "qcow2", str(output), str(wanted)],
+                         f"Creating {output.name}")
+            if result.returncode == 0:
+                result = run(["sudo", "virt-resize", "--expand", info["expand"], "--output-format", "qcow2",
+                              str(template), str(output)], f"Resizing template {image_name} to {size}")
+            method = "virt-resize"
+        else:
+            self.logger.info(f"Template {image_name} has no known partition to expand to {size}")
+            return False
+
+        if result.returncode != 0 or not output.exists():
+            self.logger.warning(f"Could not create {output} from template {image_name} ({method}): "
+                                f"{(result.stderr or result.stdout or '').strip()[-500:]}")
+            output.unlink(missing_ok=True)
+            return False
+        self.logger.info(f"Created {output} from cached template {image_name} ({method})")
+        return True
+
+    def _virtual_size(self, path: Path) -> Optional[int]:
+        result = exec_gateway.run(["qemu-img", "info", "--output=json", str(path)],
+                                  capture_output=True, text=True, timeout=60)
+        if result.returncode != 0:
+            self.logger.warning(f"qemu-img info failed for {path}: {result.stderr.strip()}")
+            return None
+        return json.loads(result.stdout)["virtual-size"]
+
+    def _expand_partition(self, image_name: str) -> Optional[str]:
+        """Partition virt-builder grows for ``image_name``, from the repository index"""
+        try:
+            result = exec_gateway.run(["virt-builder", "--list", "--list-format", "json"] + self.source_args(),
+                                      capture_output=True, text=True, timeout=120)
+            if result.returncode != 0:
+                return None
+            for template in json.loads(result.stdout).get("templates", []):
+                if template.get("os-version") == image_name:
+                    return template.get("expand")
+        except Exception as e:
+            self.logger.debug(f"Could not read the template index: {e}")
+        return None
@@ -3,11 +3,18 @@ CyRIS Services Layer
 
 This module provides the service layer for CyRIS, implementing business logic
 and orchestration of cyber range operations.
+
+Services are imported on first access so that importing one of them (e.g. the
+orchestrator for ``cyris list``) does not load the others.
 """
 
-from .orchestrator import RangeOrchestrator
-from .monitoring import MonitoringService
-from .cleanup_service import CleanupService
-from .layer3_network_service import Layer3NetworkService
+from ..core.lazy_import import lazy_exports
+
+__all__ = ["RangeOrchestrator", "MonitoringService", "CleanupService", "Layer3NetworkService"]
 
-__all__ = ["RangeOrchestrator", "MonitoringService", "CleanupService", "Layer3NetworkService"]
\ No newline at end of file
+__getattr__, __dir__ = lazy_exports(globals(), {
+    "RangeOrchestrator": ".orchestrator",
+    "MonitoringService": ".monitoring",
+    "CleanupService": ".cleanup_service",
+    "Layer3NetworkService": ".layer3_network_service",
+})
@@ -0,0 +1,156 @@
+"""
+Creation Journal
+
+Write-ahead log of the steps of one range creation, kept as JSON lines in
+``<range_dir>/creation.journal`` so that a creation that failed or was
+killed can be continued with ``cyris create --resume`` instead of being
+rebuilt from scratch.
+
+The first record describes the run, every later record marks one completed
+``(resource, step)`` pair, optionally with data needed to skip the step on
+resume (the host ids, the VM a guest got, a VM's IP address ...). Records
+are appended and fsynced before the step counts as done, so after a crash
+the journal never claims more than what happened; a record torn by a crash
+is cut off when the journal is loaded, so later records start on a line of
+their own. Guest tasks are tracked
+per task by the range's task ledger (see ``task_ledger``), which resumed
+runs consult the same way.
+
+The journal is deleted once the range was created successfully.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from cyris.core.unified_logger import get_logger
+
+logger = get_logger(__name__, "creation_journal")
+
+JOURNAL_FILE = "creation.journal"
+
+# Resource name of range-wide steps
+RANGE_RESOURCE = "range"
+
+# Steps, in creation order
+STEP_HOSTS_CREATED = "hosts_created"        # range: host resource ids
+STEP_IMAGE_BUILT = "image_built"            # image group: built image path
+STEP_DISK_CREATED = "disk_created"          # VM: disk path
+STEP_DOMAIN_DEFINED = "domain_defined"      # VM
+STEP_GUEST_CREATED = "guest_created"        # VM: guest id
+STEP_NETWORK_READY = "network_ready"        # range: IP assignments
+STEP_IP_ASSIGNED = "ip_assigned"            # VM: IP address
+
+
+class CreationJournal:
+    """
+    Append-only progress log of a range creation (one JSON object per line).
+
+    Args:
+        path: Journal file (usually ``<range_dir>/creation.journal``)
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.run: Optional[Dict[str, Any]] = None
+        self._done: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        complete = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("no line end")
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash; appending after it would
+                    # merge the next record into it
+                    logger.warning(f"Dropping torn last record of {self.path}")
+                    break
+                complete += len(line)
+                if "run" in record:
+                    self.run = record["run"]
+                else:
+                    self._done.setdefault(record["resource"], {})[record["step"]] = record.get("data")
+        if complete < self.path.stat().st_size:
+            with open(self.path, "r+b") as f:
+                f.truncate(complete)
+                os.fsync(f.fileno())
+
+    @property
+    def started(self) -> bool:
+        """Whether a creation was started and did not finish"""
+        return self.run is not None
+
+    @property
+    def has_progress(self) -> bool:
+        """Whether the run built anything worth resuming (images, disks, VMs)"""
+        with self._lock:
+            return any(resource != RANGE_RESOURCE for resource in self._done)
+
+    def start(self, range_id: str, guests: List[str]) -> None:
+        """Record the start of a creation (kept when resuming one)"""
+        if self.run is None:
+            self.run = {"range_id": range_id, "guests": list(guests), "started_at": time.time()}
+            self._append({"run": self.run})
+
+    def done(self, resource: str, step: str) -> bool:
+        with self._lock:
+            return step in self._done.get(resource, {})
+
+    def data(self, resource: str, step: str) -> Any:
+        """Data recorded with a completed step, None if there is none"""
+        with self._lock:
+            return self._done.get(resource, {}).get(step)
+
+    def resources(self, step: str) -> Dict[str, Any]:
+        """Resources that completed ``step``, in journal order, with their data"""
+        with self._lock:
+            return {resource: steps[step] for resource, steps in self._done.items() if step in steps}
+
+    def mark(self, resource: str, step: str, data: Any = None) -> None:
+        """Record a completed step; durable when this returns"""
+        with self._lock:
+            self._done.setdefault(resource, {})[step] = data
+            self._append({"resource": resource, "step": step, "data": data, "at": time.time()})
+
+    def vms(self) -> List[str]:
+        """VMs that were defined or created by the journaled run"""
+        with self._lock:
+            steps = (STEP_DOMAIN_DEFINED, STEP_GUEST_CREATED)
+            return [resource for resource, done in self._done.items()
+                    if resource != RANGE_RESOURCE and any(step in done for step in steps)]
+
+    def summary(self) -> Dict[str, int]:
+        """Completed resources per step"""
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for steps in self._done.values():
+                for step in steps:
+                    counts[step] = counts.get(step, 0) + 1
+            return counts
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self) -> None:
+        """Forget the run (after it succeeded, or before rebuilding the range)"""
+        with self._lock:
+            self.run = None
+            self._done.clear()
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
@@ -330,11 +330,15 @@ class GatewayService:
         """
         entry_points = self.get_entry_points_for_range(range_id)
         
+        # 一次性关闭该靶场的全部隧道
+        try:
+            self.tunnel_manager.destroy_range_tunnels(range_id)
+        except Exception as e:
+            logger.error(f"Failed to cleanup tunnels of range {range_id}: {e}")
+        
+        self.entry_points = [ep for ep in self.entry_points if ep.range_id != range_id]
         for ep in entry_points:
-            try:
-                self.destroy_entry_point(ep.range_id, ep.instance_id)
-            except Exception as e:
-                logger.error(f"Failed to cleanup entry point {ep.range_id}_{ep.instance_id}: {e}")
+            self.access_info_cache.pop(f"{ep.range_id}_{ep.instance_id}", None)
         
         logger.info(f"Cleaned up {len(entry_points)} entry points for range {range_id}")
     
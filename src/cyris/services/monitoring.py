@@ -17,13 +17,31 @@ try:
 except ImportError:
     PSUTIL_AVAILABLE = False
     psutil = None
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, TYPE_CHECKING
 from dataclasses import dataclass, field
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 
+from ..core.ring_buffer import MetricsRingBuffer
 from .orchestrator import RangeMetadata, RangeStatus
 
+if TYPE_CHECKING:
+    from ..core.metrics_store import MetricsStore
+    from ..infrastructure.providers.libvirt_metrics import DomainMetrics, LibvirtMetricsCollector
+
+
+# Ring buffer columns
+RANGE_FIELDS = (
+    "total_hosts", "active_hosts", "total_guests", "active_guests",
+    "avg_cpu_percent", "avg_memory_percent", "bytes_sent", "bytes_recv",
+    "sent_bps", "recv_bps", "read_bps", "write_bps", "status", "uptime_seconds",
+)
+HOST_FIELDS = (
+    "cpu_percent", "memory_percent", "disk_percent", "bytes_sent", "bytes_recv",
+    "load_1", "load_5", "load_15",
+)
+_RANGE_STATUSES = list(RangeStatus)
+
 
 @dataclass
 class HostMetrics:
@@ -50,6 +68,8 @@ class RangeMetrics:
     total_network_io: Dict[str, int]
     status: RangeStatus
     uptime_seconds: float
+    network_rate: Dict[str, float] = field(default_factory=dict)  # sent_bps, recv_bps
+    disk_rate: Dict[str, float] = field(default_factory=dict)  # read_bps, write_bps
 
 
 @dataclass
@@ -87,7 +107,10 @@ class MonitoringService:
         self,
         logger: Optional[logging.Logger] = None,
         metrics_retention_hours: int = 24,
-        collection_interval_seconds: int = 60
+        collection_interval_seconds: int = 60,
+        metrics_collector: Optional["LibvirtMetricsCollector"] = None,
+        history_size: Optional[int] = None,
+        metrics_store: Optional["MetricsStore"] = None
     ):
         """
         Initialize monitoring service.
@@ -96,20 +119,39 @@ class MonitoringService:
             logger: Optional logger instance
             metrics_retention_hours: How long to keep metrics data
             collection_interval_seconds: Interval between metric collections
+            metrics_collector: Domain statistics sampler (defaults to a
+                ``LibvirtMetricsCollector`` on ``qemu:///system``)
+            history_size: Samples kept per range/VM/host ring buffer
+                (defaults to retention / interval)
+            metrics_store: Optional on-disk columnar store; when given,
+                history survives restarts, is downsampled (raw/1m/1h) and
+                is no longer limited by ``metrics_retention_hours``
         """
         self.logger = logger or get_logger(__name__, "monitoring")
         self.metrics_retention_hours = metrics_retention_hours
         self.collection_interval_seconds = collection_interval_seconds
+        self.history_size = history_size or max(
+            1, int(metrics_retention_hours * 3600 / max(collection_interval_seconds, 1))
+        )
         
-        # In-memory storage (in production, would use time-series DB)
-        self._range_metrics: Dict[str, List[RangeMetrics]] = {}
-        self._host_metrics: Dict[str, List[HostMetrics]] = {}
+        # Fixed-size ring buffers (or persistent series of the metrics
+        # store): memory stays bounded and history queries only touch the
+        # requested window
+        self._metrics_store = metrics_store
+        self._range_metrics: Dict[str, MetricsRingBuffer] = {}
+        self._host_metrics: Dict[str, MetricsRingBuffer] = {}
+        self._vm_metrics: Dict[str, MetricsRingBuffer] = {}
         self._alerts: Dict[str, Alert] = {}
         
+        # Metrics source (created on first collection)
+        self._metrics_collector = metrics_collector
+        self._collector_error: Optional[str] = None
+        
         # Monitoring state
         self._monitoring_active = False
         self._monitoring_thread: Optional[threading.Thread] = None
         self._range_registry: Dict[str, RangeMetadata] = {}
+        self._range_domains: Dict[str, List[str]] = {}
         
         # Alert thresholds (configurable)
         self.alert_thresholds = {
@@ -122,20 +164,45 @@ class MonitoringService:
         # Alert callbacks
         self._alert_handlers: List[Callable[[Alert], None]] = []
         
+        if PSUTIL_AVAILABLE:
+            # Prime the CPU counters so later non-blocking calls return a delta
+            psutil.cpu_percent(interval=None)
+        
         self.logger.info("MonitoringService initialized")
     
-    def register_range(self, range_metadata: RangeMetadata) -> None:
-        """Register a range for monitoring"""
+    def register_range(
+        self,
+        range_metadata: RangeMetadata,
+        domain_names: Optional[List[str]] = None
+    ) -> None:
+        """
+        Register a range for monitoring.
+        
+        Args:
+            range_metadata: Range metadata
+            domain_names: libvirt domain names of the range's VMs (e.g. the
+                ``guests`` entry of the orchestrator's range resources)
+        """
         self._range_registry[range_metadata.range_id] = range_metadata
-        self._range_metrics[range_metadata.range_id] = []
+        self._range_metrics[range_metadata.range_id] = self._new_buffer("range", range_metadata.range_id, RANGE_FIELDS)
+        self.set_range_domains(range_metadata.range_id, domain_names or [])
         
         self.logger.info(f"Registered range {range_metadata.range_id} for monitoring")
     
+    def set_range_domains(self, range_id: str, domain_names: List[str]) -> None:
+        """Set the libvirt domains sampled for a range"""
+        for name in set(self._range_domains.get(range_id, [])) - set(domain_names):
+            self._vm_metrics.pop(name, None)
+        self._range_domains[range_id] = list(domain_names)
+    
     def unregister_range(self, range_id: str) -> None:
-        """Unregister a range from monitoring"""
+        """Unregister a range from monitoring (stored history is kept)"""
         self._range_registry.pop(range_id, None)
         self._range_metrics.pop(range_id, None)
         
+        for name in self._range_domains.pop(range_id, []):
+            self._vm_metrics.pop(name, None)
+        
         # Clean up host metrics for this range
         for host_id in list(self._host_metrics.keys()):
             if host_id.startswith(range_id):
@@ -168,6 +235,9 @@ class MonitoringService:
         if self._monitoring_thread:
             self._monitoring_thread.join(timeout=5.0)
         
+        if self._metrics_store is not None:
+            self._metrics_store.flush()
+        
         self.logger.info("Stopped monitoring service")
     
     def collect_range_metrics(self, range_id: str) -> Optional[RangeMetrics]:
@@ -185,56 +255,44 @@ class MonitoringService:
             return None
         
         try:
-            # In a real implementation, this would query the infrastructure
-            # provider for actual resource metrics
-            # For now, we'll simulate some metrics
-            
-            timestamp = datetime.now()
-            
-            # Simulate host and guest counts
-            total_hosts = 2  # Would come from infrastructure provider
-            active_hosts = 2 if range_metadata.status == RangeStatus.ACTIVE else 0
-            total_guests = 4  # Would come from infrastructure provider  
-            active_guests = 4 if range_metadata.status == RangeStatus.ACTIVE else 0
-            
-            # Simulate resource usage
-            avg_cpu = 25.5 if range_metadata.status == RangeStatus.ACTIVE else 0.0
-            avg_memory = 45.2 if range_metadata.status == RangeStatus.ACTIVE else 0.0
-            
-            # Calculate uptime
-            uptime_seconds = (timestamp - range_metadata.created_at).total_seconds()
-            
-            metrics = RangeMetrics(
-                range_id=range_id,
-                timestamp=timestamp,
-                total_hosts=total_hosts,
-                active_hosts=active_hosts,
-                total_guests=total_guests,
-                active_guests=active_guests,
-                avg_cpu_percent=avg_cpu,
-                avg_memory_percent=avg_memory,
-                total_network_io={"bytes_sent": 1024000, "bytes_recv": 2048000},
-                status=range_metadata.status,
-                uptime_seconds=uptime_seconds
-            )
-            
-            # Store metrics
-            self._range_metrics[range_id].append(metrics)
-            self._cleanup_old_metrics(range_id)
-            
-            # Check for alerts
-            self._check_range_alerts(metrics)
-            
-            return metrics
+            samples = self._sample_domains(self._range_domains.get(range_id, []))
+            return self._record_range_metrics(range_id, range_metadata, samples)
             
         except Exception as e:
             self.logger.error(f"Failed to collect metrics for range {range_id}: {e}")
             return None
     
+    def collect_all_range_metrics(self) -> Dict[str, RangeMetrics]:
+        """
+        Collect metrics for every registered range.
+        
+        All domains are sampled with a single bulk libvirt call and the
+        result is split per range.
+        
+        Returns:
+            Mapping of range_id -> collected metrics
+        """
+        all_domains = [
+            name for range_id in self._range_registry
+            for name in self._range_domains.get(range_id, [])
+        ]
+        samples = self._sample_domains(all_domains)
+        
+        collected = {}
+        for range_id, range_metadata in list(self._range_registry.items()):
+            try:
+                collected[range_id] = self._record_range_metrics(range_id, range_metadata, samples)
+            except Exception as e:
+                self.logger.error(f"Failed to collect metrics for range {range_id}: {e}")
+        return collected
+    
     def collect_host_metrics(self, host_id: str) -> Optional[HostMetrics]:
         """
         Collect current metrics for a host.
         
+        CPU usage is the delta since the previous call (psutil's non-blocking
+        mode), so collection never sleeps.
+        
         Args:
             host_id: Host identifier
         
@@ -244,45 +302,43 @@ class MonitoringService:
         try:
             if not PSUTIL_AVAILABLE:
                 # Return default metrics when psutil not available
-                return HostMetrics(
+                metrics = HostMetrics(
                     timestamp=datetime.now(),
                     cpu_percent=0.0,
-                    memory_total=0,
-                    memory_used=0,
-                    disk_total=0,
-                    disk_used=0,
-                    network_bytes_sent=0,
-                    network_bytes_recv=0,
+                    memory_percent=0.0,
+                    disk_percent=0.0,
+                    network_io={"bytes_sent": 0, "bytes_recv": 0},
                     load_average=[0.0, 0.0, 0.0]
                 )
-            
-            # In a real implementation, this would connect to the host
-            # and collect actual metrics via SSH or monitoring agent
-            # For now, we'll use local system metrics as simulation
-            
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
-            network = psutil.net_io_counters()
-            load_avg = list(psutil.getloadavg()) if hasattr(psutil, 'getloadavg') else [0.0, 0.0, 0.0]
-            
-            metrics = HostMetrics(
-                timestamp=datetime.now(),
-                cpu_percent=cpu_percent,
-                memory_percent=memory.percent,
-                disk_percent=disk.percent,
-                network_io={
-                    "bytes_sent": network.bytes_sent,
-                    "bytes_recv": network.bytes_recv
-                },
-                load_average=load_avg
-            )
+            else:
+                # In a real implementation, this would connect to the host
+                # and collect actual metrics via SSH or monitoring agent
+                # For now, we'll use local system metrics
+                memory = psutil.virtual_memory()
+                disk = psutil.disk_usage('/')
+                network = psutil.net_io_counters()
+                load_avg = list(psutil.getloadavg()) if hasattr(psutil, 'getloadavg') else [0.0, 0.0, 0.0]
+                
+                metrics = HostMetrics(
+                    timestamp=datetime.now(),
+                    cpu_percent=psutil.cpu_percent(interval=None),
+                    memory_percent=memory.percent,
+                    disk_percent=disk.percent,
+                    network_io={
+                        "bytes_sent": network.bytes_sent,
+                        "bytes_recv": network.bytes_recv
+                    },
+                    load_average=load_avg
+                )
             
             # Store metrics
             if host_id not in self._host_metrics:
-                self._host_metrics[host_id] = []
-            self._host_metrics[host_id].append(metrics)
-            self._cleanup_old_host_metrics(host_id)
+                self._host_metrics[host_id] = self._new_buffer("host", host_id, HOST_FIELDS)
+            self._host_metrics[host_id].append(metrics.timestamp.timestamp(), (
+                metrics.cpu_percent, metrics.memory_percent, metrics.disk_percent,
+                metrics.network_io["bytes_sent"], metrics.network_io["bytes_recv"],
+                *metrics.load_average[:3]
+            ))
             
             # Check for host-level alerts
             self._check_host_alerts(host_id, metrics)
@@ -299,9 +355,12 @@ class MonitoringService:
         hours: int = 1
     ) -> List[RangeMetrics]:
         """Get historical metrics for a range"""
-        metrics = self._range_metrics.get(range_id, [])
-        cutoff = datetime.now() - timedelta(hours=hours)
-        return [m for m in metrics if m.timestamp >= cutoff]
+        buffer = self._range_metrics.get(range_id)
+        if buffer is None:
+            return []
+        
+        timestamps, rows = buffer.window(since=self._history_cutoff(hours))
+        return [self._range_metrics_from_row(range_id, ts, row) for ts, row in zip(timestamps, rows)]
     
     def get_host_metrics_history(
         self, 
@@ -309,9 +368,61 @@ class MonitoringService:
         hours: int = 1
     ) -> List[HostMetrics]:
         """Get historical metrics for a host"""
-        metrics = self._host_metrics.get(host_id, [])
-        cutoff = datetime.now() - timedelta(hours=hours)
-        return [m for m in metrics if m.timestamp >= cutoff]
+        buffer = self._host_metrics.get(host_id)
+        if buffer is None:
+            return []
+        
+        timestamps, rows = buffer.window(since=self._history_cutoff(hours))
+        return [
+            HostMetrics(
+                timestamp=datetime.fromtimestamp(float(ts)),
+                cpu_percent=float(row[0]),
+                memory_percent=float(row[1]),
+                disk_percent=float(row[2]),
+                network_io={"bytes_sent": int(row[3]), "bytes_recv": int(row[4])},
+                load_average=[float(v) for v in row[5:8]]
+            )
+            for ts, row in zip(timestamps, rows)
+        ]
+    
+    def get_vm_metrics_history(self, domain_name: str, hours: int = 1) -> Dict[str, List[float]]:
+        """
+        Get historical metrics for a VM as columns.
+        
+        Returns:
+            ``{"timestamp": [...], "cpu_percent": [...], ...}`` (see
+            ``DomainMetrics.FIELDS``); empty when the VM is not monitored
+        """
+        buffer = self._vm_metrics.get(domain_name)
+        if buffer is None:
+            return {}
+        return buffer.to_dict(since=self._history_cutoff(hours))
+    
+    def get_metrics_summary(
+        self,
+        kind: str,
+        key: str,
+        hours: float = 1,
+        stats: tuple = ("mean", "max", "p95")
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Aggregate the history of a range, VM or host.
+        
+        Args:
+            kind: ``"range"``, ``"vm"`` or ``"host"``
+            key: Range ID, domain name or host ID
+            hours: Window size
+            stats: Statistics to compute (``mean``, ``min``, ``max``,
+                ``count``, ``pNN`` percentiles)
+        
+        Returns:
+            ``{field: {stat: value}}``; empty when nothing is monitored
+        """
+        buffers = {"range": self._range_metrics, "vm": self._vm_metrics, "host": self._host_metrics}[kind]
+        buffer = buffers.get(key)
+        if buffer is None:
+            return {}
+        return buffer.aggregate(since=self._history_cutoff(hours), stats=stats)
     
     def get_active_alerts(
         self, 
@@ -359,12 +470,16 @@ class MonitoringService:
         
         return {
             "monitored_ranges": len(self._range_registry),
+            "monitored_vms": len(self._vm_metrics),
             "total_range_metrics": total_metrics,
             "total_host_metrics": total_host_metrics,
+            "total_vm_metrics": sum(len(metrics) for metrics in self._vm_metrics.values()),
             "active_alerts": active_alerts,
             "monitoring_active": self._monitoring_active,
             "collection_interval": self.collection_interval_seconds,
-            "metrics_retention_hours": self.metrics_retention_hours
+            "metrics_retention_hours": self.metrics_retention_hours,
+            "history_size": self.history_size,
+            "collector_error": self._collector_error
         }
     
     def _monitoring_loop(self) -> None:
@@ -373,11 +488,8 @@ class MonitoringService:
         
         while self._monitoring_active:
             try:
-                # Collect metrics for all registered ranges
-                for range_id in list(self._range_registry.keys()):
-                    if not self._monitoring_active:
-                        break
-                    self.collect_range_metrics(range_id)
+                # One bulk sample for all registered ranges
+                self.collect_all_range_metrics()
                 
                 # Sleep until next collection
                 time.sleep(self.collection_interval_seconds)
@@ -388,6 +500,136 @@ class MonitoringService:
         
         self.logger.info("Monitoring loop stopped")
     
+    def _get_collector(self) -> "LibvirtMetricsCollector":
+        if self._metrics_collector is None:
+            from ..infrastructure.providers.libvirt_metrics import LibvirtMetricsCollector
+            self._metrics_collector = LibvirtMetricsCollector()
+        return self._metrics_collector
+    
+    def _sample_domains(self, domain_names: List[str]) -> Optional[Dict[str, "DomainMetrics"]]:
+        """
+        Sample domains with one bulk call.
+        
+        Returns:
+            Mapping of domain name -> metrics, or None when the hypervisor
+            could not be queried
+        """
+        if not domain_names:
+            return {}
+        
+        try:
+            samples = self._get_collector().sample(domain_names)
+        except Exception as e:
+            error = str(e)
+            if error != self._collector_error:
+                self.logger.warning(f"Domain statistics unavailable: {error}")
+            self._collector_error = error
+            return None
+        
+        self._collector_error = None
+        for name, sample in samples.items():
+            buffer = self._vm_metrics.get(name)
+            if buffer is None:
+                buffer = self._vm_metrics[name] = self._new_buffer("vm", name, sample.FIELDS)
+            buffer.append(sample.timestamp, sample.values())
+        return samples
+    
+    def _record_range_metrics(
+        self,
+        range_id: str,
+        range_metadata: RangeMetadata,
+        samples: Optional[Dict[str, "DomainMetrics"]]
+    ) -> RangeMetrics:
+        """Aggregate domain samples into range metrics and store them"""
+        timestamp = datetime.now()
+        domains = self._range_domains.get(range_id, [])
+        
+        # All domains of a range run on the local hypervisor
+        total_hosts = 1 if domains else 0
+        active_hosts = total_hosts if samples is not None else 0
+        
+        range_samples = [samples[name] for name in domains if samples and name in samples]
+        running = [s for s in range_samples if s.running]
+        
+        def average(values: List[float]) -> float:
+            return sum(values) / len(values) if values else 0.0
+        
+        metrics = RangeMetrics(
+            range_id=range_id,
+            timestamp=timestamp,
+            total_hosts=total_hosts,
+            active_hosts=active_hosts,
+            total_guests=len(domains),
+            active_guests=len(running),
+            avg_cpu_percent=average([s.cpu_percent for s in running]),
+            avg_memory_percent=average([s.memory_percent for s in running]),
+            total_network_io={
+                "bytes_sent": sum(s.net_tx_bytes for s in range_samples),
+                "bytes_recv": sum(s.net_rx_bytes for s in range_samples)
+            },
+            status=range_metadata.status,
+            uptime_seconds=(timestamp - range_metadata.created_at).total_seconds(),
+            network_rate={
+                "sent_bps": sum(s.net_tx_bps for s in range_samples),
+                "recv_bps": sum(s.net_rx_bps for s in range_samples)
+            },
+            disk_rate={
+                "read_bps": sum(s.block_read_bps for s in range_samples),
+                "write_bps": sum(s.block_write_bps for s in range_samples)
+            }
+        )
+        
+        # Store metrics
+        buffer = self._range_metrics.get(range_id)
+        if buffer is None:
+            buffer = self._range_metrics[range_id] = self._new_buffer("range", range_id, RANGE_FIELDS)
+        buffer.append(timestamp.timestamp(), (
+            metrics.total_hosts, metrics.active_hosts, metrics.total_guests, metrics.active_guests,
+            metrics.avg_cpu_percent, metrics.avg_memory_percent,
+            metrics.total_network_io["bytes_sent"], metrics.total_network_io["bytes_recv"],
+            metrics.network_rate["sent_bps"], metrics.network_rate["recv_bps"],
+            metrics.disk_rate["read_bps"], metrics.disk_rate["write_bps"],
+            _RANGE_STATUSES.index(metrics.status), metrics.uptime_seconds
+        ))
+        
+        # Check for alerts
+        self._check_range_alerts(metrics)
+        
+        return metrics
+    
+    def _range_metrics_from_row(self, range_id: str, timestamp: float, row) -> RangeMetrics:
+        values = dict(zip(RANGE_FIELDS, (float(v) for v in row)))
+        return RangeMetrics(
+            range_id=range_id,
+            timestamp=datetime.fromtimestamp(float(timestamp)),
+            total_hosts=int(values["total_hosts"]),
+            active_hosts=int(values["active_hosts"]),
+            total_guests=int(values["total_guests"]),
+            active_guests=int(values["active_guests"]),
+            avg_cpu_percent=values["avg_cpu_percent"],
+            avg_memory_percent=values["avg_memory_percent"],
+            total_network_io={
+                "bytes_sent": int(values["bytes_sent"]),
+                "bytes_recv": int(values["bytes_recv"])
+            },
+            status=_RANGE_STATUSES[int(values["status"])],
+            uptime_seconds=values["uptime_seconds"],
+            network_rate={"sent_bps": values["sent_bps"], "recv_bps": values["recv_bps"]},
+            disk_rate={"read_bps": values["read_bps"], "write_bps": values["write_bps"]}
+        )
+    
+    def _new_buffer(self, kind: str, key: str, fields: tuple):
+        """History buffer of one monitored object"""
+        if self._metrics_store is not None:
+            return self._metrics_store.series(kind, key, fields)
+        return MetricsRingBuffer(fields, self.history_size)
+    
+    def _history_cutoff(self, hours: float) -> float:
+        """Epoch cutoff for a history query, limited to the retention period"""
+        if self._metrics_store is None:
+            hours = min(hours, self.metrics_retention_hours)
+        return (datetime.now() - timedelta(hours=hours)).timestamp()
+    
     def _check_range_alerts(self, metrics: RangeMetrics) -> None:
         """Check for range-level alert conditions"""
         # CPU threshold alert
@@ -470,15 +712,3 @@ class MonitoringService:
                 self.logger.error(f"Alert handler failed: {e}")
         
         self.logger.warning(f"Alert created: {title} - {message}")
-    
-    def _cleanup_old_metrics(self, range_id: str) -> None:
-        """Clean up old range metrics"""
-        cutoff = datetime.now() - timedelta(hours=self.metrics_retention_hours)
-        metrics = self._range_metrics.get(range_id, [])
-        self._range_metrics[range_id] = [m for m in metrics if m.timestamp >= cutoff]
-    
-    def _cleanup_old_host_metrics(self, host_id: str) -> None:
-        """Clean up old host metrics"""
-        cutoff = datetime.now() - timedelta(hours=self.metrics_retention_hours)
-        metrics = self._host_metrics.get(host_id, [])
-        self._host_metrics[host_id] = [m for m in metrics if m.timestamp >= cutoff]
\ No newline at end of file
@@ -15,21 +15,27 @@ import os
 import shutil
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Protocol
+from functools import cached_property
+from typing import Dict, List, Optional, Any, Callable, Protocol, Set, TYPE_CHECKING
 from dataclasses import dataclass, field, asdict
 from enum import Enum
 
 from ..config.settings import CyRISSettings
-from ..infrastructure.network.topology_manager import NetworkTopologyManager
-from ..infrastructure.network.tunnel_manager import TunnelManager
-from .task_executor import TaskExecutor, TaskResult
-from .gateway_service import GatewayService, EntryPointInfo
 from ..core.exceptions import (
     ExceptionHandler, CyRISException, CyRISVirtualizationError, 
     CyRISNetworkError, CyRISResourceError, GatewayError, handle_exception, safe_execute
 )
+from ..core.lazy_import import lazy_exports, resolve
+from .range_registry import RangeRegistry, SQLITE_AVAILABLE
+from .range_metadata_store import RangeMetadataStore
+from .creation_journal import (
+    CreationJournal, JOURNAL_FILE, RANGE_RESOURCE, STEP_GUEST_CREATED, STEP_HOSTS_CREATED,
+    STEP_IP_ASSIGNED, STEP_NETWORK_READY
+)
 from ..core.progress import create_progress_tracker, ProgressTracker
-from ..core.rich_progress import RichProgressManager
+from ..core.dag_scheduler import DagReport, DagScheduler, NodeStatus
+from ..core import exec_gateway
+from ..core.tracing import span, start_trace, stop_trace, traced
 from ..core.operation_tracker import (
     start_operation, complete_operation, fail_operation, OperationType,
     is_all_operations_successful, get_operation_summary, 
@@ -42,11 +48,38 @@ from ..core.log_aggregator import (
 from ..core.command_executor import (
     execute_command_safe, execute_command_with_retry, set_global_log_file
 )
-from ..core.sudo_manager import SudoPermissionManager
 
-# Use modern entities - they are backward-compatible with legacy formats
-from ..domain.entities.host import Host
-from ..domain.entities.guest import Guest
+# Heavy service modules (libvirt, paramiko, rich) are imported on first use so
+# that metadata-only commands such as ``cyris list`` stay fast. They remain
+# reachable (and patchable) as attributes of this module.
+__getattr__, __dir__ = lazy_exports(globals(), {
+    "NetworkTopologyManager": "..infrastructure.network.topology_manager",
+    "TunnelManager": "..infrastructure.network.tunnel_manager",
+    "TaskExecutor": ".task_executor",
+    "TaskResult": ".task_executor",
+    "GatewayService": ".gateway_service",
+    "EntryPointInfo": ".gateway_service",
+    "RichProgressManager": "..core.rich_progress",
+    "SudoPermissionManager": "..core.sudo_manager",
+    "VMIPManager": "..tools.vm_ip_manager",
+})
+
+# Service classes constructed lazily by RangeOrchestrator
+_LAZY_SERVICE_CLASSES = (
+    "NetworkTopologyManager", "TaskExecutor", "TunnelManager",
+    "GatewayService", "SudoPermissionManager", "VMIPManager",
+)
+
+if TYPE_CHECKING:
+    from .gateway_service import EntryPointInfo, GatewayService
+    from ..core.rich_progress import RichProgressManager
+    # Use modern entities - they are backward-compatible with legacy formats
+    from ..domain.entities.host import Host
+    from ..domain.entities.guest import Guest
+    from ..config.range_plan import RangePlan
+    from ..infrastructure.providers.libvirt_snapshots import SnapshotReport
+    from .range_reconciler import RangeDiff
+    from .task_ledger import TaskLedger
 
 
 class RangeStatus(Enum):
@@ -70,6 +103,7 @@ class RangeMetadata:
     last_modified: datetime = field(default_factory=datetime.now)
     owner: Optional[str] = None
     tags: Dict[str, str] = field(default_factory=dict)
+    version: int = 0  # Bumped on every persisted change
     
     def update_status(self, status: RangeStatus) -> None:
         """Update range status and last modified time"""
@@ -97,11 +131,11 @@ class RangeMetadata:
 class InfrastructureProvider(Protocol):
     """Protocol for infrastructure providers (KVM, AWS, etc.)"""
     
-    def create_hosts(self, hosts: List[Host]) -> List[str]:
+    def create_hosts(self, hosts: List["Host"]) -> List[str]:
         """Create physical hosts, return host IDs"""
         ...
     
-    def create_guests(self, guests: List[Guest], host_mapping: Dict[str, str]) -> List[str]:
+    def create_guests(self, guests: List["Guest"], host_mapping: Dict[str, str]) -> List[str]:
         """Create virtual machines, return guest IDs"""
         ...
     
@@ -162,49 +196,57 @@ class RangeOrchestrator:
     - Dependency Inversion: Depends on abstractions
     """
     
+    # Concurrent creation steps per resource type (see _build_creation_graph)
+    CREATION_CONCURRENCY = {"network": 1, "ip": 8, "packages": 4, "content": 4, "tasks": 8}
+    
     def __init__(
         self, 
         settings: CyRISSettings,
-        infrastructure_provider: InfrastructureProvider,
-        logger: Optional[logging.Logger] = None
+        infrastructure_provider: Optional[InfrastructureProvider] = None,
+        logger: Optional[logging.Logger] = None,
+        provider_factory: Optional[Callable[[], InfrastructureProvider]] = None
     ):
         """
         Initialize the orchestrator.
         
+        Only the range registry is loaded here. Services (task executor,
+        tunnel/gateway, sudo and SSH managers, topology manager) and the
+        infrastructure provider are built on first use, so read-only callers
+        such as ``cyris list`` never pay for them.
+        
         Args:
             settings: CyRIS configuration settings
             infrastructure_provider: Provider for infrastructure operations
             logger: Optional logger instance
+            provider_factory: Optional callable used to build the provider on
+                first access when ``infrastructure_provider`` is not given
+                (metadata-only mode)
         """
         self.settings = settings
-        self.provider = infrastructure_provider
+        self._provider = infrastructure_provider
+        self._provider_factory = provider_factory
         self.logger = logger or get_logger(__name__, "orchestrator")
         
         # Rich progress manager (can be set by CLI)
-        self.progress_manager: Optional[RichProgressManager] = None
-        
-        # Initialize sudo permission manager
-        self.sudo_manager = SudoPermissionManager(progress_manager=self.progress_manager)
+        self.progress_manager: Optional["RichProgressManager"] = None
         
         # Initialize exception handler
         self.exception_handler = ExceptionHandler(self.logger)
         
+        # Bind service classes that are already loaded (or patched) now, as
+        # eager construction did; the rest are imported on first use
+        module_globals = globals()
+        self._service_classes: Dict[str, Any] = {
+            name: module_globals[name] for name in _LAZY_SERVICE_CLASSES if name in module_globals
+        }
+        
         try:
-            # Initialize network topology and task execution managers
-            self.topology_manager = NetworkTopologyManager()
-            self.task_executor = TaskExecutor({
-                'base_path': settings.cyris_path,
-                'ssh_timeout': 30,
-                'ssh_retries': 3
-            })
-            
-            # Initialize gateway services (tunnel manager and gateway service)
-            self.tunnel_manager = TunnelManager(settings)
-            self.gateway_service = GatewayService(settings, self.tunnel_manager)
-            
-            # In-memory range registry (loaded from distributed storage)
-            self._ranges: Dict[str, RangeMetadata] = {}
-            self._range_resources: Dict[str, Dict[str, List[str]]] = {}
+            # In-memory range registry, filled from the range index on first
+            # access (see the ``_ranges``/``_range_resources`` properties)
+            self._range_cache: Dict[str, RangeMetadata] = {}
+            self._resource_cache: Dict[str, Dict[str, List[str]]] = {}
+            self._registry_loaded = False
+            self._task_ledgers: Dict[str, "TaskLedger"] = {}
             
             # Create cyber_range directory if it doesn't exist
             self.ranges_dir = Path(self.settings.cyber_range_dir)
@@ -213,14 +255,17 @@ class RangeOrchestrator:
             # Singleton lock file
             self._lock_file = self.ranges_dir / ".cyris.lock"
             
-            # Auto-discover and register all ranges at startup
-            self._discover_and_register_ranges()
+            # Range index (falls back to scanning range directories)
+            self._registry: Optional[RangeRegistry] = None
+            if SQLITE_AVAILABLE:
+                self._registry = RangeRegistry(self.ranges_dir, logger=self.logger)
             
-            self.logger.info(f"RangeOrchestrator initialized with distributed storage, found {len(self._ranges)} ranges")
+            # Atomic, versioned metadata writes; status polling is coalesced
+            self._metadata_store = RangeMetadataStore(
+                self.ranges_dir, on_flush=self._index_range, logger=self.logger
+            )
             
-            # Initialize SSH manager for VM operations
-            from ..tools.ssh_manager import SSHManager
-            self.ssh_manager = SSHManager()
+            self.logger.info(f"RangeOrchestrator initialized with distributed storage at {self.ranges_dir}")
             
         except Exception as e:
             self.exception_handler.handle_exception(
@@ -229,32 +274,150 @@ class RangeOrchestrator:
                 reraise=True
             )
     
-    def set_progress_manager(self, progress_manager: RichProgressManager) -> None:
+    @property
+    def _ranges(self) -> Dict[str, RangeMetadata]:
+        """All known ranges, loaded from the range index on first access"""
+        if not self._registry_loaded:
+            self._discover_and_register_ranges()
+        return self._range_cache
+    
+    @_ranges.setter
+    def _ranges(self, value: Dict[str, RangeMetadata]) -> None:
+        self._range_cache = value
+        self._registry_loaded = True
+    
+    @property
+    def _range_resources(self) -> Dict[str, Dict[str, List[str]]]:
+        """Resources of all known ranges, loaded together with ``_ranges``"""
+        if not self._registry_loaded:
+            self._discover_and_register_ranges()
+        return self._resource_cache
+    
+    @_range_resources.setter
+    def _range_resources(self, value: Dict[str, Dict[str, List[str]]]) -> None:
+        self._resource_cache = value
+        self._registry_loaded = True
+    
+    @property
+    def provider(self) -> Optional[InfrastructureProvider]:
+        """Infrastructure provider, built on first access in metadata-only mode"""
+        if self._provider is None and self._provider_factory is not None:
+            self.logger.debug("Building infrastructure provider on first use")
+            self._provider = self._provider_factory()
+            if self.progress_manager and hasattr(self._provider, 'set_progress_manager'):
+                self._provider.set_progress_manager(self.progress_manager)
+        return self._provider
+    
+    @provider.setter
+    def provider(self, value: Optional[InfrastructureProvider]) -> None:
+        self._provider = value
+    
+    @property
+    def is_metadata_only(self) -> bool:
+        """True while no infrastructure provider has been built"""
+        return self._provider is None
+    
+    def _service_class(self, name: str) -> Any:
+        """Class used to build a lazy service"""
+        service_class = self._service_classes.get(name)
+        if service_class is None:
+            service_class = self._service_classes[name] = resolve(__name__, name)
+        return service_class
+    
+    @cached_property
+    def sudo_manager(self):
+        """Sudo permission manager (lazy)"""
+        return self._service_class("SudoPermissionManager")(progress_manager=self.progress_manager)
+    
+    @cached_property
+    def topology_manager(self):
+        """Network topology manager (lazy, imports libvirt)"""
+        return self._service_class("NetworkTopologyManager")()
+    
+    @cached_property
+    def task_executor(self):
+        """Guest task executor (lazy, imports paramiko)"""
+        package_cache_dir = None
+        package_cache_mirrors = []
+        if getattr(self.settings, 'package_cache_enabled', False) is True:
+            package_cache_dir = getattr(self.settings, 'package_cache_dir', None)
+            if not isinstance(package_cache_dir, (str, Path)):
+                package_cache_dir = Path(self.settings.cyris_path) / "cache" / "packages"
+            package_cache_mirrors = getattr(self.settings, 'package_cache_mirrors', None) or []
+        return self._service_class("TaskExecutor")({
+            'base_path': self.settings.cyris_path,
+            'ssh_timeout': 30,
+            'ssh_retries': 3,
+            'package_cache_dir': package_cache_dir,
+            'package_cache_mirrors': list(package_cache_mirrors),
+            'task_markers': getattr(self.settings, 'task_markers', False) is True
+        })
+    
+    def _task_ledger(self, range_id: str) -> "TaskLedger":
+        """Completed-task ledger of a range, shared by all its task runs"""
+        ledger = self._task_ledgers.get(range_id)
+        if ledger is None:
+            from .task_ledger import LEDGER_FILE, TaskLedger
+            ledger = self._task_ledgers.setdefault(range_id, TaskLedger(self.ranges_dir / range_id / LEDGER_FILE))
+        return ledger
+    
+    @cached_property
+    def vm_ip_manager(self):
+        """VM IP discovery shared by all lookups (lazy, imports libvirt)"""
+        return self._service_class("VMIPManager")()
+    
+    @cached_property
+    def tunnel_manager(self):
+        """Tunnel manager (lazy); local forwards go to the port forwarder daemon"""
+        from ..infrastructure.network.forwarder_daemon import ForwarderClient, default_socket_path
+        forwarder = ForwarderClient(default_socket_path(self.settings.cyber_range_dir))
+        return self._service_class("TunnelManager")(self.settings, forwarder=forwarder)
+    
+    @cached_property
+    def gateway_service(self) -> "GatewayService":
+        """Gateway service (lazy, shares the tunnel manager)"""
+        return self._service_class("GatewayService")(self.settings, self.tunnel_manager)
+    
+    @cached_property
+    def ssh_manager(self):
+        """SSH manager for VM operations (lazy, owns a thread pool)"""
+        from ..tools.ssh_manager import SSHManager
+        return SSHManager()
+    
+    def set_progress_manager(self, progress_manager: "RichProgressManager") -> None:
         """Set progress manager for rich progress reporting"""
         self.progress_manager = progress_manager
-        # Also set it for the provider if it supports it
-        if hasattr(self.provider, 'set_progress_manager'):
-            self.provider.set_progress_manager(progress_manager)
-        # Update sudo manager progress manager
-        self.sudo_manager.progress_manager = progress_manager
+        # Also set it for the provider if it supports it (a provider that is
+        # built later picks it up in the ``provider`` property)
+        if hasattr(self._provider, 'set_progress_manager'):
+            self._provider.set_progress_manager(progress_manager)
+        # Update sudo manager progress manager if it has been built already
+        if 'sudo_manager' in self.__dict__:
+            self.sudo_manager.progress_manager = progress_manager
     
     def create_range(
         self,
         range_id: str,
         name: str,
         description: str,
-        hosts: List[Host],
-        guests: List[Guest],
+        hosts: List["Host"],
+        guests: List["Guest"],
         topology_config: Optional[Dict[str, Any]] = None,
         owner: Optional[str] = None,
         tags: Optional[Dict[str, str]] = None,
         build_only: bool = False,
         skip_builder: bool = False,
-        recreate: bool = False
+        recreate: bool = False,
+        resume: bool = False
     ) -> RangeMetadata:
         """
         Create a new cyber range instance with idempotency support.
         
+        Completed steps are journaled in the range directory. When a creation
+        fails after VMs were built, they are kept and ``resume`` continues
+        from the first incomplete step: journaled VMs that are still running,
+        their IPs and the network are reused and finished tasks are skipped.
+        
         Args:
             range_id: Unique identifier for the range
             name: Human-readable name
@@ -267,6 +430,7 @@ class RangeOrchestrator:
             build_only: Build images only, don't create VMs
             skip_builder: Skip image building phase
             recreate: Force recreate existing range
+            resume: Continue an unfinished creation of this range
         
         Returns:
             RangeMetadata for the created range
@@ -274,12 +438,27 @@ class RangeOrchestrator:
         Raises:
             RuntimeError: If creation fails
         """
+        # Steps of an unfinished creation are journaled in the range directory
+        journal = self._creation_journal(range_id)
+        if journal.started and not journal.has_progress:
+            journal.clear()  # Stopped before anything was built
+        resuming = resume and journal.started and not recreate and not build_only
+        if resume and not journal.started:
+            self.logger.info(f"Range {range_id} has no unfinished creation to resume")
+        elif journal.started and not resume and not recreate:
+            self.logger.warning(f"Range '{range_id}' has an unfinished creation "
+                                f"({len(journal.vms())} VMs created before it stopped)")
+            self.logger.info("  Use --resume to continue it or --recreate to rebuild the range")
+            return None
+        
         # Check for existing range and VMs
-        existing_vms = self._discover_existing_vms(range_id)
+        existing_vms = [] if resuming else self._discover_existing_vms(range_id)
         
-        if recreate and existing_vms:
+        if recreate and (existing_vms or journal.started):
             self.logger.info(f"Force recreating range {range_id}")
+            self._adopt_journaled_vms(range_id, journal)
             self._cleanup_range_resources(range_id)
+            journal.clear()
             # Continue to create new range
         elif existing_vms:
             # Check health of existing VMs
@@ -309,7 +488,10 @@ class RangeOrchestrator:
                 self.logger.info("  Use --recreate to rebuild the range")
                 return None
         
-        self.logger.info(f"Creating new range {range_id}")
+        if resuming:
+            self.logger.info(f"Resuming creation of range {range_id} ({len(journal.vms())} VMs created before)")
+        else:
+            self.logger.info(f"Creating new range {range_id}")
         
         # Setup comprehensive logging system for this range
         log_aggregator = get_range_log_aggregator(range_id, self.ranges_dir)
@@ -323,6 +505,13 @@ class RangeOrchestrator:
         # Log range creation start to comprehensive log
         log_to_range(range_id, LogLevel.INFO, f"Starting range creation: {name}", "orchestrator")
         
+        # Trace provider calls, commands and waits; exported to logs/ at the end
+        start_trace(f"create_range {range_id}", range_id=range_id, range_name=name,
+                    hosts=len(hosts), guests=len(guests))
+        # Count every process this creation spawns; written next to the trace
+        exec_gateway.enable_accounting()
+        exec_before = exec_gateway.snapshot()
+        
         # Add workflow steps for progress tracking
         progress.add_step("init", "Initialize range creation")
         progress.add_step("hosts", f"Start the base VMs ({len(hosts)} hosts)")
@@ -364,20 +553,28 @@ class RangeOrchestrator:
             logs_dir.mkdir(exist_ok=True)
             disks_dir = range_dir / "disks"
             disks_dir.mkdir(exist_ok=True)
+            journal.start(range_id, [self._guest_id(guest) for guest in guests])
             
             # Create infrastructure resources
+            hosts_started = time.time()
             progress.start_step("hosts")
-            host_ids = safe_execute(
-                self.provider.create_hosts,
-                hosts,
-                context={
-                    "component": "orchestrator",
-                    "operation": "create_hosts", 
-                    "range_id": range_id
-                },
-                default_return=[],
-                logger=self.logger
-            )
+            host_ids = journal.data(RANGE_RESOURCE, STEP_HOSTS_CREATED) if resuming else None
+            if host_ids and all(state == "active" for state in self._live_states(host_ids).values()):
+                self.logger.info(f"Reusing {len(host_ids)} hosts of the interrupted creation")
+            else:
+                host_ids = safe_execute(
+                    traced("provider create_hosts", "provider")(self.provider.create_hosts),
+                    hosts,
+                    context={
+                        "component": "orchestrator",
+                        "operation": "create_hosts", 
+                        "range_id": range_id
+                    },
+                    default_return=[],
+                    logger=self.logger
+                )
+                if host_ids:
+                    journal.mark(RANGE_RESOURCE, STEP_HOSTS_CREATED, host_ids)
             
             if not host_ids:
                 progress.fail_step("hosts", f"Failed to create {len(hosts)} hosts")
@@ -388,6 +585,7 @@ class RangeOrchestrator:
                 )
             
             self._range_resources[range_id]["hosts"] = host_ids
+            hosts_finished = time.time()
             progress.complete_step("hosts")
             
             # Check that hosts are up
@@ -405,14 +603,22 @@ class RangeOrchestrator:
             
             progress.start_step("guests")
             
-            # Set current range context in provider for file organization
+            # Guests whose journaled VMs are all still running are not created again
+            reused_vms = self._live_journaled_guests(journal) if resuming else {}
+            pending_guests = [guest for guest in guests if self._guest_id(guest) not in reused_vms]
+            if reused_vms:
+                self.logger.info(f"Reusing VMs of {len(reused_vms)} guests, creating {len(pending_guests)}")
+            
+            # Set current range context in provider for file organization;
+            # providers journal their own steps (image, disk, domain) too
             old_range_context = getattr(self.provider, '_current_range_id', None)
             self.provider._current_range_id = range_id
+            self.provider._creation_journal = journal
             
             try:
                 guest_ids = safe_execute(
-                    self.provider.create_guests,
-                    guests, host_mapping, build_only, skip_builder, recreate,
+                    traced("provider create_guests", "provider")(self.provider.create_guests),
+                    pending_guests, host_mapping, build_only, skip_builder, recreate,
                     context={
                         "component": "orchestrator",
                         "operation": "create_guests", 
@@ -420,7 +626,7 @@ class RangeOrchestrator:
                     },
                     default_return=[],
                     logger=self.logger
-                )
+                ) if pending_guests else []
             finally:
                 # Restore previous range context
                 if old_range_context is not None:
@@ -428,8 +634,10 @@ class RangeOrchestrator:
                 else:
                     if hasattr(self.provider, '_current_range_id'):
                         delattr(self.provider, '_current_range_id')
+                if hasattr(self.provider, '_creation_journal'):
+                    delattr(self.provider, '_creation_journal')
             
-            if not guest_ids:
+            if pending_guests and not guest_ids:
                 if build_only:
                     # In build-only mode, empty guest_ids is expected - images were built successfully
                     progress.complete_step("guests")
@@ -438,6 +646,7 @@ class RangeOrchestrator:
                     progress.start_step("complete")
                     metadata.update_status(RangeStatus.ACTIVE)
                     self._save_range_metadata(range_id, yaml_config_path=None)
+                    journal.clear()
                     progress.complete_step("complete")
                     progress.complete()
                     
@@ -455,68 +664,50 @@ class RangeOrchestrator:
                         range_id=range_id
                     )
             
+            created_vms = self._map_guest_vms(pending_guests, guest_ids)
+            for guest_id, vm_names in created_vms.items():
+                for vm_name in vm_names:
+                    journal.mark(vm_name, STEP_GUEST_CREATED, guest_id)
+            guest_vms = {**reused_vms, **created_vms}
+            if reused_vms:
+                # VMs in guest order, as if all were created by this run
+                guest_ids = list(dict.fromkeys(
+                    [vm for guest in guests for vm in guest_vms.get(self._guest_id(guest), [])] + guest_ids))
+            
             self._range_resources[range_id]["guests"] = guest_ids
+            # Which VMs belong to which guest, for later reconciliation
+            metadata.tags['guest_vms'] = json.dumps(guest_vms)
+            guests_finished = time.time()
             progress.complete_step("guests")
             
-            # Create network topology if specified
+            # Network, IP discovery, package staging and guest tasks run as a
+            # dependency graph: each guest's tasks start as soon as that guest
+            # has an IP and the network is up, instead of after every guest
             progress.start_step("network")
-            if topology_config:
-                # Connect topology manager to provider's libvirt connection if available
-                if hasattr(self.provider, '_connection'):
-                    self.topology_manager.libvirt_connection = self.provider._connection
-                
-                ip_assignments = self.topology_manager.create_topology(
-                    topology_config, guests, range_id
-                )
-                self.logger.info(f"Assigned IPs to {len(ip_assignments)} guests")
-                
-                # Store IP assignments for later task execution
-                metadata.tags['ip_assignments'] = json.dumps(ip_assignments)
+            progress.start_step("tasks")
+            # Journaled results stay valid for VMs that kept running; the
+            # network is only reused when no VM was created again
+            reuse = {vm for vm_names in reused_vms.values() for vm in vm_names}
+            if resuming and not created_vms:
+                reuse.add(RANGE_RESOURCE)
+            scheduler = self._build_creation_graph(
+                range_id, guests, topology_config, metadata, progress,
+                timings={"hosts": (hosts_started, hosts_finished), "guests": (hosts_finished, guests_finished)},
+                journal=journal, reuse=reuse
+            )
+            report = scheduler.run()
+            self._save_creation_report(range_id, report)
+            
+            network_step = report.nodes["network"]
+            if network_step.exception is not None:
+                progress.fail_step("network", f"Network topology failed: {network_step.error}")
+                raise network_step.exception
             progress.complete_step("network")
             
-            # Execute tasks on guests if they have task configurations
-            progress.start_step("tasks")
             task_results = []
-            for i, guest in enumerate(guests):
-                guest_id = getattr(guest, 'id', None) or getattr(guest, 'guest_id', 'unknown')
-                
-                # Get the actual VM name from range resources
-                range_resources = self._range_resources.get(range_id, {})
-                guest_vms = range_resources.get("guests", [])
-                
-                if i < len(guest_vms):
-                    actual_vm_name = guest_vms[i]
-                    # Get IP address using the exact VM name
-                    guest_ip = self._get_vm_ip_by_name(actual_vm_name, max_wait_minutes=1)
-                else:
-                    # Fallback to pattern matching if exact name not available
-                    guest_ip = self._wait_for_vm_readiness(guest_id, range_id, max_wait_minutes=1)
-                
-                # Execute tasks if guest is ready and has tasks
-                if guest_ip and hasattr(guest, 'tasks') and guest.tasks:
-                    self.logger.info(f"Executing tasks for guest {guest_id} at {guest_ip}")
-                    
-                    results = safe_execute(
-                        self.task_executor.execute_guest_tasks,
-                        guest, guest_ip, guest.tasks,
-                        context={
-                            "component": "orchestrator", 
-                            "operation": "execute_guest_tasks",
-                            "range_id": range_id,
-                            "guest_id": guest_id
-                        },
-                        default_return=[],
-                        logger=self.logger
-                    )
-                    
-                    if results:
-                        task_results.extend(results)
-                        
-                elif hasattr(guest, 'tasks') and guest.tasks:
-                    # VM not ready but has tasks - log warning
-                    self.logger.warning(f"Guest {guest_id} has tasks but is not ready for execution (no IP or not reachable)")
-                    # For testing: skip task recording and continue
-            
+            for name, step in report.nodes.items():
+                if name.startswith("tasks:") and step.result:
+                    task_results.extend(step.result)
             progress.complete_step("tasks")
             
             # Store task results in metadata
@@ -532,10 +723,12 @@ class RangeOrchestrator:
             
             # Finalize range creation
             progress.start_step("complete")
+            self._snapshot_range(range_id, metadata)
             metadata.update_status(RangeStatus.ACTIVE)
             
             # Save distributed metadata
             self._save_range_metadata(range_id, yaml_config_path=None)
+            journal.clear()
             
             progress.complete_step("complete")
             
@@ -557,7 +750,9 @@ class RangeOrchestrator:
             # Finalize range logging
             finalize_range_logging(range_id, overall_success, failure_count)
             
-            self.logger.info(f"Successfully created range {range_id} with {len(task_results)} tasks executed")
+            cached = sum(1 for r in task_results if getattr(r, 'cached', False))
+            self.logger.info(f"Successfully created range {range_id} with {len(task_results)} tasks executed"
+                             + (f" ({cached} skipped as completed before)" if cached else ""))
             log_to_range(range_id, LogLevel.INFO, f"Range creation completed successfully: {len(task_results)} tasks executed", "orchestrator")
             
             return metadata
@@ -589,13 +784,20 @@ class RangeOrchestrator:
             # Update status to error
             metadata.update_status(RangeStatus.ERROR)
             
-            # Attempt cleanup of partial resources
-            safe_execute(
-                self._cleanup_range_resources,
-                range_id,
-                context={"operation": "cleanup_after_failure", "range_id": range_id},
-                logger=self.logger
-            )
+            # Built VMs are kept for --resume; otherwise clean up partial resources
+            kept = 0 if build_only else self._adopt_journaled_vms(range_id, journal)
+            if kept:
+                self.logger.warning(f"Keeping {kept} VMs of range {range_id}: continue with "
+                                    f"'cyris create --resume' or remove them with 'cyris destroy {range_id}'")
+            else:
+                safe_execute(
+                    self._cleanup_range_resources,
+                    range_id,
+                    context={"operation": "cleanup_after_failure", "range_id": range_id},
+                    logger=self.logger
+                )
+            if build_only or not journal.has_progress:
+                journal.clear()
             
             # Save state even on error
             self._save_range_metadata(range_id)
@@ -606,9 +808,186 @@ class RangeOrchestrator:
                 range_id=range_id,
                 cause=e
             )
+        finally:
+            self._export_trace(range_id)
+            self._save_exec_stats(range_id, exec_before)
+    
+    def _save_exec_stats(self, range_id: str, before: Dict[str, Any]) -> None:
+        """Write the processes spawned since ``before`` to the range's logs directory"""
+        stats = exec_gateway.diff_stats(exec_gateway.snapshot(), before)
+        spawned = sum(site["calls"] for site in stats["sites"])
+        try:
+            path = self.ranges_dir / range_id / "logs" / exec_gateway.RANGE_STATS_FILE
+            path.parent.mkdir(parents=True, exist_ok=True)
+            exec_gateway.save_stats(path, stats, merge=False)
+            self.logger.info(f"Range creation spawned {spawned} processes (see cyris debug exec-stats {range_id})")
+        except OSError as e:
+            self.logger.warning(f"Could not write exec statistics for range {range_id}: {e}")
+    
+    def _export_trace(self, range_id: str) -> None:
+        """Stop the active trace and write it to the range's logs directory"""
+        tracer = stop_trace()
+        if tracer is None:
+            return
+        try:
+            paths = tracer.export(self.ranges_dir / range_id / "logs")
+            slowest = ", ".join(f"{s.name} {s.duration_ns / 1e9:.1f}s" for s in tracer.slowest(limit=3))
+            self.logger.info(f"Trace written to {paths['chrome']} (slowest: {slowest or 'none'})")
+        except OSError as e:
+            self.logger.warning(f"Could not write trace for range {range_id}: {e}")
+    
+    def _build_creation_graph(
+        self,
+        range_id: str,
+        guests: List["Guest"],
+        topology_config: Optional[Dict[str, Any]],
+        metadata: RangeMetadata,
+        progress: ProgressTracker,
+        timings: Dict[str, tuple],
+        journal: Optional[CreationJournal] = None,
+        reuse: Optional[Set[str]] = None
+    ) -> DagScheduler:
+        """
+        Dependency graph of the post-provisioning creation steps.
+        
+        Steps: ``network`` (topology), ``ip:<guest>`` (address discovery),
+        ``packages:<os type>`` (package cache prefetch by the first guest of
+        that type), ``content:<src>,<dst>`` (one copy_content push to every
+        guest copying that pair, once their IPs are known) and
+        ``tasks:<guest>``, which waits only for its own IP, the network, its
+        OS type's packages and its content pushes. The provider's batched
+        host and guest creation is recorded from ``timings`` so the report
+        covers the whole creation.
+        
+        Completed network and IP steps are written to ``journal``; for the
+        resources in ``reuse`` (VM names, ``range`` for the network) steps the
+        journal already has are replayed instead of run.
+        """
+        scheduler = DagScheduler(concurrency=self.CREATION_CONCURRENCY)
+        hosts_started, hosts_finished = timings["hosts"]
+        guests_started, guests_finished = timings["guests"]
+        scheduler.record("hosts", hosts_started, hosts_finished, resource="provider")
+        scheduler.record("guests", guests_started, guests_finished, deps=["hosts"], resource="provider")
+        reuse = reuse or set()
+        
+        def replayed(resource, step):
+            return journal is not None and resource in reuse and journal.done(resource, step)
+        
+        def create_network(inputs):
+            if not topology_config:
+                return {}
+            if replayed(RANGE_RESOURCE, STEP_NETWORK_READY):
+                ip_assignments = journal.data(RANGE_RESOURCE, STEP_NETWORK_READY) or {}
+                self.logger.info(f"Network of range {range_id} was set up before, reusing it")
+                metadata.tags['ip_assignments'] = json.dumps(ip_assignments)
+                return ip_assignments
+            # Connect topology manager to provider's libvirt connection if available
+            if hasattr(self.provider, '_connection'):
+                self.topology_manager.libvirt_connection = self.provider._connection
+            with span("topology create_topology", "provider", networks=len(topology_config.get('networks', []))):
+                ip_assignments = self.topology_manager.create_topology(topology_config, guests, range_id)
+            self.logger.info(f"Assigned IPs to {len(ip_assignments)} guests")
+            # Store IP assignments for later task execution
+            metadata.tags['ip_assignments'] = json.dumps(ip_assignments)
+            if journal is not None:
+                journal.mark(RANGE_RESOURCE, STEP_NETWORK_READY, ip_assignments)
+            return ip_assignments
+        
+        scheduler.add("network", create_network, deps=["guests"], resource="network")
+        
+        guest_vms = self._range_resources.get(range_id, {}).get("guests", [])
+        keys = []
+        for i, guest in enumerate(guests):
+            guest_id = getattr(guest, 'id', None) or getattr(guest, 'guest_id', 'unknown')
+            key = guest_id if guest_id not in keys else f"{guest_id}-{i}"
+            keys.append(key)
+            
+            def resolve_ip(inputs, i=i, guest_id=guest_id):
+                if i < len(guest_vms):
+                    vm_name = guest_vms[i]
+                    if replayed(vm_name, STEP_IP_ASSIGNED):
+                        return journal.data(vm_name, STEP_IP_ASSIGNED)
+                    # Get IP address using the exact VM name
+                    ip = self._get_vm_ip_by_name(vm_name, max_wait_minutes=1)
+                    if ip and journal is not None:
+                        journal.mark(vm_name, STEP_IP_ASSIGNED, ip)
+                    return ip
+                # Fallback to pattern matching if exact name not available
+                return self._wait_for_vm_readiness(guest_id, range_id, max_wait_minutes=1)
+            
+            scheduler.add(f"ip:{key}", resolve_ip, deps=["guests"], resource="ip")
+        
+        # One package prefetch per OS type, seeded by its first guest
+        from ..tools.package_cache import collect_package_requests
+        package_steps = {}
+        for os_type in collect_package_requests(guests):
+            members = [i for i, guest in enumerate(guests)
+                       if (getattr(guest, 'basevm_os_type', None) or getattr(guest, 'os_type', 'linux')) == os_type]
+            seed = f"ip:{keys[members[0]]}"
+            
+            def stage(inputs, members=members, seed=seed):
+                targets = [(guests[i], inputs[seed] if i == members[0] else None) for i in members]
+                return self.task_executor.stage_packages(targets)
+            
+            package_steps[os_type] = scheduler.add(f"packages:{os_type}", stage, deps=[seed], resource="packages")
+        
+        # One parallel content push per (src, dst), to all guests copying it
+        from ..tools.content_distributor import collect_content_copies
+        content_steps: Dict[int, List[str]] = {}
+        for (src, dst), members in collect_content_copies(guests).items():
+            ip_steps = [f"ip:{keys[i]}" for i in members]
+            
+            def distribute(inputs, pair=(src, dst), members=members, ip_steps=ip_steps):
+                targets = [(guests[i], inputs[step]) for i, step in zip(members, ip_steps)]
+                try:
+                    return self.task_executor.distribute_content(targets, pairs=[pair])
+                except Exception as e:
+                    # copy_content tasks then copy to their guest one by one
+                    self.logger.warning(f"Parallel content distribution of {pair[0]} failed, copying per guest: {e}")
+                    return 0
+            
+            step = scheduler.add(f"content:{src},{dst}", distribute, deps=ip_steps, resource="content")
+            for i in members:
+                content_steps.setdefault(i, []).append(step)
+        
+        ledger = self._task_ledger(range_id)
+        for i, (guest, key) in enumerate(zip(guests, keys)):
+            if not getattr(guest, 'tasks', None):
+                continue
+            os_type = getattr(guest, 'basevm_os_type', None) or getattr(guest, 'os_type', 'linux')
+            deps = [f"ip:{key}", "network"] + ([package_steps[os_type]] if os_type in package_steps else [])
+            deps += content_steps.get(i, [])
+            
+            def run_tasks(inputs, guest=guest, key=key, vm_name=guest_vms[i] if i < len(guest_vms) else key):
+                guest_ip = inputs[f"ip:{key}"]
+                if not guest_ip:
+                    self.logger.warning(f"Guest {key} has tasks but is not ready for execution (no IP or not reachable)")
+                    return []
+                self.logger.info(f"Executing tasks for guest {key} at {guest_ip}")
+                return self.task_executor.execute_guest_tasks(guest, guest_ip, guest.tasks, ledger=ledger, vm_name=vm_name)
+            
+            scheduler.add(f"tasks:{key}", run_tasks, deps=deps, resource="tasks")
+        
+        return scheduler
+    
+    def _save_creation_report(self, range_id: str, report: DagReport) -> None:
+        """Log the critical path and write the full report to the range logs"""
+        self.logger.info(report.format_critical_path())
+        for step in report.failed:
+            self.logger.warning(f"Creation step {step.name} failed: {step.error}")
+        try:
+            logs_dir = self.ranges_dir / range_id / "logs"
+            logs_dir.mkdir(parents=True, exist_ok=True)
+            (logs_dir / "creation_critical_path.json").write_text(json.dumps(report.to_dict(), indent=2))
+        except OSError as e:
+            self.logger.warning(f"Could not write creation report for range {range_id}: {e}")
     
     def get_range(self, range_id: str) -> Optional[RangeMetadata]:
         """Get range metadata by ID"""
+        if not self._registry_loaded and range_id not in self._range_cache:
+            # Single-row index lookup instead of loading every range
+            if self._load_indexed(range_id=range_id) is not None:
+                return self._range_cache.get(range_id)
         return self._ranges.get(range_id)
     
     def list_ranges(
@@ -628,6 +1007,12 @@ class RangeOrchestrator:
         Returns:
             List of matching range metadata
         """
+        if not self._registry_loaded and (owner or status or tags):
+            # Filter on the index columns, only matching ranges are loaded
+            range_ids = self._load_indexed(owner=owner, status=status, tags=tags)
+            if range_ids is not None:
+                return [self._range_cache[range_id] for range_id in range_ids]
+        
         ranges = list(self._ranges.values())
         
         if owner:
@@ -681,7 +1066,7 @@ class RangeOrchestrator:
             
             if new_status != metadata.status:
                 metadata.update_status(new_status)
-                self._save_range_metadata(range_id)
+                self._save_range_metadata(range_id, coalesce=True)
                 self.logger.info(f"Range {range_id} status updated to {new_status.value}")
             
             return new_status
@@ -689,7 +1074,7 @@ class RangeOrchestrator:
         except Exception as e:
             self.logger.error(f"Failed to update status for range {range_id}: {e}")
             metadata.update_status(RangeStatus.ERROR)
-            self._save_range_metadata(range_id)
+            self._save_range_metadata(range_id, coalesce=True)
             return RangeStatus.ERROR
     
     def destroy_range(self, range_id: str) -> bool:
@@ -713,8 +1098,11 @@ class RangeOrchestrator:
             # Update status
             metadata.update_status(RangeStatus.STOPPING)
             
-            # Cleanup infrastructure resources
+            # Cleanup infrastructure resources, including VMs of an unfinished creation
+            journal = self._creation_journal(range_id)
+            self._adopt_journaled_vms(range_id, journal)
             self._cleanup_range_resources(range_id)
+            journal.clear()
             
             # Update final status
             metadata.update_status(RangeStatus.DESTROYED)
@@ -772,71 +1160,48 @@ class RangeOrchestrator:
             if range_id in self._range_resources:
                 del self._range_resources[range_id]
             
+            self._metadata_store.discard(range_id)
+            self._unindex_range(range_id)
+            
             # Clean up all range-related files and directories
             import shutil
             import glob
+            from ..infrastructure.providers.libvirt_teardown import remove_paths
             
-            # Remove range directory
-            range_dir = self.ranges_dir / range_id
-            if range_dir.exists():
-                self.logger.info(f"Removing range directory: {range_dir}")
-                shutil.rmtree(range_dir)
+            cyber_range_dir = self.ranges_dir.parent if self.ranges_dir.name == range_id else self.ranges_dir
+            range_resources = self._range_resources.get(range_id, {})
             
-            # Remove disk image files - check both old and new locations
-            removed_disks = []
+            # Collect disk images - check both new and legacy locations
+            candidates = []
             
             # New location: range-specific disks directory
             range_disks_dir = self.ranges_dir / range_id / "disks"
             if range_disks_dir.exists():
-                self.logger.info(f"Removing range-specific disk directory: {range_disks_dir}")
-                disk_files = list(range_disks_dir.glob("*.qcow2"))
-                for disk_file in disk_files:
-                    try:
-                        disk_file.unlink()
-                        removed_disks.append(disk_file.name)
-                        self.logger.info(f"Removed disk file: {disk_file.name}")
-                    except Exception as e:
-                        self.logger.warning(f"Failed to remove disk file {disk_file.name}: {e}")
-                
-                # Remove the disks directory if empty
-                try:
-                    if not any(range_disks_dir.iterdir()):
-                        range_disks_dir.rmdir()
-                except:
-                    pass
+                candidates.extend(range_disks_dir.glob("*.qcow2"))
             
-            # Legacy location: check root cyber_range directory for old disk files
-            cyber_range_dir = self.ranges_dir.parent if self.ranges_dir.name == range_id else self.ranges_dir
+            # Legacy location: tracked disk files in the root cyber_range directory
+            candidates.extend(cyber_range_dir / disk_name for disk_name in range_resources.get('disks', []))
             
-            # Get range resources to identify which disk files actually belong to this range
-            range_resources = self._range_resources.get(range_id, {})
-            range_disks = range_resources.get('disks', [])
+            # Also any remaining disk files with range ID pattern (fallback)
+            candidates.extend(Path(f) for f in glob.glob(str(cyber_range_dir / f"*{range_id}*.qcow2")))
             
-            # Remove tracked disk files from legacy location
-            for disk_name in range_disks:
-                legacy_disk_path = cyber_range_dir / disk_name
-                if legacy_disk_path.exists():
-                    try:
-                        legacy_disk_path.unlink()
-                        removed_disks.append(disk_name)
-                        self.logger.info(f"Removed legacy disk file: {disk_name}")
-                    except Exception as e:
-                        self.logger.warning(f"Failed to remove legacy disk file {disk_name}: {e}")
+            # Range-specific log files
+            candidates.extend(Path(f) for f in glob.glob(str(cyber_range_dir / f"*{range_id}*.log")))
             
-            # Also check for any remaining disk files with range ID pattern (fallback)
-            disk_pattern = f"*{range_id}*.qcow2"
-            pattern_files = glob.glob(str(cyber_range_dir / disk_pattern))
-            for disk_file in pattern_files:
-                disk_path = Path(disk_file)
-                try:
-                    disk_path.unlink()
-                    removed_disks.append(disk_path.name)
-                    self.logger.info(f"Removed pattern-matched disk file: {disk_path.name}")
-                except Exception as e:
-                    self.logger.warning(f"Failed to remove pattern-matched disk file {disk_path.name}: {e}")
+            # Delete on a worker pool; each file is reported individually
+            results = remove_paths(candidates)
+            removed = [Path(r.resource).name for r in results if r.status == "removed"]
+            for result in results:
+                if not result.ok:
+                    self.logger.warning(f"Failed to remove {result.resource}: {result.error}")
+            if removed:
+                self.logger.info(f"Removed {len(removed)} disk and log files total: {', '.join(removed)}")
             
-            if removed_disks:
-                self.logger.info(f"Removed {len(removed_disks)} disk files total: {', '.join(removed_disks)}")
+            # Remove range directory
+            range_dir = self.ranges_dir / range_id
+            if range_dir.exists():
+                self.logger.info(f"Removing range directory: {range_dir}")
+                shutil.rmtree(range_dir)
             
             # Remove network configurations if any
             # This could be extended to clean up libvirt networks, bridges, etc.
@@ -844,16 +1209,6 @@ class RangeOrchestrator:
             if range_networks:
                 self.logger.info(f"Range had {len(range_networks)} networks, manual cleanup may be needed")
             
-            # Clean up any range-specific log files
-            log_pattern = f"*{range_id}*.log"
-            log_files = glob.glob(str(cyber_range_dir / log_pattern))
-            for log_file in log_files:
-                try:
-                    Path(log_file).unlink()
-                    self.logger.info(f"Removed log file: {Path(log_file).name}")
-                except Exception as e:
-                    self.logger.warning(f"Failed to remove log file {Path(log_file).name}: {e}")
-            
             # Remove from memory (metadata files already deleted)
             pass
             
@@ -940,10 +1295,122 @@ class RangeOrchestrator:
             self.logger.info(f"Destroying {len(host_ids)} hosts for range {range_id}")
             self.provider.destroy_hosts(host_ids)
         
-        # Clear resource tracking
+        # Clear resource tracking; tasks have to run again on new VMs
         self._range_resources[range_id] = {"hosts": [], "guests": []}
+        self._task_ledger(range_id).forget()
     
-    def _is_range_healthy_and_compatible(self, range_id: str, hosts: List[Host], guests: List[Guest]) -> bool:
+    def _snapshot_range(self, range_id: str, metadata: RangeMetadata) -> None:
+        """
+        Snapshot every guest of a range as the baseline ``reset_range``
+        reverts to. Failures are logged and never fail the caller; guests
+        without a snapshot are left out of later resets.
+        """
+        vm_names = self._range_resources.get(range_id, {}).get("guests", [])
+        if (getattr(self.settings, 'range_snapshots', False) is not True or not vm_names
+                or not hasattr(self.provider, 'snapshot_guests')):
+            return
+        try:
+            with span("provider snapshot_guests", "provider", guests=len(vm_names)):
+                report = self.provider.snapshot_guests(vm_names, f"Baseline of range {range_id}")
+            for result in report.failed:
+                self.logger.warning(f"Could not snapshot {result.domain}: {result.error}")
+            if report.domains:
+                metadata.tags['snapshot'] = json.dumps({
+                    'name': report.snapshot,
+                    'taken_at': datetime.now().isoformat(),
+                    'vms': report.domains,
+                })
+            else:
+                metadata.tags.pop('snapshot', None)
+        except Exception as e:
+            self.logger.warning(f"Could not snapshot range {range_id}: {e}")
+            metadata.tags.pop('snapshot', None)
+    
+    def reset_range(self, range_id: str) -> Optional["SnapshotReport"]:
+        """
+        Revert all guests of a range to the snapshot taken after creation.
+        
+        The guests come back with every task already applied (and, for
+        guests snapshotted while running, with their memory state), so the
+        task ledger stays valid and nothing is re-created.
+        
+        Args:
+            range_id: Range identifier
+        
+        Returns:
+            Per-VM revert report, or None when the range does not exist, was
+            destroyed or has no snapshot
+        """
+        metadata = self.get_range(range_id)
+        if metadata is None or metadata.status == RangeStatus.DESTROYED:
+            self.logger.warning(f"Range {range_id} not found")
+            return None
+        try:
+            snapshot = json.loads(metadata.tags.get('snapshot') or 'null')
+        except ValueError:
+            snapshot = None
+        if not snapshot or not hasattr(self.provider, 'revert_guests'):
+            self.logger.warning(f"Range {range_id} has no snapshot to reset to")
+            return None
+        
+        self.logger.info(f"Resetting range {range_id} to snapshot '{snapshot['name']}' "
+                         f"taken at {snapshot['taken_at']}")
+        report = self.provider.revert_guests(snapshot['vms'])
+        for result in report.failed:
+            self.logger.warning(f"Could not revert {result.domain}: {result.error}")
+        
+        metadata.tags['last_reset'] = datetime.now().isoformat()
+        metadata.update_status(RangeStatus.ACTIVE if report.succeeded else RangeStatus.ERROR)
+        self._save_range_metadata(range_id)
+        log_to_range(range_id, LogLevel.INFO, f"Range reset: {report.summary()}", "orchestrator")
+        return report
+    
+    def _creation_journal(self, range_id: str) -> CreationJournal:
+        """Write-ahead journal of the range's creation steps"""
+        return CreationJournal(self.ranges_dir / range_id / JOURNAL_FILE)
+    
+    def _live_states(self, resource_ids: List[str]) -> Dict[str, str]:
+        """Provider status of ``resource_ids``; unknown ones count as missing"""
+        if not resource_ids:
+            return {}
+        try:
+            states = self.provider.get_status(list(resource_ids))
+        except Exception as e:
+            self.logger.warning(f"Could not check live state of {len(resource_ids)} resources: {e}")
+            states = {}
+        return {resource_id: states.get(resource_id, "not_found") for resource_id in resource_ids}
+    
+    def _live_journaled_guests(self, journal: CreationJournal) -> Dict[str, List[str]]:
+        """Guest id -> journaled VMs, for guests whose VMs are all running"""
+        created = journal.resources(STEP_GUEST_CREATED)
+        states = self._live_states(list(created))
+        guest_vms: Dict[str, List[str]] = {}
+        for vm_name, guest_id in created.items():
+            guest_vms.setdefault(guest_id, []).append(vm_name)
+        return {
+            guest_id: vm_names for guest_id, vm_names in guest_vms.items()
+            if all(states[vm_name] == "active" for vm_name in vm_names)
+        }
+    
+    def _adopt_journaled_vms(self, range_id: str, journal: CreationJournal) -> int:
+        """
+        Add the VMs an unfinished creation built to the range's resources, so
+        that destroying (or recreating) the range removes them too.
+        
+        Returns:
+            Number of VMs the unfinished creation built
+        """
+        vm_names = journal.vms()
+        if not vm_names:
+            return 0
+        resources = self._range_resources.setdefault(range_id, {"hosts": [], "guests": []})
+        guests = resources.setdefault("guests", [])
+        guests.extend(vm_name for vm_name in vm_names if vm_name not in guests)
+        if not resources.get("hosts"):
+            resources["hosts"] = list(journal.data(RANGE_RESOURCE, STEP_HOSTS_CREATED) or [])
+        return len(vm_names)
+    
+    def _is_range_healthy_and_compatible(self, range_id: str, hosts: List["Host"], guests: List["Guest"]) -> bool:
         """
         Check if existing range is healthy and compatible with requested configuration.
         
@@ -1002,8 +1469,320 @@ class RangeOrchestrator:
             self.logger.warning(f"Error checking range {range_id} health: {e}")
             return False
     
+    @staticmethod
+    def _guest_id(guest: "Guest") -> str:
+        return getattr(guest, 'guest_id', None) or str(getattr(guest, 'id', 'unknown'))
+    
+    def _map_guest_vms(self, guests: List["Guest"], vm_names: List[str]) -> Dict[str, List[str]]:
+        """
+        Group created VMs by guest id.
+        
+        Providers that register their guests (KVM) record the guest id in the
+        resource metadata; VMs without one are taken to be in guest order.
+        """
+        registered = {}
+        if hasattr(self.provider, 'list_resources'):
+            registered = {
+                info.resource_id: info.metadata.get('guest_id')
+                for info in self.provider.list_resources("guest")
+            }
+        guest_vms: Dict[str, List[str]] = {}
+        for i, vm_name in enumerate(vm_names):
+            guest_id = registered.get(vm_name)
+            if not guest_id and i < len(guests):
+                guest_id = self._guest_id(guests[i])
+            if guest_id:
+                guest_vms.setdefault(guest_id, []).append(vm_name)
+        return guest_vms
+    
+    def _recorded_guest_vms(
+        self,
+        range_id: str,
+        metadata: RangeMetadata,
+        recorded_plan: "RangePlan"
+    ) -> Optional[Dict[str, List[str]]]:
+        """Guest id -> VM names of an existing range, None if unknown"""
+        if metadata.tags.get('guest_vms'):
+            try:
+                return json.loads(metadata.tags['guest_vms'])
+            except ValueError:
+                self.logger.warning(f"Guest to VM map of range {range_id} is unreadable")
+        # Without a recorded map, VMs are in guest order if every guest has one
+        vm_names = (self.get_range_resources(range_id) or {}).get("guests", [])
+        if len(vm_names) != len(recorded_plan.guests):
+            return None
+        return {guest.guest_id: [vm_name] for guest, vm_name in zip(recorded_plan.guests, vm_names)}
+    
+    def diff_range(self, range_id: str, plan: "RangePlan") -> Optional["RangeDiff"]:
+        """
+        Changes needed for an existing range to match a plan.
+        
+        Args:
+            range_id: Range identifier
+            plan: Desired range plan
+        
+        Returns:
+            RangeDiff, or None when the range does not exist, was destroyed,
+            or lacks the recorded plan and VM map to compare against
+        """
+        from ..config.range_plan import PLAN_FILE, RangePlan
+        from .range_reconciler import diff_range
+        
+        metadata = self.get_range(range_id)
+        plan_file = self.ranges_dir / range_id / PLAN_FILE
+        if metadata is None or metadata.status == RangeStatus.DESTROYED or not plan_file.exists():
+            return None
+        
+        try:
+            recorded = RangePlan.load(plan_file)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.logger.warning(f"Recorded plan of range {range_id} is unreadable: {e}")
+            return None
+        
+        guest_vms = self._recorded_guest_vms(range_id, metadata, recorded)
+        if guest_vms is None:
+            self.logger.info(f"Range {range_id} has no guest to VM map, it cannot be reconciled")
+            return None
+        
+        vm_names = [vm_name for names in guest_vms.values() for vm_name in names]
+        live: Optional[Dict[str, str]] = {}
+        if vm_names:
+            try:
+                live = self.provider.get_status(vm_names)
+            except Exception as e:
+                # Compare against the records alone
+                self.logger.warning(f"Could not get VM states of range {range_id}: {e}")
+                live = None
+        return diff_range(range_id, recorded, plan, guest_vms, live)
+    
+    def reconcile_range(self, range_id: str, plan: "RangePlan") -> Optional["RangeDiff"]:
+        """
+        Bring an existing range in line with a plan by applying only the delta.
+        
+        VMs of removed and redefined guests are destroyed, new and redefined
+        guests are created, stopped VMs are started, changed task entries are
+        run and the network topology is patched. Unchanged guests are not
+        touched.
+        
+        Args:
+            range_id: Range identifier
+            plan: Desired range plan
+        
+        The plan is recorded only as far as it was applied: guests whose
+        VMs got no IP or whose task entries failed keep their previous
+        definition in ``range_plan.json``, so the next run retries them, and
+        the range is left in ERROR.
+        
+        Returns:
+            The applied RangeDiff, or None when the range cannot be
+            reconciled (see ``diff_range``) and has to be created instead
+        
+        Raises:
+            CyRISVirtualizationError: If VMs could not be destroyed or created,
+                or guests were not brought in line with the plan
+        """
+        from .range_reconciler import GuestAction
+        
+        diff = self.diff_range(range_id, plan)
+        if diff is None:
+            return None
+        if diff.is_empty:
+            self.logger.info(f"Range '{range_id}' already matches its description")
+            return diff
+        
+        metadata = self._ranges[range_id]
+        self.logger.info(f"Reconciling range {range_id}: {diff.summary()}")
+        log_to_range(range_id, LogLevel.INFO, f"Reconciling range: {diff.summary()}", "orchestrator")
+        for change in diff.guests:
+            self.logger.info(f"  {change.guest_id}: {change.action.value} ({change.reason})")
+            if change.dropped_tasks:
+                self.logger.warning(f"  {change.guest_id}: removed task entries are not undone on the running guest: "
+                                    f"{json.dumps(change.dropped_tasks)}")
+        
+        guest_vms = {guest_id: list(names) for guest_id, names in diff.guest_vms.items()}
+        resources = self._range_resources.setdefault(range_id, {"hosts": [], "guests": []})
+        old_range_context = getattr(self.provider, '_current_range_id', None)
+        self.provider._current_range_id = range_id
+        
+        try:
+            replaced = diff.changes(GuestAction.REMOVE, GuestAction.REPLACE)
+            stale_vms = [vm_name for change in replaced for vm_name in change.vm_names]
+            if stale_vms:
+                self.provider.destroy_guests(stale_vms)
+                self._task_ledger(range_id).forget(stale_vms)
+            for change in replaced:
+                guest_vms.pop(change.guest_id, None)
+            
+            # Stopped VMs are started by the provider's idempotent creation
+            build = diff.changes(GuestAction.ADD, GuestAction.REPLACE, GuestAction.START)
+            if build:
+                entities = {guest.guest_id: guest for guest in plan.build_guests()}
+                guests = [entities[change.guest_id] for change in build]
+                hosts = plan.build_hosts()
+                if diff.hosts_changed or len(resources.get("hosts", [])) != len(hosts):
+                    resources["hosts"] = self.provider.create_hosts(hosts)
+                host_mapping = {host.host_id: host_id for host, host_id in zip(hosts, resources["hosts"])}
+                
+                vm_names = self.provider.create_guests(guests, host_mapping)
+                if len(vm_names) < len(guests):
+                    raise CyRISVirtualizationError(
+                        f"Created {len(vm_names)} of {len(guests)} guests for range {range_id}",
+                        operation="create_guests",
+                        range_id=range_id
+                    )
+                guest_vms.update(self._map_guest_vms(guests, vm_names))
+        except Exception as e:
+            metadata.update_status(RangeStatus.ERROR)
+            raise CyRISVirtualizationError(
+                f"Range reconciliation failed: {e}",
+                operation="reconcile_range",
+                range_id=range_id,
+                cause=e
+            )
+        finally:
+            if old_range_context is not None:
+                self.provider._current_range_id = old_range_context
+            elif hasattr(self.provider, '_current_range_id'):
+                delattr(self.provider, '_current_range_id')
+            # Record what exists now, also after a failure
+            resources["guests"] = [vm_name for guest in plan.guests for vm_name in guest_vms.get(guest.guest_id, [])]
+            metadata.tags['guest_vms'] = json.dumps(guest_vms)
+            self._save_range_metadata(range_id)
+        
+        report = self._build_reconcile_graph(range_id, plan, diff, guest_vms, metadata).run()
+        network_step = report.nodes.get("network")
+        if network_step is not None and network_step.exception is not None:
+            metadata.update_status(RangeStatus.ERROR)
+            self._save_range_metadata(range_id)
+            raise network_step.exception
+        for step in report.failed:
+            self.logger.warning(f"Reconciliation step {step.name} failed: {step.error}")
+        
+        task_results = [result for name, step in report.nodes.items()
+                        if name.startswith("tasks:") and step.result for result in step.result]
+        if task_results:
+            previous = json.loads(metadata.tags.get('task_results') or '[]')
+            metadata.tags['task_results'] = json.dumps(previous + [
+                {
+                    'task_id': r.task_id,
+                    'task_type': r.task_type.value,
+                    'success': r.success,
+                    'message': r.message
+                } for r in task_results
+            ])
+        
+        unapplied = self._unapplied_guests(diff, guest_vms, report)
+        if unapplied:
+            from ..config.range_plan import PLAN_FILE, RangePlan
+            applied = plan.with_guests_from(RangePlan.load(self.ranges_dir / range_id / PLAN_FILE), unapplied)
+            self._save_range_plan(range_id, applied)
+            metadata.tags['plan_digest'] = applied.digest
+            metadata.update_status(RangeStatus.ERROR)
+            self._save_range_metadata(range_id)
+            raise CyRISVirtualizationError(
+                f"Guests {', '.join(unapplied)} of range {range_id} were not reconciled "
+                f"(no IP or failed tasks); run the creation again to retry them",
+                operation="reconcile_range",
+                range_id=range_id
+            )
+        
+        metadata.tags['plan_digest'] = plan.digest
+        # The reconciled state becomes the state ``cyris reset`` returns to
+        self._snapshot_range(range_id, metadata)
+        metadata.update_status(RangeStatus.ACTIVE)
+        self._save_range_metadata(range_id)
+        self.logger.info(f"Reconciled range {range_id} ({len(diff.unchanged)} guests unchanged, "
+                         f"{len(task_results)} tasks executed)")
+        log_to_range(range_id, LogLevel.INFO, f"Range reconciled: {diff.summary()}", "orchestrator")
+        return diff
+    
+    def _unapplied_guests(
+        self,
+        diff: "RangeDiff",
+        guest_vms: Dict[str, List[str]],
+        report: DagReport
+    ) -> List[str]:
+        """Guests with a VM that got no IP or whose pending task entries did not all succeed"""
+        unapplied = []
+        for change in diff.guests:
+            if not change.tasks:
+                continue
+            for vm_name in guest_vms.get(change.guest_id, []):
+                ip_step = report.nodes.get(f"ip:{vm_name}")
+                tasks_step = report.nodes.get(f"tasks:{vm_name}")
+                if (ip_step is None or ip_step.status != NodeStatus.SUCCEEDED or not ip_step.result
+                        or tasks_step is None or tasks_step.status != NodeStatus.SUCCEEDED
+                        or not all(result.success for result in tasks_step.result or [])):
+                    unapplied.append(change.guest_id)
+                    break
+        return unapplied
+    
+    def _build_reconcile_graph(
+        self,
+        range_id: str,
+        plan: "RangePlan",
+        diff: "RangeDiff",
+        guest_vms: Dict[str, List[str]],
+        metadata: RangeMetadata
+    ) -> DagScheduler:
+        """
+        Dependency graph of the post-provisioning steps of a reconciliation.
+        
+        Like ``_build_creation_graph`` but limited to the delta: ``network``
+        patches the topology when it changed or VMs were (re)created, and
+        ``ip:<vm>``/``tasks:<vm>`` run the pending task entries of each
+        changed guest's VMs.
+        """
+        from .range_reconciler import GuestAction
+        
+        scheduler = DagScheduler(concurrency=self.CREATION_CONCURRENCY)
+        guests = plan.build_guests()
+        rebuilt = diff.changes(GuestAction.ADD, GuestAction.REPLACE)
+        topology_config = plan.topology_config()
+        
+        network_deps = []
+        if diff.topology_changed or (rebuilt and topology_config):
+            def update_network(inputs):
+                if hasattr(self.provider, '_connection'):
+                    self.topology_manager.libvirt_connection = self.provider._connection
+                ip_assignments = self.topology_manager.update_topology(
+                    topology_config or {}, guests, range_id,
+                    stale_networks=diff.networks_removed + diff.networks_changed,
+                    rules_changed=diff.rules_changed
+                )
+                metadata.tags['ip_assignments'] = json.dumps(ip_assignments)
+                return ip_assignments
+            
+            network_deps = [scheduler.add("network", update_network, resource="network")]
+        
+        entities = {guest.guest_id: guest for guest in guests}
+        ledger = self._task_ledger(range_id)
+        for change in diff.guests:
+            if not change.tasks:
+                continue
+            guest = entities[change.guest_id]
+            for vm_name in guest_vms.get(change.guest_id, []):
+                ip_step = scheduler.add(f"ip:{vm_name}", lambda inputs, vm_name=vm_name:
+                                        self._get_vm_ip_by_name(vm_name, max_wait_minutes=1), resource="ip")
+                
+                def run_tasks(inputs, guest=guest, vm_name=vm_name, tasks=change.tasks):
+                    guest_ip = inputs[f"ip:{vm_name}"]
+                    if not guest_ip:
+                        self.logger.warning(f"VM {vm_name} has pending tasks but is not reachable")
+                        return []
+                    self.logger.info(f"Executing {len(tasks)} changed task entries on {vm_name} at {guest_ip}")
+                    return self.task_executor.execute_guest_tasks(guest, guest_ip, tasks,
+                                                                  ledger=ledger, vm_name=vm_name)
+                
+                scheduler.add(f"tasks:{vm_name}", run_tasks, deps=[ip_step] + network_deps, resource="tasks")
+        
+        return scheduler
+    
     def get_range_resources(self, range_id: str) -> Optional[Dict[str, List[str]]]:
         """Get resource IDs for a range"""
+        if not self._registry_loaded and range_id not in self._resource_cache:
+            if self._load_indexed(range_id=range_id) is not None:
+                return self._resource_cache.get(range_id)
         return self._range_resources.get(range_id)
     
     def get_statistics(self) -> Dict[str, Any]:
@@ -1034,7 +1813,8 @@ class RangeOrchestrator:
         dry_run: bool = False,
         build_only: bool = False,
         skip_builder: bool = False,
-        recreate: bool = False
+        recreate: bool = False,
+        resume: bool = False
     ) -> Optional[str]:
         """
         Create a cyber range from a YAML description file.
@@ -1046,142 +1826,52 @@ class RangeOrchestrator:
             build_only: Build images only, don't create VMs
             skip_builder: Skip image building phase (use existing images)
             recreate: Force recreate existing range
+            resume: Continue an unfinished creation of the range
         
         Returns:
             Range ID if successful, None if failed
         """
-        self.logger.debug(f"create_range_from_yaml called with dry_run={dry_run}, build_only={build_only}, skip_builder={skip_builder}, recreate={recreate}")
+        self.logger.debug(f"create_range_from_yaml called with dry_run={dry_run}, build_only={build_only}, skip_builder={skip_builder}, recreate={recreate}, resume={resume}")
         
-        # Add debug before main logic 
-        self.logger.debug("About to start YAML parsing and range creation flow")
-        import yaml
         import random
+        from ..config.range_plan import PLAN_CACHE_DIR, load_range_plan
         
         try:
-            # Parse YAML description
-            with open(description_file, 'r') as f:
-                doc = yaml.load(f, Loader=yaml.SafeLoader)
-            
-            # Extract components from YAML
-            hosts = []
-            guests = []
-            range_settings = {}
-            topology_config = None
-            
-            # Handle both list and dictionary YAML formats for flexibility
-            if isinstance(doc, dict):
-                # New dictionary format
-                if 'host_settings' in doc:
-                    for h in doc['host_settings']:
-                        host = Host(
-                            host_id=h['id'],
-                            virbr_addr=h.get('virbr_addr', '192.168.122.1'),
-                            mgmt_addr=h['mgmt_addr'],
-                            account=h['account']
-                        )
-                        hosts.append(host)
-                
-                if 'guest_settings' in doc:
-                    for g in doc['guest_settings']:
-                        guest = Guest(
-                            guest_id=g['id'],
-                            basevm_addr=g.get('ip_addr', '192.168.1.100'),
-                            root_passwd=g.get('root_passwd', 'password'),
-                            basevm_host=g.get('basevm_host'),  # Optional for kvm-auto
-                            basevm_config_file=g.get('basevm_config_file') or None,  # None for kvm-auto
-                            basevm_os_type=g.get('basevm_os_type', 'ubuntu'),
-                            basevm_type=g.get('basevm_type', 'kvm'),
-                            basevm_name=g.get('basevm_name', g['id']),
-                            tasks=g.get('tasks', []),
-                            # kvm-auto specific fields
-                            image_name=g.get('image_name'),
-                            vcpus=g.get('vcpus'),
-                            memory=g.get('memory'),
-                            disk_size=g.get('disk_size'),
-                            # Enhanced kvm-auto configuration options
-                            graphics_type=g.get('graphics_type', 'vnc'),
-                            graphics_port=g.get('graphics_port'),
-                            graphics_listen=g.get('graphics_listen', '127.0.0.1'),
-                            console_type=g.get('console_type', 'pty'),
-                            network_model=g.get('network_model', 'virtio'),
-                            os_variant=g.get('os_variant'),
-                            boot_options=g.get('boot_options'),
-                            cpu_model=g.get('cpu_model'),
-                            extra_args=g.get('extra_args')
-                        )
-                        guests.append(guest)
-                
-                if 'clone_settings' in doc:
-                    for c in doc['clone_settings']:
-                        range_settings = c
-                        # Extract topology configuration - KISS: simple direct lookup
-                        topology_config = self._extract_topology_config(c)
-                        # Extract and merge tasks from clone_settings into guests
-                        self._merge_tasks_from_clone_settings(c, guests)
-            else:
-                # Legacy list format (maintain backward compatibility)
-                for element in doc:
-                    if 'host_settings' in element:
-                        for h in element['host_settings']:
-                            host = Host(
-                                host_id=h['id'],
-                                virbr_addr=h.get('virbr_addr', '192.168.122.1'),
-                                mgmt_addr=h['mgmt_addr'],
-                                account=h['account']
-                            )
-                            hosts.append(host)
-                    
-                    if 'guest_settings' in element:
-                        for g in element['guest_settings']:
-                            guest = Guest(
-                                guest_id=g['id'],
-                                basevm_addr=g.get('ip_addr', '192.168.1.100'),
-                                root_passwd=g.get('root_passwd', 'password'),
-                                basevm_host=g.get('basevm_host'),  # Optional for kvm-auto
-                                basevm_config_file=g.get('basevm_config_file') or None,  # None for kvm-auto
-                                basevm_os_type=g.get('basevm_os_type', 'ubuntu'),
-                                basevm_type=g.get('basevm_type', 'kvm'),
-                                basevm_name=g.get('basevm_name', g['id']),
-                                tasks=g.get('tasks', []),
-                                # kvm-auto specific fields
-                                image_name=g.get('image_name'),
-                                vcpus=g.get('vcpus'),
-                                memory=g.get('memory'),
-                                disk_size=g.get('disk_size'),
-                                # Enhanced kvm-auto configuration options
-                                graphics_type=g.get('graphics_type', 'vnc'),
-                                graphics_port=g.get('graphics_port'),
-                                graphics_listen=g.get('graphics_listen', '127.0.0.1'),
-                                console_type=g.get('console_type', 'pty'),
-                                network_model=g.get('network_model', 'virtio'),
-                                os_variant=g.get('os_variant'),
-                                boot_options=g.get('boot_options'),
-                                cpu_model=g.get('cpu_model'),
-                                extra_args=g.get('extra_args')
-                            )
-                            guests.append(guest)
-                    
-                    if 'clone_settings' in element:
-                        for c in element['clone_settings']:
-                            range_settings = c
-                            # Extract topology configuration - KISS: simple direct lookup
-                            topology_config = self._extract_topology_config(c)
-                            # Extract and merge tasks from clone_settings into guests
-                            self._merge_tasks_from_clone_settings(c, guests)
+            # Compiled and validated once per description contents; dry-run,
+            # the CLI pre-checks and re-creation share the same plan
+            plan = load_range_plan(description_file, self.ranges_dir / PLAN_CACHE_DIR)
+            hosts = plan.build_hosts()
+            guests = plan.build_guests()
+            topology_config = plan.topology_config()
             
             # Generate range ID if not provided
             if range_id is None:
-                range_id = range_settings.get('range_id', random.randint(1000, 9999))
+                range_id = plan.range_id or random.randint(1000, 9999)
             
             range_id_str = str(range_id)
+            unfinished = self._creation_journal(range_id_str).has_progress
             
             if dry_run:
-                self.logger.info(f"DRY RUN: Would create range {range_id_str} with {len(hosts)} hosts and {len(guests)} guests")
+                diff = None if recreate or build_only or unfinished else self.diff_range(range_id_str, plan)
+                if unfinished and resume and not recreate:
+                    self.logger.info(f"DRY RUN: Would resume the unfinished creation of range {range_id_str}")
+                elif diff is not None:
+                    self.logger.info(f"DRY RUN: Would update range {range_id_str}: {diff.summary()}")
+                else:
+                    self.logger.info(f"DRY RUN: Would create range {range_id_str} with {len(hosts)} hosts and {len(guests)} guests")
                 return range_id_str
             
             # Check for kvm-auto guests and ensure sudo access if needed
             self._ensure_kvm_auto_requirements(guests)
             
+            # An existing range created from a plan only gets the delta applied
+            if not recreate and not build_only and not unfinished:
+                diff = self.reconcile_range(range_id_str, plan)
+                if diff is not None:
+                    self._save_range_metadata(range_id_str, yaml_config_path=description_file)
+                    self._save_range_plan(range_id_str, plan)
+                    return range_id_str
+            
             # Create the range using existing method
             self.logger.debug(f"About to call create_range with range_id={range_id_str}, build_only={build_only}, skip_builder={skip_builder}, recreate={recreate}")
             result = self.create_range(
@@ -1191,20 +1881,25 @@ class RangeOrchestrator:
                 hosts=hosts,
                 guests=guests,
                 topology_config=topology_config,
-                tags={"source_file": str(description_file)},
+                tags={"source_file": str(description_file), "plan_digest": plan.digest},
                 build_only=build_only,
                 skip_builder=skip_builder,
-                recreate=recreate
+                recreate=recreate,
+                resume=resume
             )
             self.logger.debug(f"create_range returned successfully: {result.range_id if result else None}")
             
             # Handle the case where range exists but is unhealthy
             if result is None:
-                self.logger.warning(f"Range {range_id_str} exists but has issues. Use --recreate to force rebuild.")
+                if unfinished and not resume:
+                    self.logger.warning(f"Range {range_id_str} was not fully created. Use --resume to continue or --recreate to force rebuild.")
+                else:
+                    self.logger.warning(f"Range {range_id_str} exists but has issues. Use --recreate to force rebuild.")
                 return None
             
             # Save YAML config to range directory after creation
             self._save_range_metadata(range_id_str, yaml_config_path=description_file)
+            self._save_range_plan(range_id_str, plan)
             
             return result.range_id
             
@@ -1212,59 +1907,28 @@ class RangeOrchestrator:
             self.logger.error(f"Failed to create range from YAML {description_file}: {e}")
             raise
     
-    def _extract_topology_config(self, clone_settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """
-        Extract topology configuration from clone settings.
-        KISS: Simple single-purpose method for topology extraction.
-        
-        Args:
-            clone_settings: Clone settings dictionary
-            
-        Returns:
-            Topology configuration dictionary or None
-        """
-        hosts = clone_settings.get('hosts', [])
-        for host in hosts:
-            topology = host.get('topology', [])
-            if topology:
-                return topology[0]  # Return first topology config
-        return None
-    
-    def _merge_tasks_from_clone_settings(self, clone_settings: Dict[str, Any], guests: List[Guest]) -> None:
-        """
-        Merge tasks from clone_settings into corresponding guest objects.
-        This handles the CyRIS YAML format where tasks can be defined in clone_settings.
-        
-        Args:
-            clone_settings: Clone settings dictionary
-            guests: List of guest objects to update
-        """
-        hosts = clone_settings.get('hosts', [])
-        for host in hosts:
-            host_guests = host.get('guests', [])
-            for host_guest in host_guests:
-                guest_id = host_guest.get('guest_id')
-                guest_tasks = host_guest.get('tasks', [])
-                
-                if guest_id and guest_tasks:
-                    # Find the corresponding guest object and merge tasks
-                    for guest in guests:
-                        if guest.guest_id == guest_id:
-                            # Merge tasks - extend existing tasks with clone_settings tasks
-                            if not hasattr(guest, 'tasks') or not guest.tasks:
-                                guest.tasks = []
-                            guest.tasks.extend(guest_tasks)
-                            self.logger.info(f"Merged {len(guest_tasks)} task configurations for guest {guest_id}")
-                            break
-    
     def _discover_and_register_ranges(self) -> None:
         """Discover and auto-register all valid ranges from filesystem"""
+        self._registry_loaded = True
+        
+        if self._registry is not None:
+            try:
+                entries = self._registry.load_all()
+            except Exception as e:
+                self.logger.warning(f"Range index unavailable, scanning range directories: {e}")
+                self._registry = None
+            else:
+                for range_id, (metadata_dict, resources) in entries.items():
+                    self._cache_range(range_id, metadata_dict, resources)
+                self.logger.debug(f"Loaded {len(entries)} ranges from range index")
+                return
+        
         discovered_count = 0
         
         for range_dir in self.ranges_dir.iterdir():
             if (range_dir.is_dir() and 
                 not range_dir.name.startswith('.') and 
-                range_dir.name not in self._ranges):
+                range_dir.name not in self._range_cache):
                 
                 metadata_file = range_dir / 'metadata.json'
                 
@@ -1274,15 +1938,15 @@ class RangeOrchestrator:
                         with open(metadata_file) as f:
                             metadata_dict = json.load(f)
                             metadata = RangeMetadata.from_dict(metadata_dict)
-                            self._ranges[range_dir.name] = metadata
+                            self._range_cache[range_dir.name] = metadata
                         
                         # Load range resources
                         resources_file = range_dir / 'resources.json'
                         if resources_file.exists():
                             with open(resources_file) as f:
-                                self._range_resources[range_dir.name] = json.load(f)
+                                self._resource_cache[range_dir.name] = json.load(f)
                         else:
-                            self._range_resources[range_dir.name] = {"hosts": [], "guests": []}
+                            self._resource_cache[range_dir.name] = {"hosts": [], "guests": []}
                         
                         discovered_count += 1
                         self.logger.info(f"Auto-registered range: {range_dir.name}")
@@ -1293,20 +1957,109 @@ class RangeOrchestrator:
         if discovered_count > 0:
             self.logger.info(f"Auto-discovery completed: {discovered_count} ranges registered")
     
-    def _save_range_metadata(self, range_id: str, yaml_config_path: Optional[Path] = None) -> None:
-        """Save range metadata and resources to its directory"""
+    def _cache_range(
+        self,
+        range_id: str,
+        metadata_dict: Dict[str, Any],
+        resources: Dict[str, List[str]]
+    ) -> bool:
+        """Add an indexed range to the in-memory registry (existing entries win)"""
+        if range_id not in self._range_cache:
+            try:
+                self._range_cache[range_id] = RangeMetadata.from_dict(metadata_dict)
+            except Exception as e:
+                self.logger.warning(f"Failed to register range {range_id}: {e}")
+                return False
+        self._resource_cache.setdefault(range_id, resources)
+        return True
+    
+    def _load_indexed(
+        self,
+        range_id: Optional[str] = None,
+        owner: Optional[str] = None,
+        status: Optional[RangeStatus] = None,
+        tags: Optional[Dict[str, str]] = None
+    ) -> Optional[List[str]]:
+        """
+        Load matching ranges from the index without loading the full registry.
+        
+        Returns:
+            IDs of the matching (now cached) ranges, or None when the index is
+            unavailable and the caller should fall back to the full registry
+        """
+        if self._registry is None:
+            return None
+        
+        try:
+            if range_id is not None:
+                entry = self._registry.get(range_id)
+                entries = {range_id: entry} if entry else {}
+            else:
+                entries = self._registry.query(
+                    owner=owner,
+                    status=status.value if status else None,
+                    tags=tags
+                )
+        except Exception as e:
+            self.logger.warning(f"Range index unavailable, scanning range directories: {e}")
+            self._registry = None
+            return None
+        
+        return [
+            indexed_id for indexed_id, (metadata_dict, resources) in entries.items()
+            if self._cache_range(indexed_id, metadata_dict, resources)
+        ]
+    
+    def _index_range(
+        self,
+        range_id: str,
+        metadata_dict: Dict[str, Any],
+        resources: Dict[str, List[str]]
+    ) -> None:
+        """Update the range index after the range files were written"""
+        if self._registry is None:
+            return
+        try:
+            self._registry.upsert(range_id, metadata_dict, resources)
+        except Exception as e:
+            # The range directory stays authoritative; the next refresh
+            # picks the change up through the mtime check
+            self.logger.warning(f"Failed to update range index for {range_id}: {e}")
+    
+    def _unindex_range(self, range_id: str) -> None:
+        """Drop a removed range from the range index"""
+        if self._registry is None:
+            return
+        try:
+            self._registry.remove(range_id)
+        except Exception as e:
+            self.logger.warning(f"Failed to remove range {range_id} from index: {e}")
+    
+    def _save_range_metadata(
+        self,
+        range_id: str,
+        yaml_config_path: Optional[Path] = None,
+        coalesce: bool = False
+    ) -> None:
+        """
+        Save range metadata and resources to its directory.
+        
+        Args:
+            range_id: Range identifier
+            yaml_config_path: Optional YAML description to back up as config.yml
+            coalesce: Defer the write so that rapid successive updates (status
+                polling) are flushed once
+        """
         range_dir = self.ranges_dir / range_id
         range_dir.mkdir(exist_ok=True)
         
         try:
-            # Save metadata.json
-            with open(range_dir / 'metadata.json', 'w') as f:
-                json.dump(self._ranges[range_id].to_dict(), f, indent=2)
-            
-            # Save resources.json
+            # Atomically write resources.json and metadata.json
+            metadata = self._ranges[range_id]
             resources = self._range_resources.get(range_id, {"hosts": [], "guests": []})
-            with open(range_dir / 'resources.json', 'w') as f:
-                json.dump(resources, f, indent=2)
+            metadata.version = self._metadata_store.save(
+                range_id, metadata.to_dict(), resources, coalesce=coalesce
+            )
             
             # Copy YAML config file if provided
             if yaml_config_path and yaml_config_path.exists():
@@ -1320,6 +2073,15 @@ class RangeOrchestrator:
             self.logger.error(f"Failed to save metadata for range {range_id}: {e}")
             raise
     
+    def _save_range_plan(self, range_id: str, plan: "RangePlan") -> None:
+        """Keep the compiled plan next to the range it created"""
+        from ..config.range_plan import PLAN_FILE
+        
+        try:
+            plan.save(self.ranges_dir / range_id / PLAN_FILE)
+        except OSError as e:
+            self.logger.warning(f"Could not save range plan for {range_id}: {e}")
+    
     def _load_range_resources(self, range_id: str) -> Dict[str, List[str]]:
         """Load resources for a specific range from its directory"""
         resources_file = self.ranges_dir / range_id / 'resources.json'
@@ -1333,7 +2095,7 @@ class RangeOrchestrator:
     
     def _create_entry_point(
         self, 
-        entry_point: EntryPointInfo, 
+        entry_point: "EntryPointInfo", 
         local_user: str, 
         host_address: str
     ) -> Dict[str, Any]:
@@ -1423,7 +2185,7 @@ class RangeOrchestrator:
                             port = self.gateway_service.get_available_port()
                             password = self.gateway_service.generate_random_credentials()
                             
-                            entry_point = EntryPointInfo(
+                            entry_point = resolve(__name__, "EntryPointInfo")(
                                 range_id=range_id,
                                 instance_id=instance_id,
                                 guest_id=guest_config.get('guest_id'),
@@ -1530,7 +2292,6 @@ class RangeOrchestrator:
         Returns:
             Dict: List of created resources {'vms': [...], 'disks': [...], 'networks': [...]}
         """
-        import subprocess
         import tempfile
         import yaml
         import time
@@ -1558,7 +2319,7 @@ class RangeOrchestrator:
             self.logger.info(f"Executing legacy CyRIS: {' '.join(legacy_command)}")
             
             # Execute legacy command
-            result = subprocess.run(
+            result = exec_gateway.run(
                 legacy_command,
                 cwd=str(self.settings.cyris_path),
                 capture_output=True,
@@ -1637,6 +2398,7 @@ class RangeOrchestrator:
         
         return resources
     
+    @traced("wait vm_ip", "wait", attributes=lambda self, vm_name, max_wait_minutes=3: {"vm": vm_name})
     def _get_vm_ip_by_name(self, vm_name: str, max_wait_minutes: int = 3) -> Optional[str]:
         """
         Get VM IP address using exact VM name instead of pattern matching.
@@ -1653,8 +2415,7 @@ class RangeOrchestrator:
         
         self.logger.info(f"Waiting up to {max_wait_minutes} minutes for VM {vm_name} to become ready...")
         
-        from ..tools.vm_ip_manager import VMIPManager
-        vm_ip_manager = VMIPManager()
+        vm_ip_manager = self.vm_ip_manager
         
         # Quick check with shorter timeout for testing
         for attempt in range(3):  # Try only 3 times
@@ -1676,6 +2437,8 @@ class RangeOrchestrator:
         self.logger.warning(f"VM {vm_name} not ready after {max_wait_minutes} minutes")
         return None
     
+    @traced("wait vm_readiness", "wait",
+            attributes=lambda self, guest_id, range_id, max_wait_minutes=3: {"guest": guest_id})
     def _wait_for_vm_readiness(self, guest_id: str, range_id: str, max_wait_minutes: int = 3) -> Optional[str]:
         """
         Wait for VM to be ready for task execution by checking IP availability and SSH connectivity.
@@ -1693,15 +2456,13 @@ class RangeOrchestrator:
         
         self.logger.info(f"Waiting up to {max_wait_minutes} minutes for VM {guest_id} to become ready...")
         
-        from ..tools.vm_ip_manager import VMIPManager
-        vm_ip_manager = VMIPManager()
+        vm_ip_manager = self.vm_ip_manager
         
         while (time.time() - start_time) < wait_seconds:
             # Try to find VM by guest_id pattern and get its IP
             try:
                 # List all VMs matching guest pattern
-                import subprocess
-                result = subprocess.run(['virsh', 'list', '--name', '--state-running'], 
+                result = exec_gateway.run(['virsh', 'list', '--name', '--state-running'], 
                                      capture_output=True, text=True, timeout=10)
                 
                 if result.returncode == 0:
@@ -1795,7 +2556,6 @@ class RangeOrchestrator:
         try:
             # First try to use legacy cleanup script
             try:
-                import subprocess
                 cleanup_command = [
                     'bash',
                     str(self.settings.cyris_path / 'main' / 'range_cleanup.sh'),
@@ -1803,7 +2563,7 @@ class RangeOrchestrator:
                     str(self.settings.cyris_path / 'CONFIG')
                 ]
                 
-                result = subprocess.run(
+                result = exec_gateway.run(
                     cleanup_command,
                     cwd=str(self.settings.cyris_path),
                     capture_output=True,
@@ -1942,6 +2702,19 @@ class RangeOrchestrator:
             # 6. Execute tasks on ready VMs
             task_results = []
             
+            targets = [
+                (guest, ready_vms.get(vm_name))
+                for guest, vm_name in zip(config.guests, created_vms)
+            ]
+            try:
+                self.task_executor.stage_packages(targets)
+            except Exception as e:
+                self.logger.warning(f"Package staging failed, guests install directly: {e}")
+            try:
+                self.task_executor.distribute_content(targets)
+            except Exception as e:
+                self.logger.warning(f"Parallel content distribution failed, copying per guest: {e}")
+            
             for i, guest in enumerate(config.guests):
                 if i < len(created_vms):
                     vm_name = created_vms[i]
@@ -1952,7 +2725,8 @@ class RangeOrchestrator:
                         
                         try:
                             results = self.task_executor.execute_guest_tasks(
-                                guest, vm_ip, guest.tasks
+                                guest, vm_ip, guest.tasks,
+                                ledger=self._task_ledger(str(range_id)), vm_name=vm_name
                             )
                             task_results.extend(results)
                             
@@ -2008,11 +2782,11 @@ class RangeOrchestrator:
         Returns:
             Detailed status dictionary with VM states, IPs, and task results
         """
-        if range_id not in self._ranges:
+        metadata = self.get_range(range_id)
+        if metadata is None:
             return None
             
-        metadata = self._ranges[range_id]
-        range_resources = self._range_resources.get(range_id, {})
+        range_resources = self.get_range_resources(range_id) or {}
         
         # Get VM information
         vm_info = []
@@ -2020,9 +2794,10 @@ class RangeOrchestrator:
         
         for vm_name in guest_vms:
             try:
-                # Use simplified IP discovery with error diagnostics
-                from ..tools.vm_ip_manager import get_vm_ip_simple
-                vm_ip, error_details = get_vm_ip_simple(vm_name)
+                # IP discovery with error diagnostics
+                health_info = self.vm_ip_manager.get_vm_health_info(vm_name)
+                vm_ip = health_info.ip_addresses[0] if health_info.ip_addresses else None
+                error_details = "; ".join(health_info.error_details) or None
                 
                 # Get VM status from provider
                 vm_status = self.provider.get_status([vm_name]).get(vm_name, "unknown")
@@ -2084,6 +2859,8 @@ class RangeOrchestrator:
             self.logger.warning(f"Could not get SSH keys: {e}")
             return []
     
+    @traced("wait vm_ssh", "wait",
+            attributes=lambda self, vm_name, vm_ip, max_wait_minutes=5: {"vm": vm_name, "vm_ip": vm_ip})
     def _wait_for_vm_ssh_ready(self, vm_name: str, vm_ip: str, max_wait_minutes: int = 5) -> bool:
         """Wait for VM to be SSH accessible"""
         import time
@@ -2116,7 +2893,7 @@ class RangeOrchestrator:
         
         return False
     
-    def _ensure_kvm_auto_requirements(self, guests: List[Guest]) -> None:
+    def _ensure_kvm_auto_requirements(self, guests: List["Guest"]) -> None:
         """
         Check for kvm-auto guests and ensure sudo requirements are met.
         
@@ -0,0 +1,202 @@
+"""
+Range Metadata Store
+
+Persistence layer for the per-range ``metadata.json``/``resources.json``
+files. Every write goes through :class:`AtomicFileWriter` (temp file, fsync,
+rename), so a crash never leaves a truncated file behind, and each save bumps
+a per-range ``version`` counter recorded in ``metadata.json``.
+
+Status polling may save the same range many times per second. Such saves can
+be *coalesced*: the newest snapshot is kept in memory and flushed once after
+a short delay, on the next non-coalesced save, on :meth:`flush`, or at
+interpreter exit. Saves whose content did not change are not written at all.
+"""
+
+import atexit
+import json
+import threading
+import weakref
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cyris.core.concurrency import AtomicFileWriter
+from cyris.core.unified_logger import get_logger
+
+
+# (metadata dict, resources dict) of a range snapshot
+_Snapshot = Tuple[Dict[str, Any], Dict[str, List[str]]]
+
+# Stores with pending coalesced writes are flushed at interpreter exit
+_live_stores: "weakref.WeakSet[RangeMetadataStore]" = weakref.WeakSet()
+
+
+def _flush_live_stores() -> None:
+    for store in list(_live_stores):
+        store.flush()
+
+
+atexit.register(_flush_live_stores)
+
+
+class RangeMetadataStore:
+    """
+    Atomic, versioned and coalescing writer for range metadata files.
+
+    Args:
+        ranges_dir: Base directory containing one directory per range
+        on_flush: Optional callback ``(range_id, metadata, resources)`` run
+            after the files of a range were written (e.g. to update an index)
+        coalesce_delay: Seconds a coalesced save waits for further updates
+            before it is flushed
+        logger: Optional logger instance
+    """
+
+    DEFAULT_COALESCE_DELAY = 0.5
+
+    def __init__(
+        self,
+        ranges_dir: Path,
+        on_flush: Optional[Callable[[str, Dict[str, Any], Dict[str, List[str]]], None]] = None,
+        coalesce_delay: float = DEFAULT_COALESCE_DELAY,
+        logger=None
+    ):
+        self.ranges_dir = Path(ranges_dir)
+        self.on_flush = on_flush
+        self.coalesce_delay = coalesce_delay
+        self.logger = logger or get_logger(__name__, "range_metadata_store")
+
+        self._lock = threading.RLock()
+        self._versions: Dict[str, int] = {}
+        self._written: Dict[str, _Snapshot] = {}
+        self._pending: Dict[str, _Snapshot] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        self.flush_count = 0
+
+        _live_stores.add(self)
+
+    def save(
+        self,
+        range_id: str,
+        metadata: Dict[str, Any],
+        resources: Dict[str, List[str]],
+        coalesce: bool = False
+    ) -> int:
+        """
+        Persist a range snapshot.
+
+        Args:
+            range_id: Range identifier
+            metadata: ``RangeMetadata.to_dict()`` output
+            resources: Resource IDs of the range
+            coalesce: Defer the write so rapid successive saves share a flush
+
+        Returns:
+            Version number assigned to this snapshot
+        """
+        with self._lock:
+            metadata = dict(metadata)
+            resources = {key: list(value) for key, value in resources.items()}
+
+            current = max(self._versions.get(range_id, 0), int(metadata.get('version') or 0))
+            if self._unchanged(range_id, metadata, resources):
+                return current
+
+            version = current + 1
+            metadata['version'] = version
+            self._versions[range_id] = version
+            self._pending[range_id] = (metadata, resources)
+
+            if coalesce and self.coalesce_delay > 0:
+                self._schedule(range_id)
+            else:
+                self._flush_range(range_id)
+            return version
+
+    def flush(self, range_id: Optional[str] = None) -> int:
+        """
+        Write pending coalesced snapshots now.
+
+        Args:
+            range_id: Only flush this range (default: all ranges)
+
+        Returns:
+            Number of ranges written
+        """
+        with self._lock:
+            range_ids = [range_id] if range_id is not None else list(self._pending)
+            return sum(1 for rid in range_ids if self._flush_range(rid))
+
+    def discard(self, range_id: str) -> None:
+        """Forget a range (pending writes are dropped, e.g. before removal)"""
+        with self._lock:
+            self._cancel_timer(range_id)
+            self._pending.pop(range_id, None)
+            self._written.pop(range_id, None)
+            self._versions.pop(range_id, None)
+
+    def has_pending(self, range_id: Optional[str] = None) -> bool:
+        """Whether coalesced writes are waiting to be flushed"""
+        with self._lock:
+            return range_id in self._pending if range_id is not None else bool(self._pending)
+
+    def close(self) -> None:
+        """Flush pending writes and stop tracking this store"""
+        self.flush()
+        _live_stores.discard(self)
+
+    def _unchanged(self, range_id: str, metadata: Dict[str, Any], resources: Dict[str, List[str]]) -> bool:
+        latest = self._pending.get(range_id) or self._written.get(range_id)
+        if latest is None:
+            return False
+        latest_metadata, latest_resources = latest
+        return (
+            latest_resources == resources
+            and {k: v for k, v in latest_metadata.items() if k != 'version'}
+            == {k: v for k, v in metadata.items() if k != 'version'}
+        )
+
+    def _schedule(self, range_id: str) -> None:
+        if range_id in self._timers:
+            return
+        timer = threading.Timer(self.coalesce_delay, self._timer_flush, args=(range_id,))
+        timer.daemon = True
+        self._timers[range_id] = timer
+        timer.start()
+
+    def _timer_flush(self, range_id: str) -> None:
+        try:
+            self.flush(range_id)
+        except Exception as e:
+            self.logger.error(f"Deferred metadata flush failed for range {range_id}: {e}")
+
+    def _cancel_timer(self, range_id: str) -> None:
+        timer = self._timers.pop(range_id, None)
+        if timer is not None and timer is not threading.current_thread():
+            timer.cancel()
+
+    def _flush_range(self, range_id: str) -> bool:
+        self._cancel_timer(range_id)
+        snapshot = self._pending.get(range_id)
+        if snapshot is None:
+            return False
+
+        metadata, resources = snapshot
+        range_dir = self.ranges_dir / range_id
+        range_dir.mkdir(parents=True, exist_ok=True)
+
+        # resources first: metadata.json carries the version and acts as the
+        # commit record of the snapshot
+        AtomicFileWriter(str(range_dir / 'resources.json')).write_text(
+            json.dumps(resources, indent=2)
+        )
+        AtomicFileWriter(str(range_dir / 'metadata.json')).write_text(
+            json.dumps(metadata, indent=2), sync_dir=True
+        )
+
+        del self._pending[range_id]
+        self._written[range_id] = snapshot
+        self.flush_count += 1
+
+        if self.on_flush is not None:
+            self.on_flush(range_id, metadata, resources)
+        return True
@@ -0,0 +1,263 @@
+"""
+Range Reconciler
+
+Works out what has to change in an existing range to match a new range
+plan, so that editing one guest's tasks or one network does not rebuild the
+whole range. The desired plan is compared with the plan the range was
+created from (``range_plan.json`` in the range directory), the guest -> VM
+map recorded in the range metadata and the live VM states reported by the
+provider:
+
+- guests that are new, or whose definition (image, resources, host) changed,
+  get new VMs; guests that are no longer described are destroyed
+- VMs that disappeared are recreated, stopped ones are started
+- guests whose task lists changed re-run only the task entries that were
+  added or modified; entries that were removed cannot be undone on a running
+  guest and are only reported
+- network segments and forwarding rules are patched when they differ
+
+Computing the diff is pure; ``RangeOrchestrator.reconcile_range`` applies it.
+"""
+
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from ..config.range_plan import GuestSpec, RangePlan, _thaw
+
+# Live VM states that need no action
+HEALTHY_STATES = ("active",)
+# Live VM states fixed by starting the existing VM
+STARTABLE_STATES = ("stopped", "paused")
+
+
+class GuestAction(Enum):
+    """What reconciliation does to one guest"""
+    ADD = "add"
+    REMOVE = "remove"
+    REPLACE = "replace"
+    START = "start"
+    RETASK = "retask"
+
+
+@dataclass
+class GuestChange:
+    """
+    Planned change to one guest.
+
+    ``vm_names`` are the guest's existing VMs (destroyed for REMOVE and
+    REPLACE), ``tasks`` the task entries to run once the guest is up and
+    ``dropped_tasks`` entries that disappeared from the description.
+    """
+    guest_id: str
+    action: GuestAction
+    reason: str
+    vm_names: List[str] = field(default_factory=list)
+    tasks: List[Dict[str, Any]] = field(default_factory=list)
+    dropped_tasks: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'guest_id': self.guest_id,
+            'action': self.action.value,
+            'reason': self.reason,
+            'vm_names': list(self.vm_names),
+            'tasks': self.tasks,
+            'dropped_tasks': self.dropped_tasks,
+        }
+
+
+@dataclass
+class RangeDiff:
+    """Delta between an existing range and its desired plan"""
+    range_id: str
+    guests: List[GuestChange] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    networks_added: List[str] = field(default_factory=list)
+    networks_removed: List[str] = field(default_factory=list)
+    networks_changed: List[str] = field(default_factory=list)
+    rules_changed: bool = False
+    hosts_changed: bool = False
+    # Guest id -> VM names the diff was computed against
+    guest_vms: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.guests or self.topology_changed or self.hosts_changed)
+
+    @property
+    def topology_changed(self) -> bool:
+        return bool(self.networks_added or self.networks_removed or self.networks_changed or self.rules_changed)
+
+    def changes(self, *actions: GuestAction) -> List[GuestChange]:
+        """Guest changes with one of ``actions``"""
+        return [change for change in self.guests if change.action in actions]
+
+    def summary(self) -> str:
+        """One-line description, e.g. ``1 added, 2 re-tasked, networks +1 -0 ~1``"""
+        if self.is_empty:
+            return "no changes"
+        labels = {
+            GuestAction.ADD: "added",
+            GuestAction.REMOVE: "removed",
+            GuestAction.REPLACE: "replaced",
+            GuestAction.START: "started",
+            GuestAction.RETASK: "re-tasked",
+        }
+        counts = Counter(change.action for change in self.guests)
+        parts = [f"{counts[action]} {label}" for action, label in labels.items() if counts[action]]
+        if self.networks_added or self.networks_removed or self.networks_changed:
+            parts.append(f"networks +{len(self.networks_added)} -{len(self.networks_removed)} "
+                         f"~{len(self.networks_changed)}")
+        if self.rules_changed:
+            parts.append("forwarding rules changed")
+        if self.hosts_changed:
+            parts.append("hosts changed")
+        return ", ".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'range_id': self.range_id,
+            'summary': self.summary(),
+            'guests': [change.to_dict() for change in self.guests],
+            'unchanged': list(self.unchanged),
+            'networks_added': list(self.networks_added),
+            'networks_removed': list(self.networks_removed),
+            'networks_changed': list(self.networks_changed),
+            'rules_changed': self.rules_changed,
+            'hosts_changed': self.hosts_changed,
+        }
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(_thaw(value), sort_keys=True, default=str)
+
+
+def _definition(guest: GuestSpec) -> str:
+    """Everything about a guest that its VM is built from"""
+    return _canonical({key: value for key, value in guest.fields.items() if key != 'tasks'})
+
+
+def task_entries(tasks: Sequence[Mapping[str, Any]]) -> List[Tuple[str, Any]]:
+    """Flatten ``[{type: [params, ...]}, ...]`` into ``(type, params)`` entries"""
+    entries = []
+    for task in tasks:
+        for task_type, params in task.items():
+            for item in (params if isinstance(params, (list, tuple)) else [params]):
+                entries.append((task_type, _thaw(item)))
+    return entries
+
+
+def group_task_entries(entries: Sequence[Tuple[str, Any]]) -> List[Dict[str, Any]]:
+    """Task list form of ``entries``, consecutive entries of a type grouped"""
+    tasks: List[Dict[str, Any]] = []
+    for task_type, params in entries:
+        if tasks and task_type in tasks[-1]:
+            tasks[-1][task_type].append(params)
+        else:
+            tasks.append({task_type: [params]})
+    return tasks
+
+
+def diff_tasks(
+    recorded: Sequence[Mapping[str, Any]],
+    desired: Sequence[Mapping[str, Any]]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Task entries to run and entries that were dropped.
+
+    Entries are compared by type and parameters; a modified entry counts as
+    dropped in its old form and added in its new one. Added entries keep
+    their order in ``desired``.
+    """
+    remaining = Counter((task_type, _canonical(params)) for task_type, params in task_entries(recorded))
+    added = []
+    for task_type, params in task_entries(desired):
+        key = (task_type, _canonical(params))
+        if remaining[key]:
+            remaining[key] -= 1
+        else:
+            added.append((task_type, params))
+    # Whatever is left unmatched in ``remaining`` was dropped
+    dropped = []
+    for task_type, params in task_entries(recorded):
+        key = (task_type, _canonical(params))
+        if remaining[key]:
+            remaining[key] -= 1
+            dropped.append((task_type, params))
+    return group_task_entries(added), group_task_entries(dropped)
+
+
+def _network_state(plan: RangePlan) -> Dict[str, Tuple[Any, ...]]:
+    return {network.name: (network.host_id, network.members, network.gateway) for network in plan.networks}
+
+
+def diff_range(
+    range_id: str,
+    recorded: RangePlan,
+    desired: RangePlan,
+    guest_vms: Mapping[str, Sequence[str]],
+    live: Optional[Mapping[str, str]] = None
+) -> RangeDiff:
+    """
+    Compare an existing range with the plan it should match.
+
+    Args:
+        range_id: Range identifier
+        recorded: Plan the range was created (or last reconciled) from
+        desired: Plan to converge to
+        guest_vms: Guest id -> VM names currently recorded for the range
+        live: VM name -> provider status (``active``, ``stopped``,
+            ``not_found`` ...); None when live state is unknown, in which case
+            recorded VMs are assumed healthy
+
+    Returns:
+        RangeDiff describing the changes, guests in desired-plan order
+        followed by removals
+    """
+    diff = RangeDiff(range_id=range_id, hosts_changed=recorded.hosts != desired.hosts,
+                     guest_vms={guest_id: list(names) for guest_id, names in guest_vms.items()})
+
+    for guest in desired.guests:
+        guest_id = guest.guest_id
+        vm_names = list(guest_vms.get(guest_id, ()))
+        previous = recorded.guest(guest_id)
+        states = [(live or {}).get(vm_name, "active" if live is None else "not_found") for vm_name in vm_names]
+
+        if previous is None or not vm_names:
+            reason = "new guest" if previous is None else "no VM recorded"
+            diff.guests.append(GuestChange(guest_id, GuestAction.ADD if not vm_names else GuestAction.REPLACE,
+                                           reason, vm_names, tasks=_thaw(guest.tasks)))
+            continue
+        if _definition(previous) != _definition(guest):
+            diff.guests.append(GuestChange(guest_id, GuestAction.REPLACE, "definition changed",
+                                           vm_names, tasks=_thaw(guest.tasks)))
+            continue
+        if any(state not in HEALTHY_STATES + STARTABLE_STATES for state in states):
+            diff.guests.append(GuestChange(guest_id, GuestAction.REPLACE, "VM missing",
+                                           vm_names, tasks=_thaw(guest.tasks)))
+            continue
+
+        added, dropped = diff_tasks(previous.tasks, guest.tasks)
+        if any(state in STARTABLE_STATES for state in states):
+            diff.guests.append(GuestChange(guest_id, GuestAction.START, "VM not running",
+                                           vm_names, tasks=added, dropped_tasks=dropped))
+        elif added or dropped:
+            diff.guests.append(GuestChange(guest_id, GuestAction.RETASK, "tasks changed",
+                                           vm_names, tasks=added, dropped_tasks=dropped))
+        else:
+            diff.unchanged.append(guest_id)
+
+    desired_ids = {guest.guest_id for guest in desired.guests}
+    for guest_id, vm_names in guest_vms.items():
+        if guest_id not in desired_ids and vm_names:
+            diff.guests.append(GuestChange(guest_id, GuestAction.REMOVE, "no longer described", list(vm_names)))
+
+    before, after = _network_state(recorded), _network_state(desired)
+    diff.networks_added = [name for name in after if name not in before]
+    diff.networks_removed = [name for name in before if name not in after]
+    diff.networks_changed = [name for name in after if name in before and before[name] != after[name]]
+    diff.rules_changed = recorded.forwarding_rules != desired.forwarding_rules
+    return diff
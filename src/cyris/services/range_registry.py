@@ -0,0 +1,350 @@
+"""
+Range Registry Index
+
+Compact SQLite index of the per-range ``metadata.json``/``resources.json``
+files stored under ``cyber_range_dir``. The orchestrator used to open and
+parse both files for every historical range on each startup; with the index
+a startup costs one ``scandir`` + ``stat`` pass (to detect stale entries) and
+a single query, and owner/status/tag filters run against indexed columns.
+
+The range directories remain the source of truth: the index is refreshed from
+them when a file's mtime differs from the recorded one, and rebuilt from
+scratch when the database is missing, corrupt or from another schema version.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from cyris.core.unified_logger import get_logger
+
+try:
+    import sqlite3
+    SQLITE_AVAILABLE = True
+except ImportError:  # Python built without _sqlite3
+    sqlite3 = None
+    SQLITE_AVAILABLE = False
+
+
+# (metadata dict, resources dict) as stored in the range directory
+RegistryEntry = Tuple[Dict[str, Any], Dict[str, List[str]]]
+
+_EMPTY_RESOURCES = '{"hosts": [], "guests": []}'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ranges (
+    range_id TEXT PRIMARY KEY,
+    name TEXT,
+    status TEXT,
+    owner TEXT,
+    created_at TEXT,
+    metadata_json TEXT NOT NULL,
+    resources_json TEXT NOT NULL,
+    metadata_mtime INTEGER NOT NULL,
+    resources_mtime INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ranges_owner ON ranges(owner);
+CREATE INDEX IF NOT EXISTS ranges_status ON ranges(status);
+CREATE TABLE IF NOT EXISTS range_tags (
+    range_id TEXT NOT NULL REFERENCES ranges(range_id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (range_id, key)
+);
+CREATE INDEX IF NOT EXISTS range_tags_kv ON range_tags(key, value);
+"""
+
+
+class RangeRegistry:
+    """
+    SQLite-backed index of range metadata.
+
+    All writes happen inside a single transaction, so concurrent CLI processes
+    never observe a half-updated entry. The connection is shared by the
+    threads of a process (metadata flushes run on timer threads) and every
+    use of it holds the registry lock. The index lives in
+    ``<cyber_range_dir>/.index/registry.db``; dot-directories are ignored by
+    range discovery.
+    """
+
+    SCHEMA_VERSION = 1
+    INDEX_DIR = ".index"
+    INDEX_FILE = "registry.db"
+
+    def __init__(self, ranges_dir: Path, logger=None):
+        if not SQLITE_AVAILABLE:
+            raise RuntimeError("sqlite3 is not available")
+
+        self.ranges_dir = Path(ranges_dir)
+        self.index_path = self.ranges_dir / self.INDEX_DIR / self.INDEX_FILE
+        self.logger = logger or get_logger(__name__, "range_registry")
+        self._conn: Optional["sqlite3.Connection"] = None
+        self._synced = False
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Connection management
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> "sqlite3.Connection":
+        with self._lock:
+            if self._conn is not None:
+                return self._conn
+
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                self._conn = self._open()
+            except sqlite3.DatabaseError as e:
+                self.logger.warning(f"Range index {self.index_path} is unusable ({e}), rebuilding")
+                self._discard_index()
+                self._conn = self._open()
+            return self._conn
+
+    def _open(self) -> "sqlite3.Connection":
+        conn = self._sqlite_connect()
+        try:
+            conn.execute("PRAGMA foreign_keys = ON")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, self.SCHEMA_VERSION):
+                conn.close()
+                self._discard_index()
+                conn = self._sqlite_connect()
+                conn.execute("PRAGMA foreign_keys = ON")
+            with conn:
+                conn.executescript(_SCHEMA)
+                conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def _sqlite_connect(self) -> "sqlite3.Connection":
+        return sqlite3.connect(str(self.index_path), timeout=30, check_same_thread=False)
+
+    def _discard_index(self) -> None:
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            try:
+                os.unlink(f"{self.index_path}{suffix}")
+            except FileNotFoundError:
+                pass
+
+    def close(self) -> None:
+        """Close the underlying database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------
+    # Synchronisation with range directories
+    # ------------------------------------------------------------------
+
+    def refresh(self) -> int:
+        """
+        Bring the index up to date with the range directories.
+
+        Only ranges whose ``metadata.json`` or ``resources.json`` mtime differs
+        from the indexed one are re-read; entries whose directory disappeared
+        are dropped.
+
+        Returns:
+            Number of index entries that were added, updated or removed
+        """
+        with self._lock:
+            conn = self._connect()
+            indexed = {
+                row[0]: (row[1], row[2])
+                for row in conn.execute("SELECT range_id, metadata_mtime, resources_mtime FROM ranges")
+            }
+
+            changed = 0
+            present = set()
+            for range_id, metadata_mtime, resources_mtime in self._scan_directories():
+                present.add(range_id)
+                if indexed.get(range_id) == (metadata_mtime, resources_mtime):
+                    continue
+                entry = self._read_directory(range_id)
+                if entry is None:
+                    continue
+                self.upsert(range_id, *entry)
+                changed += 1
+
+            vanished = [range_id for range_id in indexed if range_id not in present]
+            if vanished:
+                with conn:
+                    conn.executemany("DELETE FROM ranges WHERE range_id = ?", [(r,) for r in vanished])
+                changed += len(vanished)
+
+            self._synced = True
+            if changed:
+                self.logger.debug(f"Range index refreshed: {changed} entries changed")
+            return changed
+
+    def ensure_synced(self) -> None:
+        """Refresh the index once per registry instance"""
+        with self._lock:
+            if not self._synced:
+                self.refresh()
+
+    def _scan_directories(self) -> Iterator[Tuple[str, int, int]]:
+        """Yield (range_id, metadata mtime, resources mtime) for each range directory"""
+        with os.scandir(self.ranges_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.is_dir():
+                    continue
+                try:
+                    metadata_mtime = os.stat(os.path.join(entry.path, 'metadata.json')).st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                try:
+                    resources_mtime = os.stat(os.path.join(entry.path, 'resources.json')).st_mtime_ns
+                except FileNotFoundError:
+                    resources_mtime = 0
+                yield entry.name, metadata_mtime, resources_mtime
+
+    def _read_directory(self, range_id: str) -> Optional[RegistryEntry]:
+        range_dir = self.ranges_dir / range_id
+        try:
+            with open(range_dir / 'metadata.json') as f:
+                metadata = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Failed to index range {range_id}: {e}")
+            return None
+
+        try:
+            with open(range_dir / 'resources.json') as f:
+                resources = json.load(f)
+        except FileNotFoundError:
+            resources = {"hosts": [], "guests": []}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Failed to read resources for range {range_id}: {e}")
+            resources = {"hosts": [], "guests": []}
+
+        return metadata, resources
+
+    def _file_mtime(self, range_id: str, filename: str) -> int:
+        try:
+            return os.stat(self.ranges_dir / range_id / filename).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def upsert(
+        self,
+        range_id: str,
+        metadata: Dict[str, Any],
+        resources: Optional[Dict[str, List[str]]] = None
+    ) -> None:
+        """
+        Insert or replace the index entry for a range.
+
+        Call after ``metadata.json``/``resources.json`` were written so the
+        recorded mtimes match the files and the next refresh skips them.
+        """
+        with self._lock:
+            conn = self._connect()
+            tags = metadata.get('tags') or {}
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ranges (range_id, name, status, owner, created_at, "
+                    "metadata_json, resources_json, metadata_mtime, resources_mtime) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        range_id,
+                        metadata.get('name'),
+                        metadata.get('status'),
+                        metadata.get('owner'),
+                        metadata.get('created_at'),
+                        json.dumps(metadata),
+                        json.dumps(resources) if resources is not None else _EMPTY_RESOURCES,
+                        self._file_mtime(range_id, 'metadata.json'),
+                        self._file_mtime(range_id, 'resources.json'),
+                    )
+                )
+                conn.execute("DELETE FROM range_tags WHERE range_id = ?", (range_id,))
+                conn.executemany(
+                    "INSERT INTO range_tags (range_id, key, value) VALUES (?, ?, ?)",
+                    [(range_id, key, value) for key, value in tags.items()]
+                )
+
+    def remove(self, range_id: str) -> None:
+        """Drop a range from the index"""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM ranges WHERE range_id = ?", (range_id,))
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, range_id: str) -> Optional[RegistryEntry]:
+        """Return the indexed (metadata, resources) of a single range"""
+        with self._lock:
+            self.ensure_synced()
+            row = self._connect().execute(
+                "SELECT metadata_json, resources_json FROM ranges WHERE range_id = ?", (range_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            return json.loads(row[0]), json.loads(row[1])
+
+    def load_all(self) -> Dict[str, RegistryEntry]:
+        """Return every indexed range as {range_id: (metadata, resources)}"""
+        with self._lock:
+            self.ensure_synced()
+            rows = self._connect().execute(
+                "SELECT range_id, metadata_json, resources_json FROM ranges ORDER BY created_at, range_id"
+            )
+            return {row[0]: (json.loads(row[1]), json.loads(row[2])) for row in rows}
+
+    def query(
+        self,
+        owner: Optional[str] = None,
+        status: Optional[str] = None,
+        tags: Optional[Dict[str, str]] = None
+    ) -> Dict[str, RegistryEntry]:
+        """
+        Filter ranges using the indexed columns.
+
+        Args:
+            owner: Owner to match
+            status: Status value (e.g. ``"active"``) to match
+            tags: Tags that must all match
+
+        Returns:
+            Matching ranges as {range_id: (metadata, resources)}
+        """
+        with self._lock:
+            self.ensure_synced()
+            clauses, params = [], []
+            if owner:
+                clauses.append("owner = ?")
+                params.append(owner)
+            if status:
+                clauses.append("status = ?")
+                params.append(status)
+            for key, value in (tags or {}).items():
+                clauses.append(
+                    "range_id IN (SELECT range_id FROM range_tags WHERE key = ? AND value = ?)"
+                )
+                params.extend((key, value))
+
+            sql = "SELECT range_id, metadata_json, resources_json FROM ranges"
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            sql += " ORDER BY created_at, range_id"
+
+            rows = self._connect().execute(sql, params)
+            return {row[0]: (json.loads(row[1]), json.loads(row[2])) for row in rows}
+
+    def count(self) -> int:
+        """Number of indexed ranges"""
+        with self._lock:
+            self.ensure_synced()
+            return self._connect().execute("SELECT COUNT(*) FROM ranges").fetchone()[0]
@@ -7,11 +7,12 @@ It integrates the traditional modules.py functionality into the modern architect
 
 # import logging  # Replaced with unified logger
 from cyris.core.unified_logger import get_logger
-import subprocess
+from cyris.core import exec_gateway
 import time
 import tempfile
 import os
-from typing import Dict, List, Optional, Any, Union
+import threading
+from typing import Dict, Iterable, List, Optional, Any, Tuple, Union
 from pathlib import Path
 from dataclasses import dataclass, field
 from enum import Enum
@@ -24,6 +25,8 @@ from ..core.security import (
     validate_user_input, 
     sanitize_for_shell
 )
+from ..core.tracing import span, traced
+from .task_ledger import TaskLedger, task_key
 
 try:
     import paramiko
@@ -62,6 +65,7 @@ class TaskResult:
     evidence: Optional[str] = None  # Verification evidence
     verification_passed: bool = False
     timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    cached: bool = False  # Skipped: the task ledger shows it completed before
 
 
 class TaskExecutor:
@@ -91,26 +95,126 @@ class TaskExecutor:
         
         # Initialize secure command executor
         self.secure_executor = SecureCommandExecutor(timeout=300)
+        
+        # Parallel content distribution (copy_content over pooled SSH)
+        self.content_fanout = config.get('content_fanout', True)
+        self.content_workers = config.get('content_workers', 16)
+        self._content_distributor = None
+        self._distributed: Dict[Tuple[str, str, str], Any] = {}
+        self._ssh_manager = None
+        self._lazy_lock = threading.Lock()
+
+        # Host-side package cache (install_package through a caching proxy)
+        self.package_cache_dir = config.get('package_cache_dir')
+        self.package_cache_listen = config.get('package_cache_listen')
+        self.package_cache_mirrors = list(config.get('package_cache_mirrors') or [])
+        self._package_cache = None
+        self._staged_os_types: set = set()
+        
+        # Also mark completed tasks inside Linux guests (~/.cyris/tasks/<key>),
+        # so a ledger entry only counts while the guest still has its marker
+        self.task_markers = config.get('task_markers', False)
+    
+    @property
+    def ssh_manager(self):
+        """Lazily created SSH connection pool shared by all guests"""
+        with self._lazy_lock:
+            if self._ssh_manager is None:
+                from ..tools.ssh_manager import SSHManager
+                self._ssh_manager = SSHManager(connection_timeout=self.ssh_timeout)
+            return self._ssh_manager
+    
+    @property
+    def content_distributor(self):
+        """Lazily created content distributor shared by all guests"""
+        ssh_manager = self.ssh_manager
+        with self._lazy_lock:
+            if self._content_distributor is None:
+                from ..tools.content_distributor import ContentDistributor
+                self._content_distributor = ContentDistributor(
+                    connection_factory=ssh_manager._get_connection,
+                    max_workers=self.content_workers
+                )
+            return self._content_distributor
+    
+    def _uses_content_distributor(self, guest: Any) -> bool:
+        """Linux KVM guests reachable as root take the streaming path"""
+        os_type = getattr(guest, 'basevm_os_type', 'linux')
+        basevm_type = getattr(guest, 'basevm_type', 'kvm')
+        return (SSH_AVAILABLE and self.content_fanout
+                and basevm_type == 'kvm' and not str(os_type).startswith('windows'))
+    
+    def distribute_content(
+        self,
+        targets: List[Tuple[Any, str]],
+        pairs: Optional[Iterable[Tuple[str, str]]] = None
+    ) -> int:
+        """
+        Push the copy_content tasks of many guests concurrently.
+        
+        Guests sharing a (src, dst) pair receive one packed archive in
+        parallel; the results are kept and consumed when each guest's
+        copy_content task runs in execute_guest_tasks.
+        
+        Args:
+            targets: (guest, guest_ip) pairs of guests that are ready
+            pairs: Only distribute these (src, dst) pairs (default: all)
+        
+        Returns:
+            Number of guest copies performed
+        """
+        from ..tools.content_distributor import collect_content_copies
+        
+        ready = [(guest, guest_ip) for guest, guest_ip in targets
+                 if guest_ip and self._uses_content_distributor(guest)]
+        wanted = set(pairs) if pairs is not None else None
+        groups: Dict[Tuple[str, str], List[str]] = {}
+        for (src, dst), members in collect_content_copies(guest for guest, _ in ready).items():
+            if wanted is not None and (src, dst) not in wanted:
+                continue
+            if validate_user_input(src, "file_path") and validate_user_input(dst, "file_path"):
+                groups[(src, dst)] = [ready[i][1] for i in members]
+        
+        from ..tools.ssh_manager import SSHCredentials
+        copies = 0
+        for (src, dst), guest_ips in groups.items():
+            credentials = [
+                SSHCredentials(hostname=ip, username="root", timeout=self.ssh_timeout)
+                for ip in dict.fromkeys(guest_ips)
+            ]
+            results = self.content_distributor.distribute(src, dst, credentials)
+            for guest_ip, result in results.items():
+                self._distributed[(guest_ip, src, dst)] = result
+                copies += 1
+        return copies
     
     def execute_guest_tasks(
         self, 
         guest: Any, 
         guest_ip: str,
-        tasks: List[Dict[str, Any]]
+        tasks: List[Dict[str, Any]],
+        ledger: Optional[TaskLedger] = None,
+        vm_name: Optional[str] = None
     ) -> List[TaskResult]:
         """
         Execute all tasks for a guest.
         
+        With a task ledger, tasks that completed on this VM before are not
+        run again; they are reported as cached results.
+        
         Args:
             guest: Guest configuration object
             guest_ip: IP address of the guest VM
             tasks: List of task configurations
+            ledger: Optional ledger of completed tasks of the range
+            vm_name: VM the tasks run on, the ledger key (defaults to the guest id)
         
         Returns:
             List of task execution results
         """
         results = []
         guest_id = getattr(guest, 'id', None) or getattr(guest, 'guest_id', 'unknown')
+        vm_key = vm_name or str(guest_id)
         
         self.logger.info(f"Executing {len(tasks)} tasks for guest {guest_id} at {guest_ip}")
         
@@ -120,22 +224,129 @@ class TaskExecutor:
                 
                 if isinstance(task_params, list):
                     # Multiple tasks of the same type
-                    for i, params in enumerate(task_params):
-                        task_id = f"{guest_id}_{task_type}_{i}"
-                        result = self._execute_single_task(
-                            task_id, task_type_enum, params, guest, guest_ip
-                        )
-                        results.append(result)
+                    items = [(f"{guest_id}_{task_type}_{i}", params) for i, params in enumerate(task_params)]
                 else:
                     # Single task
-                    task_id = f"{guest_id}_{task_type}"
+                    items = [(f"{guest_id}_{task_type}", task_params)]
+                
+                for task_id, params in items:
+                    key = task_key(task_type, params) if ledger is not None else None
+                    if key is not None and self._completed_before(ledger, vm_key, key, guest, guest_ip):
+                        self.logger.debug(f"Task {task_id} completed before on {vm_key}, skipping")
+                        results.append(TaskResult(
+                            task_id=task_id,
+                            task_type=task_type_enum,
+                            success=True,
+                            message=f"{task_type} completed before (cached)",
+                            vm_name=vm_name,
+                            vm_ip=guest_ip,
+                            cached=True
+                        ))
+                        continue
+                    
                     result = self._execute_single_task(
-                        task_id, task_type_enum, task_params, guest, guest_ip
+                        task_id, task_type_enum, params, guest, guest_ip
                     )
                     results.append(result)
+                    if key is not None and result.success:
+                        self._mark_completed(ledger, vm_key, key, task_id, task_type, guest, guest_ip)
         
         return results
     
+    def _completed_before(
+        self, ledger: TaskLedger, vm_key: str, key: str, guest: Any, guest_ip: str
+    ) -> bool:
+        """Whether the ledger (and the guest's marker, if used) show the task done"""
+        if not ledger.is_done(vm_key, key):
+            return False
+        if not self._uses_task_markers(guest):
+            return True
+        present, _, _ = self._execute_ssh_command(guest_ip, f"test -f ~/.cyris/tasks/{key}")
+        if not present:
+            self.logger.info(f"Task marker {key} missing on {vm_key}, running the task again")
+        return present
+    
+    def _mark_completed(
+        self, ledger: TaskLedger, vm_key: str, key: str, task_id: str, task_type: str,
+        guest: Any, guest_ip: str
+    ) -> None:
+        ledger.record(vm_key, key, task_id, task_type)
+        if self._uses_task_markers(guest):
+            marked, _, error = self._execute_ssh_command(
+                guest_ip, f"mkdir -p ~/.cyris/tasks && touch ~/.cyris/tasks/{key}"
+            )
+            if not marked:
+                self.logger.warning(f"Could not write task marker on {vm_key}: {error}")
+    
+    def _uses_task_markers(self, guest: Any) -> bool:
+        return self.task_markers and not str(getattr(guest, 'basevm_os_type', 'linux')).startswith('windows')
+    
+    def stage_packages(self, targets: List[Tuple[Any, str]]) -> Dict[str, bool]:
+        """
+        Prefetch install_package requests into the host-side package cache.
+
+        The union of requested packages per guest OS type is downloaded once,
+        through the caching proxy, by the first ready guest of that type.
+        Guests whose OS type was staged successfully then install through
+        the proxy.
+
+        Args:
+            targets: (guest, guest_ip) pairs; guests without an IP contribute
+                their requests but are not used to prefetch
+
+        Returns:
+            Mapping of OS type -> whether its prefetch succeeded
+        """
+        if not self.package_cache_dir:
+            return {}
+
+        from ..tools.package_cache import (
+            DEFAULT_MIRRORS, PackageCache, collect_package_requests, prefetch_command
+        )
+
+        requests = collect_package_requests(guest for guest, _ in targets)
+        if not requests:
+            return {}
+
+        if self._package_cache is None:
+            self._package_cache = PackageCache(Path(self.package_cache_dir), listen_host=self.package_cache_listen,
+                                               mirrors=list(DEFAULT_MIRRORS) + self.package_cache_mirrors)
+        self._package_cache.start()
+
+        def os_type_of(guest):
+            return getattr(guest, 'basevm_os_type', None) or getattr(guest, 'os_type', 'linux')
+
+        def prefetch(os_type: str) -> bool:
+            guest_ips = [ip for guest, ip in targets if ip and os_type_of(guest) == os_type]
+            if not guest_ips:
+                return False
+            seed_ip = guest_ips[0]
+            proxy_url = self._package_cache.url_for(seed_ip)
+            by_manager: Dict[str, list] = {}
+            for request in requests[os_type]:
+                by_manager.setdefault(request.manager, []).append(request)
+
+            for manager_requests in by_manager.values():
+                success, _, error = self._execute_ssh_command(seed_ip, prefetch_command(manager_requests, proxy_url))
+                if not success:
+                    self.logger.warning(f"Package prefetch for {os_type} on {seed_ip} failed: {error.strip()}")
+                    return False
+
+            self._staged_os_types.add(os_type)
+            self.logger.info(f"Staged {len(requests[os_type])} packages for {os_type} through {proxy_url}")
+            return True
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+            staged = dict(zip(requests, pool.map(prefetch, requests)))
+
+        self.logger.info(f"Package cache: {self._package_cache.stats}")
+        return staged
+
+    @traced("task {task_type}", "task", attributes=lambda self, task_id, task_type, params, guest, guest_ip: {
+        "task_type": task_type.value, "task_id": task_id, "guest_ip": guest_ip,
+        "guest": getattr(guest, 'id', None) or getattr(guest, 'guest_id', 'unknown')
+    })
     def _execute_single_task(
         self,
         task_id: str,
@@ -687,6 +898,14 @@ class TaskExecutor:
                 execution_time=time.time() - start_time
             )
         
+        # Route through the host-side package cache when this guest was staged
+        os_type = getattr(guest, 'basevm_os_type', None) or getattr(guest, 'os_type', 'linux')
+        if self._package_cache is not None and os_type in self._staged_os_types:
+            from ..tools.package_cache import proxy_options
+            options = proxy_options(package_manager, self._package_cache.url_for(guest_ip))
+            if options:
+                package_manager = f"{package_manager} {options}"
+
         # Build install command with proper escaping
         if package_manager == "chocolatey":
             if version and validate_user_input(version, "general"):
@@ -737,6 +956,24 @@ class TaskExecutor:
         os_type = getattr(guest, 'basevm_os_type', 'linux')
         basevm_type = getattr(guest, 'basevm_type', 'kvm')
         
+        if self._uses_content_distributor(guest):
+            result = self._distributed.pop((guest_ip, src, dst), None)
+            if result is None:
+                from ..tools.ssh_manager import SSHCredentials
+                credentials = SSHCredentials(hostname=guest_ip, username="root", timeout=self.ssh_timeout)
+                result = self.content_distributor.distribute(src, dst, [credentials])[guest_ip]
+            
+            return TaskResult(
+                task_id=task_id,
+                task_type=TaskType.COPY_CONTENT,
+                success=result.success,
+                message=f"Copy '{src}' to '{dst}': {'SUCCESS' if result.success else 'FAILED'}",
+                execution_time=time.time() - start_time,
+                output=(f"{result.files_sent} files sent ({result.bytes_sent} bytes), "
+                        f"{result.files_skipped} unchanged"),
+                error=result.error
+            )
+        
         # Build secure command using secure executor
         if os_type == "windows.7":
             script_path = f"{self.abspath}/{self.instantiation_dir}/content_copy_program_run/copy_content_win.sh"
@@ -841,7 +1078,7 @@ class TaskExecutor:
             command = f"{script_path}/install_paramiko.sh && python3 {script_path}/attack_paramiko_ssh.py {guest_ip} {target_account} {attempt_number} {attack_time} {basevm_type}"
             
             try:
-                result = subprocess.run(
+                result = exec_gateway.run(
                     command, 
                     shell=True,
                     capture_output=True, 
@@ -901,7 +1138,7 @@ class TaskExecutor:
         command = f'bash "{script_path}" {guest_ip} {malware_name} {mode} {crspd_option} {basevm_type} "{self.abspath}" {os_type}'
         
         try:
-            result = subprocess.run(
+            result = exec_gateway.run(
                 command.split(),
                 capture_output=True, 
                 text=True, 
@@ -1024,11 +1261,15 @@ class TaskExecutor:
             if username != "root" and self._command_needs_sudo(command):
                 command = f"sudo {command}"
             
-            stdin, stdout, stderr = ssh.exec_command(command)
-            
-            output = stdout.read().decode('utf-8')
-            error = stderr.read().decode('utf-8')
-            exit_status = stdout.channel.recv_exit_status()
+            # Only the program name is recorded: arguments may carry passwords
+            program = command.split(" ", 2)[1 if command.startswith("sudo ") else 0]
+            with span(f"ssh {program}", "ssh", host=host, user=username) as ssh_span:
+                stdin, stdout, stderr = ssh.exec_command(command)
+                
+                output = stdout.read().decode('utf-8')
+                error = stderr.read().decode('utf-8')
+                exit_status = stdout.channel.recv_exit_status()
+                ssh_span.set_attribute("exit_code", exit_status)
             
             ssh.close()
             
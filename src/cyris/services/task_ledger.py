@@ -0,0 +1,165 @@
+"""
+Task Ledger
+
+Per-range record of the guest tasks that completed successfully, so that
+re-running, resuming or reconciling a range executes only new work.
+
+Each task is identified by a key hashed from its type, its normalized
+parameters and the content checksums of the host-side files it ships
+(``copy_content`` sources and similar), so editing a file that is copied to
+the guest makes its task run again even though the description did not
+change. Entries are kept per VM in ``<range_dir>/task_ledger.json`` and
+written atomically after every completed task.
+
+The ledger only knows what this host did. Guests can additionally carry a
+marker per completed task (see ``TaskExecutor``'s ``task_markers`` option),
+which catches VMs that were replaced behind the ledger's back.
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from cyris.core.concurrency import AtomicFileWriter
+from cyris.core.unified_logger import get_logger
+
+logger = get_logger(__name__, "task_ledger")
+
+LEDGER_FILE = "task_ledger.json"
+LEDGER_VERSION = 1
+
+# Task parameters naming host-side files whose content is part of the key
+CONTENT_PARAMS = ('src', 'program', 'rule', 'file_name')
+
+# (path, mtime_ns, size) -> checksum, so unchanged trees are not re-read
+_checksums: Dict[Tuple[str, int, int], str] = {}
+_checksums_lock = threading.Lock()
+
+
+def content_checksum(path: Union[str, Path]) -> Optional[str]:
+    """
+    SHA-256 of a file, or of a directory's relative paths and file contents.
+
+    Returns:
+        Hex digest, or None when ``path`` does not exist on this host
+    """
+    path = Path(path)
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+
+    if path.is_dir():
+        digest = hashlib.sha256()
+        for child in sorted(path.rglob('*')):
+            if child.is_file():
+                digest.update(str(child.relative_to(path)).encode('utf-8') + b'\0')
+                digest.update((content_checksum(child) or '').encode('ascii'))
+        return digest.hexdigest()
+
+    cache_key = (str(path), stat.st_mtime_ns, stat.st_size)
+    with _checksums_lock:
+        cached = _checksums.get(cache_key)
+    if cached is not None:
+        return cached
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    with _checksums_lock:
+        _checksums[cache_key] = digest.hexdigest()
+    return _checksums[cache_key]
+
+
+def task_key(task_type: str, params: Any) -> str:
+    """Identity of a task: type, normalized parameters and shipped content"""
+    content = {}
+    if isinstance(params, dict):
+        for name in CONTENT_PARAMS:
+            value = params.get(name)
+            if isinstance(value, str) and value:
+                content[name] = content_checksum(value)
+    material = json.dumps({'type': task_type, 'params': params, 'content': content},
+                          sort_keys=True, default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()[:32]
+
+
+class TaskLedger:
+    """
+    Completed tasks of one range, per VM.
+
+    Args:
+        path: Ledger file (usually ``<range_dir>/task_ledger.json``)
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._writer = AtomicFileWriter(str(self.path))
+        self._vms: Dict[str, Dict[str, Dict[str, Any]]] = self._load()
+        self.stats = {'hits': 0, 'misses': 0, 'recorded': 0}
+
+    def _load(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable task ledger {self.path}: {e}")
+            return {}
+        if data.get('version') != LEDGER_VERSION:
+            return {}
+        return data.get('vms', {})
+
+    def _save(self) -> None:
+        # Called with the lock held
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer.write_text(json.dumps({'version': LEDGER_VERSION, 'vms': self._vms}, indent=2))
+
+    def is_done(self, vm: str, key: str) -> bool:
+        with self._lock:
+            done = key in self._vms.get(vm, {})
+            self.stats['hits' if done else 'misses'] += 1
+        return done
+
+    def record(self, vm: str, key: str, task_id: str, task_type: str) -> None:
+        """Remember a successfully completed task"""
+        with self._lock:
+            self._vms.setdefault(vm, {})[key] = {
+                'task_id': task_id,
+                'task_type': task_type,
+                'completed_at': datetime.now().isoformat(),
+            }
+            self.stats['recorded'] += 1
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"Could not write task ledger {self.path}: {e}")
+
+    def forget(self, vms: Optional[Iterable[str]] = None) -> None:
+        """Drop the entries of ``vms`` (replaced or destroyed VMs), or all entries"""
+        with self._lock:
+            before = len(self._vms)
+            if vms is None:
+                self._vms.clear()
+            else:
+                for vm in vms:
+                    self._vms.pop(vm, None)
+            if len(self._vms) == before:
+                return
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"Could not write task ledger {self.path}: {e}")
+
+    def completed(self, vm: str) -> Dict[str, Dict[str, Any]]:
+        """Completed tasks of one VM by key"""
+        with self._lock:
+            return dict(self._vms.get(vm, {}))
+
+    def __len__(self) -> int:
+        return sum(len(tasks) for tasks in self._vms.values())
@@ -3,9 +3,15 @@ CyRIS Tools Module
 
 This module provides various tools for cyber range management,
 including SSH management, user management, and security tools.
+
+Tools are imported on first access (paramiko is expensive to load).
 """
 
-from .ssh_manager import SSHManager
-from .user_manager import UserManager
+from ..core.lazy_import import lazy_exports
+
+__all__ = ["SSHManager", "UserManager"]
 
-__all__ = ["SSHManager", "UserManager"]
\ No newline at end of file
+__getattr__, __dir__ = lazy_exports(globals(), {
+    "SSHManager": ".ssh_manager",
+    "UserManager": ".user_manager",
+})
@@ -0,0 +1,294 @@
+"""
+Content Distributor
+
+Copies a local file or directory tree to many guests at once. The source is
+hashed into a checksum manifest and packed into a tar archive once; every
+guest then receives it over a pooled SSH connection as a single ``tar -x``
+exec channel, concurrently with the others. Before sending, one remote
+``sha256sum`` pass lists what a guest already has, so unchanged files are
+skipped and only the missing or modified ones are packed (archives for the
+same file set are shared between guests).
+
+Compared with ``copy_content.sh`` this replaces three connection setups per
+guest (``[ -d ]``, ``mkdir -p`` and ``scp -r``) and one read and encryption
+of the tree per guest with one pooled connection and one packed archive.
+"""
+
+import hashlib
+import os
+import shlex
+import tarfile
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from cyris.core.unified_logger import get_logger
+
+logger = get_logger(__name__, "content_distributor")
+
+# Bytes written to the remote tar per channel write
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+@dataclass
+class DistributionResult:
+    """Outcome of distributing content to one guest"""
+    hostname: str
+    success: bool
+    files_sent: int = 0
+    files_skipped: int = 0
+    bytes_sent: int = 0
+    duration: float = 0.0
+    error: Optional[str] = None
+
+
+def collect_content_copies(guests: Iterable[Any]) -> Dict[Tuple[str, str], List[int]]:
+    """Indices of the guests copying each ``(src, dst)`` pair of their copy_content tasks"""
+    copies: Dict[Tuple[str, str], List[int]] = {}
+    for index, guest in enumerate(guests):
+        for task_config in getattr(guest, 'tasks', None) or []:
+            params = task_config.get("copy_content")
+            if params is None:
+                continue
+            for item in params if isinstance(params, list) else [params]:
+                src, dst = item.get('src'), item.get('dst')
+                if src and dst:
+                    members = copies.setdefault((src, dst), [])
+                    if index not in members:
+                        members.append(index)
+    return copies
+
+
+def _root_owned(info: tarfile.TarInfo) -> tarfile.TarInfo:
+    """Archive members as root:root, the ownership ``scp`` as root produces"""
+    info.uid = info.gid = 0
+    info.uname = info.gname = "root"
+    return info
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ContentDistributor:
+    """
+    Fan-out copy of local content to guests over SSH.
+
+    Args:
+        connection_factory: Callable mapping credentials to a connected,
+            paramiko-compatible client (``exec_command``); defaults to the
+            connection pool of :class:`~cyris.tools.ssh_manager.SSHManager`
+        max_workers: Guests served concurrently
+        chunk_size: Bytes per channel write
+    """
+
+    def __init__(
+        self,
+        connection_factory: Optional[Callable[[Any], Any]] = None,
+        max_workers: int = 16,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
+        self._connection_factory = connection_factory
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.logger = logger
+
+        self._lock = threading.Lock()
+        self._manifests: Dict[Path, Tuple[Tuple, Dict[str, str]]] = {}
+        # Archives are keyed by the (path, checksum) pairs they hold, so an
+        # edited source never reuses an archive packed from older contents
+        self._bundles: Dict[Tuple[Path, bool, FrozenSet[Tuple[str, str]]], Path] = {}
+        self._bundle_locks: Dict[Tuple[Path, bool, FrozenSet[Tuple[str, str]]], threading.Lock] = {}
+        self._workdir: Optional[tempfile.TemporaryDirectory] = None
+
+    # ------------------------------------------------------------------
+    # Manifest and archives
+    # ------------------------------------------------------------------
+
+    def manifest(self, src: Path) -> Dict[str, str]:
+        """
+        Checksums of the source, keyed by path relative to ``src.parent``
+        (the layout ``scp -r src dst`` produces under ``dst``).
+
+        Files are only rehashed when their size or mtime changed.
+        """
+        src = Path(src).resolve()
+        files = [src] if src.is_file() else sorted(p for p in src.rglob("*") if p.is_file())
+        entries = []
+        for path in files:
+            stat = path.stat()
+            entries.append((path.relative_to(src.parent).as_posix(), stat.st_size, stat.st_mtime_ns))
+        signature = tuple(entries)
+
+        with self._lock:
+            cached = self._manifests.get(src)
+            if cached and cached[0] == signature:
+                return cached[1]
+
+        manifest = {rel: _sha256(src.parent / rel) for rel, _, _ in entries}
+        with self._lock:
+            self._manifests[src] = (signature, manifest)
+            # Archives of the previous contents can no longer be sent
+            stale = [key for key in self._bundles if key[0] == src]
+            for key in stale:
+                self._bundle_locks.pop(key, None)
+                self._bundles.pop(key).unlink(missing_ok=True)
+        return manifest
+
+    def _bundle(self, src: Path, manifest: Dict[str, str], members: FrozenSet[str], complete: bool) -> Path:
+        """Tar archive of ``members`` (or the whole tree), packed once per contents"""
+        key = (src, complete, frozenset((rel, manifest[rel]) for rel in members))
+        with self._lock:
+            bundle = self._bundles.get(key)
+            if bundle is not None:
+                return bundle
+            lock = self._bundle_locks.setdefault(key, threading.Lock())
+            if self._workdir is None:
+                self._workdir = tempfile.TemporaryDirectory(prefix="cyris-content-")
+
+        with lock:
+            bundle = self._bundles.get(key)
+            if bundle is None:
+                fd, name = tempfile.mkstemp(suffix=".tar", dir=self._workdir.name)
+                os.close(fd)
+                with tarfile.open(name, "w") as tar:
+                    if complete:
+                        # Whole tree, including empty directories
+                        tar.add(str(src), arcname=src.name, filter=_root_owned)
+                    else:
+                        for rel in sorted(members):
+                            tar.add(str(src.parent / rel), arcname=rel, filter=_root_owned)
+                bundle = Path(name)
+                with self._lock:
+                    self._bundles[key] = bundle
+                self.logger.debug(f"Packed {src} ({len(members)} files, {bundle.stat().st_size} bytes)")
+        return bundle
+
+    # ------------------------------------------------------------------
+    # Distribution
+    # ------------------------------------------------------------------
+
+    def distribute(
+        self,
+        src: str,
+        dst: str,
+        targets: Sequence[Any],
+        skip_unchanged: bool = True
+    ) -> Dict[str, DistributionResult]:
+        """
+        Copy ``src`` into directory ``dst`` on every target.
+
+        Args:
+            src: Local file or directory
+            dst: Remote directory (created when missing)
+            targets: SSH credentials (anything with a ``hostname``) per guest
+            skip_unchanged: Compare remote checksums and send only changes
+
+        Returns:
+            Mapping of hostname -> result
+        """
+        source = Path(src).resolve()
+        if not source.exists():
+            error = f"File or directory '{src}' doesn't exist"
+            return {t.hostname: DistributionResult(t.hostname, False, error=error) for t in targets}
+
+        manifest = self.manifest(source)
+        workers = max(1, min(self.max_workers, len(targets)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                lambda target: self._send(target, source, dst, manifest, skip_unchanged), targets
+            ))
+
+        sent = sum(1 for r in results if r.files_sent)
+        self.logger.info(
+            f"Distributed {src} -> {dst} to {len(targets)} guests "
+            f"({sent} updated, {sum(1 for r in results if not r.success)} failed)"
+        )
+        return {result.hostname: result for result in results}
+
+    def _send(self, target, src: Path, dst: str, manifest: Dict[str, str], skip_unchanged: bool) -> DistributionResult:
+        start = time.time()
+        hostname = target.hostname
+        try:
+            client = self._connect(target)
+
+            needed = set(manifest)
+            if skip_unchanged:
+                remote = self._remote_checksums(client, dst, src.name)
+                needed = {rel for rel, digest in manifest.items() if remote.get(rel) != digest}
+            if not needed and manifest:
+                return DistributionResult(hostname, True, files_skipped=len(manifest),
+                                          duration=time.time() - start)
+
+            bundle = self._bundle(src, manifest, frozenset(needed), complete=len(needed) == len(manifest))
+            exit_status, error = self._stream(client, bundle, dst)
+            if exit_status != 0:
+                return DistributionResult(hostname, False, error=error.strip() or f"tar exited {exit_status}",
+                                          duration=time.time() - start)
+
+            return DistributionResult(
+                hostname, True,
+                files_sent=len(needed),
+                files_skipped=len(manifest) - len(needed),
+                bytes_sent=bundle.stat().st_size,
+                duration=time.time() - start
+            )
+        except Exception as e:
+            self.logger.error(f"Content distribution to {hostname} failed: {e}")
+            return DistributionResult(hostname, False, error=str(e), duration=time.time() - start)
+
+    def _connect(self, target):
+        with self._lock:
+            if self._connection_factory is None:
+                from .ssh_manager import SSHManager
+                self._connection_factory = SSHManager()._get_connection
+            factory = self._connection_factory
+        return factory(target)
+
+    @staticmethod
+    def _remote_checksums(client, dst: str, name: str) -> Dict[str, str]:
+        """``{relative path: sha256}`` of what the guest has under ``dst/name``"""
+        command = (
+            f"cd {shlex.quote(dst)} 2>/dev/null && "
+            f"find {shlex.quote(name)} -type f -exec sha256sum {{}} + 2>/dev/null; true"
+        )
+        _, stdout, _ = client.exec_command(command)
+        output = stdout.read().decode("utf-8", errors="replace")
+        stdout.channel.recv_exit_status()
+
+        checksums = {}
+        for line in output.splitlines():
+            digest, _, path = line.partition("  ")
+            if path:
+                checksums[path] = digest
+        return checksums
+
+    def _stream(self, client, bundle: Path, dst: str) -> Tuple[int, str]:
+        """Pipe an archive into ``tar -x`` on the guest"""
+        # Extracted files belong to the login user, as with scp
+        command = f"mkdir -p {shlex.quote(dst)} && tar -x --no-same-owner -C {shlex.quote(dst)} -f -"
+        stdin, stdout, stderr = client.exec_command(command)
+        with open(bundle, "rb") as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                stdin.write(chunk)
+        stdin.flush()
+        stdin.channel.shutdown_write()
+        exit_status = stdout.channel.recv_exit_status()
+        return exit_status, stderr.read().decode("utf-8", errors="replace")
+
+    def close(self) -> None:
+        """Delete packed archives"""
+        with self._lock:
+            self._bundles.clear()
+            self._bundle_locks.clear()
+            workdir, self._workdir = self._workdir, None
+        if workdir is not None:
+            workdir.cleanup()
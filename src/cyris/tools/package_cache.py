@@ -0,0 +1,395 @@
+"""
+Package Cache
+
+Host-side cache for ``install_package`` tasks. A small caching HTTP proxy
+runs on the host and is reached by guests over the range network; apt and
+yum/dnf are pointed at it per command. Package files (.deb, .rpm, ...) are
+immutable and, once fetched, always served from disk; repository metadata
+is refreshed after a TTL and served stale when the upstream mirror cannot
+be reached, so a warm cache keeps installs working in offline ranges.
+Concurrent requests for the same URL share a single upstream download.
+
+The proxy is not an open proxy: it only listens on the host address of the
+range bridges its guests use (never on all interfaces), only answers
+clients inside those bridges' subnets and only fetches from the configured
+package mirrors.
+
+Before the task phase the union of requested packages per guest OS type is
+prefetched through the proxy by one seed guest (download-only), so the
+remaining guests install at LAN speed.
+"""
+
+import hashlib
+import ipaddress
+import os
+import re
+import shutil
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from cyris.core import exec_gateway
+from cyris.core.unified_logger import get_logger
+
+logger = get_logger(__name__, "package_cache")
+
+DEFAULT_PROXY_PORT = 3142
+
+# Files that never change once published under a given URL
+IMMUTABLE_SUFFIXES = (".deb", ".udeb", ".rpm", ".drpm", ".apk", ".pkg.tar.zst", ".pkg.tar.xz")
+
+# Upstream hosts the proxy fetches from (subdomains included, e.g. the
+# country mirrors of archive.ubuntu.com); more can be configured
+DEFAULT_MIRRORS = (
+    "archive.ubuntu.com", "security.ubuntu.com", "ports.ubuntu.com",
+    "deb.debian.org", "security.debian.org",
+    "mirror.centos.org", "vault.centos.org",
+    "download.fedoraproject.org", "dl.fedoraproject.org",
+    "dl.rockylinux.org", "repo.almalinux.org",
+)
+
+# Package managers that can be pointed at the proxy per command
+APT_MANAGERS = ("apt", "apt-get")
+YUM_MANAGERS = ("yum", "dnf")
+
+
+@dataclass(frozen=True)
+class PackageRequest:
+    """One install_package request"""
+    manager: str
+    name: str
+    version: str = ""
+
+    @property
+    def spec(self) -> str:
+        """Package argument as passed to the package manager"""
+        if not self.version:
+            return self.name
+        return f"{self.name}={self.version}" if self.manager in APT_MANAGERS else f"{self.name}-{self.version}"
+
+
+def collect_package_requests(guests: Iterable[Any]) -> Dict[str, List[PackageRequest]]:
+    """
+    Union of cacheable install_package requests, keyed by guest OS type.
+
+    Only apt and yum/dnf requests are collected; other managers are left to
+    install directly.
+    """
+    requests: Dict[str, Dict[PackageRequest, None]] = {}
+    for guest in guests:
+        os_type = getattr(guest, 'basevm_os_type', None) or getattr(guest, 'os_type', 'linux')
+        for task_config in getattr(guest, 'tasks', None) or []:
+            params = task_config.get("install_package")
+            if params is None:
+                continue
+            for item in params if isinstance(params, list) else [params]:
+                manager = item.get('package_manager', 'yum')
+                if manager in APT_MANAGERS + YUM_MANAGERS and item.get('name'):
+                    request = PackageRequest(manager, str(item['name']), str(item.get('version', '') or ''))
+                    requests.setdefault(os_type, {})[request] = None
+    return {os_type: list(items) for os_type, items in requests.items()}
+
+
+def proxy_options(manager: str, proxy_url: str) -> str:
+    """Command-line options routing one package manager run through the proxy"""
+    if manager in APT_MANAGERS:
+        return f"-o Acquire::http::Proxy={proxy_url}"
+    if manager in YUM_MANAGERS:
+        return f"--setopt=proxy={proxy_url}"
+    return ""
+
+
+def prefetch_command(requests: List[PackageRequest], proxy_url: str) -> str:
+    """Download-only command fetching every request through the proxy"""
+    manager = requests[0].manager
+    specs = " ".join(request.spec for request in requests)
+    options = proxy_options(manager, proxy_url)
+    if manager in APT_MANAGERS:
+        return f"apt-get {options} update && apt-get {options} install -y --download-only {specs}"
+    return f"{manager} {options} install -y --downloadonly {specs}"
+
+
+def local_address_for(remote_ip: str) -> str:
+    """Host address on the interface that routes to ``remote_ip``"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.connect((remote_ip, 9))
+        return sock.getsockname()[0]
+
+
+def interface_network(address: str) -> Optional[ipaddress.IPv4Network]:
+    """Subnet of the host interface that has ``address``, None if unknown"""
+    try:
+        result = exec_gateway.run(["ip", "-o", "-4", "addr", "show"], capture_output=True, text=True, timeout=10)
+    except (OSError, ValueError) as e:
+        logger.debug(f"Cannot list interface addresses: {e}")
+        return None
+    for line in result.stdout.splitlines():
+        match = re.search(r"\binet (\S+)", line)
+        if match and match.group(1).split("/")[0] == address:
+            return ipaddress.ip_interface(match.group(1)).network
+    return None
+
+
+class PackageCache:
+    """
+    Caching HTTP proxy for guest package managers.
+
+    Guests are served through :meth:`url_for`, which binds a listener on
+    the host address facing the guest (its range bridge) and admits the
+    subnet of that bridge.
+
+    Args:
+        cache_dir: Directory holding cached files (kept across ranges)
+        listen_host: Fixed address to bind to instead of the bridge addresses
+        port: Proxy port (0 picks a free one)
+        mirrors: Upstream hosts that may be fetched from (and their subdomains)
+        metadata_ttl: Seconds before repository metadata is revalidated
+        upstream_timeout: Timeout for upstream mirror requests
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        listen_host: Optional[str] = None,
+        port: int = DEFAULT_PROXY_PORT,
+        mirrors: Iterable[str] = DEFAULT_MIRRORS,
+        metadata_ttl: float = 3600,
+        upstream_timeout: float = 30
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.listen_host = listen_host
+        self.port = port
+        self.mirrors = tuple(m.lower().strip(".") for m in mirrors)
+        self.metadata_ttl = metadata_ttl
+        self.upstream_timeout = upstream_timeout
+        self.logger = logger
+
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "errors": 0,
+                      "bytes_served": 0, "bytes_fetched": 0}
+        self._stats_lock = threading.Lock()
+        self._url_locks: Dict[str, threading.Lock] = {}
+        self._url_locks_guard = threading.Lock()
+        self._servers: Dict[str, ThreadingHTTPServer] = {}
+        self._servers_lock = threading.Lock()
+        self._clients: List[ipaddress.IPv4Network] = []
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return bool(self._servers)
+
+    def start(self) -> int:
+        """Start serving on the fixed listen address, if any; returns the port"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        if self.listen_host:
+            self._listen(self.listen_host)
+        return self.port
+
+    def _listen(self, host: str) -> None:
+        with self._servers_lock:
+            if host in self._servers:
+                return
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            cache = self
+
+            class Handler(_ProxyHandler):
+                package_cache = cache
+
+            server = ThreadingHTTPServer((host, self.port), Handler)
+            server.daemon_threads = True
+            # Later listeners (other bridges) reuse the port picked first
+            self.port = server.server_address[1]
+            self._servers[host] = server
+            threading.Thread(target=server.serve_forever, name=f"cyris-package-cache-{host}",
+                             daemon=True).start()
+            self.logger.info(f"Package cache proxy listening on {host}:{self.port} ({self.cache_dir})")
+
+    def stop(self) -> None:
+        with self._servers_lock:
+            servers, self._servers = list(self._servers.values()), {}
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+    def url_for(self, guest_ip: str) -> str:
+        """Proxy URL as seen from a guest, admitting the guest's subnet"""
+        host = self.listen_host
+        if host in (None, "", "0.0.0.0"):
+            host = local_address_for(guest_ip)
+        self._listen(host)
+        self.allow(guest_ip, host)
+        return f"http://{host}:{self.port}"
+
+    def allow(self, guest_ip: str, host_address: Optional[str] = None) -> None:
+        """Admit the bridge subnet of a guest (or only the guest if it is unknown)"""
+        guest = ipaddress.ip_address(guest_ip)
+        network = interface_network(host_address) if host_address else None
+        if network is None or guest not in network:
+            network = ipaddress.ip_network(f"{guest_ip}/32")
+        with self._servers_lock:
+            if network not in self._clients:
+                self._clients.append(network)
+
+    def client_allowed(self, client_ip: str) -> bool:
+        try:
+            address = ipaddress.ip_address(client_ip)
+        except ValueError:
+            return False
+        with self._servers_lock:
+            return any(address in network for network in self._clients)
+
+    def upstream_allowed(self, url: str) -> bool:
+        host = (urlsplit(url).hostname or "").lower()
+        return any(host == mirror or host.endswith("." + mirror) for mirror in self.mirrors)
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    def cache_path(self, url: str) -> Path:
+        """On-disk location of a URL: <host>/<path> (query strings hashed in)"""
+        parts = urlsplit(url)
+        path = parts.path.lstrip("/") or "index"
+        if path.endswith("/"):
+            path += "index"
+        if parts.query:
+            path += "." + hashlib.sha256(parts.query.encode()).hexdigest()[:16]
+        safe = [re.sub(r"[^A-Za-z0-9._+~-]", "_", segment) for segment in path.split("/")
+                if segment not in ("", ".", "..")]
+        return self.cache_dir.joinpath(re.sub(r"[^A-Za-z0-9.-]", "_", parts.netloc), *safe)
+
+    @staticmethod
+    def is_immutable(url: str) -> bool:
+        return urlsplit(url).path.endswith(IMMUTABLE_SUFFIXES)
+
+    def _count(self, **deltas: int) -> None:
+        with self._stats_lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
+
+    def _url_lock(self, url: str) -> threading.Lock:
+        with self._url_locks_guard:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def fetch(self, url: str) -> Tuple[Optional[Path], int]:
+        """
+        Cached copy of ``url``, downloading it when missing or stale.
+
+        Returns:
+            (path, status): path is None when nothing can be served, in
+            which case status is the upstream HTTP status (502 if unreachable)
+        """
+        path = self.cache_path(url)
+        if self._fresh(path, url):
+            self._count(hits=1)
+            return path, 200
+
+        # Single flight: one download per URL, concurrent requesters wait
+        with self._url_lock(url):
+            if self._fresh(path, url):
+                self._count(hits=1)
+                return path, 200
+            try:
+                size = self._download(url, path)
+                self._count(misses=1, bytes_fetched=size)
+                return path, 200
+            except urllib.error.HTTPError as e:
+                if path.exists() and e.code >= 500:
+                    self._count(stale=1)
+                    return path, 200
+                self._count(errors=1)
+                return None, e.code
+            except (urllib.error.URLError, OSError) as e:
+                if path.exists():
+                    # Offline: serve what we have
+                    self._count(stale=1)
+                    self.logger.debug(f"Upstream unreachable for {url}, serving cached copy: {e}")
+                    return path, 200
+                self._count(errors=1)
+                self.logger.warning(f"Cannot fetch {url}: {e}")
+                return None, 502
+
+    def _fresh(self, path: Path, url: str) -> bool:
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        return self.is_immutable(url) or time.time() - mtime < self.metadata_ttl
+
+    def _download(self, url: str, path: Path) -> int:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f".{path.name}.{threading.get_ident()}.part")
+        try:
+            with urllib.request.urlopen(url, timeout=self.upstream_timeout) as response, \
+                    open(partial, "wb") as out:
+                shutil.copyfileobj(response, out, 1024 * 1024)
+            size = partial.stat().st_size
+            os.replace(partial, path)
+            return size
+        finally:
+            if partial.exists():
+                partial.unlink()
+
+    def usage(self) -> Dict[str, int]:
+        """Number of cached files and bytes on disk"""
+        files = [p for p in self.cache_dir.rglob("*") if p.is_file()] if self.cache_dir.exists() else []
+        return {"files": len(files), "bytes": sum(p.stat().st_size for p in files)}
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    """Forward-proxy GET/HEAD handler backed by a PackageCache"""
+
+    package_cache: PackageCache
+    protocol_version = "HTTP/1.1"
+
+    def _serve(self, send_body: bool) -> None:
+        if not self.package_cache.client_allowed(self.client_address[0]):
+            self.send_error(403, "Client outside the range networks")
+            return
+        url = self.path
+        if not url.startswith("http://"):
+            # apt/yum send absolute URIs to a proxy; anything else is not ours
+            self.send_error(400, "Absolute http:// URI required")
+            return
+        if not self.package_cache.upstream_allowed(url):
+            self.send_error(403, "Not a configured package mirror")
+            return
+
+        path, status = self.package_cache.fetch(url)
+        if path is None:
+            self.send_error(status)
+            return
+
+        size = path.stat().st_size
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(size))
+        self.send_header("Last-Modified", self.date_time_string(path.stat().st_mtime))
+        self.end_headers()
+        if send_body:
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, self.wfile, 1024 * 1024)
+            self.package_cache._count(bytes_served=size)
+
+    def do_GET(self):
+        self._serve(True)
+
+    def do_HEAD(self):
+        self._serve(False)
+
+    def do_CONNECT(self):
+        # TLS repositories cannot be cached; guests should use http mirrors
+        self.send_error(501, "CONNECT not supported by the package cache")
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
@@ -0,0 +1,570 @@
+"""
+Range Creation Benchmark
+
+Drives ``create_range``, ``get_range_status_detailed`` and ``destroy_range``
+of a real :class:`RangeOrchestrator` against a fake hypervisor, fake libvirt
+IP discovery and fake guest SSH, so orchestration overhead (scheduling,
+bookkeeping, logging, metadata writes) can be measured at 1-500 guests on
+any machine. Each fake call sleeps for a configurable, deterministic
+latency; nothing touches KVM, libvirt or the network.
+
+Every operation reports wall time, CPU time, peak RSS and the number of
+subprocesses spawned as counted by the exec gateway (which should be zero: a
+fake endpoint cannot account for a ``virsh`` call that bypasses it). Results are JSON and can be compared
+against a saved baseline to catch regressions.
+
+Usage::
+
+    python -m cyris.tools.range_benchmark --scales 1,10,100,500 --output bench.json
+    python -m cyris.tools.range_benchmark --baseline bench.json    # exit 1 on regression
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import ipaddress
+import json
+import logging
+import multiprocessing
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..core import exec_gateway
+from ..infrastructure.providers.base_provider import InfrastructureProvider, ResourceInfo, ResourceStatus
+from ..infrastructure.providers.libvirt_snapshots import SnapshotReport, SnapshotResult
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_AVAILABLE = False
+
+RESULTS_VERSION = 1
+DEFAULT_SCALES = (1, 10, 100, 500)
+OPERATIONS = ("create", "status", "destroy")
+
+# Typical guest workload: one account and one package per guest
+DEFAULT_TASKS: List[Dict[str, Any]] = [
+    {"add_account": [{"account": "trainee01", "passwd": "trainee-pass"}]},
+    {"install_package": [{"package_manager": "apt-get", "name": "nmap"}]},
+]
+
+# Metric -> absolute slack added to the relative tolerance, so that
+# millisecond-level noise on small ranges is not reported as a regression
+METRIC_SLACK = {"wall_s": 0.05, "cpu_s": 0.05, "peak_rss_kb": 8192, "subprocesses": 0}
+
+
+@dataclass
+class LatencyProfile:
+    """Simulated duration of each fake endpoint call, in seconds"""
+    create_host: float = 0.01
+    create_guest: float = 0.005
+    destroy_guest: float = 0.002
+    destroy_host: float = 0.002
+    snapshot: float = 0.002
+    revert: float = 0.002
+    status: float = 0.001
+    ip_lookup: float = 0.002
+    ssh_connect: float = 0.002
+    ssh_command: float = 0.002
+    jitter: float = 0.0
+    seed: int = 0
+
+    def scaled(self, factor: float) -> "LatencyProfile":
+        """Profile with every latency multiplied by ``factor``"""
+        values = {name: value * factor for name, value in asdict(self).items()
+                  if name not in ("jitter", "seed")}
+        return LatencyProfile(jitter=self.jitter, seed=self.seed, **values)
+
+    def delay(self, kind: str, key: str = "") -> float:
+        """
+        Latency of one call. Jitter is derived from ``(seed, kind, key)``
+        rather than a shared random stream, so it does not depend on the
+        order in which worker threads happen to make calls.
+        """
+        base = getattr(self, kind)
+        if not self.jitter or not base:
+            return base
+        offset = random.Random(f"{self.seed}:{kind}:{key}").uniform(-self.jitter, self.jitter)
+        return max(0.0, base * (1 + offset))
+
+
+class FakeEndpoints:
+    """State and call counters shared by the fake hypervisor, libvirt and SSH"""
+
+    def __init__(self, latency: Optional[LatencyProfile] = None):
+        self.latency = latency or LatencyProfile()
+        self.calls: Counter = Counter()
+        self.hosts: Dict[str, str] = {}
+        self.domains: Dict[str, str] = {}
+        # VM name -> IP the VM had when its snapshot was taken
+        self.snapshots: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def call(self, kind: str, key: str = "") -> None:
+        with self._lock:
+            self.calls[kind] += 1
+        seconds = self.latency.delay(kind, key)
+        if seconds:
+            time.sleep(seconds)
+
+    def allocate_ip(self, vm_name: str) -> str:
+        with self._lock:
+            ip = str(ipaddress.IPv4Address("10.128.0.1") + len(self.domains))
+            self.domains[vm_name] = ip
+        return ip
+
+
+class FakeHypervisor(InfrastructureProvider):
+    """In-memory provider: guests become fake domains with a fixed IP"""
+
+    def __init__(self, endpoints: FakeEndpoints, config: Optional[Dict[str, Any]] = None):
+        super().__init__("fake", config or {})
+        self.endpoints = endpoints
+        self._connected = False
+
+    def connect(self) -> None:
+        self._connected = True
+
+    def disconnect(self) -> None:
+        self._connected = False
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def create_hosts(self, hosts: List[Any]) -> List[str]:
+        host_ids = []
+        for host in hosts:
+            host_id = getattr(host, 'host_id', None) or str(getattr(host, 'id', 'host'))
+            self.endpoints.call("create_host", host_id)
+            self.endpoints.hosts[f"fake-host-{host_id}"] = host_id
+            host_ids.append(f"fake-host-{host_id}")
+        return host_ids
+
+    def create_guests(self, guests: List[Any], host_mapping: Dict[str, str],
+                      build_only: bool = False, skip_builder: bool = False,
+                      recreate: bool = False) -> List[str]:
+        if build_only:
+            return []
+        range_id = getattr(self, '_current_range_id', None) or "range"
+        names = []
+        for guest in guests:
+            guest_id = getattr(guest, 'guest_id', None) or getattr(guest, 'id', 'guest')
+            name = f"cyris-{range_id}-{guest_id}"
+            self.endpoints.call("create_guest", name)
+            self.endpoints.allocate_ip(name)
+            names.append(name)
+        return names
+
+    def destroy_guests(self, guest_ids: List[str]) -> None:
+        for guest_id in guest_ids:
+            self.endpoints.call("destroy_guest", guest_id)
+            self.endpoints.domains.pop(guest_id, None)
+            self.endpoints.snapshots.pop(guest_id, None)
+
+    def snapshot_guests(self, guest_ids: List[str], description: str = "") -> SnapshotReport:
+        report = SnapshotReport(action="snapshot")
+        for guest_id in guest_ids:
+            self.endpoints.call("snapshot", guest_id)
+            if guest_id in self.endpoints.domains:
+                self.endpoints.snapshots[guest_id] = self.endpoints.domains[guest_id]
+                report.add(SnapshotResult(guest_id, "created"))
+            else:
+                report.add(SnapshotResult(guest_id, "failed", "domain not found"))
+        return report
+
+    def revert_guests(self, guest_ids: List[str]) -> SnapshotReport:
+        report = SnapshotReport(action="revert")
+        for guest_id in guest_ids:
+            self.endpoints.call("revert", guest_id)
+            if guest_id not in self.endpoints.domains:
+                report.add(SnapshotResult(guest_id, "failed", "domain not found"))
+            elif guest_id not in self.endpoints.snapshots:
+                report.add(SnapshotResult(guest_id, "failed", f"no snapshot '{report.snapshot}'"))
+            else:
+                self.endpoints.domains[guest_id] = self.endpoints.snapshots[guest_id]
+                report.add(SnapshotResult(guest_id, "reverted"))
+        return report
+
+    def destroy_hosts(self, host_ids: List[str]) -> None:
+        for host_id in host_ids:
+            self.endpoints.call("destroy_host", host_id)
+            self.endpoints.hosts.pop(host_id, None)
+
+    def get_status(self, resource_ids: List[str]) -> Dict[str, str]:
+        self.endpoints.call("status", ",".join(resource_ids))
+        known = set(self.endpoints.domains) | set(self.endpoints.hosts)
+        return {rid: "active" if rid in known else "not_found" for rid in resource_ids}
+
+    def get_resource_info(self, resource_id: str) -> Optional[ResourceInfo]:
+        if resource_id not in self.endpoints.domains:
+            return None
+        return ResourceInfo(
+            resource_id=resource_id,
+            resource_type="guest",
+            name=resource_id,
+            status=ResourceStatus.ACTIVE,
+            metadata={"provider": "fake"},
+            ip_addresses=[self.endpoints.domains[resource_id]],
+        )
+
+    def list_vms_by_pattern(self, pattern: str) -> List[str]:
+        return sorted(name for name in self.endpoints.domains if name.startswith(pattern))
+
+
+@dataclass
+class FakeVMHealth:
+    """The parts of ``VMHealthInfo`` the orchestrator reads"""
+    vm_name: str
+    ip_addresses: List[str] = field(default_factory=list)
+    error_details: List[str] = field(default_factory=list)
+
+
+class FakeIPManager:
+    """Stands in for libvirt-backed ``VMIPManager``"""
+
+    def __init__(self, endpoints: FakeEndpoints):
+        self.endpoints = endpoints
+
+    def get_vm_health_info(self, vm_name: str) -> FakeVMHealth:
+        self.endpoints.call("ip_lookup", vm_name)
+        ip = self.endpoints.domains.get(vm_name)
+        if ip is None:
+            return FakeVMHealth(vm_name, error_details=[f"Domain {vm_name} not found"])
+        return FakeVMHealth(vm_name, ip_addresses=[ip])
+
+
+@dataclass
+class FakeCredentials:
+    hostname: str
+    username: str = "root"
+    password: Optional[str] = None
+
+
+class FakeSSHManager:
+    """Stands in for ``SSHManager`` in status checks"""
+
+    def __init__(self, endpoints: FakeEndpoints):
+        self.endpoints = endpoints
+
+    def create_from_vm_info(self, vm_name: str, vm_ip: str, username: str = "root") -> FakeCredentials:
+        return FakeCredentials(hostname=vm_ip, username=username)
+
+    def verify_connectivity(self, credentials: FakeCredentials, timeout: int = 10) -> Dict[str, Any]:
+        self.endpoints.call("ssh_connect", credentials.hostname)
+        reachable = credentials.hostname in self.endpoints.domains.values()
+        return {"hostname": credentials.hostname, "port_open": reachable, "auth_working": reachable}
+
+    def establish_connection(self, credentials: FakeCredentials, max_retries: int = 3) -> bool:
+        self.endpoints.call("ssh_connect", credentials.hostname)
+        return credentials.hostname in self.endpoints.domains.values()
+
+
+class FakeTopologyManager:
+    """Stands in for ``NetworkTopologyManager`` (no libvirt networks)"""
+
+    def __init__(self):
+        self.libvirt_connection = None
+
+    def create_topology(self, topology_config: Dict[str, Any], guests: List[Any], range_id: str) -> Dict[str, str]:
+        return {}
+
+    def update_topology(self, topology_config: Dict[str, Any], guests: List[Any], range_id: str,
+                        stale_networks: Optional[List[str]] = None, rules_changed: bool = False) -> Dict[str, str]:
+        return {}
+
+    def get_range_metadata(self, range_id: str) -> Dict[str, Any]:
+        return {}
+
+
+def _fake_task_executor(endpoints: FakeEndpoints, base_path: Path):
+    """Real TaskExecutor whose guest SSH commands hit the fake endpoint"""
+    from ..services.task_executor import TaskExecutor
+
+    class FakeSSHTaskExecutor(TaskExecutor):
+        def _execute_ssh_command(self, host, command, username="ubuntu", password="ubuntu"):
+            endpoints.call("ssh_command", f"{host}:{command}")
+            if host not in endpoints.domains.values():
+                return False, "", f"ssh: connect to host {host}: No route to host"
+            return True, "", ""
+
+    return FakeSSHTaskExecutor({
+        'base_path': base_path,
+        'ssh_timeout': 30,
+        'ssh_retries': 3,
+        'package_cache_dir': None,
+    })
+
+
+def build_orchestrator(endpoints: FakeEndpoints, workdir: Path):
+    """RangeOrchestrator wired to the fake endpoints, storing ranges under ``workdir``"""
+    from ..config.settings import CyRISSettings
+    from ..services.orchestrator import RangeOrchestrator
+
+    workdir = Path(workdir)
+    settings = CyRISSettings(
+        cyris_path=workdir,
+        cyber_range_dir=workdir / "cyber_range",
+        package_cache_enabled=False,
+    )
+    orchestrator = RangeOrchestrator(settings, FakeHypervisor(endpoints))
+    orchestrator.vm_ip_manager = FakeIPManager(endpoints)
+    orchestrator.ssh_manager = FakeSSHManager(endpoints)
+    orchestrator.topology_manager = FakeTopologyManager()
+    orchestrator.task_executor = _fake_task_executor(endpoints, workdir)
+    return orchestrator
+
+
+def _peak_rss_kb() -> int:
+    if not RESOURCE_AVAILABLE:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _measure(endpoints: FakeEndpoints, func) -> Dict[str, Any]:
+    calls_before = Counter(endpoints.calls)
+    spawns_before = exec_gateway.total_processes()
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+    value = func()
+    wall = time.perf_counter() - wall_before
+    return {
+        "wall_s": round(wall, 4),
+        "cpu_s": round(time.process_time() - cpu_before, 4),
+        "peak_rss_kb": _peak_rss_kb(),
+        "subprocesses": exec_gateway.total_processes() - spawns_before,
+        "fake_calls": dict(endpoints.calls - calls_before),
+        "value": value,
+    }
+
+
+def _created_status(metadata) -> Optional[str]:
+    # Read now: destroy_range later mutates the same metadata object
+    return metadata.status.value if metadata is not None else None
+
+
+def run_scale(
+    guest_count: int,
+    latency: Optional[LatencyProfile] = None,
+    tasks: Optional[List[Dict[str, Any]]] = None,
+    workdir: Optional[Path] = None,
+    quiet: bool = True
+) -> Dict[str, Any]:
+    """
+    Create, inspect and destroy one range of ``guest_count`` guests.
+
+    Args:
+        guest_count: Number of guests in the range
+        latency: Fake endpoint latencies (default :class:`LatencyProfile`)
+        tasks: Task list given to every guest (default ``DEFAULT_TASKS``)
+        workdir: Directory for range metadata and logs (default: temporary)
+        quiet: Suppress progress output and logging below WARNING while running
+
+    Returns:
+        ``{"guests": n, "ok": bool, "operations": {op: metrics}}``
+    """
+    from ..domain.entities.guest import BaseVMType, Guest, OSType
+    from ..domain.entities.host import Host
+
+    exec_gateway.enable_accounting()
+    tasks = DEFAULT_TASKS if tasks is None else tasks
+    endpoints = FakeEndpoints(latency)
+    range_id = f"bench-{guest_count}"
+
+    hosts = [Host(host_id="host_1", mgmt_addr="localhost", virbr_addr="192.168.122.1", account="cyuser")]
+    guests = [
+        Guest(guest_id=f"desktop{i}", basevm_type=BaseVMType.KVM, basevm_host="host_1",
+              basevm_config_file="/benchmark/basevm.xml", basevm_os_type=OSType.UBUNTU,
+              tasks=copy.deepcopy(tasks))
+        for i in range(guest_count)
+    ]
+
+    previous_disable = logging.root.manager.disable
+    output = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+    if quiet:
+        logging.disable(logging.INFO)
+    try:
+        with output, tempfile.TemporaryDirectory(prefix="cyris-bench-") as tmp:
+            orchestrator = build_orchestrator(endpoints, Path(workdir or tmp))
+            create = _measure(endpoints, lambda: _created_status(orchestrator.create_range(
+                range_id, f"Benchmark {guest_count}", "range creation benchmark", hosts, guests)))
+            status = _measure(endpoints, lambda: orchestrator.get_range_status_detailed(range_id))
+            destroy = _measure(endpoints, lambda: orchestrator.destroy_range(range_id))
+    finally:
+        logging.disable(previous_disable)
+
+    created, detail, destroyed = create.pop("value"), status.pop("value"), destroy.pop("value")
+    reachable = [vm for vm in (detail or {}).get("vms", []) if vm.get("ip") and vm.get("ssh_accessible")]
+    ok = (
+        created == "active"
+        and len(reachable) == guest_count
+        and destroyed is True and not endpoints.domains
+    )
+    return {
+        "guests": guest_count,
+        "ok": ok,
+        "operations": {"create": create, "status": status, "destroy": destroy},
+    }
+
+
+def run_benchmark(
+    scales: Sequence[int] = DEFAULT_SCALES,
+    latency: Optional[LatencyProfile] = None,
+    tasks: Optional[List[Dict[str, Any]]] = None,
+    isolate: bool = True,
+    quiet: bool = True
+) -> Dict[str, Any]:
+    """
+    Run every scale and collect the results document.
+
+    With ``isolate`` each scale runs in a fresh interpreter, so peak RSS
+    belongs to that scale alone and imports are not shared between runs.
+    """
+    latency = latency or LatencyProfile()
+    results: Dict[str, Any] = {}
+    for guest_count in scales:
+        if isolate:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results[str(guest_count)] = pool.submit(
+                    run_scale, guest_count, latency, tasks, None, quiet).result()
+        else:
+            results[str(guest_count)] = run_scale(guest_count, latency, tasks, quiet=quiet)
+
+    return {
+        "version": RESULTS_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "latency": asdict(latency),
+        "tasks": tasks if tasks is not None else DEFAULT_TASKS,
+        "isolated": isolate,
+        "scales": results,
+    }
+
+
+@dataclass
+class Regression:
+    """A metric that got worse than the baseline allows"""
+    guests: int
+    operation: str
+    metric: str
+    baseline: float
+    current: float
+
+    def __str__(self) -> str:
+        change = (self.current / self.baseline - 1) * 100 if self.baseline else float("inf")
+        return (f"{self.guests} guests / {self.operation}: {self.metric} "
+                f"{self.baseline:g} -> {self.current:g} (+{change:.0f}%)")
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any],
+                    tolerance: float = 0.25) -> List[Regression]:
+    """
+    Metrics that exceed ``baseline * (1 + tolerance)`` plus the metric's
+    absolute slack. Scales or operations missing from either side are
+    ignored; any extra subprocess is a regression.
+    """
+    regressions = []
+    for scale, result in current.get("scales", {}).items():
+        base_result = baseline.get("scales", {}).get(scale)
+        if not base_result:
+            continue
+        for operation, metrics in result["operations"].items():
+            base_metrics = base_result["operations"].get(operation)
+            if not base_metrics:
+                continue
+            for metric, slack in METRIC_SLACK.items():
+                if metric not in metrics or metric not in base_metrics:
+                    continue
+                allowed = base_metrics[metric] * (1 + tolerance) + slack
+                if metric == "subprocesses":
+                    allowed = base_metrics[metric]
+                if metrics[metric] > allowed:
+                    regressions.append(Regression(int(scale), operation, metric,
+                                                  base_metrics[metric], metrics[metric]))
+    return regressions
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    """Plain-text table of a results document"""
+    lines = [f"{'guests':>6}  {'operation':<9} {'wall(s)':>9} {'cpu(s)':>8} "
+             f"{'peak RSS(MB)':>12} {'subprocs':>8}  fake calls"]
+    for scale, result in results["scales"].items():
+        for operation in OPERATIONS:
+            metrics = result["operations"][operation]
+            calls = sum(metrics["fake_calls"].values())
+            lines.append(
+                f"{scale:>6}  {operation:<9} {metrics['wall_s']:>9.3f} {metrics['cpu_s']:>8.3f} "
+                f"{metrics['peak_rss_kb'] / 1024:>12.1f} {metrics['subprocesses']:>8}  {calls}"
+            )
+        if not result["ok"]:
+            lines.append(f"{scale:>6}  FAILED: range did not reach the expected state")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m cyris.tools.range_benchmark",
+        description="Benchmark range creation, status and destruction against a fake hypervisor")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="Comma-separated guest counts (default: %(default)s)")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiply every fake endpoint latency (0 = no simulated latency)")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Deterministic +/- latency fraction, e.g. 0.2")
+    parser.add_argument("--seed", type=int, default=0, help="Jitter seed")
+    parser.add_argument("--no-tasks", action="store_true", help="Create guests without tasks")
+    parser.add_argument("--no-isolate", action="store_true",
+                        help="Run every scale in this process (peak RSS becomes cumulative)")
+    parser.add_argument("--verbose", action="store_true", help="Keep orchestrator logging")
+    parser.add_argument("--output", type=Path, help="Write the results JSON here")
+    parser.add_argument("--baseline", type=Path, help="Compare against a saved results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative slowdown against the baseline (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    try:
+        scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    except ValueError:
+        parser.error(f"Invalid --scales: {args.scales}")
+
+    latency = LatencyProfile(jitter=args.jitter, seed=args.seed).scaled(args.latency_scale)
+    results = run_benchmark(scales, latency, [] if args.no_tasks else None,
+                            isolate=not args.no_isolate, quiet=not args.verbose)
+    print(format_results(results))
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+
+    failed = [scale for scale, result in results["scales"].items() if not result["ok"]]
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("latency") != results["latency"] or baseline.get("tasks") != results["tasks"]:
+            print("\nWarning: baseline was recorded with a different latency profile or task list")
+        regressions = compare_results(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regressions against {args.baseline}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
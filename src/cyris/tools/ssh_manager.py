@@ -7,6 +7,7 @@ capabilities for cyber range operations.
 
 # import logging  # Replaced with unified logger
 from cyris.core.unified_logger import get_logger
+from cyris.core.tracing import traced
 import logging  # Keep for type annotations
 import socket
 from typing import Dict, List, Optional, Any, Union, Tuple
@@ -16,6 +17,7 @@ import time
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import subprocess
+from cyris.core import exec_gateway
 
 try:
     import paramiko
@@ -251,6 +253,10 @@ class SSHManager:
             self.logger.error(f"Failed to install public key on {credentials.hostname}: {e}")
             return False
     
+    @traced("ssh {description}", "ssh", attributes=lambda self, credentials, command: {
+        "host": credentials.hostname, "user": credentials.username,
+        "description": command.description if isinstance(command, SSHCommand) else "command"
+    })
     def execute_command(
         self,
         credentials: SSHCredentials,
@@ -955,17 +961,8 @@ class SSHManager:
             }
     
     def _has_parallel_ssh(self) -> bool:
-        """Check if parallel-ssh is available on system"""
-        try:
-            result = subprocess.run(
-                ["which", "parallel-ssh"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            return result.returncode == 0
-        except:
-            return False
+        """Check if parallel-ssh is available on system (cached, no fork)"""
+        return exec_gateway.has_tool("parallel-ssh")
     
     def _execute_system_parallel_ssh(
         self,
@@ -1004,7 +1001,7 @@ class SSHManager:
             self.logger.info(f"Running parallel-ssh with {len(hosts)} hosts")
             
             start_time = time.time()
-            result = subprocess.run(
+            result = exec_gateway.run(
                 parallel_ssh_cmd,
                 capture_output=True,
                 text=True,
@@ -8,6 +8,7 @@ with minimal intrusion to existing codebase.
 # import logging  # Replaced with unified logger
 from cyris.core.unified_logger import get_logger
 import subprocess
+from cyris.core import exec_gateway
 import time
 from typing import Dict, List, Optional, Tuple, NamedTuple
 from pathlib import Path
@@ -289,7 +290,7 @@ class VMDiagnostics:
             # Get domain log from libvirt
             try:
                 log_cmd = ["virsh", "dominfo", vm_name]
-                result = subprocess.run(log_cmd, capture_output=True, text=True, timeout=10)
+                result = exec_gateway.run(log_cmd, capture_output=True, text=True, timeout=10)
                 logs["domain_info"] = result.stdout
             except:
                 logs["domain_info"] = "Unable to retrieve domain info"
@@ -305,7 +306,7 @@ class VMDiagnostics:
         """Get VM disk file paths"""
         try:
             cmd = ["virsh", "domblklist", vm_name]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+            result = exec_gateway.run(cmd, capture_output=True, text=True, timeout=10)
             if result.returncode != 0:
                 return []
             
@@ -339,7 +340,7 @@ class VMDiagnostics:
                 return None  # VM is running fine, so image must be OK
             
             cmd = ["qemu-img", "info", "--force-share", image_path]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
+            result = exec_gateway.run(cmd, capture_output=True, text=True, timeout=15)
             
             if result.returncode != 0:
                 # Only report as error if we can't determine VM is running
@@ -411,7 +412,7 @@ class VMDiagnostics:
         try:
             # Check if VM is in running state
             state_cmd = ["virsh", "domstate", vm_name]
-            state_result = subprocess.run(state_cmd, capture_output=True, text=True, timeout=5)
+            state_result = exec_gateway.run(state_cmd, capture_output=True, text=True, timeout=5)
             
             if state_result.returncode != 0:
                 return False
@@ -440,7 +441,7 @@ class VMDiagnostics:
         """Get VM runtime statistics"""
         try:
             cmd = ["virsh", "domstats", vm_name]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+            result = exec_gateway.run(cmd, capture_output=True, text=True, timeout=10)
             
             if result.returncode != 0:
                 return {}
@@ -467,7 +468,7 @@ class VMDiagnostics:
         """Get VM network interface names"""
         try:
             cmd = ["virsh", "dumpxml", vm_name]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+            result = exec_gateway.run(cmd, capture_output=True, text=True, timeout=10)
             
             if result.returncode != 0:
                 return []
@@ -486,7 +487,7 @@ class VMDiagnostics:
         """Get VM MAC addresses"""
         try:
             cmd = ["virsh", "dumpxml", vm_name]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+            result = exec_gateway.run(cmd, capture_output=True, text=True, timeout=10)
             
             if result.returncode != 0:
                 return []
@@ -508,7 +509,7 @@ class VMDiagnostics:
         """Check DHCP leases for given MAC addresses"""
         try:
             cmd = ["virsh", "net-dhcp-leases", "default"]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+            result = exec_gateway.run(cmd, capture_output=True, text=True, timeout=10)
             
             if result.returncode != 0:
                 return []
@@ -527,7 +528,7 @@ class VMDiagnostics:
         """Test basic ping connectivity"""
         try:
             cmd = ["ping", "-c", "1", "-W", "2", ip_address]
-            result = subprocess.run(cmd, capture_output=True, timeout=5)
+            result = exec_gateway.run(cmd, capture_output=True, timeout=5)
             return result.returncode == 0
         except:
             return False
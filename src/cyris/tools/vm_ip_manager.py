@@ -24,6 +24,7 @@ Usage:
 # import logging  # Replaced with unified logger
 from cyris.core.unified_logger import get_logger
 import subprocess
+from cyris.core import exec_gateway
 import json
 import time
 import threading
@@ -45,8 +46,10 @@ from ..infrastructure.providers.libvirt_domain_wrapper import (
     LibvirtDomainWrapper,
     DomainState,
     DomainStateInfo,
-    NetworkInterface
+    NetworkInterface,
+    watch_domain_events
 )
+from ..infrastructure.providers.domain_model import DOMAIN_MODELS
 
 import libvirt
 
@@ -212,6 +215,8 @@ class EnhancedVMIPManager:
         try:
             self.connection_manager = get_connection_manager(libvirt_uri)
             self.logger.info(f"Using native libvirt-python with connection pooling")
+            # Parsed domain models then stay cached until libvirt reports a change
+            watch_domain_events(libvirt_uri)
         except LibvirtConnectionError as e:
             self.logger.error(f"Failed to initialize libvirt connection manager: {e}")
             self.connection_manager = None
@@ -460,7 +465,7 @@ class EnhancedVMIPManager:
     def _get_ips_via_virsh_fallback(self, vm_name: str) -> Optional[VMIPInfo]:
         """Get IP addresses using virsh command as fallback"""
         try:
-            result = subprocess.run(
+            result = exec_gateway.run(
                 ["virsh", "--connect", self.libvirt_uri, "domifaddr", vm_name],
                 capture_output=True,
                 text=True,
@@ -583,7 +588,7 @@ class EnhancedVMIPManager:
                 return None
             
             # Scan ARP table
-            result = subprocess.run(
+            result = exec_gateway.run(
                 ["arp", "-a"],
                 capture_output=True,
                 text=True,
@@ -834,7 +839,12 @@ class EnhancedVMIPManager:
             'cache_size': len(self._ip_cache),
             'libvirt_available': True,
             'connection_manager_available': self.connection_manager is not None,
-            'cache_ttl': self.cache_ttl
+            'cache_ttl': self.cache_ttl,
+            'domain_models': {
+                **DOMAIN_MODELS.stats,
+                'cached': len(DOMAIN_MODELS),
+                'event_driven': DOMAIN_MODELS.is_watching(self.libvirt_uri)
+            }
         }
     
     def __enter__(self):
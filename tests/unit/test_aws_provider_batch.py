@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+"""
+Offline tests for batched EC2 launch, readiness waiting and status
+(botocore Stubber; no AWS credentials or network needed)
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+from botocore.stub import ANY, Stubber
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.infrastructure.providers.aws_provider import AWSProvider
+from cyris.infrastructure.providers.base_provider import (
+    ResourceCreationError, ResourceInfo, ResourceStatus,
+)
+
+
+def instance(instance_id, state, index=0, ip=None):
+    data = {
+        "InstanceId": instance_id,
+        "State": {"Name": state, "Code": 0},
+        "AmiLaunchIndex": index,
+        "InstanceType": "t3.micro",
+        "Placement": {"AvailabilityZone": "us-east-1a"},
+    }
+    if ip:
+        data["PrivateIpAddress"] = ip
+    return data
+
+
+def describe(*instances, next_token=None):
+    response = {"Reservations": [{"Instances": list(instances)}] if instances else []}
+    if next_token:
+        response["NextToken"] = next_token
+    return response
+
+
+def id_filter(*ids):
+    return {"Filters": [{"Name": "instance-id", "Values": list(ids)}]}
+
+
+def guest(guest_id, memory=1024, os_type="ubuntu.20.04"):
+    return SimpleNamespace(id=guest_id, host_id="h1", os_type=os_type,
+                           memory_mb=memory, vcpus=1, user_data=None)
+
+
+@pytest.fixture
+def provider():
+    provider = AWSProvider({"region": "us-east-1", "poll_interval": 0, "wait_timeout": 5})
+    provider._ec2_client = boto3.client(
+        "ec2", region_name="us-east-1",
+        aws_access_key_id="testing", aws_secret_access_key="testing"
+    )
+    provider.is_connected = lambda: True
+    provider._register_resource(ResourceInfo(
+        resource_id="h1", resource_type="host", name="h1", status=ResourceStatus.ACTIVE,
+        metadata={"subnet_ids": ["subnet-1"], "security_group_id": "sg-1", "vpc_id": "vpc-1"}
+    ))
+    return provider
+
+
+@pytest.fixture
+def stub(provider):
+    with Stubber(provider._ec2_client) as stubber:
+        yield stubber
+        stubber.assert_no_pending_responses()
+
+
+class TestBatchedLaunch:
+
+    def test_same_spec_guests_share_one_run_instances(self, provider, stub):
+        stub.add_response("run_instances", {"Instances": [
+            instance("i-b", "pending", index=1), instance("i-a", "pending", index=0)
+        ]}, {
+            "ImageId": "ami-0abcdef1234567890", "MinCount": 2, "MaxCount": 2,
+            "InstanceType": "t3.micro", "SubnetId": "subnet-1", "SecurityGroupIds": ["sg-1"],
+            "TagSpecifications": ANY,
+        })
+        stub.add_response("create_tags", {}, {"Resources": ["i-a"], "Tags": ANY})
+        stub.add_response("create_tags", {}, {"Resources": ["i-b"], "Tags": ANY})
+        stub.add_response("run_instances", {"Instances": [instance("i-c", "pending")]}, {
+            "ImageId": "ami-0abcdef1234567890", "MinCount": 1, "MaxCount": 1,
+            "InstanceType": "t3.medium", "SubnetId": "subnet-1", "SecurityGroupIds": ["sg-1"],
+            "TagSpecifications": ANY,
+        })
+        # One describe loop for all three: first round pending, second running
+        stub.add_response("describe_instances", describe(
+            instance("i-a", "running"), instance("i-b", "pending"), instance("i-c", "pending")
+        ), id_filter("i-a", "i-b", "i-c"))
+        stub.add_response("describe_instances", describe(
+            instance("i-b", "running", ip="10.0.0.6"), instance("i-c", "running")
+        ), id_filter("i-b", "i-c"))
+
+        ids = provider.create_guests(
+            [guest("web1"), guest("web2"), guest("db", memory=4096)], {"h1": "h1"}
+        )
+
+        assert ids == ["i-a", "i-b", "i-c"]
+        assert provider.get_resource_info("i-b").name == "web2"
+        assert provider._resources["i-b"].ip_addresses == ["10.0.0.6"]
+        assert provider._resources["i-c"].metadata["instance_type"] == "t3.medium"
+
+    def test_failed_instance_aborts_creation(self, provider, stub):
+        stub.add_response("run_instances", {"Instances": [instance("i-a", "pending")]})
+        stub.add_response("describe_instances", describe(instance("i-a", "terminated")))
+        stub.add_response("terminate_instances", {"TerminatingInstances": []}, {"InstanceIds": ["i-a"]})
+
+        with pytest.raises(ResourceCreationError, match="unexpected state"):
+            provider.create_guests([guest("web1")], {"h1": "h1"})
+
+    def test_failed_later_group_terminates_launched_instances(self, provider, stub):
+        stub.add_response("run_instances", {"Instances": [instance("i-a", "pending")]})
+        stub.add_client_error("run_instances", "InsufficientInstanceCapacity")
+        stub.add_response("terminate_instances", {"TerminatingInstances": []}, {"InstanceIds": ["i-a"]})
+
+        with pytest.raises(ResourceCreationError, match="InsufficientInstanceCapacity"):
+            provider.create_guests([guest("web1"), guest("db", memory=4096)], {"h1": "h1"})
+
+        assert provider.get_resource_info("i-a") is None
+
+    def test_instances_that_cannot_be_terminated_stay_tracked(self, provider, stub):
+        stub.add_response("run_instances", {"Instances": [instance("i-a", "pending")]})
+        stub.add_client_error("run_instances", "InsufficientInstanceCapacity")
+        stub.add_client_error("terminate_instances", "RequestLimitExceeded")
+
+        with pytest.raises(ResourceCreationError):
+            provider.create_guests([guest("web1"), guest("db", memory=4096)], {"h1": "h1"})
+
+        assert provider.get_resource_info("i-a").status == ResourceStatus.ERROR
+        assert provider.get_resource_info("i-a").name == "web1"
+
+
+class TestBatchedStatus:
+
+    def test_status_uses_paginated_filter_describe(self, provider, stub):
+        for instance_id in ("i-a", "i-b", "i-gone"):
+            provider._register_resource(ResourceInfo(
+                resource_id=instance_id, resource_type="guest", name=instance_id,
+                status=ResourceStatus.ACTIVE, metadata={"instance_id": instance_id}
+            ))
+        stub.add_response("describe_vpcs", {"Vpcs": []}, {"VpcIds": ["vpc-1"]})
+        stub.add_response("describe_instances", describe(instance("i-a", "running"), next_token="t1"),
+                          id_filter("i-a", "i-b", "i-gone"))
+        stub.add_response("describe_instances", describe(instance("i-b", "stopping")),
+                          {**id_filter("i-a", "i-b", "i-gone"), "NextToken": "t1"})
+
+        status = provider.get_status(["h1", "i-a", "i-b", "i-gone", "unknown"])
+
+        assert status == {"h1": "active", "i-a": "active", "i-b": "creating",
+                          "i-gone": "not_found", "unknown": "not_found"}
+
+    def test_destroy_terminates_existing_in_one_call(self, provider, stub):
+        stub.add_response("describe_instances", describe(
+            instance("i-a", "running"), instance("i-b", "terminated")
+        ), id_filter("i-a", "i-b", "i-gone"))
+        stub.add_response("terminate_instances", {"TerminatingInstances": []}, {"InstanceIds": ["i-a"]})
+        stub.add_response("describe_instances", describe(), id_filter("i-a"))
+
+        provider.destroy_guests(["i-a", "i-b", "i-gone"])
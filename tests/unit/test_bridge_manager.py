@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+"""
+Tests for batched bridge plumbing in BridgeManager
+"""
+
+import os
+import sys
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.infrastructure.network.bridge_manager import BridgeConfig, BridgeManager
+from cyris.infrastructure.providers.base_provider import InfrastructureError
+
+
+LINK_SHOW = ["ip", "-o", "link", "show"]
+
+
+def completed(returncode=0, stdout="", stderr=""):
+    return Mock(returncode=returncode, stdout=stdout, stderr=stderr)
+
+
+def batches(run):
+    """Calls of ``run`` other than the link listing done while planning"""
+    return [call for call in run.call_args_list if call[0][0] != LINK_SHOW]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return BridgeManager(bridge_prefix="cr", config_dir=tmp_path)
+
+
+NETWORKS = {
+    "office": BridgeConfig(bridge_name="", network_cidr="10.1.0.0/24"),
+    "dmz": BridgeConfig(bridge_name="", network_cidr="10.2.0.0/24", gateway_ip="10.2.0.254",
+                        mtu=9000, stp_enabled=True),
+}
+
+
+class TestNetworkPlan:
+    """Dry-run compilation"""
+
+    def test_compiles_one_script_for_all_bridges(self, manager):
+        with patch("subprocess.run", return_value=completed()) as run:
+            plan = manager.create_range_network("7", NETWORKS, ports={"office": ["vnet0"]},
+                                                dry_run=True)
+        # Links are only listed
+        assert batches(run) == []
+
+        assert plan.bridge_names == ["cr-7-office", "cr-7-dmz"]
+        assert plan.commands == [
+            "link add name cr-7-office type bridge",
+            "addr add 10.1.0.1/24 dev cr-7-office",
+            "link set dev vnet0 master cr-7-office",
+            "link set dev cr-7-office up",
+            "link add name cr-7-dmz mtu 9000 type bridge stp_state 1 forward_delay 15 "
+            "hello_time 2 max_age 20",
+            "addr add 10.2.0.254/24 dev cr-7-dmz",
+            "link set dev cr-7-dmz up",
+        ]
+        assert plan.rollback_commands == ["link del cr-7-dmz", "link del cr-7-office"]
+        assert plan.script().endswith("link set dev cr-7-dmz up\n")
+        assert manager.list_bridges() == []
+
+    def test_rejects_invalid_plans(self, manager):
+        with pytest.raises(InfrastructureError, match="exceeds"):
+            manager.plan_range_network("range-with-long-id", NETWORKS)
+        with pytest.raises(InfrastructureError, match="unknown networks"):
+            manager.plan_range_network("7", NETWORKS, ports={"lab": ["vnet0"]})
+        with pytest.raises(InfrastructureError, match="Invalid CIDR"):
+            manager.plan_range_network("7", {"x": BridgeConfig("", "10.0.0.0/99")})
+
+    def test_rejects_bridges_already_on_the_host(self, manager):
+        links = completed(stdout="1: lo: <LOOPBACK>\n9: cr-7-dmz: <BROADCAST>\n")
+        with patch("subprocess.run", return_value=links) as run:
+            with pytest.raises(InfrastructureError, match="already exist on the host: cr-7-dmz"):
+                manager.create_range_network("7", NETWORKS)
+        assert batches(run) == []
+
+
+class TestApplyNetworkPlan:
+    """Single ip -batch application with rollback"""
+
+    def test_applies_in_one_process(self, manager, tmp_path):
+        with patch("subprocess.run", return_value=completed()) as run:
+            plan = manager.create_range_network("7", NETWORKS)
+
+        assert len(batches(run)) == 1
+        assert run.call_args[0][0] == ["ip", "-batch", "-"]
+        assert run.call_args[1]["input"] == plan.script()
+        assert {b.bridge_id for b in manager.list_bridges("7")} == {"cr-7-office", "cr-7-dmz"}
+        assert (tmp_path / "cr-7-dmz.json").exists()
+
+        with pytest.raises(InfrastructureError, match="already exists"):
+            manager.plan_range_network("7", NETWORKS)
+
+    def test_failure_rolls_back_bridges_created_before_it(self, manager):
+        failure = completed(1, stderr="RTNETLINK answers: File exists\nCommand failed -:4\n")
+        with patch("subprocess.run", side_effect=[completed(), failure, completed()]) as run:
+            with pytest.raises(InfrastructureError, match="link add name cr-7-dmz"):
+                manager.create_range_network("7", NETWORKS)
+
+        rollback = run.call_args_list[2]
+        assert rollback[0][0] == ["ip", "-force", "-batch", "-"]
+        # cr-7-dmz was not created by this batch, so it is left alone
+        assert rollback[1]["input"] == "link del cr-7-office\n"
+        assert manager.list_bridges() == []
+
+        # Nothing to undo when the first bridge fails
+        first = completed(1, stderr="Command failed -:1\n")
+        with patch("subprocess.run", side_effect=[completed(), first]) as run:
+            with pytest.raises(InfrastructureError):
+                manager.create_range_network("7", NETWORKS)
+        assert len(batches(run)) == 1
+
+    def test_create_bridge_uses_single_batch(self, manager):
+        with patch("subprocess.run", return_value=completed()) as run:
+            assert manager.create_bridge("7", "lab", BridgeConfig("", "10.3.0.0/24")) == "cr-7-lab"
+        assert len(batches(run)) == 1
+
+    def test_cleanup_range_deletes_in_one_batch(self, manager):
+        with patch("subprocess.run", return_value=completed()):
+            manager.create_range_network("7", NETWORKS)
+            manager.create_bridge("8", "lab", BridgeConfig("", "10.3.0.0/24"))
+
+        with patch("subprocess.run", return_value=completed()) as run:
+            assert manager.cleanup_range_bridges("7") == 2
+
+        run.assert_called_once()
+        assert sorted(run.call_args[1]["input"].splitlines()) == [
+            "link del cr-7-dmz", "link del cr-7-office"
+        ]
+        assert [b.bridge_id for b in manager.list_bridges()] == ["cr-8-lab"]
+
+        # Bridges still present after a partial failure stay registered
+        partial = completed(1, stderr="Command failed -:1\n")
+        links = completed(stdout="1: lo: <LOOPBACK>\n5: cr-8-lab: <BROADCAST>\n")
+        with patch("subprocess.run", side_effect=[partial, links]):
+            assert manager.cleanup_range_bridges("8") == 0
+        assert [b.bridge_id for b in manager.list_bridges()] == ["cr-8-lab"]
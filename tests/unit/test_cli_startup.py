@@ -0,0 +1,121 @@
+"""
+CLI startup import-time benchmark
+
+Guards the lazy-import fast path: read-only commands (``cyris list``,
+``cyris status``, ``config-show``) must not load libvirt, paramiko, boto3 or
+the range-creation services, and ``import cyris.cli.main`` must stay within an
+``-X importtime`` budget.
+
+The budget can be tuned for slow CI machines with
+``CYRIS_CLI_IMPORT_BUDGET_MS``.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parents[2] / "src"
+
+# Cumulative import time of ``cyris.cli.main`` (microseconds, best of 3)
+IMPORT_TIME_BUDGET_US = int(os.environ.get("CYRIS_CLI_IMPORT_BUDGET_MS", "400")) * 1000
+
+# Modules that metadata-only commands must never import
+HEAVY_MODULES = [
+    "libvirt",
+    "paramiko",
+    "boto3",
+    "rich.progress",
+    "cyris.infrastructure.providers.kvm_provider",
+    "cyris.infrastructure.providers.aws_provider",
+    "cyris.infrastructure.network.topology_manager",
+    "cyris.services.task_executor",
+    "cyris.services.gateway_service",
+    "cyris.core.sudo_manager",
+    "cyris.tools.ssh_manager",
+]
+
+
+def _import_profile(code: str, cwd: Path = None) -> Dict[str, int]:
+    """Run ``code`` under ``-X importtime`` and return {module: cumulative_us}"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=env, cwd=str(cwd) if cwd else None, timeout=60
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, timings = line.split(":", 1)
+        _self_us, cumulative_us, name = (part.strip() for part in timings.split("|"))
+        profile[name] = int(cumulative_us)
+    return profile
+
+
+def _write_config(tmp_path: Path) -> Path:
+    ranges_dir = tmp_path / "cyber_range"
+    ranges_dir.mkdir()
+    config_file = tmp_path / "config.yml"
+    config_file.write_text(
+        f"cyris_path: {tmp_path}\n"
+        f"cyber_range_dir: {ranges_dir}\n"
+        f"build_storage_dir: {tmp_path / 'builds'}\n"
+        f"vm_storage_dir: {tmp_path / 'vms'}\n"
+    )
+    return config_file
+
+
+class TestCLIStartup:
+    """Import-time guards for the CLI fast path"""
+
+    def test_cli_main_import_is_light(self):
+        """Importing the CLI entry point loads no heavy modules"""
+        profile = _import_profile("import cyris.cli.main")
+        loaded = [m for m in HEAVY_MODULES if m in profile]
+        assert loaded == []
+
+    def test_cli_main_import_time_budget(self):
+        """``import cyris.cli.main`` stays within the import-time budget"""
+        best = min(
+            _import_profile("import cyris.cli.main")["cyris.cli.main"]
+            for _ in range(3)
+        )
+        assert best <= IMPORT_TIME_BUDGET_US, (
+            f"cyris.cli.main import took {best / 1000:.1f} ms "
+            f"(budget {IMPORT_TIME_BUDGET_US / 1000:.0f} ms)"
+        )
+
+    @pytest.mark.parametrize("command", [["list"], ["list", "--all"], ["config-show"]])
+    def test_read_only_commands_skip_heavy_modules(self, tmp_path, command):
+        """Metadata-only commands never import provider or service modules"""
+        config_file = _write_config(tmp_path)
+        code = (
+            "from cyris.cli.main import main\n"
+            f"main(['-c', {str(config_file)!r}] + {command!r})\n"
+        )
+        profile = _import_profile(code, cwd=tmp_path)
+        loaded = [m for m in HEAVY_MODULES if m in profile]
+        assert loaded == []
+
+    def test_orchestrator_metadata_only_mode(self, tmp_path):
+        """Orchestrator builds no services until they are used"""
+        code = (
+            "from cyris.config.settings import CyRISSettings\n"
+            "from cyris.services.orchestrator import RangeOrchestrator\n"
+            f"s = CyRISSettings(cyris_path={str(tmp_path)!r}, cyber_range_dir={str(tmp_path / 'cr')!r})\n"
+            "o = RangeOrchestrator(s, provider_factory=lambda: 1/0)\n"
+            "assert o.is_metadata_only\n"
+            "assert o.list_ranges() == []\n"
+            "assert o.get_statistics()['total_ranges'] == 0\n"
+            "assert 'task_executor' not in vars(o)\n"
+        )
+        profile = _import_profile(code, cwd=tmp_path)
+        loaded = [m for m in HEAVY_MODULES if m in profile]
+        assert loaded == []
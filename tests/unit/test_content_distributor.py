@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+"""
+Tests for streaming parallel content distribution (copy_content)
+"""
+
+import os
+import subprocess
+import sys
+import tarfile
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.tools.content_distributor import ContentDistributor
+
+
+class LocalChannel:
+    def __init__(self, process):
+        self.process = process
+
+    def shutdown_write(self):
+        self.process.stdin.close()
+
+    def recv_exit_status(self):
+        return self.process.wait()
+
+
+class LocalStream:
+    def __init__(self, stream, process):
+        self.stream = stream
+        self.channel = LocalChannel(process)
+
+    def write(self, data):
+        self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+    def read(self):
+        return self.stream.read()
+
+
+class LocalClient:
+    """paramiko-like client running each exec locally, under a per-guest root"""
+
+    def __init__(self, root):
+        self.root = root
+        self.commands = []
+
+    def exec_command(self, command):
+        self.commands.append(command)
+        process = subprocess.Popen(["bash", "-c", command], stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        return (LocalStream(process.stdin, process), LocalStream(process.stdout, process),
+                LocalStream(process.stderr, process))
+
+
+@pytest.fixture
+def source(tmp_path):
+    src = tmp_path / "src" / "lab"
+    (src / "docs").mkdir(parents=True)
+    (src / "empty").mkdir()
+    (src / "README").write_text("readme")
+    (src / "docs" / "a.txt").write_text("a" * 1000)
+    (src / "docs" / "b.txt").write_text("b")
+    return src
+
+
+@pytest.fixture
+def guests(tmp_path):
+    clients = {f"10.0.0.{i}": LocalClient(tmp_path / f"guest{i}") for i in range(1, 5)}
+    return clients
+
+
+def targets(clients):
+    return [SimpleNamespace(hostname=host) for host in clients]
+
+
+class TestContentDistributor:
+
+    def test_fans_out_one_archive_to_all_guests(self, tmp_path, source, guests):
+        connects = []
+        lock = threading.Lock()
+
+        def factory(target):
+            with lock:
+                connects.append(target.hostname)
+            return guests[target.hostname]
+
+        distributor = ContentDistributor(factory, max_workers=4)
+        # Each guest gets its own destination directory on the local disk
+        results = {}
+        for host, client in guests.items():
+            results.update(distributor.distribute(str(source), str(client.root / "opt"),
+                                                  [SimpleNamespace(hostname=host)]))
+
+        for host, client in guests.items():
+            assert results[host].success
+            assert results[host].files_sent == 3
+            assert (client.root / "opt/lab/docs/a.txt").read_text() == "a" * 1000
+            assert (client.root / "opt/lab/empty").is_dir()
+            # One checksum listing and one tar extraction per guest
+            assert len(client.commands) == 2
+        # The whole tree was packed once and reused
+        assert len(distributor._bundles) == 1
+        distributor.close()
+
+    def test_content_is_owned_by_root_not_the_host_user(self, tmp_path, source, guests):
+        client = guests["10.0.0.1"]
+        distributor = ContentDistributor(lambda t: client)
+        distributor.distribute(str(source), str(client.root / "opt"), targets({"10.0.0.1": 0}))
+
+        with tarfile.open(next(iter(distributor._bundles.values()))) as tar:
+            assert {(m.uid, m.gid, m.uname, m.gname) for m in tar.getmembers()} == {(0, 0, "root", "root")}
+        assert "tar -x --no-same-owner" in client.commands[-1]
+        distributor.close()
+
+    def test_concurrent_guests_share_destination(self, tmp_path, source, guests):
+        dst = tmp_path / "shared"
+        distributor = ContentDistributor(lambda t: guests[t.hostname])
+
+        results = distributor.distribute(str(source), str(dst), targets(guests))
+
+        assert set(results) == set(guests)
+        assert all(r.success for r in results.values())
+        assert (dst / "lab/README").read_text() == "readme"
+        distributor.close()
+
+    def test_skips_unchanged_files(self, tmp_path, source, guests):
+        client = guests["10.0.0.1"]
+        dst = str(client.root / "opt")
+        distributor = ContentDistributor(lambda t: client)
+        target = [SimpleNamespace(hostname="10.0.0.1")]
+
+        assert distributor.distribute(str(source), dst, target)["10.0.0.1"].files_sent == 3
+
+        unchanged = distributor.distribute(str(source), dst, target)["10.0.0.1"]
+        assert unchanged.success and unchanged.files_sent == 0 and unchanged.files_skipped == 3
+        assert not client.commands[-1].startswith("mkdir")
+
+        (source / "docs" / "b.txt").write_text("changed")
+        (client.root / "opt/lab/README").write_text("tampered")
+        delta = distributor.distribute(str(source), dst, target)["10.0.0.1"]
+        assert delta.files_sent == 2 and delta.files_skipped == 1
+        assert (client.root / "opt/lab/docs/b.txt").read_text() == "changed"
+        assert (client.root / "opt/lab/README").read_text() == "readme"
+        distributor.close()
+
+    def test_edited_source_is_repacked(self, tmp_path, source, guests):
+        distributor = ContentDistributor(lambda t: guests[t.hostname])
+        first, second = (guests["10.0.0.1"], guests["10.0.0.2"])
+
+        distributor.distribute(str(source), str(first.root / "opt"), [SimpleNamespace(hostname="10.0.0.1")])
+        (source / "docs" / "a.txt").write_text("edited")
+        result = distributor.distribute(str(source), str(second.root / "opt"),
+                                        [SimpleNamespace(hostname="10.0.0.2")])["10.0.0.2"]
+
+        assert result.files_sent == 3
+        assert (second.root / "opt/lab/docs/a.txt").read_text() == "edited"
+        assert len(distributor._bundles) == 1
+        distributor.close()
+
+    def test_single_file_and_failures(self, tmp_path, source, guests):
+        client = guests["10.0.0.1"]
+
+        def factory(target):
+            if target.hostname == "10.0.0.2":
+                raise ConnectionError("unreachable")
+            return client
+
+        distributor = ContentDistributor(factory)
+        results = distributor.distribute(str(source / "README"), str(client.root / "etc"),
+                                         targets({"10.0.0.1": 0, "10.0.0.2": 0}))
+        assert results["10.0.0.1"].success
+        assert (client.root / "etc/README").read_text() == "readme"
+        assert not results["10.0.0.2"].success and "unreachable" in results["10.0.0.2"].error
+
+        missing = distributor.distribute(str(tmp_path / "nope"), "/tmp", targets({"10.0.0.1": 0}))
+        assert "doesn't exist" in missing["10.0.0.1"].error
+
+        # Extraction failures surface tar's exit status
+        blocker = client.root / "blocked"
+        blocker.write_text("not a directory")
+        failed = distributor.distribute(str(source), str(blocker), targets({"10.0.0.1": 0}))
+        assert not failed["10.0.0.1"].success
+        distributor.close()
+
+
+class TestCreationGraph:
+
+    def test_content_is_pushed_once_per_pair_before_tasks(self, tmp_path):
+        from unittest.mock import Mock
+        from cyris.config.settings import CyRISSettings
+        from cyris.services.orchestrator import RangeOrchestrator
+
+        orchestrator = RangeOrchestrator(CyRISSettings(cyris_path=tmp_path, cyber_range_dir=tmp_path / "ranges"),
+                                         infrastructure_provider=Mock())
+        executor = Mock()
+        executor.distribute_content.return_value = 2
+        executor.execute_guest_tasks.return_value = []
+        orchestrator.__dict__["task_executor"] = executor
+        orchestrator._range_resources["r1"] = {"hosts": [], "guests": ["vm-a", "vm-b", "vm-c"]}
+        orchestrator._get_vm_ip_by_name = lambda vm_name, max_wait_minutes=1: {
+            "vm-a": "10.0.0.1", "vm-b": "10.0.0.2", "vm-c": "10.0.0.3"}[vm_name]
+        copy = {"copy_content": {"src": "/lab", "dst": "/opt/lab"}}
+        guests = [SimpleNamespace(id="a", tasks=[copy]), SimpleNamespace(id="b", tasks=[copy]),
+                  SimpleNamespace(id="c", tasks=[{"add_account": {"account": "x", "passwd": "y"}}])]
+
+        scheduler = orchestrator._build_creation_graph(
+            "r1", guests, None, Mock(tags={}), Mock(), timings={"hosts": (0.0, 0.0), "guests": (0.0, 0.0)})
+        report = scheduler.run()
+
+        content = report.nodes["content:/lab,/opt/lab"]
+        assert content.deps == ["ip:a", "ip:b"]
+        assert "content:/lab,/opt/lab" in report.nodes["tasks:a"].deps
+        assert "content:/lab,/opt/lab" not in report.nodes["tasks:c"].deps
+        assert report.succeeded
+        executor.distribute_content.assert_called_once_with(
+            [(guests[0], "10.0.0.1"), (guests[1], "10.0.0.2")], pairs=[("/lab", "/opt/lab")])
+        assert report.nodes["tasks:a"].started_at >= content.finished_at
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the range creation journal and resumed creation
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.core.exceptions import CyRISVirtualizationError
+from cyris.services.creation_journal import (
+    JOURNAL_FILE, RANGE_RESOURCE, STEP_DOMAIN_DEFINED, STEP_GUEST_CREATED, STEP_HOSTS_CREATED,
+    STEP_IMAGE_BUILT, STEP_IP_ASSIGNED, CreationJournal
+)
+
+
+class TestCreationJournal:
+
+    def test_steps_survive_a_crash(self, tmp_path):
+        path = tmp_path / JOURNAL_FILE
+        journal = CreationJournal(path)
+        assert not journal.started
+
+        journal.start("42", ["desktop", "webserver"])
+        journal.mark(RANGE_RESOURCE, STEP_HOSTS_CREATED, ["host_1"])
+        assert not journal.has_progress
+        journal.mark("ubuntu-20.04_1_1024_10G", STEP_IMAGE_BUILT, "/builds/desktop.qcow2")
+        journal.mark("cyris-desktop", STEP_GUEST_CREATED, "desktop")
+        journal.mark("cyris-webserver", STEP_DOMAIN_DEFINED)
+        journal.mark("cyris-desktop", STEP_IP_ASSIGNED, "10.0.0.5")
+        # A crash while appending leaves a torn last line
+        with open(path, "a") as f:
+            f.write('{"resource": "cyris-webserver", "st')
+
+        reloaded = CreationJournal(path)
+        assert reloaded.started and reloaded.run["guests"] == ["desktop", "webserver"]
+        assert reloaded.data(RANGE_RESOURCE, STEP_HOSTS_CREATED) == ["host_1"]
+        assert reloaded.data("cyris-desktop", STEP_IP_ASSIGNED) == "10.0.0.5"
+        assert reloaded.resources(STEP_GUEST_CREATED) == {"cyris-desktop": "desktop"}
+        assert reloaded.vms() == ["cyris-desktop", "cyris-webserver"]
+        assert reloaded.has_progress and not reloaded.done("cyris-webserver", STEP_GUEST_CREATED)
+
+        # Records appended after the torn line survive the next reload
+        reloaded.mark("cyris-mail", STEP_GUEST_CREATED, "mail")
+        assert CreationJournal(path).vms() == ["cyris-desktop", "cyris-webserver", "cyris-mail"]
+
+        reloaded.clear()
+        assert not path.exists() and not CreationJournal(path).started
+
+
+class TestResumedCreation:
+
+    @pytest.fixture
+    def setup(self, tmp_path):
+        from cyris.domain.entities.guest import BaseVMType, Guest, OSType
+        from cyris.domain.entities.host import Host
+        from cyris.tools.range_benchmark import FakeEndpoints, build_orchestrator
+
+        endpoints = FakeEndpoints()
+        orchestrator = build_orchestrator(endpoints, tmp_path)
+        hosts = [Host(host_id="host_1", mgmt_addr="localhost", virbr_addr="192.168.122.1", account="cyuser")]
+        guests = [Guest(guest_id=guest_id, basevm_type=BaseVMType.KVM, basevm_host="host_1",
+                        basevm_config_file=f"/images/{guest_id}.xml", basevm_os_type=OSType.UBUNTU,
+                        tasks=[{"add_account": [{"account": "daniel", "passwd": "password1"}]}])
+                  for guest_id in ("desktop", "webserver", "firewall")]
+        topology = {"type": "custom", "networks": [{"name": "office", "members": ["desktop.eth0"]}]}
+
+        # The first creation fails once every VM has been built
+        topology_manager = orchestrator.topology_manager
+        create_topology = topology_manager.create_topology
+        failures = [RuntimeError("bridge br-office busy")]
+
+        def flaky_topology(*args):
+            if failures:
+                raise failures.pop()
+            return create_topology(*args)
+
+        topology_manager.create_topology = flaky_topology
+        with pytest.raises(CyRISVirtualizationError):
+            orchestrator.create_range("42", "Resume", "resume", hosts, guests, topology_config=topology)
+        return orchestrator, endpoints, hosts, guests, topology, tmp_path / "cyber_range" / "42" / JOURNAL_FILE
+
+    def test_failed_creation_keeps_its_vms(self, setup):
+        orchestrator, endpoints, hosts, guests, topology, journal_file = setup
+
+        assert endpoints.calls["create_guest"] == 3 and endpoints.calls["destroy_guest"] == 0
+        assert orchestrator.get_range("42").status.value == "error"
+        assert sorted(orchestrator.get_range_resources("42")["guests"]) == [
+            "cyris-42-desktop", "cyris-42-firewall", "cyris-42-webserver"]
+        assert len(CreationJournal(journal_file).resources(STEP_IP_ASSIGNED)) == 3
+        # Without --resume or --recreate the unfinished range is left alone
+        assert orchestrator.create_range("42", "Resume", "resume", hosts, guests, topology_config=topology) is None
+
+    def test_resume_continues_from_the_first_incomplete_step(self, setup):
+        orchestrator, endpoints, hosts, guests, topology, journal_file = setup
+        calls = dict(endpoints.calls)
+
+        metadata = orchestrator.create_range("42", "Resume", "resume", hosts, guests,
+                                             topology_config=topology, resume=True)
+
+        assert metadata.status.value == "active"
+        # Hosts, VMs and IPs come from the journal; only network and tasks run
+        for kind in ("create_host", "create_guest", "ip_lookup"):
+            assert endpoints.calls[kind] == calls.get(kind, 0)
+        assert orchestrator.get_range_resources("42")["guests"] == [
+            "cyris-42-desktop", "cyris-42-webserver", "cyris-42-firewall"]
+        assert not journal_file.exists()
+
+    def test_resume_rebuilds_only_vms_that_disappeared(self, setup):
+        orchestrator, endpoints, hosts, guests, topology, journal_file = setup
+        endpoints.domains.pop("cyris-42-webserver")
+
+        metadata = orchestrator.create_range("42", "Resume", "resume", hosts, guests,
+                                             topology_config=topology, resume=True)
+
+        assert metadata.status.value == "active"
+        assert endpoints.calls["create_guest"] == 4
+        assert endpoints.calls["destroy_guest"] == 0
+
+    def test_recreate_discards_the_unfinished_creation(self, setup):
+        orchestrator, endpoints, hosts, guests, topology, journal_file = setup
+
+        metadata = orchestrator.create_range("42", "Resume", "resume", hosts, guests,
+                                             topology_config=topology, recreate=True)
+
+        assert metadata.status.value == "active"
+        assert endpoints.calls["destroy_guest"] == 3 and endpoints.calls["create_guest"] == 6
+        assert not journal_file.exists()
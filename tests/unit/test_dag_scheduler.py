@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the dependency-aware DAG scheduler used during range creation
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.core.dag_scheduler import DagScheduler, NodeStatus
+
+
+def sleeper(seconds, value=None, log=None, name=None):
+    def step(inputs):
+        if log is not None:
+            log.append(("start", name))
+        time.sleep(seconds)
+        if log is not None:
+            log.append(("end", name))
+        return value
+    return step
+
+
+class TestDagScheduler:
+
+    def test_steps_start_as_soon_as_inputs_are_ready(self):
+        log = []
+        scheduler = DagScheduler()
+        scheduler.add("network", sleeper(0.3, log=log, name="network"), resource="network")
+        scheduler.add("ip:a", sleeper(0.05, "10.0.0.1", log, "ip:a"), resource="ip")
+        scheduler.add("ip:b", sleeper(0.4, "10.0.0.2", log, "ip:b"), resource="ip")
+        scheduler.add("tasks:a", lambda inputs: inputs, deps=["ip:a", "network"], resource="tasks")
+        scheduler.add("tasks:b", lambda inputs: inputs, deps=["ip:b", "network"], resource="tasks")
+
+        report = scheduler.run()
+
+        assert report.succeeded
+        assert report.nodes["tasks:a"].result == {"ip:a": "10.0.0.1", "network": None}
+        # tasks:a ran once network finished, while ip:b was still probing
+        assert report.nodes["tasks:a"].finished_at < report.nodes["ip:b"].finished_at
+        assert report.critical_path == ["ip:b", "tasks:b"]
+        assert report.duration < 0.6
+
+    def test_concurrency_is_bounded_per_resource(self):
+        running = {"ip": 0, "tasks": 0}
+        peak = {"ip": 0, "tasks": 0}
+        lock = threading.Lock()
+
+        def probe(resource):
+            def step(inputs):
+                with lock:
+                    running[resource] += 1
+                    peak[resource] = max(peak[resource], running[resource])
+                time.sleep(0.05)
+                with lock:
+                    running[resource] -= 1
+            return step
+
+        scheduler = DagScheduler(concurrency={"ip": 2}, default_concurrency=8)
+        for i in range(6):
+            scheduler.add(f"ip:{i}", probe("ip"), resource="ip")
+            scheduler.add(f"tasks:{i}", probe("tasks"), deps=[f"ip:{i}"], resource="tasks")
+
+        report = scheduler.run()
+
+        assert report.succeeded
+        assert peak["ip"] == 2
+        assert sum(node.queued > 0.03 for name, node in report.nodes.items() if name.startswith("ip:")) >= 4
+
+    def test_failure_skips_only_dependents(self):
+        def boom(inputs):
+            raise RuntimeError("virsh timed out")
+
+        scheduler = DagScheduler()
+        scheduler.add("ip:a", boom)
+        scheduler.add("ip:b", lambda inputs: "10.0.0.2")
+        scheduler.add("tasks:a", lambda inputs: 1, deps=["ip:a"])
+        scheduler.add("firewall:a", lambda inputs: 1, deps=["tasks:a"])
+        scheduler.add("tasks:b", lambda inputs: 2, deps=["ip:b"])
+
+        report = scheduler.run()
+
+        assert not report.succeeded
+        assert [n.name for n in report.failed] == ["ip:a"]
+        assert isinstance(report.nodes["ip:a"].exception, RuntimeError)
+        assert {n.name for n in report.skipped} == {"tasks:a", "firewall:a"}
+        assert report.nodes["tasks:b"].status == NodeStatus.SUCCEEDED
+
+    def test_recorded_steps_feed_the_report(self):
+        now = time.time()
+        scheduler = DagScheduler()
+        scheduler.record("guests", now - 2.0, now - 0.5, resource="provider")
+        scheduler.add("ip:a", lambda inputs: "10.0.0.1", deps=["guests"], resource="ip")
+
+        report = scheduler.run()
+
+        assert report.critical_path == ["guests", "ip:a"]
+        assert report.duration >= 2.0
+        data = report.to_dict()
+        assert data["critical_path"][0]["start"] == 0.0
+        assert data["resource_time"]["provider"] == pytest.approx(1.5)
+        assert "guests" in report.format_critical_path()
+
+    def test_rejects_invalid_graphs(self):
+        scheduler = DagScheduler()
+        scheduler.add("a", lambda inputs: None, deps=["b"])
+        scheduler.add("b", lambda inputs: None, deps=["a"])
+        with pytest.raises(ValueError, match="cycle"):
+            scheduler.run()
+
+        scheduler = DagScheduler()
+        scheduler.add("a", lambda inputs: None, deps=["missing"])
+        with pytest.raises(ValueError, match="unknown"):
+            scheduler.run()
+        with pytest.raises(ValueError, match="Duplicate"):
+            scheduler.add("a", lambda inputs: None)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the parsed domain model and its per-UUID cache
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.infrastructure.providers.domain_model import DomainModel, DomainModelCache
+
+UUID = "6f2c1d3e-8a41-4b8e-9d0c-2f4a5b6c7d8e"
+URI = "qemu:///system"
+
+DOMAIN_XML = f"""
+<domain type='kvm'>
+  <name>cyris-12-desktop</name>
+  <uuid>{UUID}</uuid>
+  <memory unit='GiB'>2</memory>
+  <currentMemory unit='MiB'>1536</currentMemory>
+  <vcpu placement='static'>2</vcpu>
+  <devices>
+    <disk type='file' device='disk'>
+      <driver name='qemu' type='qcow2'/>
+      <source file='/var/lib/cyris/12/desktop.qcow2'/>
+      <target dev='vda' bus='virtio'/>
+    </disk>
+    <disk type='file' device='cdrom'>
+      <target dev='hdc' bus='ide'/>
+      <readonly/>
+    </disk>
+    <interface type='bridge'>
+      <mac address='52:54:00:aa:bb:01'/>
+      <source bridge='br-office'/>
+      <target dev='vnet3'/>
+      <model type='virtio'/>
+    </interface>
+    <interface type='network'>
+      <mac address='52:54:00:aa:bb:02'/>
+      <source network='default' bridge='virbr0'/>
+      <ip address='192.168.122.40' prefix='24'/>
+    </interface>
+  </devices>
+</domain>
+"""
+
+
+class FakeDomain:
+
+    def __init__(self, xml):
+        self.xml = xml
+        self.xml_calls = 0
+
+    def UUIDString(self):
+        return UUID
+
+    def XMLDesc(self, flags=0):
+        self.xml_calls += 1
+        return self.xml
+
+
+class TestDomainModel:
+
+    def test_parses_devices_and_resources(self):
+        model = DomainModel.from_xml(DOMAIN_XML)
+
+        assert (model.name, model.uuid, model.vcpus) == ("cyris-12-desktop", UUID, 2)
+        assert model.memory_kib == 2 * 1024 ** 2
+        assert model.current_memory_kib == 1536 * 1024
+        assert model.macs == ("52:54:00:aa:bb:01", "52:54:00:aa:bb:02")
+        assert model.bridges == ("br-office", "virbr0")
+        assert model.static_ips == ("192.168.122.40",)
+
+        office, default = model.interfaces
+        assert (office.interface_type, office.target, office.model) == ("bridge", "vnet3", "virtio")
+        assert (default.network, default.target) == ("default", None)
+
+        disk, cdrom = model.disks
+        assert (disk.source, disk.driver_type, disk.bus, disk.readonly) == \
+            ("/var/lib/cyris/12/desktop.qcow2", "qcow2", "virtio", False)
+        assert (cdrom.device_type, cdrom.source, cdrom.driver_type, cdrom.readonly) == \
+            ("cdrom", "", "raw", True)
+
+    def test_models_are_slotted(self):
+        model = DomainModel.from_xml(DOMAIN_XML)
+        for obj in (model, model.interfaces[0], model.disks[0]):
+            assert not hasattr(obj, "__dict__")
+            with pytest.raises(AttributeError):
+                obj.extra = 1
+
+
+class TestDomainModelCache:
+
+    def test_unchanged_xml_is_not_reparsed(self):
+        cache = DomainModelCache()
+        domain = FakeDomain(DOMAIN_XML)
+
+        first = cache.for_domain(domain, URI)
+        assert cache.for_domain(domain, URI) is first
+        assert cache.stats["parses"] == 1 and cache.stats["revalidated"] == 1
+
+        domain.xml = DOMAIN_XML.replace("br-office", "br-dmz")
+        assert cache.for_domain(domain, URI).bridges == ("br-dmz", "virbr0")
+        assert cache.stats["parses"] == 2
+        assert domain.xml_calls == 3
+
+    def test_watched_uri_is_served_from_memory_until_invalidated(self):
+        cache = DomainModelCache()
+        domain = FakeDomain(DOMAIN_XML)
+        cache.set_watching(URI, True)
+
+        model = cache.for_domain(domain, URI)
+        for _ in range(5):
+            assert cache.for_domain(domain, URI) is model
+        assert domain.xml_calls == 1 and cache.stats["hits"] == 5
+
+        # Other connections are still checked against the XML
+        cache.for_domain(domain, "qemu+ssh://host2/system")
+        assert domain.xml_calls == 2
+
+        # A define/undefine event drops the entry
+        domain.xml = DOMAIN_XML.replace("<vcpu placement='static'>2", "<vcpu placement='static'>4")
+        cache.invalidate(UUID)
+        assert cache.for_domain(domain, URI).vcpus == 4
+
+    def test_losing_the_event_subscription_clears_models(self):
+        cache = DomainModelCache()
+        cache.set_watching(URI, True)
+        cache.for_domain(FakeDomain(DOMAIN_XML), URI)
+        assert len(cache) == 1
+
+        cache.set_watching(URI, False)
+        assert len(cache) == 0 and not cache.is_watching(URI)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the exec gateway: per-call-site subprocess accounting, cached tool
+checks and the ``cyris debug exec-stats`` command
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+from click.testing import CliRunner
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.core import exec_gateway
+from cyris.core.exec_gateway import SiteStats, diff_stats, load_stats, merge_stats, save_stats
+
+
+def sites_since(before, site=None):
+    stats = diff_stats(exec_gateway.snapshot(), before)
+    return {(s["program"], s["routed"]): s for s in stats["sites"]
+            if site is None or s["site"].endswith(site)}
+
+
+class TestAccounting:
+
+    def test_calls_are_counted_per_site_and_program(self):
+        before = exec_gateway.snapshot()
+
+        def probe_guests():
+            exec_gateway.run(["true"])
+            exec_gateway.run(["env", "LC_ALL=C", "timeout", "5", "false"])
+            exec_gateway.run("exit 3", shell=True)
+            with pytest.raises(subprocess.TimeoutExpired):
+                exec_gateway.run(["sleep", "2"], timeout=0.05)
+
+        probe_guests()
+
+        sites = sites_since(before, ":probe_guests")
+        assert sites[("true", True)]["calls"] == 1 and sites[("true", True)]["failures"] == 0
+        # env/timeout wrappers are attributed to the tool they run
+        assert sites[("false", True)]["failures"] == 1
+        assert sites[("exit", True)]["failures"] == 1
+        sleep = sites[("sleep", True)]
+        assert sleep["timeouts"] == 1 and sleep["total_s"] >= 0.05
+        assert sum(sleep["histogram"]) == 1
+        assert sites[("true", True)]["site"] == f"{__name__}:probe_guests"
+
+    def test_streamed_processes_are_counted_when_waited_for(self):
+        exec_gateway.enable_accounting()
+        before = exec_gateway.snapshot()
+
+        def stream_chunks():
+            process = exec_gateway.popen(["cat"], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+            process.communicate(b"chunk")
+            stalled = exec_gateway.popen(["sleep", "30"])
+            with pytest.raises(subprocess.TimeoutExpired):
+                stalled.wait(timeout=0.05)
+            stalled.expire()
+
+        stream_chunks()
+
+        sites = sites_since(before, ":stream_chunks")
+        assert set(sites) == {("cat", True), ("sleep", True)}
+        assert sites[("cat", True)]["calls"] == 1 and sites[("cat", True)]["failures"] == 0
+        assert sites[("sleep", True)]["calls"] == 1 and sites[("sleep", True)]["timeouts"] == 1
+
+    def test_processes_outside_the_gateway_are_attributed(self):
+        exec_gateway.enable_accounting()
+        before = exec_gateway.snapshot()
+
+        def legacy_helper():
+            subprocess.run(["echo", "x"], capture_output=True)
+            os.system("true")
+
+        legacy_helper()
+
+        sites = sites_since(before, ":legacy_helper")
+        assert sites[("echo", False)]["calls"] == 1
+        assert sites[("true", False)]["calls"] == 1
+        assert not any(routed for _, routed in sites)
+
+    def test_tool_checks_are_cached(self, monkeypatch):
+        lookups = []
+        monkeypatch.setattr(exec_gateway.shutil, "which", lambda tool: lookups.append(tool) or f"/usr/bin/{tool}")
+        exec_gateway.clear_tool_cache()
+        before = exec_gateway.snapshot()
+
+        assert exec_gateway.has_tool("parallel-ssh")
+        assert exec_gateway.which("parallel-ssh") == "/usr/bin/parallel-ssh"
+        assert lookups == ["parallel-ssh"]
+
+        probes = []
+        for _ in range(3):
+            assert exec_gateway.cached_check("virsh version", lambda: probes.append(1) or True)
+        assert probes == [1]
+
+        cache = diff_stats(exec_gateway.snapshot(), before)["cache"]
+        assert cache["which parallel-ssh"] == {"hits": 1, "misses": 1}
+        assert cache["virsh version"] == {"hits": 2, "misses": 1}
+        exec_gateway.clear_tool_cache()
+
+    def test_parallel_ssh_check_does_not_fork(self):
+        from cyris.tools.ssh_manager import SSHManager
+
+        exec_gateway.enable_accounting()
+        manager = SSHManager()
+        before = exec_gateway.total_processes()
+        for _ in range(5):
+            manager._has_parallel_ssh()
+        assert exec_gateway.total_processes() == before
+
+
+    def test_system_parallel_ssh_is_routed(self, monkeypatch, tmp_path):
+        from cyris.tools.ssh_manager import SSHManager
+
+        monkeypatch.setattr(subprocess, "run", lambda *args, **kwargs: subprocess.CompletedProcess(
+            args[0], 0, stdout="[1] 10:00:00 [SUCCESS] 10.0.0.1\n", stderr=""))
+        before = exec_gateway.snapshot()
+        SSHManager()._execute_system_parallel_ssh(["10.0.0.1"], "root", "true", 5, "probe")
+
+        sites = sites_since(before, ":_execute_system_parallel_ssh")
+        assert sites[("parallel-ssh", True)]["calls"] == 1
+
+
+class TestPersistence:
+
+    def test_merge_diff_and_files(self, tmp_path):
+        first = SiteStats("cyris.tools.vm_ip_manager:_get_ips_via_arp", "arp")
+        first.record(0.004)
+        second = SiteStats("cyris.tools.vm_ip_manager:_get_ips_via_arp", "arp")
+        second.record(0.2, failed=True)
+        one = {"version": 1, "since": "2026-01-01T00:00:00", "sites": [first.to_dict()], "cache": {}}
+        two = {"version": 1, "since": "2026-02-01T00:00:00", "sites": [second.to_dict()],
+               "cache": {"which virsh": {"hits": 3, "misses": 1}}}
+
+        merged = merge_stats(one, two)
+        arp = SiteStats.from_dict(merged["sites"][0])
+        assert (arp.calls, arp.failures) == (2, 1)
+        assert arp.percentile(0.5) == 0.005 and arp.percentile(1.0) == 0.5
+        assert merged["since"] == "2026-01-01T00:00:00"
+        assert diff_stats(merged, one)["sites"][0]["calls"] == 1
+
+        path = tmp_path / exec_gateway.STATS_FILE
+        save_stats(path, one)
+        save_stats(path, two)
+        assert load_stats(path)["sites"][0]["calls"] == 2
+        assert load_stats(tmp_path / "missing.json")["sites"] == []
+
+    def test_processes_saving_together_keep_all_counts(self, tmp_path):
+        site = SiteStats("cyris.tools.ssh_manager:_execute_system_parallel_ssh", "parallel-ssh")
+        site.record(0.01)
+        stats = {"version": 1, "since": None, "sites": [site.to_dict()], "cache": {}}
+        path = tmp_path / exec_gateway.STATS_FILE
+
+        children = []
+        for _ in range(8):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    for _ in range(10):
+                        save_stats(path, stats)
+                finally:
+                    os._exit(0)
+            children.append(pid)
+        for pid in children:
+            os.waitpid(pid, 0)
+
+        assert load_stats(path)["sites"][0]["calls"] == 80
+
+
+class TestExecStatsCommand:
+
+    @pytest.fixture
+    def config(self, tmp_path):
+        ranges = tmp_path / "cyber_range"
+        (ranges / "12" / "logs").mkdir(parents=True)
+        config = tmp_path / "config.yml"
+        config.write_text(f"cyber_range_dir: {ranges}\ncyris_path: {tmp_path}\n")
+
+        virsh = SiteStats("cyris.services.orchestrator:_wait_for_vm_readiness", "virsh")
+        for _ in range(40):
+            virsh.record(0.03)
+        ping = SiteStats("cyris.infrastructure.providers.kvm_provider:_get_ip_from_bridge_scan", "ping")
+        ping.record(1.0, failed=True)
+        keygen = SiteStats("cyris.tools.ssh_manager:generate_ssh_keypair", "ssh-keygen", routed=False)
+        keygen.record(None)
+        stats = {"version": 1, "since": "2026-10-01T09:00:00",
+                 "sites": [ping.to_dict(), virsh.to_dict(), keygen.to_dict()],
+                 "cache": {"which parallel-ssh": {"hits": 9, "misses": 1}}}
+        save_stats(ranges / exec_gateway.STATS_FILE, stats, merge=False)
+        save_stats(ranges / "12" / "logs" / exec_gateway.RANGE_STATS_FILE,
+                   {**stats, "sites": [virsh.to_dict()]}, merge=False)
+        return config
+
+    def invoke(self, *args):
+        from cyris.cli.main import cli
+        return CliRunner().invoke(cli, list(args))
+
+    def test_shows_fork_heavy_sites_first(self, config):
+        result = self.invoke("-c", str(config), "debug", "exec-stats")
+        assert result.exit_code == 0, result.output
+        assert "42 processes from 3 call sites" in result.output
+        # call sites are ordered by the number of processes they started
+        assert result.output.index("virsh") < result.output.index("ping") < result.output.index("ssh-keygen *")
+        assert "By program: virsh 40, ping 1, ssh-keygen 1" in result.output
+        assert "9 of 10 answered from cache" in result.output
+
+    def test_range_json_and_reset(self, config):
+        result = self.invoke("-c", str(config), "debug", "exec-stats", "12", "--json")
+        assert result.exit_code == 0
+        assert '"calls": 40' in result.output and "ping" not in result.output
+
+        assert self.invoke("-c", str(config), "debug", "exec-stats", "99").exit_code == 1
+        assert self.invoke("-c", str(config), "debug", "exec-stats", "--reset").exit_code == 0
+        assert self.invoke("-c", str(config), "debug", "exec-stats").exit_code == 1
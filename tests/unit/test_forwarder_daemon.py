@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the port forwarder daemon and its client
+"""
+
+import os
+import socket
+import sys
+import tempfile
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.core.exceptions import TunnelError
+from cyris.infrastructure.network.forwarder_daemon import ForwarderClient, default_socket_path
+
+
+@pytest.fixture
+def echo_server():
+    """Threaded TCP echo server on an ephemeral port"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+
+    def serve(conn):
+        with conn:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    break
+                conn.sendall(data)
+
+    def accept():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=serve, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    yield server.getsockname()[1]
+    server.close()
+
+
+@pytest.fixture
+def client():
+    # Short directory: unix socket paths are limited to ~100 bytes
+    with tempfile.TemporaryDirectory(prefix="cyris-fwd-") as directory:
+        client = ForwarderClient(default_socket_path(directory))
+        yield client
+        client.shutdown()
+
+
+def echo(port, payload):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as conn:
+        conn.sendall(payload)
+        conn.shutdown(socket.SHUT_WR)
+        data = b""
+        while True:
+            chunk = conn.recv(65536)
+            if not chunk:
+                return data
+            data += chunk
+
+
+class TestForwarderDaemon:
+    """Daemon start-up, forwarding across clients and range teardown"""
+
+    def test_calls_without_daemon_do_not_start_one(self, client):
+        assert client.close_range(1) == 0
+        assert client.close("t1") is False
+        assert client.stats("t1") is None
+        assert not os.path.exists(client.socket_path)
+
+    def test_open_starts_daemon_and_reports_bound_port(self, client, echo_server):
+        port = client.open("t1", 0, "127.0.0.1", echo_server, range_id=7,
+                           listen_host="127.0.0.1")
+
+        assert port != 0
+        assert echo(port, b"hello") == b"hello"
+        stats = client.stats("t1")
+        assert stats.listen_port == port
+        assert stats.bytes_to_target == 5
+
+    def test_tunnels_outlive_the_client_that_opened_them(self, client, echo_server):
+        client.open("a1", 0, "127.0.0.1", echo_server, range_id=1, listen_host="127.0.0.1")
+        client.open("a2", 0, "127.0.0.1", echo_server, range_id=1, listen_host="127.0.0.1")
+        kept = client.open("b1", 0, "127.0.0.1", echo_server, range_id=2,
+                           listen_host="127.0.0.1")
+
+        # A later CLI process only knows the socket path
+        other = ForwarderClient(client.socket_path)
+        assert other.range_tunnels(1) == ["a1", "a2"]
+        assert other.close_range(1) == 2
+        assert other.range_tunnels(1) == []
+        assert echo(kept, b"still up") == b"still up"
+
+    def test_errors_are_raised_as_tunnel_errors(self, client, echo_server):
+        client.open("t1", 0, "127.0.0.1", echo_server, listen_host="127.0.0.1")
+
+        with pytest.raises(TunnelError, match="already exists"):
+            client.open("t1", 0, "127.0.0.1", echo_server, listen_host="127.0.0.1")
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+"""
+Tests for chunk-deduplicated image distribution, with directories as hosts
+"""
+
+import hashlib
+import os
+import struct
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.infrastructure.image_distribution import (
+    CHUNK_DIR, QCOW2_MAGIC, DistributionTarget, ImageDistributor, RateLimiter, backing_file, build_manifest
+)
+
+CHUNK = 64 * 1024
+
+
+def write_image(path, chunks):
+    """Image made of CHUNK-sized blocks filled with the given byte values"""
+    with open(path, "wb") as f:
+        for value in chunks:
+            f.write(os.urandom(CHUNK) if value is None else bytes([value]) * CHUNK)
+        f.write(b"tail")
+    return path
+
+
+def sha256(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def hosts(tmp_path, count=3):
+    return [DistributionTarget.directory(tmp_path / f"host{i}", "images/base.qcow2") for i in range(count)]
+
+
+def test_image_reaches_every_host_verified(tmp_path):
+    image = write_image(tmp_path / "base.qcow2", [None, 0, 0, None, 7])
+    targets = hosts(tmp_path)
+
+    report = ImageDistributor(chunk_size=CHUNK).distribute(image, targets)
+
+    assert report.succeeded, report.to_dict()
+    for target in targets:
+        assert sha256(target.path) == sha256(image)
+        result = report.results[target.name]
+        assert result.sha256 == sha256(image)
+        # The two zero chunks are sent once
+        assert (result.chunks_total, result.chunks_sent) == (6, 5)
+
+
+def test_only_changed_chunks_are_sent_again(tmp_path):
+    image = write_image(tmp_path / "base.qcow2", [None, None, None, None])
+    targets = hosts(tmp_path, count=2)
+    distributor = ImageDistributor(chunk_size=CHUNK)
+    first = distributor.distribute(image, targets)
+
+    with open(image, "r+b") as f:
+        f.seek(2 * CHUNK)
+        f.write(b"rebuilt")
+    second = distributor.distribute(image, targets)
+
+    assert second.succeeded
+    assert all(r.chunks_sent == 1 for r in second.results.values())
+    assert second.bytes_sent < first.bytes_sent / 3
+    for target in targets:
+        assert sha256(target.path) == sha256(image)
+
+
+def test_corrupt_chunk_on_host_is_sent_again(tmp_path):
+    image = write_image(tmp_path / "base.qcow2", [None, None])
+    target = hosts(tmp_path, count=1)[0]
+    distributor = ImageDistributor(chunk_size=CHUNK)
+    distributor.distribute(image, [target])
+
+    os.unlink(target.path)
+    stored = next(p for p in Path(target.chunk_dir).rglob("*") if p.is_file())
+    stored.write_bytes(b"garbage")
+
+    result = distributor.distribute(image, [target]).results[target.name]
+    assert result.ok, result.error
+    assert result.chunks_sent == 1
+    assert sha256(target.path) == sha256(image)
+
+
+def test_failed_host_does_not_stop_others(tmp_path):
+    image = write_image(tmp_path / "base.qcow2", [None])
+    good = hosts(tmp_path, count=1)[0]
+    blocked = tmp_path / "blocked"
+    blocked.write_text("not a directory")
+    bad = DistributionTarget.directory(blocked, "images/base.qcow2")
+
+    report = ImageDistributor(chunk_size=CHUNK).distribute(image, [good, bad])
+
+    assert report.results[good.name].ok
+    assert [r.target for r in report.failed] == [bad.name]
+    assert not report.succeeded
+
+
+def test_stalled_transfer_is_killed(tmp_path):
+    class StalledTarget(DistributionTarget):
+        def agent_command(self, *args):
+            if args[0] == "receive":
+                return [sys.executable, "-c", "import time; time.sleep(60)"]
+            return super().agent_command(*args)
+
+    image = write_image(tmp_path / "base.qcow2", [None, None, None])
+    target = StalledTarget(**vars(hosts(tmp_path, count=1)[0]))
+
+    report = ImageDistributor(chunk_size=CHUNK, timeout=0.5).distribute(image, [target])
+
+    result = report.results[target.name]
+    assert not result.ok
+    assert "no progress" in result.error
+    assert report.duration < 30
+
+
+def test_manifest_is_reused_until_image_changes(tmp_path):
+    image = write_image(tmp_path / "base.qcow2", [None, None])
+    first = build_manifest(image, CHUNK)
+    assert build_manifest(image, CHUNK) == first
+
+    write_image(image, [None, None])
+    assert build_manifest(image, CHUNK).sha256 != first.sha256
+    assert CHUNK_DIR not in str(image)
+
+
+def test_overlay_is_flattened_before_distribution(tmp_path):
+    template = write_image(tmp_path / "template.qcow2", [None, None])
+    overlay = tmp_path / "desktop.qcow2"
+    name = str(template).encode()
+    overlay.write_bytes(QCOW2_MAGIC + struct.pack(">IQI", 3, 512, len(name)) + bytes(492) + name)
+    assert backing_file(overlay) == str(template)
+    assert backing_file(template) is None
+    run = subprocess.run
+
+    def fake_run(cmd, **kwargs):
+        if cmd[:2] == ["qemu-img", "convert"]:
+            # The standalone image carries the template's data
+            Path(cmd[-1]).write_bytes(template.read_bytes())
+            return subprocess.CompletedProcess(cmd, 0, "", "")
+        return run(cmd, **kwargs)
+
+    target = hosts(tmp_path, count=1)[0]
+    with patch("subprocess.run", side_effect=fake_run):
+        report = ImageDistributor(chunk_size=CHUNK).distribute(overlay, [target])
+
+    assert report.succeeded, report.to_dict()
+    assert sha256(target.path) == sha256(template)
+    # The flattened copy is not left behind
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_file()) == ["desktop.qcow2", "template.qcow2"]
+
+
+def test_unused_chunks_are_pruned(tmp_path):
+    old = write_image(tmp_path / "old.qcow2", [None, None])
+    new = write_image(tmp_path / "new.qcow2", [None, 0])
+    target = hosts(tmp_path, count=1)[0]
+    distributor = ImageDistributor(chunk_size=CHUNK, chunk_ttl=3600)
+    distributor.distribute(old, [target])
+    for chunk in Path(target.chunk_dir).rglob("*"):
+        if chunk.is_file():
+            os.utime(chunk, (0, 0))
+
+    assert distributor.distribute(new, [target]).succeeded
+
+    stored = {p.name for p in Path(target.chunk_dir).rglob("*") if p.is_file()}
+    assert stored == set(build_manifest(new, CHUNK).chunks)
+
+
+def test_rate_limiter_paces_to_bandwidth():
+    now = [0.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    limiter = RateLimiter(1000, clock=lambda: now[0], sleep=sleep)
+    for _ in range(5):
+        limiter.consume(1000)
+
+    # One second of burst, then one second per 1000 bytes
+    assert sum(slept) == 4
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+
+"""
+Tests for range baseline snapshots and ``cyris reset``
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.infrastructure.providers.libvirt_snapshots import (
+    BASELINE_SNAPSHOT, VIR_DOMAIN_SNAPSHOT_CREATE_ATOMIC, VIR_ERR_NO_DOMAIN_SNAPSHOT, SnapshotManager
+)
+from cyris.infrastructure.providers.libvirt_teardown import VIR_ERR_NO_DOMAIN
+
+
+class FakeLibvirtError(Exception):
+
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+    def get_error_code(self):
+        return self.code
+
+
+class FakeSnapshot:
+
+    def __init__(self, domain, name, state):
+        self.domain = domain
+        self.name = name
+        self.state = state
+
+    def delete(self, flags):
+        self.domain.snapshots.pop(self.name)
+
+
+class FakeDomain:
+
+    def __init__(self, name):
+        self.name = name
+        self.state = "booted"
+        self.snapshots = {}
+        self.created = []
+
+    def snapshotCreateXML(self, xml, flags):
+        assert f"<name>{BASELINE_SNAPSHOT}</name>" in xml and flags == VIR_DOMAIN_SNAPSHOT_CREATE_ATOMIC
+        assert BASELINE_SNAPSHOT not in self.snapshots
+        self.snapshots[BASELINE_SNAPSHOT] = FakeSnapshot(self, BASELINE_SNAPSHOT, self.state)
+        self.created.append(self.state)
+
+    def snapshotLookupByName(self, name, flags):
+        if name not in self.snapshots:
+            raise FakeLibvirtError(f"no snapshot {name}", VIR_ERR_NO_DOMAIN_SNAPSHOT)
+        return self.snapshots[name]
+
+    def revertToSnapshot(self, snapshot, flags):
+        self.state = snapshot.state
+
+
+class FakeConnection:
+
+    def __init__(self, *names):
+        self.domains = {name: FakeDomain(name) for name in names}
+
+    def lookupByName(self, name):
+        if name not in self.domains:
+            raise FakeLibvirtError(f"no domain {name}", VIR_ERR_NO_DOMAIN)
+        return self.domains[name]
+
+
+class TestSnapshotManager:
+
+    def test_take_replaces_and_revert_restores(self):
+        conn = FakeConnection("cyris-desktop", "cyris-webserver")
+        manager = SnapshotManager(lambda: conn, max_workers=2)
+
+        report = manager.take(["cyris-desktop", "cyris-webserver", "cyris-desktop"], description="range 42")
+        assert report.succeeded and sorted(report.domains) == ["cyris-desktop", "cyris-webserver"]
+
+        conn.domains["cyris-desktop"].state = "configured"
+        assert manager.take(["cyris-desktop"]).succeeded
+        assert conn.domains["cyris-desktop"].created == ["booted", "configured"]
+
+        conn.domains["cyris-desktop"].state = "compromised"
+        conn.domains["cyris-webserver"].state = "compromised"
+        report = manager.revert(["cyris-desktop", "cyris-webserver"])
+        assert report.summary() == {"reverted": 2}
+        assert conn.domains["cyris-desktop"].state == "configured"
+        assert conn.domains["cyris-webserver"].state == "booted"
+
+    def test_missing_domains_and_snapshots_fail_per_domain(self):
+        conn = FakeConnection("cyris-desktop", "cyris-webserver")
+        manager = SnapshotManager(lambda: conn)
+        manager.take(["cyris-desktop"])
+
+        report = manager.revert(["cyris-desktop", "cyris-webserver", "cyris-gone"])
+        assert not report.succeeded and report.domains == ["cyris-desktop"]
+        errors = {r.domain: r.error for r in report.failed}
+        assert errors == {"cyris-webserver": f"no snapshot '{BASELINE_SNAPSHOT}'",
+                          "cyris-gone": "domain not found"}
+        assert report.to_dict()["summary"] == {"reverted": 1, "failed": 2}
+
+
+class TestRangeReset:
+
+    @pytest.fixture
+    def setup(self, tmp_path):
+        from cyris.domain.entities.guest import BaseVMType, Guest, OSType
+        from cyris.domain.entities.host import Host
+        from cyris.tools.range_benchmark import FakeEndpoints, build_orchestrator
+
+        endpoints = FakeEndpoints()
+        orchestrator = build_orchestrator(endpoints, tmp_path)
+        hosts = [Host(host_id="host_1", mgmt_addr="localhost", virbr_addr="192.168.122.1", account="cyuser")]
+        guests = [Guest(guest_id=guest_id, basevm_type=BaseVMType.KVM, basevm_host="host_1",
+                        basevm_config_file=f"/images/{guest_id}.xml", basevm_os_type=OSType.UBUNTU)
+                  for guest_id in ("desktop", "webserver")]
+        return orchestrator, endpoints, hosts, guests
+
+    def test_reset_reverts_every_guest(self, setup):
+        orchestrator, endpoints, hosts, guests = setup
+        metadata = orchestrator.create_range("42", "Reset", "reset", hosts, guests)
+        assert "snapshot" in metadata.tags
+        assert sorted(endpoints.snapshots) == ["cyris-42-desktop", "cyris-42-webserver"]
+
+        original = dict(endpoints.domains)
+        endpoints.domains["cyris-42-desktop"] = "10.0.0.99"
+        created = endpoints.calls["create_guest"]
+
+        report = orchestrator.reset_range("42")
+
+        assert report.succeeded and sorted(report.domains) == ["cyris-42-desktop", "cyris-42-webserver"]
+        assert endpoints.domains == original
+        assert endpoints.calls["create_guest"] == created
+        reset = orchestrator.get_range("42")
+        assert reset.status.value == "active" and "last_reset" in reset.tags
+
+    def test_reset_without_snapshot(self, setup):
+        orchestrator, endpoints, hosts, guests = setup
+        orchestrator.settings.range_snapshots = False
+        metadata = orchestrator.create_range("42", "Reset", "reset", hosts, guests)
+
+        assert "snapshot" not in metadata.tags and not endpoints.snapshots
+        assert orchestrator.reset_range("42") is None
+        assert orchestrator.reset_range("missing") is None
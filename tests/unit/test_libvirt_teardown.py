@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the parallel, journaled libvirt teardown pipeline
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.infrastructure.providers.libvirt_teardown import (
+    TeardownJournal, TeardownPipeline, VIR_DOMAIN_EVENT_STOPPED, VIR_ERR_NO_DOMAIN,
+    remove_paths,
+)
+
+
+class FakeLibvirtError(Exception):
+    def __init__(self, message, code=1):
+        super().__init__(message)
+        self.code = code
+
+    def get_error_code(self):
+        return self.code
+
+
+class FakeDomain:
+    def __init__(self, conn, name, active=True, stop_delay=0.0):
+        self.conn = conn
+        self._name = name
+        self.active = active
+        self.stop_delay = stop_delay
+        self.undefined = False
+
+    def name(self):
+        return self._name
+
+    def isActive(self):
+        self.conn.check(self._name)
+        return self.active
+
+    def destroy(self):
+        self.conn.record("destroy", self._name)
+        if self.stop_delay:
+            def stop():
+                time.sleep(self.stop_delay)
+                self.active = False
+                self.conn.emit(self, VIR_DOMAIN_EVENT_STOPPED)
+            threading.Thread(target=stop, daemon=True).start()
+        else:
+            self.active = False
+
+    def undefineFlags(self, flags):
+        self.conn.record("undefine", self._name)
+        if self._name in self.conn.fail_undefine:
+            raise FakeLibvirtError("domain is locked")
+        self.undefined = True
+        del self.conn.domains[self._name]
+
+
+class FakeConnection:
+    def __init__(self, events=True):
+        self.domains = {}
+        self.calls = []
+        self.events = events
+        self.callback = None
+        self.fail_undefine = set()
+        self._lock = threading.Lock()
+
+    def add(self, name, **kwargs):
+        self.domains[name] = FakeDomain(self, name, **kwargs)
+
+    def record(self, action, name):
+        with self._lock:
+            self.calls.append((action, name))
+
+    def check(self, name):
+        if name not in self.domains:
+            raise FakeLibvirtError(f"Domain not found: {name}", VIR_ERR_NO_DOMAIN)
+
+    def lookupByName(self, name):
+        self.check(name)
+        return self.domains[name]
+
+    def domainEventRegisterAny(self, dom, event_id, callback, opaque):
+        if not self.events:
+            raise FakeLibvirtError("no event loop")
+        self.callback = callback
+        return 1
+
+    def domainEventDeregisterAny(self, callback_id):
+        self.callback = None
+
+    def emit(self, domain, event):
+        if self.callback:
+            self.callback(self, domain, event, 0, None)
+
+
+class TestTeardownPipeline:
+
+    @pytest.mark.parametrize("events", [True, False], ids=["events", "polling"])
+    def test_destroys_all_domains_concurrently(self, tmp_path, events):
+        conn = FakeConnection(events=events)
+        for i in range(20):
+            conn.add(f"vm{i}", stop_delay=0.2)
+        disks = {f"vm{i}": [str(tmp_path / f"vm{i}.qcow2")] for i in range(20)}
+        for paths in disks.values():
+            open(paths[0], "w").close()
+
+        pipeline = TeardownPipeline(lambda: conn, max_workers=20, poll_interval=0.05)
+        start = time.monotonic()
+        report = pipeline.run(list(disks), disks, tmp_path / "teardown.journal")
+
+        assert time.monotonic() - start < 2.0  # not 20 x 0.2s serially
+        assert report.succeeded
+        assert report.summary() == {"removed": 40}
+        assert conn.domains == {}
+        assert not any(tmp_path.glob("*.qcow2"))
+        assert not (tmp_path / "teardown.journal").exists()
+        # Every destroy was issued before the first undefine
+        actions = [action for action, _ in conn.calls]
+        assert actions.index("undefine") == 20
+
+    def test_missing_and_inactive_domains_are_idempotent(self, tmp_path):
+        conn = FakeConnection()
+        conn.add("stopped", active=False)
+
+        report = TeardownPipeline(lambda: conn).run(["stopped", "gone"], {"gone": [str(tmp_path / "x")]})
+
+        assert report.results["domain:stopped"].status == "removed"
+        assert report.results["domain:gone"].status == "absent"
+        assert report.results[f"file:{tmp_path / 'x'}"].status == "absent"
+        assert ("destroy", "stopped") not in conn.calls
+
+    def test_shutoff_timeout_keeps_disk(self, tmp_path):
+        conn = FakeConnection(events=False)
+        conn.add("stuck")
+        conn.domains["stuck"].destroy = lambda: None  # never stops
+        disk = tmp_path / "stuck.qcow2"
+        disk.touch()
+
+        report = TeardownPipeline(lambda: conn, shutoff_timeout=0.2, poll_interval=0.05).run(
+            ["stuck"], {"stuck": [str(disk)]}
+        )
+
+        assert not report.succeeded
+        assert "shut off" in report.failed[0].error
+        assert disk.exists()
+        assert "stuck" in conn.domains
+
+    def test_resumes_from_journal(self, tmp_path):
+        conn = FakeConnection()
+        for name in ("a", "b", "c"):
+            conn.add(name)
+        conn.fail_undefine.add("c")
+        disks = {name: [str(tmp_path / f"{name}.qcow2")] for name in ("a", "b", "c")}
+        for paths in disks.values():
+            open(paths[0], "w").close()
+        journal_path = tmp_path / "teardown.journal"
+
+        first = TeardownPipeline(lambda: conn).run(["a", "b", "c"], disks, journal_path)
+        assert [r.resource for r in first.failed] == ["c"]
+        assert os.path.exists(disks["c"][0])
+
+        journal = TeardownJournal(journal_path)
+        assert journal.done("a", "undefined") and not journal.done("c", "undefined")
+
+        # A later run only needs the journal: its plan brings back "c"
+        conn.fail_undefine.clear()
+        conn.calls.clear()
+        second = TeardownPipeline(lambda: conn).run([], journal_path=journal_path)
+
+        assert second.resumed and second.succeeded
+        assert second.results["domain:a"].status == "resumed"
+        assert second.results["domain:c"].status == "removed"
+        assert conn.calls == [("undefine", "c")]
+        assert not os.path.exists(disks["c"][0])
+        assert not journal_path.exists()
+
+    def test_journal_ignores_torn_last_line(self, tmp_path):
+        path = tmp_path / "j"
+        path.write_text(json.dumps({"plan": {"domains": ["a"], "files": {}}}) + "\n"
+                        + json.dumps({"resource": "a", "step": "destroyed"}) + "\n{\"reso")
+        journal = TeardownJournal(path)
+        assert journal.plan["domains"] == ["a"]
+        assert journal.done("a", "destroyed")
+
+
+def test_remove_paths_reports_each_file(tmp_path):
+    files = [tmp_path / f"{i}.log" for i in range(5)]
+    for path in files:
+        path.touch()
+
+    results = remove_paths(files + [tmp_path / "missing.log", files[0]])
+
+    assert [r.status for r in results] == ["removed"] * 5 + ["absent"]
+    assert not any(path.exists() for path in files)
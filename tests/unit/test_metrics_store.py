@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the columnar on-disk metrics store and its downsampling tiers
+"""
+
+import math
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.core import ring_buffer
+from cyris.core.metrics_store import MetricSeries, MetricsStore, Tier
+from cyris.services.monitoring import MonitoringService
+from cyris.services.orchestrator import RangeMetadata, RangeStatus
+
+
+BACKENDS = [False] + ([True] if ring_buffer.NUMPY_AVAILABLE else [])
+
+SMALL_TIERS = (Tier("raw", 0, 120), Tier("1m", 60, 60), Tier("1h", 3600, 24))
+
+
+@pytest.fixture(params=BACKENDS, ids=lambda numpy: "numpy" if numpy else "array")
+def backend(request, monkeypatch):
+    monkeypatch.setattr(ring_buffer, "NUMPY_AVAILABLE", request.param)
+    return request.param
+
+
+def fill(series, start, seconds, step=10, value=lambda t: float(t % 60)):
+    for t in range(start, start + seconds, step):
+        series.append(float(t), (value(t), 1.0))
+
+
+class TestMetricSeries:
+    """Tiered persistent series"""
+
+    def test_raw_window_and_persistence(self, tmp_path, backend):
+        series = MetricSeries(tmp_path / "s", ("cpu", "mem"), SMALL_TIERS)
+        fill(series, 0, 100)
+        series.close()
+
+        reopened = MetricSeries(tmp_path / "s", ("cpu", "mem"), SMALL_TIERS)
+        timestamps, rows = reopened.window(since=50.0)
+        assert [float(t) for t in timestamps] == [50.0, 60.0, 70.0, 80.0, 90.0]
+        assert [float(row[0]) for row in rows] == [50.0, 0.0, 10.0, 20.0, 30.0]
+        assert len(reopened) == 10
+        reopened.close()
+
+    def test_minute_rollup_mean_and_max(self, tmp_path, backend):
+        series = MetricSeries(tmp_path / "s", ("cpu", "mem"), SMALL_TIERS)
+        fill(series, 0, 130)  # completes buckets [0, 60) and [60, 120)
+
+        minutes = series.to_dict(tier="1m")
+        assert minutes["timestamp"] == [0.0, 60.0]
+        assert minutes["cpu"] == [25.0, 25.0]  # mean of 0..50
+
+        summary = series.aggregate(since=0.0, stats=("mean", "max"), tier="1m")
+        assert summary["cpu"] == {"mean": 25.0, "max": 50.0}
+        series.close()
+
+    def test_hour_rollup_cascades(self, tmp_path, backend):
+        series = MetricSeries(tmp_path / "s", ("cpu", "mem"), SMALL_TIERS)
+        fill(series, 0, 3 * 3600 + 70, step=30)
+
+        hours = series.to_dict(tier="1h")
+        assert hours["timestamp"] == [0.0, 3600.0, 7200.0]
+        assert all(v == pytest.approx(15.0) for v in hours["cpu"])
+        series.close()
+
+    def test_query_falls_back_to_coarser_tier(self, tmp_path, backend):
+        series = MetricSeries(tmp_path / "s", ("cpu", "mem"), SMALL_TIERS)
+        fill(series, 0, 2 * 3600)  # raw keeps 20 minutes, 1m keeps an hour
+
+        assert series.select_tier(6500.0) == 0
+        assert series.select_tier(4000.0) == 1
+        assert series.select_tier(0.0) == 2
+        timestamps, rows = series.window(since=0.0)
+        assert [float(t) for t in timestamps] == [0.0]  # first (complete) hour
+        assert float(rows[0][0]) == pytest.approx(25.0)
+        series.close()
+
+    def test_percentiles(self, tmp_path, backend):
+        series = MetricSeries(tmp_path / "s", ("cpu", "mem"), SMALL_TIERS)
+        for t in range(101):
+            series.append(float(t), (float(t), math.nan))
+
+        summary = series.aggregate(stats=("p50", "p95", "count"))
+        assert summary["cpu"] == {"p50": 50.0, "p95": 95.0, "count": 101.0}
+        assert summary["mem"]["count"] == 0.0 and math.isnan(summary["mem"]["p50"])
+        series.close()
+
+    def test_schema_change_resets_series(self, tmp_path, backend):
+        series = MetricSeries(tmp_path / "s", ("cpu", "mem"), SMALL_TIERS)
+        fill(series, 0, 30)
+        series.close()
+
+        changed = MetricSeries(tmp_path / "s", ("cpu",), SMALL_TIERS)
+        assert len(changed) == 0
+        changed.close()
+
+
+class TestMetricsStore:
+    """Store of series per monitored object"""
+
+    def test_series_are_cached_and_listed(self, tmp_path):
+        store = MetricsStore(tmp_path, SMALL_TIERS)
+        series = store.series("vm", "cyris-a/b", ("cpu",))
+        assert store.series("vm", "cyris-a/b", ("cpu",)) is series
+        assert store.list_series("vm") == ["cyris-a/b"]
+
+        store.remove("vm", "cyris-a/b")
+        assert store.list_series("vm") == []
+        store.close()
+
+    def test_monitoring_history_survives_restart(self, tmp_path):
+        metadata = RangeMetadata(range_id="r1", name="r1", description="",
+                                 created_at=datetime.now(), status=RangeStatus.ACTIVE)
+
+        service = MonitoringService(metrics_store=MetricsStore(tmp_path, SMALL_TIERS))
+        service.register_range(metadata)
+        for _ in range(3):
+            service.collect_range_metrics("r1")
+        service.stop_monitoring()
+        service._metrics_store.close()
+
+        restarted = MonitoringService(metrics_store=MetricsStore(tmp_path, SMALL_TIERS))
+        restarted.register_range(metadata)
+        history = restarted.get_range_metrics_history("r1", hours=48)
+        assert len(history) == 3
+        assert history[0].status == RangeStatus.ACTIVE
+
+        summary = restarted.get_metrics_summary("range", "r1", hours=1, stats=("count",))
+        assert summary["total_guests"]["count"] == 3.0
+        restarted._metrics_store.close()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+
+"""
+Tests for libvirt-backed monitoring metrics: ring buffers, bulk domain
+sampling with delta rates, and MonitoringService aggregation
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.core import ring_buffer
+from cyris.core.ring_buffer import MetricsRingBuffer
+from cyris.infrastructure.providers.libvirt_metrics import LibvirtMetricsCollector
+from cyris.services.monitoring import MonitoringService
+from cyris.services.orchestrator import RangeMetadata, RangeStatus
+
+
+BACKENDS = [False] + ([True] if ring_buffer.NUMPY_AVAILABLE else [])
+
+
+@pytest.fixture(params=BACKENDS, ids=lambda numpy: "numpy" if numpy else "array")
+def backend(request, monkeypatch):
+    monkeypatch.setattr(ring_buffer, "NUMPY_AVAILABLE", request.param)
+    return request.param
+
+
+class FakeDomain:
+    def __init__(self, name):
+        self._name = name
+
+    def name(self):
+        return self._name
+
+
+class FakeConnection:
+    """Returns scripted getAllDomainStats records"""
+
+    def __init__(self):
+        self.records = {}
+        self.calls = 0
+
+    def set(self, name, cpu_ns, rx=0, tx=0, rd=0, wr=0, state=1, vcpus=1):
+        self.records[name] = {
+            "state.state": state, "cpu.time": cpu_ns, "vcpu.current": vcpus,
+            "balloon.current": 1024, "balloon.available": 1000, "balloon.unused": 250,
+            "block.count": 1, "block.0.rd.bytes": rd, "block.0.wr.bytes": wr,
+            "net.count": 1, "net.0.rx.bytes": rx, "net.0.tx.bytes": tx,
+        }
+
+    def getAllDomainStats(self, stats, flags):
+        self.calls += 1
+        return [(FakeDomain(name), dict(record)) for name, record in self.records.items()]
+
+    def close(self):
+        pass
+
+
+class TestMetricsRingBuffer:
+    """Bounded ring buffer with windowed reads"""
+
+    def test_overwrites_oldest_when_full(self, backend):
+        buffer = MetricsRingBuffer(("a", "b"), capacity=3)
+        for i in range(5):
+            buffer.append(float(i), (i, i * 10))
+
+        timestamps, values = buffer.window()
+        assert len(buffer) == 3
+        assert [float(t) for t in timestamps] == [2.0, 3.0, 4.0]
+        assert [float(row[1]) for row in values] == [20.0, 30.0, 40.0]
+        assert buffer.latest() == (4.0, (4.0, 40.0))
+
+    def test_window_bounds_across_wraparound(self, backend):
+        buffer = MetricsRingBuffer(("v",), capacity=4)
+        for i in range(7):
+            buffer.append(float(i), (i,))
+
+        timestamps, _ = buffer.window(since=4.0, until=5.0)
+        assert [float(t) for t in timestamps] == [4.0, 5.0]
+
+        timestamps, values = buffer.window(since=10.0)
+        assert len(timestamps) == 0 and len(values) == 0
+
+    def test_to_dict(self, backend):
+        buffer = MetricsRingBuffer(("cpu",), capacity=2)
+        buffer.append(1.0, (50.0,))
+        assert buffer.to_dict() == {"timestamp": [1.0], "cpu": [50.0]}
+
+    def test_rejects_wrong_width(self):
+        with pytest.raises(ValueError):
+            MetricsRingBuffer(("a",), capacity=2).append(0.0, (1, 2))
+
+
+class TestLibvirtMetricsCollector:
+    """Delta-based rates from bulk domain stats"""
+
+    def test_rates_from_counter_deltas(self):
+        conn = FakeConnection()
+        collector = LibvirtMetricsCollector(connection_factory=lambda: conn)
+
+        with patch("cyris.infrastructure.providers.libvirt_metrics.time.monotonic", side_effect=[100.0, 102.0]):
+            conn.set("vm1", cpu_ns=0, rx=0, tx=0, rd=0, wr=0, vcpus=2)
+            first = collector.sample()["vm1"]
+            conn.set("vm1", cpu_ns=2_000_000_000, rx=4000, tx=2000, rd=8000, wr=0, vcpus=2)
+            second = collector.sample()["vm1"]
+
+        assert first.cpu_percent == 0.0 and first.net_rx_bps == 0.0
+        assert second.cpu_percent == pytest.approx(50.0)  # 1s CPU per s over 2 vCPUs
+        assert second.net_rx_bps == pytest.approx(2000.0)
+        assert second.net_tx_bps == pytest.approx(1000.0)
+        assert second.block_read_bps == pytest.approx(4000.0)
+        assert second.memory_percent == pytest.approx(75.0)
+        assert conn.calls == 2
+
+    def test_filters_domains_and_forgets_vanished(self):
+        conn = FakeConnection()
+        conn.set("vm1", cpu_ns=0)
+        conn.set("other", cpu_ns=0)
+        collector = LibvirtMetricsCollector(connection_factory=lambda: conn)
+
+        assert list(collector.sample(["vm1"])) == ["vm1"]
+
+        del conn.records["other"]
+        collector.sample()
+        assert "other" not in collector._previous
+
+    def test_connection_error_resets_connection(self):
+        conn = Mock()
+        conn.getAllDomainStats.side_effect = RuntimeError("libvirtd down")
+        factory = Mock(return_value=conn)
+        collector = LibvirtMetricsCollector(connection_factory=factory)
+
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                collector.sample()
+        assert factory.call_count == 2
+
+
+class TestMonitoringServiceMetrics:
+    """MonitoringService aggregation and history"""
+
+    @pytest.fixture
+    def conn(self):
+        conn = FakeConnection()
+        conn.set("r1-vm1", cpu_ns=0)
+        conn.set("r1-vm2", cpu_ns=0, state=5)
+        conn.set("r2-vm1", cpu_ns=0)
+        return conn
+
+    @pytest.fixture
+    def service(self, conn):
+        collector = LibvirtMetricsCollector(connection_factory=lambda: conn)
+        service = MonitoringService(metrics_collector=collector, history_size=5)
+        for range_id, domains in (("r1", ["r1-vm1", "r1-vm2"]), ("r2", ["r2-vm1"])):
+            service.register_range(
+                RangeMetadata(range_id=range_id, name=range_id, description="",
+                              created_at=datetime.now(), status=RangeStatus.ACTIVE),
+                domain_names=domains
+            )
+        return service
+
+    def test_collect_all_uses_one_bulk_call(self, service, conn):
+        collected = service.collect_all_range_metrics()
+
+        assert conn.calls == 1
+        assert collected["r1"].total_guests == 2
+        assert collected["r1"].active_guests == 1
+        assert collected["r2"].active_guests == 1
+        assert service.get_monitoring_statistics()["monitored_vms"] == 3
+
+    def test_history_is_bounded(self, service):
+        for _ in range(8):
+            service.collect_range_metrics("r1")
+
+        history = service.get_range_metrics_history("r1")
+        assert len(history) == 5
+        assert all(m.status == RangeStatus.ACTIVE for m in history)
+        assert history[-1].total_guests == 2
+        assert len(service.get_vm_metrics_history("r1-vm1")["cpu_percent"]) == 5
+
+    def test_unreachable_hypervisor(self, service):
+        service._metrics_collector = LibvirtMetricsCollector(
+            connection_factory=Mock(side_effect=ConnectionError("no libvirtd"))
+        )
+
+        metrics = service.collect_range_metrics("r1")
+
+        assert metrics.active_hosts == 0 and metrics.active_guests == 0
+        assert service.get_monitoring_statistics()["collector_error"] == "no libvirtd"
+        assert any(a.title == "Host Availability Issue" for a in service.get_active_alerts("r1"))
+
+    def test_host_metrics_do_not_block(self):
+        service = MonitoringService()
+        start = time.monotonic()
+        metrics = service.collect_host_metrics("r1-host")
+        assert time.monotonic() - start < 0.5
+        assert metrics is not None
+        assert len(service.get_host_metrics_history("r1-host")) == 1
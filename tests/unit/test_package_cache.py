@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the host-side package cache used by install_package tasks
+"""
+
+import os
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.tools.package_cache import (
+    PackageCache, PackageRequest, collect_package_requests, prefetch_command, proxy_options,
+)
+
+
+class Mirror:
+    """Local stand-in for an upstream package mirror"""
+
+    def __init__(self, files):
+        self.files = files
+        self.hits = []
+        mirror = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                mirror.hits.append(self.path)
+                body = mirror.files.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                time.sleep(0.05)  # slow enough for concurrent requests to overlap
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def mirror():
+    mirror = Mirror({
+        "/ubuntu/pool/main/n/nmap_7.80_amd64.deb": b"\x01deb" * 1000,
+        "/ubuntu/dists/focal/Release": b"Release v1",
+    })
+    yield mirror
+    mirror.stop()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = PackageCache(tmp_path / "cache", listen_host="127.0.0.1", port=0, mirrors=["127.0.0.1"])
+    cache.start()
+    yield cache
+    cache.stop()
+
+
+def get_via(cache, url, proxy=None):
+    proxy = proxy or cache.url_for("127.0.0.1")
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({"http": proxy}))
+    with opener.open(url, timeout=10) as response:
+        return response.read()
+
+
+class TestPackageCacheProxy:
+
+    def test_concurrent_requests_fetch_package_once(self, cache, mirror):
+        url = mirror.url + "/ubuntu/pool/main/n/nmap_7.80_amd64.deb"
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            bodies = list(pool.map(lambda _: get_via(cache, url), range(8)))
+
+        assert all(body == b"\x01deb" * 1000 for body in bodies)
+        assert len(mirror.hits) == 1
+        assert cache.stats["misses"] == 1 and cache.stats["hits"] == 7
+        assert cache.stats["bytes_served"] == 8 * 4000
+        assert cache.cache_path(url).read_bytes() == bodies[0]
+
+        # Packages are immutable: later requests never go upstream
+        cache.metadata_ttl = 0
+        get_via(cache, url)
+        assert len(mirror.hits) == 1
+
+    def test_metadata_revalidates_and_survives_offline(self, cache, mirror):
+        url = mirror.url + "/ubuntu/dists/focal/Release"
+        assert get_via(cache, url) == b"Release v1"
+
+        get_via(cache, url)
+        assert len(mirror.hits) == 1  # within TTL
+
+        cache.metadata_ttl = 0
+        mirror.files["/ubuntu/dists/focal/Release"] = b"Release v2"
+        assert get_via(cache, url) == b"Release v2"
+
+        # Upstream gone: the cached copy keeps the range installable
+        mirror.stop()
+        assert get_via(cache, url) == b"Release v2"
+        assert cache.stats["stale"] == 1
+
+    def test_missing_upstream_file_is_not_cached(self, cache, mirror):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            get_via(cache, mirror.url + "/ubuntu/pool/missing.deb")
+        assert error.value.code == 404
+        assert cache.usage()["files"] == 0
+
+    def test_only_configured_mirrors_are_fetched(self, tmp_path, mirror):
+        cache = PackageCache(tmp_path / "cache", port=0, mirrors=["archive.ubuntu.com"])
+        try:
+            with pytest.raises(urllib.error.HTTPError) as error:
+                get_via(cache, mirror.url + "/ubuntu/dists/focal/Release")
+            assert error.value.code == 403
+            assert mirror.hits == []
+            # Bound to the address facing the guest, never to all interfaces
+            assert list(cache._servers) == ["127.0.0.1"]
+            assert cache.upstream_allowed("http://de.archive.ubuntu.com/ubuntu/dists/focal/Release")
+            assert not cache.upstream_allowed("http://archive.ubuntu.com.example.org/")
+        finally:
+            cache.stop()
+
+    def test_clients_outside_range_networks_are_refused(self, cache, mirror):
+        url = mirror.url + "/ubuntu/dists/focal/Release"
+        proxy = f"http://127.0.0.1:{cache.start()}"
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            get_via(cache, url, proxy)
+        assert error.value.code == 403
+        assert mirror.hits == []
+
+        cache.allow("127.0.0.1")
+        assert get_via(cache, url, proxy) == b"Release v1"
+        assert not cache.client_allowed("127.0.0.2")
+
+
+class TestRequests:
+
+    def test_union_per_os_type(self):
+        guests = [
+            SimpleNamespace(basevm_os_type="ubuntu.20.04", tasks=[
+                {"install_package": [{"package_manager": "apt-get", "name": "nmap"},
+                                     {"package_manager": "apt-get", "name": "curl", "version": "7.68"}]}
+            ]),
+            SimpleNamespace(basevm_os_type="ubuntu.20.04", tasks=[
+                {"install_package": {"package_manager": "apt-get", "name": "nmap"}},
+                {"copy_content": {"src": "/a", "dst": "/b"}},
+            ]),
+            SimpleNamespace(basevm_os_type="centos.7", tasks=[
+                {"install_package": [{"package_manager": "yum", "name": "wget"},
+                                     {"package_manager": "chocolatey", "name": "git"}]}
+            ]),
+        ]
+
+        requests = collect_package_requests(guests)
+
+        assert requests == {
+            "ubuntu.20.04": [PackageRequest("apt-get", "nmap"), PackageRequest("apt-get", "curl", "7.68")],
+            "centos.7": [PackageRequest("yum", "wget")],
+        }
+        assert prefetch_command(requests["ubuntu.20.04"], "http://h:3142") == (
+            "apt-get -o Acquire::http::Proxy=http://h:3142 update && "
+            "apt-get -o Acquire::http::Proxy=http://h:3142 install -y --download-only nmap curl=7.68"
+        )
+        assert prefetch_command(requests["centos.7"], "http://h:3142") == (
+            "yum --setopt=proxy=http://h:3142 install -y --downloadonly wget"
+        )
+        assert proxy_options("zypper", "http://h:3142") == ""
+
+
+class TestTaskExecutorStaging:
+
+    def test_staged_guests_install_through_proxy(self, tmp_path):
+        from cyris.services.task_executor import TaskExecutor
+
+        executor = TaskExecutor({"package_cache_dir": tmp_path / "cache",
+                                 "package_cache_listen": "127.0.0.1"})
+        executor._package_cache = PackageCache(tmp_path / "cache", listen_host="127.0.0.1", port=0,
+                                               mirrors=["127.0.0.1"])
+        commands = []
+
+        def ssh(host, command, **kwargs):
+            commands.append((host, command))
+            return True, "", ""
+
+        executor._execute_ssh_command = ssh
+        tasks = [{"install_package": {"package_manager": "apt-get", "name": "nmap"}}]
+        guests = [SimpleNamespace(id=f"g{i}", basevm_os_type="ubuntu.20.04", tasks=tasks) for i in range(3)]
+        try:
+            staged = executor.stage_packages(list(zip(guests, ["127.0.0.1", "127.0.0.2", None])))
+            assert staged == {"ubuntu.20.04": True}
+            proxy = f"http://127.0.0.1:{executor._package_cache.port}"
+            assert commands == [("127.0.0.1", prefetch_command([PackageRequest("apt-get", "nmap")], proxy))]
+
+            results = executor.execute_guest_tasks(guests[0], "127.0.0.1", tasks)
+            assert results[0].success
+            assert commands[-1] == ("127.0.0.1", f"apt-get -o Acquire::http::Proxy={proxy} install -y nmap")
+        finally:
+            executor._package_cache.stop()
+
+    def test_disabled_without_cache_dir(self):
+        from cyris.services.task_executor import TaskExecutor
+
+        guest = SimpleNamespace(tasks=[{"install_package": {"package_manager": "apt", "name": "x"}}])
+        assert TaskExecutor({}).stage_packages([(guest, "10.0.0.1")]) == {}
+
+    def test_off_by_default(self):
+        from cyris.config.settings import CyRISSettings
+
+        assert CyRISSettings().package_cache_enabled is False
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the in-process asyncio port forwarder
+"""
+
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.core.exceptions import TunnelError
+from cyris.infrastructure.network.port_forwarder import PortForwarder
+
+
+@pytest.fixture
+def echo_server():
+    """Threaded TCP echo server on an ephemeral port"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+
+    def serve(conn):
+        with conn:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    break
+                conn.sendall(data)
+
+    def accept():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=serve, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    yield server.getsockname()[1]
+    server.close()
+
+
+@pytest.fixture
+def forwarder():
+    forwarder = PortForwarder(connect_timeout=2.0)
+    yield forwarder
+    forwarder.shutdown()
+
+
+def connect(port):
+    return socket.create_connection(("127.0.0.1", port), timeout=5)
+
+
+def recv_exactly(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+class TestPortForwarder:
+    """Listener lifecycle, relaying and counters"""
+
+    def test_relays_both_directions_and_counts_bytes(self, forwarder, echo_server):
+        port = forwarder.open("t1", 0, "127.0.0.1", echo_server, range_id=1,
+                              listen_host="127.0.0.1")
+        payload = os.urandom(1024 * 1024)
+
+        with connect(port) as client:
+            sender = threading.Thread(target=client.sendall, args=(payload,))
+            sender.start()
+            assert recv_exactly(client, len(payload)) == payload
+            sender.join()
+
+        stats = forwarder.stats("t1")
+        assert stats.listen_port == port
+        assert stats.bytes_to_target == len(payload)
+        assert stats.bytes_from_target == len(payload)
+        assert stats.connections_total == 1
+        assert wait_for(lambda: stats.connections_active == 0)
+
+    def test_close_range_stops_only_that_range(self, forwarder, echo_server):
+        ports = {
+            tunnel_id: forwarder.open(tunnel_id, 0, "127.0.0.1", echo_server,
+                                      range_id=range_id, listen_host="127.0.0.1")
+            for tunnel_id, range_id in (("a1", "a"), ("a2", "a"), ("b1", "b"))
+        }
+        open_conn = connect(ports["a1"])
+        open_conn.sendall(b"ping")
+        assert recv_exactly(open_conn, 4) == b"ping"
+
+        assert forwarder.range_tunnels("a") == ["a1", "a2"]
+        assert forwarder.close_range("a") == 2
+        assert forwarder.range_tunnels("a") == []
+        assert len(forwarder) == 1
+
+        # Established connections are dropped with the listener
+        open_conn.settimeout(5)
+        assert open_conn.recv(4) == b""
+        open_conn.close()
+        with pytest.raises(OSError):
+            connect(ports["a2"]).close()
+
+        with connect(ports["b1"]) as client:
+            client.sendall(b"still up")
+            assert recv_exactly(client, 8) == b"still up"
+
+    def test_unreachable_target_counts_failure(self, forwarder):
+        probe = socket.socket()
+        probe.bind(("127.0.0.1", 0))
+        dead_port = probe.getsockname()[1]
+        probe.close()
+
+        port = forwarder.open("t1", 0, "127.0.0.1", dead_port, listen_host="127.0.0.1")
+        with connect(port) as client:
+            assert client.recv(1) == b""
+        assert wait_for(lambda: forwarder.stats("t1").connect_failures == 1)
+        assert forwarder.stats("t1").connections_total == 0
+
+    def test_duplicate_and_busy_ports_raise(self, forwarder, echo_server):
+        port = forwarder.open("t1", 0, "127.0.0.1", echo_server, listen_host="127.0.0.1")
+
+        with pytest.raises(TunnelError, match="already exists"):
+            forwarder.open("t1", 0, "127.0.0.1", echo_server, listen_host="127.0.0.1")
+        with pytest.raises(TunnelError, match="Failed to listen"):
+            forwarder.open("t2", port, "127.0.0.1", echo_server, listen_host="127.0.0.1")
+        assert forwarder.close("t2") is False
+        assert forwarder.close("t1") is True
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+"""
+Tests for prefixed, line-by-line output of concurrently running commands
+"""
+
+import io
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.core.streaming_executor import PrefixedOutput, StreamingCommandExecutor
+
+
+class TestPrefixedOutput:
+
+    def test_lines_are_prefixed_and_progress_is_throttled(self):
+        stream = io.StringIO()
+        output = PrefixedOutput("desktop", progress_interval=60, stream=stream)
+
+        output.write("[   1.0] Downloading: templ")
+        output.write("ate\r\n[   2.0] Planning how to build this image\r")
+        output.write("\n 10% [###      ]\r 20% [####     ]\r 30% [#####    ]\r")
+        output.write("[  90.0] Resizing\n\n[ 120.0] Finishing")
+        assert stream.getvalue().count("\n") == 4
+        output.flush()
+
+        assert stream.getvalue().splitlines() == [
+            "[desktop] [   1.0] Downloading: template",
+            "[desktop] [   2.0] Planning how to build this image",
+            "[desktop]  10% [###      ]",
+            "[desktop] [  90.0] Resizing",
+            "[desktop] [ 120.0] Finishing",
+        ]
+
+    def test_concurrent_commands_interleave_by_line(self, capsys):
+        executor = StreamingCommandExecutor()
+        script = "for i in 1 2 3 4 5; do echo \"line $i\"; sleep 0.01; done"
+        results = {}
+
+        def run(prefix):
+            results[prefix] = executor.execute_with_realtime_output(
+                ['sh', '-c', script], f"build {prefix}", timeout=30, use_pty=False, output_prefix=prefix
+            )
+
+        threads = [threading.Thread(target=run, args=(prefix,)) for prefix in ("desktop", "webserver")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith("[")]
+        assert sorted(lines) == sorted(f"[{prefix}] line {i}" for prefix in ("desktop", "webserver")
+                                       for i in range(1, 6))
+        assert all(result.returncode == 0 and result.stdout.count("line") == 5 for result in results.values())
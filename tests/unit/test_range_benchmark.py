@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the range-creation benchmark harness and its fake hypervisor
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.tools.range_benchmark import (
+    FakeEndpoints, FakeHypervisor, FakeIPManager, LatencyProfile,
+    compare_results, main, run_scale
+)
+
+NO_LATENCY = LatencyProfile().scaled(0)
+
+
+def results_doc(**wall):
+    return {"scales": {scale: {"operations": {"create": {
+        "wall_s": seconds, "cpu_s": 0.1, "peak_rss_kb": 50000, "subprocesses": 0
+    }}} for scale, seconds in wall.items()}}
+
+
+class TestFakeEndpoints:
+
+    def test_hypervisor_and_ip_discovery_share_state(self):
+        endpoints = FakeEndpoints(NO_LATENCY)
+        provider = FakeHypervisor(endpoints)
+        provider._current_range_id = "7"
+
+        class G:
+            guest_id = "desktop"
+
+        names = provider.create_guests([G()], {})
+        assert names == ["cyris-7-desktop"]
+        assert provider.list_vms_by_pattern("cyris-7-") == names
+        assert FakeIPManager(endpoints).get_vm_health_info(names[0]).ip_addresses == ["10.128.0.1"]
+
+        provider.destroy_guests(names)
+        assert provider.get_status(names) == {names[0]: "not_found"}
+        assert FakeIPManager(endpoints).get_vm_health_info(names[0]).error_details
+        assert endpoints.calls["create_guest"] == 1 and endpoints.calls["ip_lookup"] == 2
+
+    def test_jitter_is_deterministic_per_call(self):
+        profile = LatencyProfile(ssh_command=0.1, jitter=0.5, seed=3)
+        first = profile.delay("ssh_command", "10.0.0.1:id")
+        assert first == profile.delay("ssh_command", "10.0.0.1:id")
+        assert 0.05 <= first <= 0.15
+        assert first != profile.delay("ssh_command", "10.0.0.2:id")
+        assert LatencyProfile(ssh_command=0.1).delay("ssh_command", "x") == 0.1
+
+
+class TestRunScale:
+
+    def test_full_lifecycle_against_fakes(self, tmp_path):
+        result = run_scale(3, NO_LATENCY, workdir=tmp_path)
+
+        assert result["ok"]
+        create = result["operations"]["create"]
+        assert create["fake_calls"]["create_guest"] == 3
+        assert create["fake_calls"]["ip_lookup"] == 3
+        assert create["fake_calls"]["ssh_command"] >= 6
+        assert create["subprocesses"] == 0
+        assert result["operations"]["status"]["fake_calls"]["ssh_connect"] == 3
+        assert result["operations"]["destroy"]["fake_calls"]["destroy_guest"] == 3
+        assert (tmp_path / "cyber_range" / "bench-3" / "logs" / "trace.json").exists()
+
+    def test_cli_writes_results_and_compares_baseline(self, tmp_path, capsys):
+        output = tmp_path / "bench.json"
+        assert main(["--scales", "2", "--latency-scale", "0", "--no-isolate",
+                     "--output", str(output)]) == 0
+        results = json.loads(output.read_text())
+        assert results["scales"]["2"]["ok"]
+        assert set(results["scales"]["2"]["operations"]) == {"create", "status", "destroy"}
+
+        assert main(["--scales", "2", "--latency-scale", "0", "--no-isolate",
+                     "--baseline", str(output), "--tolerance", "10"]) == 0
+        assert "No regressions" in capsys.readouterr().out
+
+
+class TestCompare:
+
+    def test_regressions_respect_tolerance_and_slack(self):
+        baseline = results_doc(**{"10": 1.0, "100": 0.01})
+        current = results_doc(**{"10": 1.2, "100": 0.05, "500": 9.0})
+        assert compare_results(current, baseline, tolerance=0.25) == []
+
+        current = results_doc(**{"10": 1.4})
+        regressions = compare_results(current, baseline, tolerance=0.25)
+        assert [(r.guests, r.operation, r.metric) for r in regressions] == [(10, "create", "wall_s")]
+        assert "+40%" in str(regressions[0])
+
+    def test_any_new_subprocess_is_a_regression(self):
+        baseline = results_doc(**{"10": 1.0})
+        current = results_doc(**{"10": 1.0})
+        current["scales"]["10"]["operations"]["create"]["subprocesses"] = 1
+        assert [r.metric for r in compare_results(current, baseline)] == ["subprocesses"]
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+"""
+Tests for atomic, versioned and coalescing range metadata writes
+"""
+
+import json
+import os
+import stat
+import sys
+import time
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.config.settings import CyRISSettings
+from cyris.core.concurrency import AtomicFileWriter
+from cyris.services.orchestrator import RangeMetadata, RangeOrchestrator, RangeStatus
+from cyris.services.range_metadata_store import RangeMetadataStore
+
+
+def metadata_dict(status: str = "active", **extra):
+    data = RangeMetadata(
+        range_id="1", name="Range 1", description="test",
+        created_at=datetime(2024, 1, 1), last_modified=datetime(2024, 1, 1)
+    ).to_dict()
+    data.update(status=status, **extra)
+    return data
+
+
+RESOURCES = {"hosts": ["h1"], "guests": ["vm-1"]}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RangeMetadataStore(tmp_path, coalesce_delay=60)
+    yield store
+    store.discard("1")
+    store.close()
+
+
+def read_metadata(tmp_path):
+    return json.loads((tmp_path / "1" / "metadata.json").read_text())
+
+
+class TestAtomicFileWriter:
+    """AtomicFileWriter.write_text"""
+
+    def test_write_text_replaces_content(self, tmp_path):
+        target = tmp_path / "file.json"
+        target.write_text("old")
+
+        AtomicFileWriter(str(target)).write_text("new", sync_dir=True)
+
+        assert target.read_text() == "new"
+        assert os.listdir(tmp_path) == ["file.json"]
+
+    def test_written_file_gets_the_mode_open_would_give(self, tmp_path):
+        target = tmp_path / "file.json"
+        plain = tmp_path / "plain.json"
+        plain.write_text("old")
+
+        AtomicFileWriter(str(target)).write_text("new")
+
+        assert stat.S_IMODE(target.stat().st_mode) == stat.S_IMODE(plain.stat().st_mode)
+
+    def test_failed_write_keeps_original(self, tmp_path):
+        target = tmp_path / "file.json"
+        target.write_text("old")
+
+        with patch("cyris.core.concurrency.os.replace", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                AtomicFileWriter(str(target)).write_text("new")
+
+        assert target.read_text() == "old"
+        assert os.listdir(tmp_path) == ["file.json"]
+
+
+class TestRangeMetadataStore:
+    """Versioning and coalescing"""
+
+    def test_save_writes_both_files_with_version(self, tmp_path, store):
+        assert store.save("1", metadata_dict(), RESOURCES) == 1
+        assert store.save("1", metadata_dict(status="stopped"), RESOURCES) == 2
+
+        assert read_metadata(tmp_path)["version"] == 2
+        assert read_metadata(tmp_path)["status"] == "stopped"
+        assert json.loads((tmp_path / "1" / "resources.json").read_text()) == RESOURCES
+
+    def test_version_continues_from_existing_metadata(self, store):
+        assert store.save("1", metadata_dict(version=7), RESOURCES) == 8
+
+    def test_unchanged_save_is_skipped(self, store):
+        store.save("1", metadata_dict(), RESOURCES)
+        assert store.save("1", metadata_dict(), RESOURCES) == 1
+        assert store.flush_count == 1
+
+    def test_coalesced_saves_share_one_flush(self, tmp_path, store):
+        for status in ("creating", "error", "active"):
+            store.save("1", metadata_dict(status=status), RESOURCES, coalesce=True)
+
+        assert store.has_pending("1")
+        assert not (tmp_path / "1" / "metadata.json").exists()
+
+        assert store.flush() == 1
+        assert store.flush_count == 1
+        assert read_metadata(tmp_path)["status"] == "active"
+        assert read_metadata(tmp_path)["version"] == 3
+
+    def test_coalesced_save_flushes_after_delay(self, tmp_path):
+        store = RangeMetadataStore(tmp_path, coalesce_delay=0.05)
+        store.save("1", metadata_dict(), RESOURCES, coalesce=True)
+
+        deadline = time.time() + 5
+        while store.has_pending("1") and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert not store.has_pending("1")
+        assert read_metadata(tmp_path)["status"] == "active"
+
+    def test_immediate_save_supersedes_pending(self, tmp_path, store):
+        store.save("1", metadata_dict(status="error"), RESOURCES, coalesce=True)
+        store.save("1", metadata_dict(status="destroyed"), RESOURCES)
+
+        assert not store.has_pending()
+        assert read_metadata(tmp_path)["status"] == "destroyed"
+
+    def test_discard_drops_pending_write(self, tmp_path, store):
+        store.save("1", metadata_dict(), RESOURCES, coalesce=True)
+        store.discard("1")
+
+        assert store.flush() == 0
+        assert not (tmp_path / "1").exists()
+
+    def test_on_flush_callback(self, tmp_path):
+        on_flush = Mock()
+        store = RangeMetadataStore(tmp_path, on_flush=on_flush)
+        store.save("1", metadata_dict(), RESOURCES)
+
+        on_flush.assert_called_once()
+        range_id, metadata, resources = on_flush.call_args[0]
+        assert (range_id, metadata["version"], resources) == ("1", 1, RESOURCES)
+
+
+class TestOrchestratorMetadataPersistence:
+    """RangeOrchestrator persists through the metadata store"""
+
+    @pytest.fixture
+    def orchestrator(self, tmp_path):
+        settings = CyRISSettings(cyris_path=tmp_path, cyber_range_dir=tmp_path / "cyber_range")
+        orchestrator = RangeOrchestrator(settings, infrastructure_provider=Mock())
+        orchestrator._ranges["1"] = RangeMetadata(
+            range_id="1", name="Range 1", description="test",
+            created_at=datetime.now(), status=RangeStatus.CREATING
+        )
+        orchestrator._range_resources["1"] = {"hosts": [], "guests": ["vm-1"]}
+        orchestrator._save_range_metadata("1")
+        return orchestrator
+
+    def test_status_polling_is_coalesced(self, orchestrator):
+        store = orchestrator._metadata_store
+        writes = store.flush_count
+
+        for state in ("error", "active", "stopped"):
+            orchestrator.provider.get_status.return_value = {"vm-1": state}
+            orchestrator.update_range_status("1")
+
+        assert store.flush_count == writes
+        assert store.flush("1") == 1
+
+        on_disk = json.loads((orchestrator.ranges_dir / "1" / "metadata.json").read_text())
+        assert on_disk["status"] == "stopped"
+        assert on_disk["version"] == orchestrator.get_range("1").version == 4
+
+    def test_reload_reads_version(self, orchestrator):
+        fresh = RangeOrchestrator(orchestrator.settings, infrastructure_provider=Mock())
+        assert fresh.get_range("1").version == 1
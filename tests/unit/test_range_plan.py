@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the compile-once range plan
+"""
+
+import dataclasses
+import os
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.config import range_plan
+from cyris.config.parser import ConfigurationError, CyRISConfigParser
+from cyris.config.range_plan import RangePlan, compile_range_plan, load_range_plan
+
+FULL_YML = Path(__file__).parent.parent.parent / "examples" / "full.yml"
+
+DICT_LAYOUT = """
+host_settings:
+  - id: host_1
+    mgmt_addr: localhost
+    account: cyuser
+guest_settings:
+  - id: desktop
+    basevm_host: host_1
+    basevm_config_file: /images/desktop.xml
+    basevm_type: kvm
+    tasks:
+      - add_account:
+          - account: daniel
+            passwd: pass
+clone_settings:
+  - range_id: 42
+    hosts:
+      - host_id: host_1
+        instance_number: 2
+        guests:
+          - guest_id: desktop
+            number: 3
+            entry_point: yes
+            tasks:
+              - install_package:
+                  - package_manager: apt
+                    name: nmap
+        topology:
+          - type: custom
+            networks:
+              - name: office
+                members: desktop.eth0, desktop.eth1
+"""
+
+
+@pytest.fixture(autouse=True)
+def fresh_plans():
+    range_plan.clear_plan_cache()
+    yield
+    range_plan.clear_plan_cache()
+
+
+def write(tmp_path, text, name="range.yml"):
+    path = tmp_path / name
+    path.write_text(text)
+    return path
+
+
+class TestCompile:
+
+    def test_full_example_is_expanded(self):
+        plan = compile_range_plan(FULL_YML)
+
+        assert plan.range_id == "125"
+        assert [h.host_id for h in plan.hosts] == ["host_1"]
+        assert [g.guest_id for g in plan.guests] == ["desktop", "webserver", "firewall"]
+        # instance_number 2 x three guests with number 1
+        assert len(plan.instances) == 6
+        assert [i.guest_id for i in plan.instances if i.entry_point] == ["desktop", "desktop"]
+        assert [(n.name, n.members, n.gateway) for n in plan.networks] == [
+            ("office", ("desktop.eth0",), "firewall.eth0"),
+            ("servers", ("webserver.eth0",), "firewall.eth1"),
+        ]
+        assert [(r.guest_id, r.rule) for r in plan.forwarding_rules] == [
+            ("firewall", "src=office dst=servers dport=25,53")
+        ]
+        assert plan.topology_config()["type"] == "custom"
+        assert "firewall_rules" in plan.guest("desktop").tasks[-1]
+
+    def test_clone_tasks_are_merged_and_layouts_agree(self, tmp_path):
+        sections = ["host_settings", "guest_settings", "clone_settings"]
+        doc = yaml.safe_load(DICT_LAYOUT)
+        as_list = yaml.safe_dump([{key: doc[key]} for key in sections])
+
+        plan = compile_range_plan(write(tmp_path, DICT_LAYOUT))
+        listed = compile_range_plan(write(tmp_path, as_list, "list.yml"))
+
+        assert plan.digest == listed.digest
+        assert plan.source_digest != listed.source_digest
+        desktop = plan.guest("desktop")
+        assert [next(iter(task)) for task in desktop.tasks] == ["add_account", "install_package"]
+        assert len(plan.instances) == 6
+        assert plan.networks[0].members == ("desktop.eth0", "desktop.eth1")
+        assert plan.hosts[0].virbr_addr == "192.168.122.1"
+
+    def test_plan_is_immutable_and_entities_are_fresh(self, tmp_path):
+        plan = compile_range_plan(write(tmp_path, DICT_LAYOUT))
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            plan.range_id = "43"
+        with pytest.raises(TypeError):
+            plan.guest("desktop").fields["vcpus"] = 4
+
+        guest = plan.build_guests()[0]
+        guest.tasks.append({"execute_program": []})
+        assert guest.basevm_type == "kvm" and guest.basevm_os_type == "ubuntu"
+        assert len(plan.guest("desktop").tasks) == 2
+        assert plan.build_hosts()[0].mgmt_addr == "localhost"
+
+    def test_invalid_guest_is_reported(self, tmp_path):
+        broken = DICT_LAYOUT.replace("basevm_config_file: /images/desktop.xml", "basevm_config_file: desktop.img")
+        with pytest.raises(ConfigurationError, match="Invalid guest desktop"):
+            compile_range_plan(write(tmp_path, broken))
+        with pytest.raises(ConfigurationError, match="missing mgmt_addr"):
+            compile_range_plan(write(tmp_path, DICT_LAYOUT.replace("mgmt_addr: localhost", "")))
+
+
+class TestCache:
+
+    def test_compiled_once_per_contents(self, tmp_path, monkeypatch):
+        description = write(tmp_path, DICT_LAYOUT)
+        cache_dir = tmp_path / "cyber_range" / range_plan.PLAN_CACHE_DIR
+        compiles = []
+        real_compile = range_plan.compile_range_plan
+        monkeypatch.setattr(range_plan, "compile_range_plan",
+                            lambda *args: compiles.append(1) or real_compile(*args))
+
+        plan = load_range_plan(description, cache_dir)
+        assert load_range_plan(description, cache_dir) is plan
+        assert CyRISConfigParser().parse_file(description).guests[0].guest_id == "desktop"
+        assert (cache_dir / f"{plan.source_digest}.json").exists()
+
+        # A new process (or re-create) reads the stored plan instead of the YAML
+        range_plan.clear_plan_cache()
+        assert load_range_plan(description, cache_dir) == plan
+        assert len(compiles) == 1
+
+        description.write_text(DICT_LAYOUT.replace("number: 3", "number: 1"))
+        assert len(load_range_plan(description, cache_dir).instances) == 2
+        assert len(compiles) == 2
+
+    def test_round_trip_and_unreadable_cache(self, tmp_path):
+        description = write(tmp_path, DICT_LAYOUT)
+        plan = compile_range_plan(description)
+        saved = plan.save(tmp_path / "42" / range_plan.PLAN_FILE)
+        assert RangePlan.load(saved) == plan
+
+        cache_dir = tmp_path / "plans"
+        cache_dir.mkdir()
+        (cache_dir / f"{plan.source_digest}.json").write_text("{not json")
+        assert load_range_plan(description, cache_dir).digest == plan.digest
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+
+"""
+Tests for incremental range reconciliation
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.config import range_plan
+from cyris.config.range_plan import compile_range_plan
+from cyris.services.range_reconciler import GuestAction, diff_range, diff_tasks
+
+LAYOUT = """
+host_settings:
+  - id: host_1
+    mgmt_addr: localhost
+    account: cyuser
+guest_settings:
+  - id: desktop
+    basevm_host: host_1
+    basevm_config_file: /images/desktop.xml
+    basevm_type: kvm
+    tasks:
+      - add_account:
+          - account: daniel
+            passwd: pass
+  - id: webserver
+    basevm_host: host_1
+    basevm_config_file: /images/webserver.xml
+    basevm_type: kvm
+  - id: firewall
+    basevm_host: host_1
+    basevm_config_file: /images/firewall.xml
+    basevm_type: kvm
+clone_settings:
+  - range_id: 77
+    hosts:
+      - host_id: host_1
+        instance_number: 1
+        guests:
+          - guest_id: desktop
+            number: 1
+            entry_point: yes
+          - guest_id: webserver
+            number: 1
+          - guest_id: firewall
+            number: 1
+            forwarding_rules:
+              - rule: src=office dst=servers dport=80
+        topology:
+          - type: custom
+            networks:
+              - name: office
+                members: desktop.eth0
+                gateway: firewall.eth0
+              - name: servers
+                members: webserver.eth0
+                gateway: firewall.eth1
+"""
+
+VMS = {"desktop": ["cyris-desktop-1"], "webserver": ["cyris-webserver-1"], "firewall": ["cyris-firewall-1"]}
+
+
+@pytest.fixture(autouse=True)
+def fresh_plans():
+    range_plan.clear_plan_cache()
+    yield
+    range_plan.clear_plan_cache()
+
+
+def plan_of(tmp_path, text, name="range.yml"):
+    path = tmp_path / name
+    path.write_text(text)
+    return compile_range_plan(path)
+
+
+def edited(*replacements):
+    text = LAYOUT
+    for old, new in replacements:
+        assert old in text
+        text = text.replace(old, new)
+    return text
+
+
+ADD_PACKAGE = ("            passwd: pass\n",
+               "            passwd: pass\n      - install_package:\n          - package_manager: apt\n"
+               "            name: nmap\n")
+
+
+class TestDiffTasks:
+
+    def test_only_new_and_modified_entries_run(self):
+        recorded = [{"add_account": [{"account": "a", "passwd": "x"}, {"account": "b", "passwd": "y"}]},
+                    {"install_package": [{"name": "nmap"}]}]
+        desired = [{"add_account": [{"account": "a", "passwd": "x"}, {"account": "b", "passwd": "z"}]},
+                   {"install_package": [{"name": "nmap"}, {"name": "tcpdump"}]}]
+
+        added, dropped = diff_tasks(recorded, desired)
+
+        assert added == [{"add_account": [{"account": "b", "passwd": "z"}]},
+                         {"install_package": [{"name": "tcpdump"}]}]
+        assert dropped == [{"add_account": [{"account": "b", "passwd": "y"}]}]
+        assert diff_tasks(desired, desired) == ([], [])
+
+
+class TestDiffRange:
+
+    def test_unchanged_range_has_no_changes(self, tmp_path):
+        plan = plan_of(tmp_path, LAYOUT)
+        diff = diff_range("77", plan, plan, VMS, {name[0]: "active" for name in VMS.values()})
+
+        assert diff.is_empty and diff.summary() == "no changes"
+        assert diff.unchanged == ["desktop", "webserver", "firewall"]
+
+    def test_delta_per_guest_and_network(self, tmp_path):
+        recorded = plan_of(tmp_path, LAYOUT)
+        desired = plan_of(tmp_path, edited(
+            ADD_PACKAGE,
+            ("basevm_config_file: /images/webserver.xml", "basevm_config_file: /images/webserver2.xml"),
+            ("members: desktop.eth0\n", "members: desktop.eth0, mail.eth0\n"),
+            ("dport=80", "dport=80,443"),
+            ("  - id: firewall\n", "  - id: mail\n    basevm_host: host_1\n    basevm_config_file: /images/mail.xml\n"
+                                   "    basevm_type: kvm\n  - id: firewall\n"),
+        ), "desired.yml")
+        live = {"cyris-desktop-1": "active", "cyris-webserver-1": "active", "cyris-firewall-1": "stopped"}
+
+        diff = diff_range("77", recorded, desired, VMS, live)
+
+        actions = {change.guest_id: change.action for change in diff.guests}
+        assert actions == {"desktop": GuestAction.RETASK, "webserver": GuestAction.REPLACE,
+                           "mail": GuestAction.ADD, "firewall": GuestAction.START}
+        desktop = diff.changes(GuestAction.RETASK)[0]
+        assert desktop.tasks == [{"install_package": [{"package_manager": "apt", "name": "nmap"}]}]
+        assert diff.changes(GuestAction.REPLACE)[0].vm_names == ["cyris-webserver-1"]
+        assert diff.networks_changed == ["office"] and not diff.networks_added
+        assert diff.rules_changed and not diff.hosts_changed
+        assert diff.summary() == ("1 added, 1 replaced, 1 started, 1 re-tasked, "
+                                  "networks +0 -0 ~1, forwarding rules changed")
+
+    def test_removed_and_missing_guests(self, tmp_path):
+        recorded = plan_of(tmp_path, LAYOUT)
+        without_webserver = LAYOUT.replace("          - guest_id: webserver\n            number: 1\n", "")
+        desired = plan_of(tmp_path, without_webserver.replace(
+            "  - id: webserver\n    basevm_host: host_1\n    basevm_config_file: /images/webserver.xml\n"
+            "    basevm_type: kvm\n", ""), "desired.yml")
+        live = {"cyris-desktop-1": "not_found", "cyris-webserver-1": "active", "cyris-firewall-1": "active"}
+
+        diff = diff_range("77", recorded, desired, VMS, live)
+
+        assert [(c.guest_id, c.action, c.reason) for c in diff.guests] == [
+            ("desktop", GuestAction.REPLACE, "VM missing"),
+            ("webserver", GuestAction.REMOVE, "no longer described"),
+        ]
+        # a recreated guest runs its whole task list again
+        assert diff.guests[0].tasks == [{"add_account": [{"account": "daniel", "passwd": "pass"}]}]
+        # without live state the records are trusted
+        assert diff_range("77", recorded, recorded, VMS, None).is_empty
+
+
+class TestReconcileRange:
+
+    @pytest.fixture
+    def orchestrator(self, tmp_path):
+        from cyris.tools.range_benchmark import FakeEndpoints, build_orchestrator
+
+        endpoints = FakeEndpoints()
+        return build_orchestrator(endpoints, tmp_path / "work"), endpoints
+
+    def test_changed_tasks_and_new_guest_do_not_rebuild(self, tmp_path, orchestrator):
+        orchestrator, endpoints = orchestrator
+        description = tmp_path / "range.yml"
+        description.write_text(LAYOUT)
+
+        assert orchestrator.create_range_from_yaml(description) == "77"
+        assert endpoints.calls["create_guest"] == 3
+        assert json.loads(orchestrator.get_range("77").tags["guest_vms"]) == {
+            "desktop": ["cyris-77-desktop"], "webserver": ["cyris-77-webserver"], "firewall": ["cyris-77-firewall"]}
+
+        # Unchanged description: nothing is created, destroyed or re-run
+        ssh_before = endpoints.calls["ssh_command"]
+        assert orchestrator.create_range_from_yaml(description) == "77"
+        assert endpoints.calls["create_guest"] == 3 and endpoints.calls["ssh_command"] == ssh_before
+
+        description.write_text(edited(ADD_PACKAGE, ("  - id: firewall\n",
+                                                    "  - id: mail\n    basevm_host: host_1\n"
+                                                    "    basevm_config_file: /images/mail.xml\n"
+                                                    "    basevm_type: kvm\n  - id: firewall\n")))
+        diff = orchestrator.diff_range("77", compile_range_plan(description))
+        assert diff.summary() == "1 added, 1 re-tasked"
+
+        assert orchestrator.create_range_from_yaml(description) == "77"
+        assert endpoints.calls["create_guest"] == 4
+        assert endpoints.calls["destroy_guest"] == 0
+        assert "cyris-77-mail" in orchestrator.get_range_resources("77")["guests"]
+        metadata = orchestrator.get_range("77")
+        assert metadata.status.value == "active"
+        assert metadata.tags["plan_digest"] == compile_range_plan(description).digest
+        results = json.loads(metadata.tags["task_results"])
+        assert results[-1]["task_type"] == "install_package"
+        assert orchestrator.diff_range("77", compile_range_plan(description)).is_empty
+
+    def test_failed_task_entries_are_retried_by_the_next_run(self, tmp_path, orchestrator):
+        from cyris.core.exceptions import CyRISVirtualizationError
+        from cyris.services.task_executor import TaskResult, TaskType
+
+        orchestrator, _ = orchestrator
+        description = tmp_path / "range.yml"
+        description.write_text(LAYOUT)
+        assert orchestrator.create_range_from_yaml(description) == "77"
+        recorded_digest = orchestrator.get_range("77").tags["plan_digest"]
+
+        description.write_text(edited(ADD_PACKAGE))
+        execute = orchestrator.task_executor.execute_guest_tasks
+        orchestrator.task_executor.execute_guest_tasks = lambda guest, ip, tasks, **kwargs: [
+            TaskResult(task_id="nmap", task_type=TaskType.INSTALL_PACKAGE, success=False, message="failed")]
+        with pytest.raises(CyRISVirtualizationError):
+            orchestrator.create_range_from_yaml(description)
+
+        metadata = orchestrator.get_range("77")
+        assert metadata.status.value == "error"
+        assert metadata.tags["plan_digest"] == recorded_digest
+        assert orchestrator.diff_range("77", compile_range_plan(description)).summary() == "1 re-tasked"
+
+        orchestrator.task_executor.execute_guest_tasks = execute
+        assert orchestrator.create_range_from_yaml(description) == "77"
+        assert orchestrator.get_range("77").status.value == "active"
+        assert orchestrator.diff_range("77", compile_range_plan(description)).is_empty
+
+    def test_ranges_without_a_recorded_plan_are_created(self, tmp_path, orchestrator):
+        orchestrator, _ = orchestrator
+        description = tmp_path / "range.yml"
+        description.write_text(LAYOUT)
+
+        assert orchestrator.reconcile_range("77", compile_range_plan(description)) is None
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the range registry index and its use by RangeOrchestrator
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.config.settings import CyRISSettings
+from cyris.services.orchestrator import RangeMetadata, RangeOrchestrator, RangeStatus
+from cyris.services.range_registry import RangeRegistry
+
+
+def write_range(ranges_dir: Path, range_id: str, owner: str = "alice",
+                status: RangeStatus = RangeStatus.ACTIVE, tags=None, guests=None) -> None:
+    """Write a range directory the way the orchestrator does"""
+    metadata = RangeMetadata(
+        range_id=range_id,
+        name=f"Range {range_id}",
+        description="test",
+        created_at=datetime(2024, 1, int(range_id) if range_id.isdigit() else 1),
+        status=status,
+        owner=owner,
+        tags=tags or {}
+    )
+    range_dir = ranges_dir / range_id
+    range_dir.mkdir(parents=True, exist_ok=True)
+    (range_dir / 'metadata.json').write_text(json.dumps(metadata.to_dict()))
+    (range_dir / 'resources.json').write_text(json.dumps({"hosts": [], "guests": guests or []}))
+
+
+def bump_mtime(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def ranges_dir(tmp_path):
+    ranges_dir = tmp_path / "cyber_range"
+    ranges_dir.mkdir()
+    write_range(ranges_dir, "1", owner="alice", tags={"env": "test"}, guests=["vm-1"])
+    write_range(ranges_dir, "2", owner="bob", status=RangeStatus.DESTROYED, tags={"env": "prod"})
+    write_range(ranges_dir, "3", owner="alice", tags={"env": "prod"})
+    return ranges_dir
+
+
+@pytest.fixture
+def settings(tmp_path, ranges_dir):
+    return CyRISSettings(cyris_path=tmp_path, cyber_range_dir=ranges_dir)
+
+
+class TestRangeRegistry:
+    """RangeRegistry index maintenance and queries"""
+
+    def test_initial_refresh_indexes_all_ranges(self, ranges_dir):
+        registry = RangeRegistry(ranges_dir)
+        assert registry.refresh() == 3
+        assert registry.count() == 3
+        assert (ranges_dir / ".index" / "registry.db").exists()
+
+        metadata, resources = registry.get("1")
+        assert metadata["owner"] == "alice"
+        assert resources["guests"] == ["vm-1"]
+
+    def test_refresh_only_rereads_changed_ranges(self, ranges_dir):
+        RangeRegistry(ranges_dir).refresh()
+
+        registry = RangeRegistry(ranges_dir)
+        assert registry.refresh() == 0
+
+        write_range(ranges_dir, "2", owner="carol")
+        bump_mtime(ranges_dir / "2" / "metadata.json")
+        assert registry.refresh() == 1
+        assert registry.get("2")[0]["owner"] == "carol"
+
+    def test_refresh_drops_removed_directories(self, ranges_dir):
+        registry = RangeRegistry(ranges_dir)
+        registry.refresh()
+
+        (ranges_dir / "3" / "metadata.json").unlink()
+        (ranges_dir / "3" / "resources.json").unlink()
+        (ranges_dir / "3").rmdir()
+
+        assert registry.refresh() == 1
+        assert registry.get("3") is None
+
+    def test_query_filters_on_index_columns(self, ranges_dir):
+        registry = RangeRegistry(ranges_dir)
+
+        assert list(registry.query(owner="alice")) == ["1", "3"]
+        assert list(registry.query(status="destroyed")) == ["2"]
+        assert list(registry.query(tags={"env": "prod"})) == ["2", "3"]
+        assert list(registry.query(owner="alice", tags={"env": "prod"})) == ["3"]
+        assert registry.query(owner="nobody") == {}
+
+    def test_upsert_replaces_tags(self, ranges_dir):
+        registry = RangeRegistry(ranges_dir)
+        metadata, resources = registry.get("1")
+
+        metadata["tags"] = {"team": "red"}
+        registry.upsert("1", metadata, resources)
+
+        assert list(registry.query(tags={"env": "test"})) == []
+        assert list(registry.query(tags={"team": "red"})) == ["1"]
+
+    def test_corrupt_index_is_rebuilt(self, ranges_dir):
+        index_path = ranges_dir / ".index" / "registry.db"
+        index_path.parent.mkdir()
+        index_path.write_bytes(b"not a sqlite database" * 100)
+
+        registry = RangeRegistry(ranges_dir)
+        assert registry.count() == 3
+
+
+class TestOrchestratorRangeIndex:
+    """RangeOrchestrator reads ranges through the index"""
+
+    def test_startup_does_not_read_range_files(self, settings):
+        RangeOrchestrator(settings).list_ranges()
+
+        with patch.object(RangeRegistry, "_read_directory") as read_directory:
+            orchestrator = RangeOrchestrator(settings)
+            ranges = orchestrator.list_ranges()
+
+        read_directory.assert_not_called()
+        assert sorted(r.range_id for r in ranges) == ["1", "2", "3"]
+
+    def test_filtered_listing_loads_only_matches(self, settings):
+        orchestrator = RangeOrchestrator(settings)
+
+        ranges = orchestrator.list_ranges(owner="alice", tags={"env": "prod"})
+
+        assert [r.range_id for r in ranges] == ["3"]
+        assert not orchestrator._registry_loaded
+        assert set(orchestrator._range_cache) == {"3"}
+
+    def test_get_range_is_single_lookup(self, settings):
+        orchestrator = RangeOrchestrator(settings)
+
+        assert orchestrator.get_range("2").status == RangeStatus.DESTROYED
+        assert orchestrator.get_range_resources("1") == {"hosts": [], "guests": ["vm-1"]}
+        assert orchestrator.get_range("missing") is None
+        assert not orchestrator._registry_loaded
+
+    def test_save_updates_index(self, settings):
+        orchestrator = RangeOrchestrator(settings)
+        metadata = orchestrator.get_range("1")
+        metadata.update_status(RangeStatus.ERROR)
+        orchestrator._save_range_metadata("1")
+
+        fresh = RangeOrchestrator(settings)
+        assert [r.range_id for r in fresh.list_ranges(status=RangeStatus.ERROR)] == ["1"]
+
+    def test_coalesced_save_updates_index(self, settings):
+        orchestrator = RangeOrchestrator(settings)
+        orchestrator._metadata_store.coalesce_delay = 0.05
+        orchestrator.get_range("1").update_status(RangeStatus.ERROR)
+        orchestrator._save_range_metadata("1", coalesce=True)
+
+        # Flushed on the store's timer thread, not this one
+        deadline = time.monotonic() + 5
+        while orchestrator._metadata_store.has_pending("1") and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert not orchestrator._metadata_store.has_pending("1")
+        assert list(orchestrator._registry.query(status="error")) == ["1"]
+
+    def test_remove_range_updates_index(self, settings):
+        orchestrator = RangeOrchestrator(settings)
+        assert orchestrator.remove_range("2")
+
+        fresh = RangeOrchestrator(settings)
+        assert fresh.get_range("2") is None
+        assert sorted(r.range_id for r in fresh.list_ranges()) == ["1", "3"]
+
+    def test_falls_back_to_directory_scan(self, settings):
+        with patch("cyris.services.orchestrator.SQLITE_AVAILABLE", False):
+            orchestrator = RangeOrchestrator(settings)
+
+        assert orchestrator._registry is None
+        assert len(orchestrator.list_ranges(owner="alice")) == 2
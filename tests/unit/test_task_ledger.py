@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the completed-task ledger and cached task results
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.services.task_executor import TaskExecutor, TaskType
+from cyris.services.task_ledger import LEDGER_FILE, TaskLedger, task_key
+
+GUEST_IP = "10.0.0.5"
+
+TASKS = [
+    {"add_account": [{"account": "daniel", "passwd": "password1"}]},
+    {"install_package": [{"package_manager": "apt-get", "name": "nmap"}]},
+]
+
+
+class Guest:
+    guest_id = "desktop"
+    basevm_type = "kvm"
+    basevm_os_type = "ubuntu"
+    tasks = TASKS
+
+
+class RecordingExecutor(TaskExecutor):
+    """Guest SSH replaced by a command log; ``~/.cyris/tasks`` is simulated"""
+
+    def __init__(self, **config):
+        super().__init__({'base_path': '/tmp', 'content_fanout': False, **config})
+        self.commands = []
+        self.markers = set()
+        self.fail = False
+
+    def _execute_ssh_command(self, host, command, username="ubuntu", password="ubuntu"):
+        self.commands.append(command)
+        if command.startswith("test -f ~/.cyris/tasks/"):
+            return command.rsplit("/", 1)[1] in self.markers, "", ""
+        if command.startswith("mkdir -p ~/.cyris/tasks"):
+            self.markers.add(command.rsplit("/", 1)[1])
+        return not self.fail, "", "boom" if self.fail else ""
+
+    def task_commands(self):
+        return [c for c in self.commands if "~/.cyris/tasks" not in c]
+
+
+class TestTaskKey:
+
+    def test_key_covers_params_and_shipped_content(self, tmp_path):
+        content = tmp_path / "content"
+        content.mkdir()
+        (content / "flag.txt").write_text("flag{one}")
+        params = {"src": str(content), "dst": "/home/daniel"}
+
+        key = task_key("copy_content", params)
+        assert key == task_key("copy_content", {"dst": "/home/daniel", "src": str(content)})
+        assert key != task_key("copy_content", {**params, "dst": "/root"})
+
+        (content / "flag.txt").write_text("flag{two}")
+        assert task_key("copy_content", params) != key
+
+
+class TestLedgerSkipsCompletedTasks:
+
+    def test_second_run_is_cached(self, tmp_path):
+        executor = RecordingExecutor()
+        ledger = TaskLedger(tmp_path / LEDGER_FILE)
+
+        first = executor.execute_guest_tasks(Guest(), GUEST_IP, TASKS, ledger=ledger, vm_name="cyris-desktop-1")
+        assert [r.success for r in first] == [True, True] and not any(r.cached for r in first)
+        commands = len(executor.commands)
+
+        # A new process reads the ledger from the range directory
+        ledger = TaskLedger(tmp_path / LEDGER_FILE)
+        second = executor.execute_guest_tasks(Guest(), GUEST_IP, TASKS, ledger=ledger, vm_name="cyris-desktop-1")
+        assert [(r.cached, r.success, r.task_type) for r in second] == [
+            (True, True, TaskType.ADD_ACCOUNT), (True, True, TaskType.INSTALL_PACKAGE)]
+        assert second[0].task_id == first[0].task_id == "desktop_add_account_0"
+        assert len(executor.commands) == commands
+
+        # Another VM of the same guest has its own entries
+        third = executor.execute_guest_tasks(Guest(), GUEST_IP, TASKS, ledger=ledger, vm_name="cyris-desktop-2")
+        assert not any(r.cached for r in third)
+
+        ledger.forget(["cyris-desktop-1"])
+        assert not ledger.completed("cyris-desktop-1") and len(ledger) == 2
+
+    def test_failed_tasks_are_not_recorded(self, tmp_path):
+        executor = RecordingExecutor()
+        executor.fail = True
+        ledger = TaskLedger(tmp_path / LEDGER_FILE)
+
+        results = executor.execute_guest_tasks(Guest(), GUEST_IP, TASKS[1:], ledger=ledger)
+        assert not results[0].success and len(ledger) == 0
+        assert not (tmp_path / LEDGER_FILE).exists()
+
+    def test_guest_markers_catch_replaced_vms(self, tmp_path):
+        executor = RecordingExecutor(task_markers=True)
+        ledger = TaskLedger(tmp_path / LEDGER_FILE)
+        executor.execute_guest_tasks(Guest(), GUEST_IP, TASKS, ledger=ledger, vm_name="vm")
+        assert len(executor.markers) == 2
+
+        ran = len(executor.task_commands())
+        cached = executor.execute_guest_tasks(Guest(), GUEST_IP, TASKS, ledger=ledger, vm_name="vm")
+        assert all(r.cached for r in cached) and len(executor.task_commands()) == ran
+
+        # Same VM name, fresh disk: the markers are gone, so the tasks run again
+        executor.markers.clear()
+        rerun = executor.execute_guest_tasks(Guest(), GUEST_IP, TASKS, ledger=ledger, vm_name="vm")
+        assert not any(r.cached for r in rerun) and len(executor.task_commands()) > ran
+
+
+class TestOrchestratorLedger:
+
+    def test_creation_records_and_recreate_forgets(self, tmp_path):
+        from cyris.domain.entities.guest import BaseVMType, Guest as GuestEntity, OSType
+        from cyris.domain.entities.host import Host
+        from cyris.tools.range_benchmark import FakeEndpoints, build_orchestrator
+
+        endpoints = FakeEndpoints()
+        orchestrator = build_orchestrator(endpoints, tmp_path)
+        hosts = [Host(host_id="host_1", mgmt_addr="localhost", virbr_addr="192.168.122.1", account="cyuser")]
+        guests = [GuestEntity(guest_id="desktop", basevm_type=BaseVMType.KVM, basevm_host="host_1",
+                              basevm_config_file="/images/desktop.xml", basevm_os_type=OSType.UBUNTU,
+                              tasks=TASKS)]
+
+        orchestrator.create_range("55", "Ledger", "task ledger", hosts, guests)
+        ledger_file = tmp_path / "cyber_range" / "55" / LEDGER_FILE
+        assert TaskLedger(ledger_file).completed("cyris-55-desktop")
+
+        orchestrator._cleanup_range_resources("55")
+        assert len(TaskLedger(ledger_file)) == 0
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the virt-builder template cache
+"""
+
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.infrastructure.template_cache import TemplateCache, parse_size
+
+GIB = 1024 ** 3
+
+
+class FakeRunner:
+    """Records commands and creates the file a qemu-img/virt-resize would write"""
+
+    def __init__(self, returncode=0):
+        self.returncode = returncode
+        self.commands = []
+
+    def __call__(self, cmd, description):
+        self.commands.append(cmd)
+        if self.returncode == 0 and cmd[0] == "qemu-img":
+            with open(cmd[-1] if "-b" in cmd else cmd[-2], "w") as f:
+                f.write("qcow2")
+        return SimpleNamespace(returncode=self.returncode, stdout="", stderr="failed")
+
+
+def cached(tmp_path, image="ubuntu-20.04", virtual_size=6 * GIB, expand="/dev/sda1"):
+    cache = TemplateCache(tmp_path / "templates")
+    cache.cache_dir.mkdir()
+    cache.template_path(image).write_text("template")
+    with open(cache.cache_dir / f"{image}.json", "w") as f:
+        json.dump({"image": image, "virtual_size": virtual_size, "expand": expand}, f)
+    return cache
+
+
+def test_parse_size():
+    assert parse_size("10G") == 10 * GIB
+    assert parse_size("512M") == 512 * 1024 ** 2
+    assert parse_size("1.5g") == int(1.5 * GIB)
+    assert parse_size("20GiB") == 20 * GIB
+    assert parse_size(None) is None
+    assert parse_size("big") is None
+
+
+def test_small_disk_is_an_overlay_on_the_template(tmp_path):
+    cache = cached(tmp_path)
+    run = FakeRunner()
+    output = tmp_path / "desktop.qcow2"
+
+    assert cache.create_image("ubuntu-20.04", "6G", output, run)
+
+    assert run.commands == [["qemu-img", "create", "-f", "qcow2", "-b",
+                             str(cache.template_path("ubuntu-20.04")), "-F", "qcow2", str(output)]]
+    assert output.exists()
+    assert cache.overlays("ubuntu-20.04") == [str(output.resolve())]
+
+
+def test_template_backing_overlays_is_kept(tmp_path):
+    cache = cached(tmp_path)
+    output = tmp_path / "desktop.qcow2"
+    assert cache.create_image("ubuntu-20.04", "6G", output, FakeRunner())
+    template = cache.template_path("ubuntu-20.04")
+
+    assert not cache.remove("ubuntu-20.04")
+    assert template.exists()
+
+    # Lost metadata does not replace the template under the overlay
+    (cache.cache_dir / "ubuntu-20.04.json").unlink()
+    run = FakeRunner()
+    assert cache.ensure("ubuntu-20.04", run) is None
+    assert run.commands == []
+    assert template.read_text() == "template"
+
+    output.unlink()
+    assert cache.remove("ubuntu-20.04")
+    assert not template.exists()
+
+
+def test_larger_disk_is_resized_from_the_template(tmp_path):
+    cache = cached(tmp_path)
+    run = FakeRunner()
+    output = tmp_path / "desktop.qcow2"
+
+    assert cache.create_image("ubuntu-20.04", "20G", output, run)
+
+    assert run.commands[0] == ["qemu-img", "create", "-f", "qcow2", str(output), str(20 * GIB)]
+    assert run.commands[1][:4] == ["sudo", "virt-resize", "--expand", "/dev/sda1"]
+
+
+def test_falls_back_to_virt_builder_when_template_cannot_be_used(tmp_path):
+    cache = cached(tmp_path, expand=None)
+    output = tmp_path / "desktop.qcow2"
+    # No partition to grow
+    assert not cache.create_image("ubuntu-20.04", "20G", output, FakeRunner())
+
+    # Failed overlay leaves nothing behind
+    output.write_text("partial")
+    assert not cache.create_image("ubuntu-20.04", "4G", output, FakeRunner(returncode=1))
+    assert not output.exists()
+
+    # Template that virt-builder could not fetch
+    run = FakeRunner(returncode=1)
+    assert cache.ensure("debian-12", run) is None
+    assert run.commands[0][:3] == ["sudo", "virt-builder", "debian-12"]
+    assert not list(cache.cache_dir.glob("*debian-12*.partial"))
+
+
+def test_mirror_repository_is_passed_to_virt_builder(tmp_path):
+    mirror = tmp_path / "mirror"
+    mirror.mkdir()
+    assert TemplateCache(tmp_path / "templates", mirror).source_args() == []
+
+    (mirror / "index").write_text("[ubuntu-20.04]\n")
+    args = TemplateCache(tmp_path / "templates", mirror).source_args()
+    assert args == ["--source", f"file://{mirror.resolve()}/index", "--no-check-signature"]
+
+    (mirror / "index.asc").write_text("signed")
+    assert "--no-check-signature" not in TemplateCache(tmp_path / "templates", mirror).source_args()
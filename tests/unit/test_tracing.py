@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the tracing layer and its Chrome-trace / OTLP exports
+"""
+
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.core import tracing
+from cyris.core.dag_scheduler import DagScheduler
+from cyris.core.security import SecureCommandExecutor
+from cyris.core.tracing import span, start_trace, stop_trace, traced
+
+
+@pytest.fixture
+def tracer():
+    tracer = start_trace("create_range 7", range_id="7")
+    yield tracer
+    stop_trace()
+
+
+def by_name(tracer):
+    return {s.name: s for s in tracer.spans}
+
+
+class TestSpans:
+
+    def test_noop_without_trace(self):
+        assert tracing.current_tracer() is None
+        with span("idle", "wait") as current:
+            current.set_attribute("ignored", True)
+
+        @traced("task {kind}", attributes=lambda kind: {"kind": kind})
+        def task(kind):
+            return kind
+
+        assert task("x") == "x"
+
+    def test_nesting_errors_and_decorator(self, tracer):
+        @traced("task {task_type}", "task", attributes=lambda task_type, guest: {
+            "task_type": task_type, "guest": guest})
+        def run_task(task_type, guest):
+            with span("ssh useradd", "ssh", host="10.0.0.1"):
+                time.sleep(0.01)
+            return "ok"
+
+        assert run_task("add_account", "desktop") == "ok"
+        with pytest.raises(RuntimeError):
+            with span("wait vm_ip", "wait"):
+                raise RuntimeError("no lease")
+
+        spans = by_name(tracer)
+        task, ssh = spans["task add_account"], spans["ssh useradd"]
+        assert ssh.parent_id == task.span_id
+        assert task.parent_id == tracer.root.span_id
+        assert task.attributes == {"task_type": "add_account", "guest": "desktop"}
+        assert ssh.duration_ns >= 10_000_000
+        assert spans["wait vm_ip"].error == "no lease"
+
+    def test_dag_steps_nest_across_threads(self, tracer):
+        def step(inputs):
+            with span("exec virsh", "subprocess"):
+                pass
+
+        with span("create"):
+            scheduler = DagScheduler()
+            scheduler.add("ip:a", step, resource="ip")
+            scheduler.add("ip:b", step, resource="ip")
+            scheduler.run()
+
+        spans = by_name(tracer)
+        steps = [s for s in tracer.spans if s.name.startswith("ip:")]
+        execs = [s for s in tracer.spans if s.name == "exec virsh"]
+        assert {s.parent_id for s in steps} == {spans["create"].span_id}
+        assert {s.parent_id for s in execs} == {s.span_id for s in steps}
+        assert all(s.category == "ip" for s in steps)
+
+    def test_subprocesses_are_recorded(self, tracer):
+        success, output, _ = SecureCommandExecutor().execute_command(["echo", "hi"])
+        assert success and output == "hi\n"
+
+        spans = by_name(tracer)
+        assert spans["exec echo"].attributes["exit_code"] == 0
+        spawn = spans["spawn echo"]
+        assert spawn.instant and spawn.parent_id == spans["exec echo"].span_id
+
+
+class TestExport:
+
+    def test_chrome_and_otlp_files(self, tracer, tmp_path):
+        with span("provider create_guests", "provider", guests=2):
+            with span("wait vm_ssh", "wait", vm="desktop", ready=True, attempt=1.5):
+                pass
+        tracing.event("spawn virsh", "subprocess")
+        stop_trace()
+
+        paths = tracer.export(tmp_path)
+        assert paths["chrome"].name == "trace.json"
+
+        chrome = json.loads(paths["chrome"].read_text())
+        events = {e["name"]: e for e in chrome["traceEvents"]}
+        assert events["thread_name"]["ph"] == "M"
+        provider = events["provider create_guests"]
+        assert provider["ph"] == "X" and provider["cat"] == "provider"
+        assert provider["args"] == {"guests": 2}
+        assert events["wait vm_ssh"]["ts"] >= provider["ts"]
+        assert events["spawn virsh"]["ph"] == "i"
+        assert chrome["otherData"]["range_id"] == "7"
+
+        otlp = json.loads(paths["otlp"].read_text())
+        resource_spans = otlp["resourceSpans"][0]
+        assert {"key": "range_id", "value": {"stringValue": "7"}} in resource_spans["resource"]["attributes"]
+        spans = {s["name"]: s for s in resource_spans["scopeSpans"][0]["spans"]}
+        wait = spans["wait vm_ssh"]
+        assert wait["parentSpanId"] == spans["provider create_guests"]["spanId"]
+        assert len(wait["traceId"]) == 32 and len(wait["spanId"]) == 16
+        assert int(wait["endTimeUnixNano"]) >= int(wait["startTimeUnixNano"])
+        attributes = {a["key"]: a["value"] for a in wait["attributes"]}
+        assert attributes["ready"] == {"boolValue": True}
+        assert attributes["attempt"] == {"doubleValue": 1.5}
+        assert spans["provider create_guests"]["kind"] == tracing.SPAN_KIND_CLIENT
+        assert "parentSpanId" not in spans["create_range 7"]
+
+    def test_slowest(self, tracer):
+        with span("fast"):
+            pass
+        with span("slow"):
+            time.sleep(0.02)
+        assert [s.name for s in tracer.slowest(limit=1)] == ["slow"]
@@ -91,6 +91,11 @@ class TestTunnelManager:
             gw_inside_addr="172.16.1.1"
         )
     
+    @pytest.fixture
+    def forwarder(self):
+        """模拟进程内端口转发器"""
+        return Mock()
+    
     def test_tunnel_manager_initialization(self, settings_direct_mode):
         """测试隧道管理器初始化"""
         manager = TunnelManager(settings_direct_mode)
@@ -99,11 +104,41 @@ class TestTunnelManager:
         assert len(manager.active_tunnels) == 0
     
     @patch('subprocess.run')
-    def test_create_direct_mode_tunnel(self, mock_subprocess, settings_direct_mode):
-        """测试创建直接模式隧道"""
+    def test_default_tunnels_are_detached_processes(self, mock_subprocess, settings_gateway_mode):
+        """测试默认使用独立ssh进程（CLI退出后隧道仍然存在）"""
         mock_subprocess.return_value = Mock(returncode=0, stdout="", stderr="")
         
-        manager = TunnelManager(settings_direct_mode)
+        manager = TunnelManager(settings_gateway_mode)
+        direct_id = manager.create_tunnel(TunnelConfiguration(
+            range_id=123, port=60001, target_host="192.168.123.101", target_port=22,
+            local_user="ubuntu"
+        ))
+        gateway_id = manager.create_tunnel(TunnelConfiguration(
+            range_id=123, port=60002, target_host="192.168.123.102", target_port=22,
+            local_user="ubuntu", gw_mode=True, gw_account="gateway_user",
+            gw_host="gateway.example.com"
+        ))
+        
+        direct_command = mock_subprocess.call_args_list[0][0][0]
+        assert direct_command[:2] == ['bash', '-c']
+        assert 'exec -a ct123_60001 ssh' in direct_command[2]
+        assert '-f -L 0.0.0.0:60001:192.168.123.101:22' in direct_command[2]
+        assert manager.get_tunnel_info(direct_id).process_names == ['ct123_60001']
+        assert manager.get_tunnel_info(gateway_id).process_names == ['ct123_60002_gw', 'ct123_60002']
+        assert manager.get_tunnel_info(direct_id).listen_port is None
+        
+        mock_subprocess.reset_mock()
+        assert manager.destroy_range_tunnels(123) == 2
+        kills = [str(call[0][0]) for call in mock_subprocess.call_args_list]
+        assert len(kills) == 3
+        assert any("'pkill', '-f', 'ct123_60001'" in kill for kill in kills)
+        assert any("'pkill', '-f', 'ct123_60002'" in kill for kill in kills)
+        assert any('pkill -f ct123_60002_gw' in kill for kill in kills)
+    
+    @patch('subprocess.run')
+    def test_create_direct_mode_tunnel(self, mock_subprocess, settings_direct_mode, forwarder):
+        """测试创建直接模式隧道"""
+        manager = TunnelManager(settings_direct_mode, forwarder=forwarder)
         config = TunnelConfiguration(
             range_id=123,
             port=60001,
@@ -118,21 +153,18 @@ class TestTunnelManager:
         # 验证隧道创建
         assert tunnel_id in manager.active_tunnels
         
-        # 验证执行的命令
-        expected_command = [
-            'bash', '-c',
-            "exec -a ct123_60001 ssh -o UserKnownHostsFile=/dev/null "
-            "-o StrictHostKeyChecking=no -f -L 0.0.0.0:60001:192.168.123.101:22 "
-            "ubuntu@localhost -N"
-        ]
-        mock_subprocess.assert_called_once_with(expected_command, capture_output=True, text=True)
+        # 直接模式在进程内转发，不再启动ssh进程
+        forwarder.open.assert_called_once_with(
+            tunnel_id, 60001, "192.168.123.101", 22, range_id=123
+        )
+        mock_subprocess.assert_not_called()
     
     @patch('subprocess.run')
-    def test_create_gateway_mode_tunnel(self, mock_subprocess, settings_gateway_mode):
+    def test_create_gateway_mode_tunnel(self, mock_subprocess, settings_gateway_mode, forwarder):
         """测试创建网关模式隧道"""
         mock_subprocess.return_value = Mock(returncode=0, stdout="", stderr="")
         
-        manager = TunnelManager(settings_gateway_mode)
+        manager = TunnelManager(settings_gateway_mode, forwarder=forwarder)
         config = TunnelConfiguration(
             range_id=123,
             port=60001,
@@ -149,8 +181,9 @@ class TestTunnelManager:
         # 验证隧道创建
         assert tunnel_id in manager.active_tunnels
         
-        # 验证执行了两个命令（网关隧道 + 本地隧道）
-        assert mock_subprocess.call_count == 2
+        # 网关端仍使用ssh，本地端由转发器监听
+        assert mock_subprocess.call_count == 1
+        forwarder.open.assert_called_once()
         
         # 验证网关隧道命令
         gateway_command = [
@@ -161,24 +194,13 @@ class TestTunnelManager:
             '-o StrictHostKeyChecking=no -f -L 0.0.0.0:60001:localhost:60001 '
             'gateway_user@localhost -N\''
         ]
-        
-        # 验证本地隧道命令
-        local_command = [
-            'bash', '-c',
-            "exec -a ct123_60001 ssh -o UserKnownHostsFile=/dev/null "
-            "-o StrictHostKeyChecking=no -f -L 0.0.0.0:60001:192.168.123.101:22 "
-            "ubuntu@localhost -N"
-        ]
-        
-        calls = mock_subprocess.call_args_list
-        assert len(calls) == 2
+        assert 'gateway_user@gateway.example.com' in mock_subprocess.call_args[0][0]
     
-    @patch('subprocess.run')
-    def test_tunnel_creation_failure(self, mock_subprocess, settings_direct_mode):
+    def test_tunnel_creation_failure(self, settings_direct_mode, forwarder):
         """测试隧道创建失败"""
-        mock_subprocess.return_value = Mock(returncode=1, stdout="", stderr="Connection failed")
+        forwarder.open.side_effect = TunnelError("Address already in use")
         
-        manager = TunnelManager(settings_direct_mode)
+        manager = TunnelManager(settings_direct_mode, forwarder=forwarder)
         config = TunnelConfiguration(
             range_id=123,
             port=60001,
@@ -190,14 +212,30 @@ class TestTunnelManager:
         
         with pytest.raises(TunnelError, match="Failed to create tunnel"):
             manager.create_tunnel(config)
+        assert manager.active_tunnels == {}
     
     @patch('subprocess.run')
-    def test_destroy_tunnel(self, mock_subprocess, settings_direct_mode):
-        """测试销毁隧道"""
-        # 模拟创建隧道
+    def test_gateway_hop_removed_when_local_listener_fails(
+        self, mock_subprocess, settings_gateway_mode, forwarder
+    ):
+        """测试本地监听失败时清理网关端隧道"""
         mock_subprocess.return_value = Mock(returncode=0, stdout="", stderr="")
+        forwarder.open.side_effect = TunnelError("Address already in use")
         
-        manager = TunnelManager(settings_direct_mode)
+        manager = TunnelManager(settings_gateway_mode, forwarder=forwarder)
+        config = TunnelConfiguration(
+            range_id=123, port=60001, target_host="192.168.123.101", target_port=22,
+            local_user="ubuntu", gw_mode=True, gw_account="gateway_user",
+            gw_host="gateway.example.com"
+        )
+        
+        with pytest.raises(TunnelError):
+            manager.create_tunnel(config)
+        assert 'pkill -f ct123_60001_gw' in mock_subprocess.call_args_list[-1][0][0]
+    
+    def test_destroy_tunnel(self, settings_direct_mode, forwarder):
+        """测试销毁隧道"""
+        manager = TunnelManager(settings_direct_mode, forwarder=forwarder)
         config = TunnelConfiguration(
             range_id=123,
             port=60001,
@@ -216,17 +254,15 @@ class TestTunnelManager:
         # 验证隧道已移除
         assert tunnel_id not in manager.active_tunnels
         
-        # 验证执行了pkill命令
-        destroy_calls = [call for call in mock_subprocess.call_args_list 
-                        if 'pkill' in str(call)]
-        assert len(destroy_calls) > 0
+        # 验证关闭了本地监听
+        forwarder.close.assert_called_once_with(tunnel_id)
     
     @patch('subprocess.run')
-    def test_destroy_gateway_mode_tunnel(self, mock_subprocess, settings_gateway_mode):
+    def test_destroy_gateway_mode_tunnel(self, mock_subprocess, settings_gateway_mode, forwarder):
         """测试销毁网关模式隧道"""
         mock_subprocess.return_value = Mock(returncode=0, stdout="", stderr="")
         
-        manager = TunnelManager(settings_gateway_mode)
+        manager = TunnelManager(settings_gateway_mode, forwarder=forwarder)
         config = TunnelConfiguration(
             range_id=123,
             port=60001,
@@ -244,14 +280,50 @@ class TestTunnelManager:
         # 验证隧道已移除
         assert tunnel_id not in manager.active_tunnels
         
-        # 验证执行了网关和本地的pkill命令
+        # 验证执行了网关端的pkill命令并关闭了本地监听
         destroy_calls = [call for call in mock_subprocess.call_args_list 
                         if 'pkill' in str(call)]
-        assert len(destroy_calls) >= 2  # 至少有网关和本地两个销毁命令
+        assert len(destroy_calls) == 1
+        forwarder.close.assert_called_once_with(tunnel_id)
+    
+    def test_destroy_range_tunnels(self, settings_direct_mode, forwarder):
+        """测试按靶场批量销毁隧道"""
+        manager = TunnelManager(settings_direct_mode, forwarder=forwarder)
+        for range_id, port in ((123, 60001), (123, 60002), (456, 60003)):
+            manager.create_tunnel(TunnelConfiguration(
+                range_id=range_id, port=port, target_host="192.168.123.101",
+                target_port=22, local_user="ubuntu"
+            ))
+        
+        forwarder.close_range.return_value = 2
+        assert manager.destroy_range_tunnels(123) == 2
+        forwarder.close_range.assert_called_once_with(123)
+        assert [t['range_id'] for t in manager.list_active_tunnels()] == [456]
+        forwarder.close_range.return_value = 0
+        assert manager.destroy_range_tunnels(123) == 0
+    
+    def test_destroy_range_tunnels_opened_by_another_process(self, settings_direct_mode, forwarder):
+        """测试销毁由之前的CLI进程在守护进程中创建的隧道"""
+        forwarder.close_range.return_value = 3
+        manager = TunnelManager(settings_direct_mode, forwarder=forwarder)
+        
+        assert manager.destroy_range_tunnels(123) == 3
+        forwarder.close_range.assert_called_once_with(123)
     
-    def test_list_active_tunnels(self, settings_direct_mode):
+    def test_records_bound_listen_port(self, settings_direct_mode, forwarder):
+        """测试记录转发器实际绑定的端口（端口0时由系统分配）"""
+        forwarder.open.return_value = 40123
+        manager = TunnelManager(settings_direct_mode, forwarder=forwarder)
+        tunnel_id = manager.create_tunnel(TunnelConfiguration(
+            range_id=123, port=0, target_host="192.168.123.101", target_port=22,
+            local_user="ubuntu"
+        ))
+        
+        assert manager.get_tunnel_info(tunnel_id).listen_port == 40123
+    
+    def test_list_active_tunnels(self, settings_direct_mode, forwarder):
         """测试列出活跃隧道"""
-        manager = TunnelManager(settings_direct_mode)
+        manager = TunnelManager(settings_direct_mode, forwarder=forwarder)
         
         # 初始状态无隧道
         assert manager.list_active_tunnels() == []
@@ -266,9 +338,7 @@ class TestTunnelManager:
             gw_mode=False
         )
         
-        with patch('subprocess.run') as mock_subprocess:
-            mock_subprocess.return_value = Mock(returncode=0, stdout="", stderr="")
-            tunnel_id = manager.create_tunnel(config)
+        tunnel_id = manager.create_tunnel(config)
         
         # 验证隧道在列表中
         active_tunnels = manager.list_active_tunnels()
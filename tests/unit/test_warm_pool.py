@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the warm pool of standby VMs
+"""
+
+import os
+import sys
+import threading
+import xml.etree.ElementTree as ET
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from cyris.infrastructure.providers.libvirt_teardown import VIR_ERR_NO_DOMAIN
+from cyris.infrastructure.providers.warm_pool import (
+    MODE_SAVED, POOL_INDEX, PoolMember, WarmPool, pool_key
+)
+
+
+class FakeLibvirtError(Exception):
+    def __init__(self, message, code=1):
+        super().__init__(message)
+        self.code = code
+
+    def get_error_code(self):
+        return self.code
+
+
+class FakeDomain:
+    def __init__(self, conn, name):
+        self.conn = conn
+        self._name = name
+        self.state = "running"
+        self.links = []
+
+    def name(self):
+        return self._name
+
+    def isActive(self):
+        return self.state != "shutoff"
+
+    def destroy(self):
+        self.state = "shutoff"
+
+    def undefineFlags(self, flags):
+        del self.conn.domains[self._name]
+
+    def XMLDesc(self, flags):
+        return (f"<domain><name>{self._name}</name><devices>"
+                "<interface type='bridge'><mac address='52:54:00:00:00:01'/></interface>"
+                "</devices></domain>")
+
+    def rename(self, name, flags):
+        assert self.state == "shutoff", "libvirt renames inactive domains only"
+        self.conn.domains[name] = self.conn.domains.pop(self._name)
+        self._name = name
+
+    def save(self, path):
+        with open(path, "w") as f:
+            f.write(self.XMLDesc(0))
+        self.state = "shutoff"
+
+    def suspend(self):
+        self.state = "paused"
+
+    def resume(self):
+        self.state = "running"
+
+    def updateDeviceFlags(self, xml, flags):
+        self.links.append(ET.fromstring(xml).find("link").get("state"))
+
+
+class FakeConnection:
+    def __init__(self):
+        self.domains = {}
+        self.fail_restore = False
+        self._lock = threading.Lock()
+
+    def define(self, name):
+        with self._lock:
+            self.domains[name] = FakeDomain(self, name)
+
+    def lookupByName(self, name):
+        if name not in self.domains:
+            raise FakeLibvirtError(f"Domain not found: {name}", VIR_ERR_NO_DOMAIN)
+        return self.domains[name]
+
+    def saveImageGetXMLDesc(self, path, flags):
+        with open(path) as f:
+            return f.read()
+
+    def restoreFlags(self, path, xml, flags):
+        if self.fail_restore:
+            raise FakeLibvirtError("saved image is corrupt")
+        self.lookupByName(ET.fromstring(xml).find("name").text).state = "running"
+
+    def domainEventRegisterAny(self, dom, event_id, callback, opaque):
+        raise FakeLibvirtError("no event loop")
+
+
+class Guest:
+    guest_id = "desktop"
+    image_name = "ubuntu-20.04"
+    vcpus = 1
+    memory = 1024
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "desktop-ubuntu-20.04.qcow2"
+    path.write_bytes(b"qcow2 image")
+    return path
+
+
+def make_pool(tmp_path, conn, **kwargs):
+    booted = []
+
+    def boot(guest, vm_name, disk_path):
+        assert os.path.exists(disk_path)
+        booted.append(vm_name)
+        conn.define(vm_name)
+        return True
+
+    pool = WarmPool(tmp_path / "pool", lambda: conn, boot, link_flap=0.001, **kwargs)
+    return pool, booted
+
+
+class TestWarmPool:
+
+    def test_saved_members_are_claimed_under_the_guest_name(self, tmp_path, image):
+        conn = FakeConnection()
+        pool, booted = make_pool(tmp_path, conn, size=2)
+        key = pool_key(image, Guest())
+
+        assert pool.fill(key, Guest(), str(image)) == 2
+        assert all(conn.domains[name].state == "shutoff" for name in booted)
+        assert all(m.state_path and os.path.exists(m.state_path) for m in pool.members())
+
+        claimed = pool.claim(key, "cyris-42-desktop")
+
+        assert claimed.vm_name == "cyris-42-desktop" and claimed.pool_name == booted[0]
+        domain = conn.domains["cyris-42-desktop"]
+        assert domain.state == "running" and domain.links == ["down", "up"]
+        assert booted[0] not in conn.domains and os.path.exists(claimed.disk_path)
+        assert [m.name for m in pool.members()] == [booted[1]]
+        assert pool.claim("other-key", "cyris-42-webserver") is None
+
+        # Refilling replaces the claimed member only
+        pool.refill(key, Guest(), str(image)).join()
+        assert len(pool.members()) == 2 and len(booted) == 3
+
+    def test_paused_members_are_never_claimed(self, tmp_path, image):
+        conn = FakeConnection()
+        pool, booted = make_pool(tmp_path, conn, size=1)
+        key = pool_key(image, Guest())
+        with pytest.raises(ValueError):
+            make_pool(tmp_path, conn, size=1, mode="paused")
+
+        # Left in the index by a release that let members wait paused
+        leftover = PoolMember(name="cyris-pool-old", key=key, image_path=str(image),
+                              disk_path=str(tmp_path / "old.qcow2"), memory_mb=1024, mode="paused")
+        with pool._index() as members:
+            members.append(leftover)
+        assert pool.claim(key, "cyris-42-desktop") is None
+
+        pool.fill(key, Guest(), str(image))
+
+        assert [m.mode for m in pool.members()] == [MODE_SAVED]
+        claimed = pool.claim(key, "cyris-42-desktop")
+        assert claimed.vm_name == "cyris-42-desktop" and claimed.pool_name == booted[0]
+
+    def test_sizes_and_memory_budget(self, tmp_path, image):
+        conn = FakeConnection()
+        pool, booted = make_pool(tmp_path, conn, size=1, sizes={"ubuntu-20.04": 5}, memory_budget_mb=3000)
+
+        pool.fill(pool_key(image, Guest()), Guest(), str(image))
+
+        assert pool.target("ubuntu-20.04") == 5 and pool.target("kali") == 1
+        status = pool.status()
+        assert len(booted) == 2 and status["memory_mb"] == 2048 and status["mode"] == MODE_SAVED
+
+    def test_rebuilt_image_discards_stale_members(self, tmp_path, image):
+        conn = FakeConnection()
+        pool, booted = make_pool(tmp_path, conn, size=1)
+        old_key = pool_key(image, Guest())
+        pool.fill(old_key, Guest(), str(image))
+        stale = pool.members()[0]
+
+        image.write_bytes(b"rebuilt qcow2 image")
+        new_key = pool_key(image, Guest())
+        assert new_key != old_key
+        pool.fill(new_key, Guest(), str(image))
+
+        assert [m.key for m in pool.members()] == [new_key]
+        assert stale.name not in conn.domains
+        assert not any(os.path.exists(path) for path in stale.files())
+
+    def test_failed_claim_discards_the_member(self, tmp_path, image):
+        conn = FakeConnection()
+        pool, booted = make_pool(tmp_path, conn, size=1)
+        key = pool_key(image, Guest())
+        pool.fill(key, Guest(), str(image))
+        member = pool.members()[0]
+        conn.fail_restore = True
+
+        assert pool.claim(key, "cyris-42-desktop") is None
+        assert not conn.domains and not os.path.exists(member.disk_path)
+        assert pool.members() == []
+
+    def test_drain_removes_members_and_files(self, tmp_path, image):
+        conn = FakeConnection()
+        pool, booted = make_pool(tmp_path, conn, size=3)
+        pool.fill(pool_key(image, Guest()), Guest(), str(image))
+
+        report = pool.drain()
+
+        assert report.succeeded and not conn.domains
+        assert sorted(os.listdir(tmp_path / "pool")) == [POOL_INDEX, "pool.lock"]